@@ -161,6 +161,7 @@ from galaxy.util import (
     StructuredExecutionTimer,
 )
 from galaxy.util.task import IntervalTask
+from galaxy.util.template import compiled_template_cache
 from galaxy.util.tool_shed import tool_shed_registry
 from galaxy.visualization.data_providers.registry import DataProviderRegistry
 from galaxy.visualization.genomes import Genomes
@@ -590,6 +591,7 @@ class GalaxyManagerApplication(MinimalManagerApp, MinimalGalaxyApplication, Inst
         )
         # Initialize the job management configuration
         self.job_config = self._register_singleton(jobs.JobConfiguration)
+        compiled_template_cache.resize(self.config.cheetah_template_cache_size)
 
         # Setup infrastructure for short term storage manager.
         short_term_storage_config_kwds: Dict[str, Any] = {}
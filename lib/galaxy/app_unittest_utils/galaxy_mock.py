@@ -339,6 +339,12 @@ class MockTrans:
     def check_csrf_token(self, payload):
         pass
 
+    def get_current_user_roles(self):
+        return self.user.all_roles() if self.user else []
+
+    def get_dataset_permission_resolver(self):
+        return self.app.security_agent.dataset_permission_resolver(self.get_current_user_roles())
+
     def handle_user_login(self, user):
         pass
 
@@ -237,6 +237,7 @@ def setup_periodic_tasks(config, celery_app):
 
     beat_schedule: Dict[str, Dict[str, Any]] = {}
     schedule_task("prune_history_audit_table", config.history_audit_table_prune_interval)
+    schedule_task("update_job_rollups", config.job_rollup_update_interval)
     schedule_task("cleanup_short_term_storage", config.short_term_storage_cleanup_interval)
 
     if config.enable_notification_system:
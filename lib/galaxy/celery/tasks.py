@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import (
     Any,
     Callable,
+    List,
     Optional,
 )
 
@@ -36,6 +37,7 @@ from galaxy.managers.tool_data import ToolDataImportManager
 from galaxy.metadata.set_metadata import set_metadata_portable
 from galaxy.model import (
     Job,
+    job_rollups,
     User,
 )
 from galaxy.model.base import transaction
@@ -63,7 +65,10 @@ from galaxy.short_term_storage import ShortTermStorageMonitor
 from galaxy.structured_app import MinimalManagerApp
 from galaxy.tools import create_tool_from_representation
 from galaxy.tools.data_fetch import do_fetch
-from galaxy.util import galaxy_directory
+from galaxy.util import (
+    chunk_iterable,
+    galaxy_directory,
+)
 from galaxy.util.custom_logging import get_logger
 
 log = get_logger(__name__)
@@ -101,6 +106,12 @@ def purge_hda(hda_manager: HDAManager, hda_id: int, task_user_id: Optional[int]
     hda_manager._purge(hda)
 
 
+@galaxy_task(ignore_result=True, action="purge history datasets")
+def purge_hdas(hda_manager: HDAManager, hda_ids: List[int], task_user_id: Optional[int] = None):
+    hdas = [hda for chunk in chunk_iterable(hda_ids) for hda in hda_manager.by_ids(chunk)]
+    hda_manager._purge_many(hdas)
+
+
 @galaxy_task(ignore_result=True, action="completely removes a set of datasets from the object_store")
 def purge_datasets(
     dataset_manager: DatasetManager, request: PurgeDatasetsTaskRequest, task_user_id: Optional[int] = None
@@ -154,7 +165,7 @@ def change_datatype(
         return
     if datatype == "auto":
         path = dataset_instance.dataset.get_file_name()
-        datatype = sniff.guess_ext(path, datatypes_registry.sniff_order)
+        datatype = sniff.guess_ext(path, datatypes_registry.sniffer_index)
     datatypes_registry.change_datatype(dataset_instance, datatype)
     with transaction(sa_session):
         sa_session.commit()
@@ -472,6 +483,13 @@ def prune_history_audit_table(sa_session: galaxy_scoped_session):
     model.HistoryAudit.prune(sa_session)
 
 
+@galaxy_task(action="update job statistics rollups")
+def update_job_rollups(sa_session: galaxy_scoped_session):
+    """Include recent job updates in the daily job statistics rollups."""
+    with sa_session() as session, session.begin():
+        job_rollups.update_job_rollups(session.connection())
+
+
 @galaxy_task(action="clean up short term storage")
 def cleanup_short_term_storage(storage_monitor: ShortTermStorageMonitor):
     """Cleanup short term storage."""
@@ -10,6 +10,7 @@ from galaxy.datatypes.protocols import DatasetProtocol
 from galaxy.datatypes.sniff import (
     build_sniff_from_prefix,
     FilePrefix,
+    sniff_requires_tarfile,
 )
 from galaxy.util import nice_size
 
@@ -65,6 +66,7 @@ class Augustus(CompressedArchive):
         except Exception:
             return f"Augustus model ({nice_size(dataset.get_size())})"
 
+    @sniff_requires_tarfile
     def sniff(self, filename: str) -> bool:
         """
         Augustus archives always contain the same files
@@ -78,6 +78,9 @@ from galaxy.datatypes.protocols import (
 from galaxy.datatypes.sniff import (
     build_sniff_from_prefix,
     FilePrefix,
+    sniff_leading_bytes,
+    sniff_requires_tarfile,
+    tar_member_names,
 )
 from galaxy.datatypes.text import Html
 from galaxy.util import (
@@ -296,6 +299,7 @@ class Meryldb(CompressedArchive):
 
     file_ext = "meryldb"
 
+    @sniff_requires_tarfile
     def sniff(self, filename: str) -> bool:
         """
         Try to guess if the file is a Cel file.
@@ -310,12 +314,11 @@ class Meryldb(CompressedArchive):
         """
         try:
             if filename and tarfile.is_tarfile(filename):
-                with tarfile.open(filename, "r") as temptar:
-                    _tar_content = temptar.getnames()
-                    # 64 data files ad 64 indices + 2 folders
-                    if len(_tar_content) == 130:
-                        if len([_ for _ in _tar_content if _.endswith(".merylIndex")]) == 64:
-                            return True
+                _tar_content = tar_member_names(filename)
+                # 64 data files ad 64 indices + 2 folders
+                if len(_tar_content) == 130:
+                    if len([_ for _ in _tar_content if _.endswith(".merylIndex")]) == 64:
+                        return True
         except Exception as e:
             log.warning("%s, sniff Exception: %s", self, e)
         return False
@@ -326,6 +329,7 @@ class Visium(CompressedArchive):
 
     file_ext = "visium.tar.gz"
 
+    @sniff_requires_tarfile
     def sniff(self, filename: str) -> bool:
         """
         Check data structure:
@@ -334,11 +338,10 @@ class Visium(CompressedArchive):
         """
         try:
             if filename and tarfile.is_tarfile(filename):
-                with tarfile.open(filename, "r") as temptar:
-                    _tar_content = temptar.getnames()
-                    if "spatial" in _tar_content:
-                        if len([_ for _ in _tar_content if _.endswith("matrix.h5")]) == 2:
-                            return True
+                _tar_content = tar_member_names(filename)
+                if "spatial" in _tar_content:
+                    if len([_ for _ in _tar_content if _.endswith("matrix.h5")]) == 2:
+                        return True
         except Exception as e:
             log.warning("%s, sniff Exception: %s", self, e)
         return False
@@ -353,6 +356,7 @@ class Bref3(Binary):
         super().__init__(**kwd)
         self._magic = binascii.unhexlify("7a8874f400156272")
 
+    @sniff_leading_bytes("_magic")
     def sniff_prefix(self, file_prefix: FilePrefix) -> bool:
         return file_prefix.startswith_bytes(self._magic)
 
@@ -1161,6 +1165,7 @@ class H5(Binary):
         super().__init__(**kwd)
         self._magic = binascii.unhexlify("894844460d0a1a0a")
 
+    @sniff_leading_bytes("_magic")
     def sniff(self, filename: str) -> bool:
         # The first 8 bytes of any hdf5 file are 0x894844460d0a1a0a
         try:
@@ -2270,6 +2275,7 @@ class Sff(Binary):
     edam_data = "data_0924"
     file_ext = "sff"
 
+    @sniff_leading_bytes(b".sff")
     def sniff_prefix(self, file_prefix: FilePrefix) -> bool:
         # The first 4 bytes of any sff file is '.sff', and the file is binary. For details
         # about the format, see http://www.ncbi.nlm.nih.gov/Traces/trace.cgi?cmd=show&f=formats&m=doc&s=format
@@ -3122,6 +3128,7 @@ class Sra(Binary):
 
     file_ext = "sra"
 
+    @sniff_leading_bytes(b"NCBI.sra")
     def sniff_prefix(self, file_prefix: FilePrefix) -> bool:
         """The first 8 bytes of any NCBI sra file is 'NCBI.sra', and the file is binary.
         For details about the format, see http://www.ncbi.nlm.nih.gov/books/n/helpsra/SRA_Overview_BK/#SRA_Overview_BK.4_SRA_Data_Structure
@@ -3187,6 +3194,7 @@ class RData(CompressedArchive):
         finally:
             fh.close()
 
+    @sniff_leading_bytes("VERSION_2_PREFIX", "VERSION_3_PREFIX")
     def sniff_prefix(self, file_prefix: FilePrefix) -> bool:
         return file_prefix.startswith_bytes((self.VERSION_2_PREFIX, self.VERSION_3_PREFIX))
 
@@ -3519,10 +3527,10 @@ class PostgresqlArchive(CompressedArchive):
         except Exception as e:
             log.warning("%s, set_meta Exception: %s", self, util.unicodify(e))
 
+    @sniff_requires_tarfile
     def sniff(self, filename: str) -> bool:
         if filename and tarfile.is_tarfile(filename):
-            with tarfile.open(filename, "r") as temptar:
-                return "postgresql/db/PG_VERSION" in temptar.getnames()
+            return "postgresql/db/PG_VERSION" in tar_member_names(filename)
         return False
 
     def set_peek(self, dataset: DatasetProtocol, **kwd) -> None:
@@ -3587,10 +3595,10 @@ class MongoDBArchive(CompressedArchive):
         except Exception as e:
             log.warning("%s CompressedArchive set_meta Exception: %s", self, e)
 
+    @sniff_requires_tarfile
     def sniff(self, filename: str) -> bool:
         if filename and tarfile.is_tarfile(filename):
-            with tarfile.open(filename, "r") as temptar:
-                return "mongo_db/_mdb_catalog.wt" in temptar.getnames()
+            return "mongo_db/_mdb_catalog.wt" in tar_member_names(filename)
         return False
 
     def set_peek(self, dataset: DatasetProtocol, **kwd) -> None:
@@ -3648,6 +3656,7 @@ class Fast5Archive(CompressedArchive):
         except Exception as e:
             log.warning("%s, set_meta Exception: %s", self, e)
 
+    @sniff_requires_tarfile
     def sniff(self, filename: str) -> bool:
         try:
             if filename and tarfile.is_tarfile(filename):
@@ -3867,6 +3876,7 @@ class NetCDF(Binary):
         except Exception:
             return f"Binary netCDF file ({nice_size(dataset.get_size())})"
 
+    @sniff_leading_bytes(b"CDF")
     def sniff_prefix(self, file_prefix: FilePrefix) -> bool:
         return file_prefix.startswith_bytes(b"CDF")
 
@@ -3996,6 +4006,7 @@ class DAA(Binary):
         super().__init__(**kwd)
         self._magic = binascii.unhexlify("6be33e6d47530e3c")
 
+    @sniff_leading_bytes("_magic")
     def sniff_prefix(self, file_prefix: FilePrefix) -> bool:
         # The first 8 bytes of any daa file are 0x3c0e53476d3ee36b
         return file_prefix.startswith_bytes(self._magic)
@@ -4021,6 +4032,7 @@ class RMA6(Binary):
         super().__init__(**kwd)
         self._magic = binascii.unhexlify("000003f600000006")
 
+    @sniff_leading_bytes("_magic")
     def sniff_prefix(self, file_prefix: FilePrefix) -> bool:
         return file_prefix.startswith_bytes(self._magic)
 
@@ -4045,6 +4057,7 @@ class DMND(Binary):
         super().__init__(**kwd)
         self._magic = binascii.unhexlify("6d18ee15a4f84a02")
 
+    @sniff_leading_bytes("_magic")
     def sniff_prefix(self, file_prefix: FilePrefix) -> bool:
         # The first 8 bytes of any dmnd file are 0x24af8a415ee186d
         return file_prefix.startswith_bytes(self._magic)
@@ -4100,6 +4113,7 @@ class Parquet(Binary):
         super().__init__(**kwd)
         self._magic = b"PAR1"  # Defined at https://parquet.apache.org/documentation/latest/
 
+    @sniff_leading_bytes("_magic")
     def sniff_prefix(self, file_prefix: FilePrefix) -> bool:
         return file_prefix.startswith_bytes(self._magic)
 
@@ -4124,10 +4138,10 @@ class BafTar(CompressedArchive):
     def get_signature_file(self) -> str:
         return "analysis.baf"
 
+    @sniff_requires_tarfile
     def sniff(self, filename: str) -> bool:
         if tarfile.is_tarfile(filename):
-            with tarfile.open(filename) as rawtar:
-                return self.get_signature_file() in [os.path.basename(f).lower() for f in rawtar.getnames()]
+            return self.get_signature_file() in [os.path.basename(f).lower() for f in tar_member_names(filename)]
         return False
 
     def get_type(self) -> str:
@@ -4214,10 +4228,10 @@ class WiffTar(BafTar):
 
     file_ext = "wiff.tar"
 
+    @sniff_requires_tarfile
     def sniff(self, filename: str) -> bool:
         if tarfile.is_tarfile(filename):
-            with tarfile.open(filename) as rawtar:
-                return ".wiff" in [os.path.splitext(os.path.basename(f).lower())[1] for f in rawtar.getnames()]
+            return ".wiff" in [os.path.splitext(os.path.basename(f).lower())[1] for f in tar_member_names(filename)]
         return False
 
     def get_type(self) -> str:
@@ -4242,10 +4256,10 @@ class Wiff2Tar(BafTar):
 
     file_ext = "wiff2.tar"
 
+    @sniff_requires_tarfile
     def sniff(self, filename: str) -> bool:
         if tarfile.is_tarfile(filename):
-            with tarfile.open(filename) as rawtar:
-                return ".wiff2" in [os.path.splitext(os.path.basename(f).lower())[1] for f in rawtar.getnames()]
+            return ".wiff2" in [os.path.splitext(os.path.basename(f).lower())[1] for f in tar_member_names(filename)]
         return False
 
     def get_type(self) -> str:
@@ -4266,6 +4280,7 @@ class Pretext(Binary):
 
     file_ext = "pretext"
 
+    @sniff_leading_bytes(b"pstm")
     def sniff_prefix(self, file_prefix: FilePrefix) -> bool:
         # The first 4 bytes of any pretext file is 'pstm', and the rest of the
         # file contains binary data.
@@ -4632,6 +4647,7 @@ class Numpy(Binary):
         except Exception as e:
             log.warning("%s, set_meta Exception: %s", self, e)
 
+    @sniff_leading_bytes(b"\x93NUMPY")
     def sniff_prefix(self, file_prefix: FilePrefix) -> bool:
         # The first 6 bytes of any numpy file is '\x93NUMPY', with following bytes for version
         # number of file formats, and info about header data. The rest of the file contains binary data.
@@ -187,6 +187,29 @@ def _get_file_size(data):
     return file_size
 
 
+def _dataset_exists(data) -> bool:
+    dataset = getattr(data, "dataset", None)
+    if dataset is not None and dataset.object_store and not dataset.external_filename and not dataset.purged:
+        # avoid get_file_name(), that would pull the whole dataset into the object store cache
+        return dataset.object_store.exists(dataset)
+    return os.path.exists(data.get_file_name())
+
+
+def open_dataset_contents(
+    data: HasFileName, mode: str = "r", compressed_formats: Optional[List[str]] = None
+) -> FileObjType:
+    """Open the contents of ``data`` for reading a bounded part of it.
+
+    Datasets exposing ``open_data`` are read through the object store, which only
+    fetches the regions read from remote storage where supported. Compressed
+    contents are decompressed as with :func:`compression_utils.get_fileobj`.
+    """
+    open_data = getattr(data, "open_data", None)
+    if open_data is None:
+        return compression_utils.get_fileobj(data.get_file_name(), mode, compressed_formats)
+    return compression_utils.get_fileobj_from_stream(open_data(), mode, compressed_formats)
+
+
 @p_dataproviders.decorators.has_dataproviders
 class Data(metaclass=DataMeta):
     """
@@ -484,7 +507,7 @@ class Data(metaclass=DataMeta):
 
     def _serve_binary_file_contents_as_text(self, trans, data, headers, file_size, max_peek_size):
         headers["content-type"] = "text/html"
-        with open(data.get_file_name(), "rb") as fh:
+        with open_dataset_contents(data, "rb", compressed_formats=[]) as fh:
             return (
                 trans.fill_template_mako(
                     "/dataset/binary_file.mako",
@@ -503,7 +526,7 @@ class Data(metaclass=DataMeta):
         if not preview or isinstance(data.datatype, images.Image) or file_size < max_peek_size:
             return self._yield_user_file_content(trans, data, data.get_file_name(), headers), headers
 
-        with compression_utils.get_fileobj(data.get_file_name(), "rb") as fh:
+        with open_dataset_contents(data, "rb") as fh:
             # preview large text file
             headers["content-type"] = "text/html"
             return (
@@ -585,7 +608,7 @@ class Data(metaclass=DataMeta):
         downloading = to_ext is not None
         file_size = _get_file_size(dataset)
 
-        if not os.path.exists(dataset.get_file_name()):
+        if not _dataset_exists(dataset):
             raise ObjectNotFound(f"File Not Found ({dataset.get_file_name()}).")
 
         if downloading:
@@ -622,7 +645,7 @@ class Data(metaclass=DataMeta):
         if self.is_binary:
             result = "*cannot display binary content*\n"
         else:
-            with open(dataset_instance.get_file_name()) as f:
+            with open_dataset_contents(dataset_instance, compressed_formats=[]) as f:
                 contents = f.read(DEFAULT_MAX_PEEK_SIZE)
             result = literal_via_fence(contents)
             if len(contents) == DEFAULT_MAX_PEEK_SIZE:
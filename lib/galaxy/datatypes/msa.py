@@ -19,6 +19,7 @@ from galaxy.datatypes.protocols import DatasetProtocol
 from galaxy.datatypes.sniff import (
     build_sniff_from_prefix,
     FilePrefix,
+    sniff_leading_bytes,
 )
 from galaxy.datatypes.util import generic_util
 from galaxy.util import (
@@ -118,6 +119,7 @@ class Hmmer2(Hmmer):
     edam_format = "format_3328"
     file_ext = "hmm2"
 
+    @sniff_leading_bytes(b"HMMER2.0")
     def sniff_prefix(self, file_prefix: FilePrefix) -> bool:
         """HMMER2 files start with HMMER2.0"""
         return file_prefix.startswith("HMMER2.0")
@@ -127,6 +129,7 @@ class Hmmer3(Hmmer):
     edam_format = "format_3329"
     file_ext = "hmm3"
 
+    @sniff_leading_bytes(b"HMMER3/f")
     def sniff_prefix(self, file_prefix: FilePrefix) -> bool:
         """HMMER3 files start with HMMER3/f"""
         return file_prefix.startswith("HMMER3/f")
@@ -283,6 +286,7 @@ class MauveXmfa(Text):
             dataset.peek = "file does not exist"
             dataset.blurb = "file purged from disc"
 
+    @sniff_leading_bytes(b"#FormatVersion Mauve1")
     def sniff_prefix(self, file_prefix: FilePrefix) -> bool:
         return file_prefix.startswith("#FormatVersion Mauve1")
 
@@ -40,6 +40,7 @@ from . import (
     xml,
 )
 from .display_applications.application import DisplayApplication
+from .sniff import SnifferIndex
 
 if TYPE_CHECKING:
     from galaxy.datatypes.data import Data
@@ -76,6 +77,7 @@ class Registry:
         self.available_tracks = []
         self.set_external_metadata_tool = None
         self.sniff_order = []
+        self._sniffer_index: Optional[SnifferIndex] = None
         self.upload_file_formats = []
         # Datatype elements defined in local datatypes_conf.xml that contain display applications.
         self.display_app_containers = []
@@ -427,6 +429,8 @@ class Registry:
                     self.sniff_order.append(datatype)
 
         append_to_sniff_order()
+        # Index the final sniff order up front, rather than on the first upload
+        self._sniffer_index = SnifferIndex(self.sniff_order)
 
     def _load_build_sites(self, root):
         def load_build_site(build_site_config):
@@ -482,6 +486,13 @@ class Registry:
     def get_display_sites(self, site_type):
         return self.display_sites.get(site_type, [])
 
+    @property
+    def sniffer_index(self) -> SnifferIndex:
+        """The sniff order indexed for :func:`galaxy.datatypes.sniff.guess_ext`, rebuilt when the sniff order changes."""
+        if self._sniffer_index is None or not self._sniffer_index.indexes(self.sniff_order):
+            self._sniffer_index = SnifferIndex(self.sniff_order)
+        return self._sniffer_index
+
     def load_datatype_sniffers(self, root, override=False, compressed_sniffers=None):
         """
         Process the sniffers element from a parsed a datatypes XML file located at root_dir/config (if processing the Galaxy
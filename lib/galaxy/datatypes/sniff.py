@@ -10,15 +10,25 @@ import os
 import re
 import shutil
 import struct
+import tarfile
 import tempfile
+import threading
+import time
 import zipfile
-from functools import partial
+from functools import (
+    lru_cache,
+    partial,
+)
 from typing import (
+    Any,
     Callable,
     Dict,
     IO,
+    Iterable,
+    List,
     NamedTuple,
     Optional,
+    Tuple,
     Union,
 )
 
@@ -47,6 +57,10 @@ import magic  # isort:skip
 
 log = logging.getLogger(__name__)
 
+# The libmagic handle used by magic.detect_from_* is shared and not thread-safe,
+# files may be sniffed concurrently (e.g. by the data fetch tool).
+_MAGIC_LOCK = threading.Lock()
+
 SNIFF_PREFIX_BYTES = int(os.environ.get("GALAXY_SNIFF_PREFIX_BYTES", None) or 2**20)
 BINARY_MIMETYPES = {"application/pdf", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"}
 
@@ -600,19 +614,22 @@ class FilePrefix:
         self.truncated = truncated
         self.filename = filename
         self.non_utf8_error = non_utf8_error
-        file_magic = magic.detect_from_content(contents_header_bytes)
+        with _MAGIC_LOCK:
+            file_magic = magic.detect_from_content(contents_header_bytes)
         self.encoding = file_magic.encoding
         self.mime_type = file_magic.mime_type
         self.compressed_mime_type = None
         self.compressed_encoding = None
         if compressed_format:
-            compressed_magic = magic.detect_from_filename(filename)
+            with _MAGIC_LOCK:
+                compressed_magic = magic.detect_from_filename(filename)
             self.compressed_mime_type = compressed_magic.mime_type
             self.compressed_encoding = compressed_magic.encoding
         self.compressed_format = compressed_format
         self.contents_header = contents_header
         self.contents_header_bytes = contents_header_bytes
         self._is_binary = None
+        self._is_tarfile = None
         self._file_size = None
 
     @property
@@ -633,6 +650,15 @@ class FilePrefix:
                 self._is_binary = True
         return self._is_binary
 
+    @property
+    def is_tarfile(self) -> bool:
+        if self._is_tarfile is None:
+            try:
+                self._is_tarfile = tarfile.is_tarfile(self.filename)
+            except Exception:
+                self._is_tarfile = False
+        return self._is_tarfile
+
     @property
     def file_size(self):
         if self._file_size is None:
@@ -689,11 +715,141 @@ def _get_file_prefix(filename_or_file_prefix: Union[str, FilePrefix], auto_decom
     return filename_or_file_prefix
 
 
+def _may_sniff(datatype, compressed_format: Optional[str], binary: bool) -> bool:
+    """Return False if ``datatype`` cannot match a file of this compression format and binary-ness."""
+    datatype_compressed = getattr(datatype, "compressed", False)
+    if datatype_compressed and not compressed_format and not datatype.file_ext.endswith(".tar"):
+        # we don't auto-detect tar as compressed
+        return False
+    if not datatype_compressed and compressed_format:
+        return False
+    if binary != datatype.is_binary and not datatype.is_binary == "maybe":
+        # Binary detection doesn't match datatype ...
+        compressed_data_for_compressed_text_datatype = (
+            binary and compressed_format and datatype_compressed and not datatype.is_binary
+        )
+        if not compressed_data_for_compressed_text_datatype:
+            # ... and mismatch is not due to compressed text data for a compressed text datatype
+            return False
+    if hasattr(datatype, "sniff_prefix"):
+        if compressed_format and getattr(datatype, "compressed_format", None):
+            # Compare the compressed format detected
+            # to the expected.
+            if compressed_format != datatype.compressed_format:
+                return False
+    return True
+
+
+def _sniffer(datatype):
+    # The method run_sniffers_raw calls
+    return getattr(datatype, "sniff_prefix", None) or getattr(datatype, "sniff", None)
+
+
+def _sniff_leading_bytes(datatype) -> Optional[Tuple[bytes, ...]]:
+    signatures = getattr(_sniffer(datatype), "sniff_leading_bytes", None)
+    if signatures is None:
+        return None
+    leading_bytes: List[bytes] = []
+    for signature in signatures:
+        if isinstance(signature, str):
+            signature = getattr(datatype, signature)
+        leading_bytes.extend(signature if isinstance(signature, tuple) else [signature])
+    return tuple(leading_bytes)
+
+
+class _IndexedSniffer(NamedTuple):
+    datatype: Any
+    leading_bytes: Optional[Tuple[bytes, ...]]
+    requires_tarfile: bool
+
+
+class SnifferIndex:
+    """The sniffers of a sniff order, indexed by the files they can possibly match.
+
+    Iterating over the index yields the sniff order, so it can be passed to
+    :func:`guess_ext` in place of it. :func:`run_sniffers_raw` then only runs
+    the sniffers applicable to the compression format and binary-ness of the
+    file, which are grouped up front, and skips sniffers whose declared
+    leading bytes (see :func:`sniff_leading_bytes`) the file does not start
+    with, as well as sniffers of tar archives (see :func:`sniff_requires_tarfile`)
+    if the file is not one. The remaining sniffers run in sniff order, so
+    results are the same as walking the whole sniff order.
+
+    The time spent in (and the number of calls and matches of) each sniffer
+    is counted, see :meth:`timings`.
+    """
+
+    def __init__(self, sniff_order: Iterable):
+        self.sniff_order = list(sniff_order)
+        self._sniffers = [
+            _IndexedSniffer(
+                datatype,
+                _sniff_leading_bytes(datatype),
+                getattr(_sniffer(datatype), "sniff_requires_tarfile", False),
+            )
+            for datatype in self.sniff_order
+        ]
+        self._candidates: Dict[Tuple[Optional[str], bool], List[_IndexedSniffer]] = {}
+        self._timings: Dict[str, List[float]] = {}
+
+    def __iter__(self):
+        return iter(self.sniff_order)
+
+    def __len__(self) -> int:
+        return len(self.sniff_order)
+
+    def indexes(self, sniff_order: List) -> bool:
+        """Return True if this index is up to date with ``sniff_order``."""
+        return len(sniff_order) == len(self.sniff_order) and all(a is b for a, b in zip(sniff_order, self.sniff_order))
+
+    def candidates(self, file_prefix: "FilePrefix") -> List:
+        """Return the datatypes that may match ``file_prefix``, in sniff order."""
+        key = (file_prefix.compressed_format, file_prefix.binary)
+        candidates = self._candidates.get(key)
+        if candidates is None:
+            candidates = [sniffer for sniffer in self._sniffers if _may_sniff(sniffer.datatype, *key)]
+            self._candidates[key] = candidates
+        # Leading bytes are declared for (the contents of) uncompressed files only
+        header = None if file_prefix.compressed_format else file_prefix.contents_header_bytes or b""
+        return [
+            sniffer.datatype
+            for sniffer in candidates
+            if (header is None or sniffer.leading_bytes is None or header.startswith(sniffer.leading_bytes))
+            and (not sniffer.requires_tarfile or file_prefix.is_tarfile)
+        ]
+
+    def record(self, datatype, seconds: float, matched: bool) -> None:
+        timing = self._timings.setdefault(datatype.file_ext, [0, 0, 0.0])
+        timing[0] += 1
+        timing[1] += int(matched)
+        timing[2] += seconds
+
+    def timings(self) -> List[Dict[str, Any]]:
+        """Return the calls, matches and time spent per sniffer, slowest sniffers first."""
+        return sorted(
+            (
+                {"ext": ext, "calls": calls, "matches": matches, "seconds": seconds}
+                for ext, (calls, matches, seconds) in self._timings.items()
+            ),
+            key=lambda timing: timing["seconds"],
+            reverse=True,
+        )
+
+
 def run_sniffers_raw(file_prefix: FilePrefix, sniff_order):
     """Run through sniffers specified by sniff_order, return None of None match."""
     fname = file_prefix.filename
     file_ext = None
-    for datatype in sniff_order:
+    sniffer_index = sniff_order if isinstance(sniff_order, SnifferIndex) else None
+    if sniffer_index:
+        datatypes = sniffer_index.candidates(file_prefix)
+    else:
+        datatypes = (
+            datatype
+            for datatype in sniff_order
+            if _may_sniff(datatype, file_prefix.compressed_format, file_prefix.binary)
+        )
+    for datatype in datatypes:
         """
         Some classes may not have a sniff function, which is ok.  In fact,
         Binary, Data, Tabular and Text are examples of classes that should never
@@ -702,35 +858,19 @@ def run_sniffers_raw(file_prefix: FilePrefix, sniff_order):
         from this function after all other datatypes in sniff_order have not been
         successfully discovered.
         """
-        datatype_compressed = getattr(datatype, "compressed", False)
-        if datatype_compressed and not file_prefix.compressed_format and not datatype.file_ext.endswith(".tar"):
-            # we don't auto-detect tar as compressed
-            continue
-        if not datatype_compressed and file_prefix.compressed_format:
-            continue
-        if file_prefix.binary != datatype.is_binary and not datatype.is_binary == "maybe":
-            # Binary detection doesn't match datatype ...
-            compressed_data_for_compressed_text_datatype = (
-                file_prefix.binary and file_prefix.compressed_format and datatype_compressed and not datatype.is_binary
-            )
-            if not compressed_data_for_compressed_text_datatype:
-                # ... and mismatch is not due to compressed text data for a compressed text datatype
-                continue
+        start = time.perf_counter()
         try:
             if hasattr(datatype, "sniff_prefix"):
-                if file_prefix.compressed_format and getattr(datatype, "compressed_format", None):
-                    # Compare the compressed format detected
-                    # to the expected.
-                    if file_prefix.compressed_format != datatype.compressed_format:
-                        continue
-                if datatype.sniff_prefix(file_prefix):
-                    file_ext = datatype.file_ext
-                    break
-            elif datatype.sniff(fname):
-                file_ext = datatype.file_ext
-                break
+                matched = datatype.sniff_prefix(file_prefix)
+            else:
+                matched = datatype.sniff(fname)
         except Exception:
-            pass
+            matched = False
+        if sniffer_index:
+            sniffer_index.record(datatype, time.perf_counter() - start, bool(matched))
+        if matched:
+            file_ext = datatype.file_ext
+            break
 
     return file_ext
 
@@ -766,6 +906,47 @@ def build_sniff_from_prefix(klass):
     return klass
 
 
+def sniff_leading_bytes(*signatures: Union[bytes, str]):
+    """Declare the leading bytes a file must start with for the decorated sniffer to match it.
+
+    Signatures are bytes, or the name of a datatype attribute holding bytes (or
+    a tuple of bytes). Used by :class:`SnifferIndex` to skip the sniffer for
+    other (uncompressed) files, so only declare signatures a sniffer requires.
+    """
+
+    def decorator(func):
+        func.sniff_leading_bytes = signatures
+        return func
+
+    return decorator
+
+
+@lru_cache(maxsize=32)
+def _tar_member_names(filename: str, mtime_ns: int, size: int) -> Tuple[str, ...]:
+    with tarfile.open(filename, "r") as tar:
+        return tuple(tar.getnames())
+
+
+def tar_member_names(filename: str) -> Tuple[str, ...]:
+    """Return the member names of the tar archive ``filename``.
+
+    Names are cached while the file is unchanged, so that the sniffers of
+    several tar archive datatypes only read an archive once.
+    """
+    stat = os.stat(filename)
+    return _tar_member_names(filename, stat.st_mtime_ns, stat.st_size)
+
+
+def sniff_requires_tarfile(func):
+    """Declare that the decorated sniffer only matches files ``tarfile.is_tarfile`` accepts.
+
+    Used by :class:`SnifferIndex` to check this once per file rather than in
+    every sniffer of a tar archive datatype.
+    """
+    func.sniff_requires_tarfile = True
+    return func
+
+
 def disable_parent_class_sniffing(klass):
     klass.sniff = lambda self, filename: False
     klass.sniff_prefix = lambda self, file_prefix: False
@@ -916,7 +1097,7 @@ def handle_uploaded_dataset_file_internal(
             # TODO: skip this if we haven't actually converted the dataset
             guessed_ext = guess_ext(
                 converted_path,
-                sniff_order=datatypes_registry.sniff_order,
+                sniff_order=datatypes_registry.sniffer_index,
                 auto_decompress=file_prefix.auto_decompress,
             )
 
@@ -932,7 +1113,7 @@ def handle_uploaded_dataset_file_internal(
                 assert _converted_path
                 converted_path = _converted_path
             if ext in AUTO_DETECT_EXTENSIONS:
-                ext = guess_ext(converted_path, sniff_order=datatypes_registry.sniff_order)
+                ext = guess_ext(converted_path, sniff_order=datatypes_registry.sniffer_index)
         else:
             ext = guessed_ext
 
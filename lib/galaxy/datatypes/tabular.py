@@ -6,6 +6,7 @@ import abc
 import binascii
 import csv
 import logging
+import operator
 import os
 import re
 import shutil
@@ -13,9 +14,12 @@ import subprocess
 import tempfile
 from json import dumps
 from typing import (
+    Callable,
     cast,
     Dict,
+    IO,
     List,
+    NamedTuple,
     Optional,
     Union,
 )
@@ -63,6 +67,7 @@ from galaxy.datatypes.sniff import (
     FilePrefix,
     get_headers,
     iter_headers,
+    sniff_leading_bytes,
     validate_tabular,
 )
 from galaxy.exceptions import InvalidFileFormatError
@@ -80,6 +85,202 @@ from . import dataproviders
 log = logging.getLogger(__name__)
 
 MAX_DATA_LINES = 100000
+# Number of characters read at once when scanning tabular files for metadata
+SET_META_CHUNK_SIZE = 1024 * 1024
+
+COLUMN_TYPE_SET_ORDER = ["int", "float", "list", "str"]  # Order to set column types in
+DEFAULT_COLUMN_TYPE = COLUMN_TYPE_SET_ORDER[-1]  # Default column type is lowest in list
+_COLUMN_TYPE_RANK = {column_type: rank for rank, column_type in enumerate(COLUMN_TYPE_SET_ORDER)}
+
+_INT_RE = re.compile(r"[+-]?[0-9]+")
+# Longest text int() converts whatever sys.set_int_max_str_digits() is set to (CVE-2020-10735),
+# longer digit strings matching _INT_RE are left to int()
+_INT_SAFE_STR_LENGTH = 640
+_FLOAT_RE = re.compile(r"[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?")
+# ASCII text with any character int() and float() could not parse (including 'nan', 'inf', 'infinity' and 'na')
+_NOT_NUMERIC_RE = re.compile(r"[^0-9+\-.eEnNaAiIfFtTyY\t\n\x0b\x0c\r\x1c-\x1f ]|_")
+_count_tabs = operator.methodcaller("count", "\t")
+_starts_with_hash = operator.methodcaller("startswith", "#")
+
+
+def _is_int(column_text: str) -> bool:
+    # Don't allow underscores in numeric literals (PEP 515)
+    if "_" in column_text:
+        return False
+    try:
+        int(column_text)
+        return True
+    except ValueError:
+        return False
+
+
+def _is_float(column_text: str) -> bool:
+    # Don't allow underscores in numeric literals (PEP 515)
+    if "_" in column_text:
+        return False
+    try:
+        float(column_text)
+        return True
+    except ValueError:
+        if column_text.strip().lower() == "na":
+            return True  # na is special cased to be a float
+        return False
+
+
+def guess_column_type(column_text: str) -> Optional[str]:
+    """Return the first of ``COLUMN_TYPE_SET_ORDER`` matching ``column_text``, None for empty text.
+
+    >>> [guess_column_type(t) for t in ["-1", "1e5", " NA", "1,2", "1_000", "chr1", ""]]
+    ['int', 'float', 'float', 'list', 'str', 'str', None]
+    """
+    if _INT_RE.fullmatch(column_text) and (len(column_text) <= _INT_SAFE_STR_LENGTH or _is_int(column_text)):
+        return "int"
+    if _FLOAT_RE.fullmatch(column_text):
+        return "float"
+    # Only text that may still be a number (padded, 'nan', non-ASCII digits, ...) is left to int() and float()
+    if not column_text.isascii() or not _NOT_NUMERIC_RE.search(column_text):
+        if _is_int(column_text):
+            return "int"
+        if _is_float(column_text):
+            return "float"
+    if "," in column_text:
+        return "list"
+    if column_text:
+        return "str"
+    return None
+
+
+class TabularMetadata(NamedTuple):
+    data_lines: Optional[int]
+    comment_lines: Optional[int]
+    column_types: List[str]
+    column_names: Optional[List[str]]
+
+
+def scan_tabular_metadata(
+    fh: IO[str],
+    skip: int = 0,
+    first_line_is_header: bool = False,
+    max_data_lines: Optional[int] = MAX_DATA_LINES,
+    max_guess_type_data_lines: Optional[int] = None,
+    get_column_names: Optional[Callable[[str], Optional[List[str]]]] = None,
+    chunk_size: int = SET_META_CHUNK_SIZE,
+) -> TabularMetadata:
+    """Count the data and comment lines of the tabular text in ``fh`` and guess its column types.
+
+    See :meth:`Tabular.set_meta` for the meaning of the parameters. ``fh``
+    must be opened with universal newlines. The file is read in chunks of
+    ``chunk_size`` characters; fields of columns already typed ``str`` are not
+    looked at again, and chunks in which no column type can change are only
+    counted.
+    """
+    data_lines = 0
+    comment_lines = 0
+    column_names = None
+    column_types: List[Optional[str]] = []
+    first_line_column_types: List[Optional[str]] = []
+    str_columns = 0  # Number of columns typed 'str', no later field can change these
+    i = 0
+    # Text of the last, incomplete line read so far
+    remainder: List[str] = []
+    eof = False
+    done = False
+    while not done and not eof:
+        chunk = fh.read(chunk_size)
+        if chunk:
+            if "\n" not in chunk:
+                remainder.append(chunk)
+                continue
+            remainder.append(chunk)
+            lines = "".join(remainder).split("\n")
+            remainder = [lines.pop()]
+        else:
+            eof = True
+            last_line = "".join(remainder)
+            if not last_line:
+                break
+            lines = [last_line]
+            remainder = []
+        if (
+            i > 0
+            and i >= skip
+            and (max_data_lines is None or data_lines + len(lines) < max_data_lines)
+            and (
+                (max_guess_type_data_lines is not None and data_lines >= max_guess_type_data_lines)
+                or (str_columns == len(column_types) and max(map(_count_tabs, lines)) < len(column_types))
+            )
+        ):
+            # No column type can change in this chunk, only count its lines
+            chunk_comment_lines = lines.count("") + sum(map(_starts_with_hash, lines))
+            comment_lines += chunk_comment_lines
+            data_lines += len(lines) - chunk_comment_lines
+            i += len(lines)
+            continue
+        for line_number, line in enumerate(lines):
+            if i == 0 and get_column_names is not None:
+                column_names = get_column_names(line)
+            if i < skip or not line or line[0] == "#":
+                # We'll call blank lines comments
+                comment_lines += 1
+            else:
+                data_lines += 1
+                if max_guess_type_data_lines is None or data_lines <= max_guess_type_data_lines:
+                    if str_columns < len(column_types) or line.count("\t") >= len(column_types):
+                        for field_count, field in enumerate(line.split("\t")):
+                            if field_count >= len(column_types):
+                                # found a previously unknown column, we append None
+                                column_types.append(None)
+                            old_column_type = column_types[field_count]
+                            if old_column_type == "str":
+                                continue
+                            column_type = guess_column_type(field)
+                            if column_type is not None and (
+                                old_column_type is None
+                                or _COLUMN_TYPE_RANK[column_type] > _COLUMN_TYPE_RANK[old_column_type]
+                            ):
+                                column_types[field_count] = column_type
+                                if column_type == "str":
+                                    str_columns += 1
+                if i == 0 and first_line_is_header:
+                    # This is our first line, people seem to like to upload files that have a header line, but do not
+                    # start with '#' (i.e. all column types would then most likely be detected as str).  We will assume
+                    # that the first line is always a header (this was previous behavior - it was always skipped).  When
+                    # the first line is a header, we only use the data from the first line if we have no other data for
+                    # a column.  This is far from perfect, as
+                    # 1,2,3	1.1	2.2	qwerty
+                    # 0	0		1,2,3
+                    # will be detected as
+                    # "column_types": ["int", "int", "float", "list"]
+                    # instead of
+                    # "column_types": ["list", "float", "float", "str"]  *** would seem to be the 'Truth' by manual
+                    # observation that the first line should be included as data.  The old method would have detected as
+                    # "column_types": ["int", "int", "str", "list"]
+                    first_line_column_types = column_types
+                    column_types = [None for col in first_line_column_types]
+                    str_columns = 0
+            if max_data_lines is not None and data_lines >= max_data_lines:
+                if line_number < len(lines) - 1 or (not eof and (any(remainder) or fh.read(1))):
+                    # Clear optional data_lines metadata value
+                    data_lines = None  # type: ignore[assignment]
+                    # Clear optional comment_lines metadata value; additional comment lines could appear below this point
+                    comment_lines = None  # type: ignore[assignment]
+                done = True
+                break
+            i += 1
+
+    # we error on the larger number of columns
+    # first we pad our column_types by using data from first line
+    if len(first_line_column_types) > len(column_types):
+        for column_type in first_line_column_types[len(column_types) :]:
+            column_types.append(column_type)
+    # Now we fill any unknown (None) column_types with data from first line
+    for i in range(len(column_types)):
+        if column_types[i] is None:
+            if len(first_line_column_types) <= i or first_line_column_types[i] is None:
+                column_types[i] = DEFAULT_COLUMN_TYPE
+            else:
+                column_types[i] = first_line_column_types[i]
+    return TabularMetadata(data_lines, comment_lines, cast(List[str], column_types), column_names)
 
 
 @dataproviders.decorators.has_dataproviders
@@ -156,7 +357,7 @@ class TabularData(Text):
         )
 
     def _read_chunk(self, trans, dataset: HasFileName, offset: int, ck_size: Optional[int] = None):
-        with compression_utils.get_fileobj(dataset.get_file_name()) as f:
+        with data.open_dataset_contents(dataset) as f:
             f.seek(offset)
             try:
                 ck_data = f.read(ck_size or trans.app.config.display_chunk_size)
@@ -448,134 +649,20 @@ class Tabular(TabularData):
            Since metadata can now be processed on cluster nodes, we've merged the line count portion
            of the set_peek() processing here, and we now check the entire contents of the file.
         """
-        # Store original skip value to check with later
-        requested_skip = skip
-        if skip is None:
-            skip = 0
-        column_type_set_order = ["int", "float", "list", "str"]  # Order to set column types in
-        default_column_type = column_type_set_order[-1]  # Default column type is lowest in list
-        column_type_compare_order = list(column_type_set_order)  # Order to compare column types
-        column_type_compare_order.reverse()
-
-        def type_overrules_type(new_column_type, old_column_type):
-            if new_column_type is None or new_column_type == old_column_type:
-                return False
-            if old_column_type is None:
-                return True
-            for column_type in column_type_compare_order:
-                if new_column_type == column_type:
-                    return True
-                if old_column_type == column_type:
-                    return False
-            # neither column type was found in our ordered list, this cannot happen
-            raise ValueError(f"Tried to compare unknown column types: {new_column_type} and {old_column_type}")
-
-        def is_int(column_text):
-            # Don't allow underscores in numeric literals (PEP 515)
-            if "_" in column_text:
-                return False
-            try:
-                int(column_text)
-                return True
-            except ValueError:
-                return False
-
-        def is_float(column_text):
-            # Don't allow underscores in numeric literals (PEP 515)
-            if "_" in column_text:
-                return False
-            try:
-                float(column_text)
-                return True
-            except ValueError:
-                if column_text.strip().lower() == "na":
-                    return True  # na is special cased to be a float
-                return False
-
-        def is_list(column_text):
-            return "," in column_text
-
-        def is_str(column_text):
-            # anything, except an empty string, is True
-            if column_text == "":
-                return False
-            return True
-
-        is_column_type = {}  # Dict to store column type string to checking function
-        for column_type in column_type_set_order:
-            is_column_type[column_type] = locals()[f"is_{column_type}"]
-
-        def guess_column_type(column_text):
-            for column_type in column_type_set_order:
-                if is_column_type[column_type](column_text):
-                    return column_type
-            return None
-
-        data_lines = 0
-        comment_lines = 0
-        column_names = None
-        column_types: List = []
-        first_line_column_types = []
+        tabular_metadata = TabularMetadata(0, 0, [], None)
         if dataset.has_data():
             # NOTE: if skip > num_check_lines, we won't detect any metadata, and will use default
             with compression_utils.get_fileobj(dataset.get_file_name()) as dataset_fh:
-                i = 0
-                for line in iter(dataset_fh.readline, ""):
-                    line = line.rstrip("\r\n")
-                    if i == 0:
-                        column_names = self.get_column_names(first_line=line)
-                    if i < skip or not line or line.startswith("#"):
-                        # We'll call blank lines comments
-                        comment_lines += 1
-                    else:
-                        data_lines += 1
-                        if max_guess_type_data_lines is None or data_lines <= max_guess_type_data_lines:
-                            fields = line.split("\t")
-                            for field_count, field in enumerate(fields):
-                                if field_count >= len(
-                                    column_types
-                                ):  # found a previously unknown column, we append None
-                                    column_types.append(None)
-                                column_type = guess_column_type(field)
-                                if type_overrules_type(column_type, column_types[field_count]):
-                                    column_types[field_count] = column_type
-                        if i == 0 and requested_skip is None:
-                            # This is our first line, people seem to like to upload files that have a header line, but do not
-                            # start with '#' (i.e. all column types would then most likely be detected as str).  We will assume
-                            # that the first line is always a header (this was previous behavior - it was always skipped).  When
-                            # the requested skip is None, we only use the data from the first line if we have no other data for
-                            # a column.  This is far from perfect, as
-                            # 1,2,3	1.1	2.2	qwerty
-                            # 0	0		1,2,3
-                            # will be detected as
-                            # "column_types": ["int", "int", "float", "list"]
-                            # instead of
-                            # "column_types": ["list", "float", "float", "str"]  *** would seem to be the 'Truth' by manual
-                            # observation that the first line should be included as data.  The old method would have detected as
-                            # "column_types": ["int", "int", "str", "list"]
-                            first_line_column_types = column_types
-                            column_types = [None for col in first_line_column_types]
-                    if max_data_lines is not None and data_lines >= max_data_lines:
-                        if dataset_fh.tell() != dataset.get_size():
-                            # Clear optional data_lines metadata value
-                            data_lines = None  # type: ignore [assignment]
-                            # Clear optional comment_lines metadata value; additional comment lines could appear below this point
-                            comment_lines = None  # type: ignore [assignment]
-                        break
-                    i += 1
-
-        # we error on the larger number of columns
-        # first we pad our column_types by using data from first line
-        if len(first_line_column_types) > len(column_types):
-            for column_type in first_line_column_types[len(column_types) :]:
-                column_types.append(column_type)
-        # Now we fill any unknown (None) column_types with data from first line
-        for i in range(len(column_types)):
-            if column_types[i] is None:
-                if len(first_line_column_types) <= i or first_line_column_types[i] is None:
-                    column_types[i] = default_column_type
-                else:
-                    column_types[i] = first_line_column_types[i]
+                tabular_metadata = scan_tabular_metadata(
+                    dataset_fh,
+                    skip=skip or 0,
+                    # Using None for skip processes the first line as a header
+                    first_line_is_header=skip is None,
+                    max_data_lines=max_data_lines,
+                    max_guess_type_data_lines=max_guess_type_data_lines,
+                    get_column_names=self.get_column_names,
+                )
+        data_lines, comment_lines, column_types, column_names = tabular_metadata
         # Set the discovered metadata values for the dataset
         dataset.metadata.data_lines = data_lines
         dataset.metadata.comment_lines = comment_lines
@@ -1672,6 +1759,7 @@ class MatrixMarket(TabularData):
     def __init__(self, **kwd):
         super().__init__(**kwd)
 
+    @sniff_leading_bytes(b"%%MatrixMarket matrix coordinate")
     def sniff_prefix(self, file_prefix: FilePrefix) -> bool:
         return file_prefix.startswith("%%MatrixMarket matrix coordinate")
 
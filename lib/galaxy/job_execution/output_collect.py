@@ -16,6 +16,7 @@ from typing import (
 
 from sqlalchemy.orm.scoping import ScopedSession
 
+from galaxy.metadata.parallel import ParallelMetadataSetter
 from galaxy.model import (
     DatasetInstance,
     HistoryDatasetAssociation,
@@ -414,6 +415,7 @@ class SessionlessJobContext(SessionlessModelPersistenceContext, BaseJobContext):
         working_directory,
         final_job_state,
         max_discovered_files: Optional[int],
+        metadata_setter: Optional[ParallelMetadataSetter] = None,
     ):
         # TODO: use a metadata source provider... (pop from inputs and add parameter)
         super().__init__(object_store, export_store, working_directory)
@@ -423,6 +425,15 @@ class SessionlessJobContext(SessionlessModelPersistenceContext, BaseJobContext):
         self.final_job_state = final_job_state
         self.max_discovered_files = float("inf") if max_discovered_files is None else max_discovered_files
         self.discovered_file_count = 0
+        self.metadata_setter = metadata_setter
+
+    def set_meta_and_peek(self, datasets):
+        if self.metadata_setter is None:
+            return super().set_meta_and_peek(datasets)
+        # Composite datasets may need their extra files to set metadata, keep setting these here
+        composite_datasets = [dataset for dataset in datasets if dataset.datatype.composite_type]
+        super().set_meta_and_peek(composite_datasets)
+        self.metadata_setter.set_meta_and_peek([dataset for dataset in datasets if dataset not in composite_datasets])
 
     @property
     def change_datatype_actions(self):
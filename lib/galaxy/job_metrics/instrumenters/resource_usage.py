@@ -0,0 +1,301 @@
+"""The module describes the ``resource_usage`` job metrics plugin.
+
+Unlike the ``cgroup`` plugin, which records the counters of a job's cgroup
+once the tool has finished, this plugin samples memory, CPU and I/O counters
+while the tool is running. A background sampler appends one line per sample
+to a CSV file in the job directory::
+
+    # source=cgroupv2 interval=10 slots=4
+    epoch,memory_bytes,cpu_usec,io_read_bytes,io_write_bytes
+    1700000000,104857600,1500000,4096,0
+
+The samples are summarized (peak and mean memory, CPU utilization percentiles,
+bytes read and written) when the job's metrics are collected.
+"""
+
+import logging
+import math
+import os
+from typing import (
+    Any,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+)
+
+from galaxy.util import nice_size
+from . import InstrumentPlugin
+from .. import formatting
+
+log = logging.getLogger(__name__)
+
+VALID_SOURCES = ("auto", "cgroup", "proc")
+DEFAULT_INTERVAL = 10
+SAMPLES_HEADER = "epoch,memory_bytes,cpu_usec,io_read_bytes,io_write_bytes"
+CPU_PERCENTILES = (50, 90, 95)
+SAMPLER_EOF = "__GALAXY_RESOURCE_USAGE_SAMPLER__"
+
+# POSIX shell sampler, called as ``sh sampler SAMPLES INTERVAL CGROUP_MOUNT SOURCE ROOT_PID [once]``.
+# Counters are read from the job's cgroup (v2, then v1) if ``SOURCE`` allows it, otherwise from the
+# /proc entries of the processes descending from ``ROOT_PID`` (the job script), excluding the sampler.
+SAMPLER_SCRIPT = r"""
+samples="$1"; interval="$2"; cgroup_mount="$3"; requested_source="$4"; root_pid="$5"
+source=proc
+if [ "$requested_source" != "proc" ] && [ -e "/proc/$root_pid/cgroup" ]; then
+    if [ -f "$cgroup_mount/cgroup.controllers" ]; then
+        cgroup_dir="$cgroup_mount$(awk -F: '$1=="0" {print $3}' "/proc/$root_pid/cgroup")"
+        [ -f "$cgroup_dir/memory.current" ] && [ -f "$cgroup_dir/cpu.stat" ] && source=cgroupv2
+    else
+        memory_dir="$cgroup_mount/memory$(awk -F: '$2 ~ /(^|,)memory(,|$)/ {print $3}' "/proc/$root_pid/cgroup")"
+        cpuacct_path="$(awk -F: '$2 ~ /(^|,)cpuacct(,|$)/ {print $3}' "/proc/$root_pid/cgroup")"
+        for controller in cpuacct cpu,cpuacct cpuacct,cpu; do
+            if [ -f "$cgroup_mount/$controller$cpuacct_path/cpuacct.usage" ]; then
+                cpuacct_dir="$cgroup_mount/$controller$cpuacct_path"
+            fi
+        done
+        blkio_dir="$cgroup_mount/blkio$(awk -F: '$2 ~ /(^|,)blkio(,|$)/ {print $3}' "/proc/$root_pid/cgroup")"
+        [ -f "$memory_dir/memory.usage_in_bytes" ] && [ -n "$cpuacct_dir" ] && source=cgroupv1
+    fi
+fi
+page_size=$(getconf PAGESIZE 2>/dev/null || echo 4096)
+clock_ticks=$(getconf CLK_TCK 2>/dev/null || echo 100)
+
+sample() {
+    io=0,0
+    case "$source" in
+    cgroupv2)
+        usage="$(cat "$cgroup_dir/memory.current"),$(awk '$1=="usage_usec" {print $2}' "$cgroup_dir/cpu.stat")"
+        [ -f "$cgroup_dir/io.stat" ] && io=$(awk '{
+            for (i = 2; i <= NF; i++) {
+                split($i, kv, "=");
+                if (kv[1] == "rbytes") read_bytes += kv[2]; else if (kv[1] == "wbytes") write_bytes += kv[2];
+            }
+        } END {printf "%.0f,%.0f", read_bytes, write_bytes}' "$cgroup_dir/io.stat")
+        ;;
+    cgroupv1)
+        cpu_usec=$(awk '{printf "%.0f", $1 / 1000}' "$cpuacct_dir/cpuacct.usage")
+        usage="$(cat "$memory_dir/memory.usage_in_bytes"),$cpu_usec"
+        [ -f "$blkio_dir/blkio.throttle.io_service_bytes" ] && io=$(awk '
+            $2 == "Read" {read_bytes += $3} $2 == "Write" {write_bytes += $3}
+            END {printf "%.0f,%.0f", read_bytes, write_bytes}' "$blkio_dir/blkio.throttle.io_service_bytes")
+        ;;
+    *)
+        # Fields of /proc/<pid>/stat after the command name: ppid is 2, utime, stime, cutime, cstime are 12-15,
+        # rss (in pages) is 22.
+        usage=$(cat /proc/[0-9]*/stat 2>/dev/null | awk -v root="$root_pid" -v sampler="$$" \
+                -v page_size="$page_size" -v clock_ticks="$clock_ticks" '{
+            pid = $1; line = $0; sub(/^.*\) /, "", line); split(line, f, " ");
+            ppid[pid] = f[2]; ticks[pid] = f[12] + f[13] + f[14] + f[15]; rss[pid] = f[22];
+        } END {
+            tree[root] = 1; changed = 1;
+            while (changed) {
+                changed = 0;
+                for (pid in ppid) {
+                    if (!(pid in tree) && pid != sampler && (ppid[pid] in tree)) {tree[pid] = 1; changed = 1}
+                }
+            }
+            for (pid in tree) {
+                if (!(pid in ppid)) continue;
+                memory += rss[pid] * page_size; cpu += ticks[pid];
+                io = "/proc/" pid "/io";
+                while ((getline io_line < io) > 0) {
+                    split(io_line, kv, " ");
+                    if (kv[1] == "read_bytes:") read_bytes += kv[2];
+                    else if (kv[1] == "write_bytes:") write_bytes += kv[2];
+                }
+                close(io);
+            }
+            printf "%.0f,%.0f,%.0f,%.0f", memory, cpu * 1000000 / clock_ticks, read_bytes, write_bytes;
+        }')
+        io=""
+        ;;
+    esac
+    echo "$(date +%s),$usage${io:+,$io}"
+}
+
+if [ "$6" = "once" ]; then
+    sample >> "$samples"
+    exit 0
+fi
+echo "# source=$source interval=$interval slots=${GALAXY_SLOTS:-1}" > "$samples"
+echo "epoch,memory_bytes,cpu_usec,io_read_bytes,io_write_bytes" >> "$samples"
+while kill -0 "$root_pid" 2>/dev/null; do
+    sample >> "$samples"
+    sleep "$interval"
+done
+""".strip()
+
+TITLES = {
+    "source": "Resource usage source",
+    "samples": "Resource usage samples",
+    "sampling_interval": "Resource usage sampling interval",
+    "sampling_duration": "Resource usage sampling duration",
+    "peak_memory_bytes": "Peak memory usage",
+    "mean_memory_bytes": "Mean memory usage",
+    "cpu_time": "CPU time",
+    "cpu_percent_mean": "Mean CPU utilization",
+    "cpu_percent_p50": "Median CPU utilization",
+    "cpu_percent_p90": "90th percentile CPU utilization",
+    "cpu_percent_p95": "95th percentile CPU utilization",
+    "cpu_percent_max": "Maximum CPU utilization",
+    "cpu_efficiency_percent": "CPU efficiency (of allocated slots)",
+    "io_read_bytes": "Bytes read",
+    "io_write_bytes": "Bytes written",
+}
+
+
+class ResourceUsageSample(NamedTuple):
+    epoch: int
+    memory_bytes: int
+    cpu_usec: int
+    io_read_bytes: int
+    io_write_bytes: int
+
+
+class ResourceUsageFormatter(formatting.JobMetricFormatter):
+    def format(self, key: str, value: Any) -> formatting.FormattedMetric:
+        title = TITLES.get(key, key)
+        if key.endswith("_bytes"):
+            return formatting.FormattedMetric(title, nice_size(value))
+        elif key in ("sampling_interval", "sampling_duration", "cpu_time"):
+            seconds = value if value < 60 else int(value)
+            return formatting.FormattedMetric(title, formatting.seconds_to_str(seconds))
+        elif key.startswith("cpu_") and "percent" in key:
+            return formatting.FormattedMetric(title, f"{float(value):.1f}%")
+        return formatting.FormattedMetric(title, str(value))
+
+
+def _percentile(sorted_values: List[float], percentile: int) -> float:
+    """Return the nearest-rank ``percentile`` of the non-empty list ``sorted_values``."""
+    rank = max(1, math.ceil(percentile / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def read_samples(path: str) -> Dict[str, Any]:
+    """Read the header (``source``, ``interval``, ``slots``) and samples of a samples file.
+
+    Malformed lines (e.g. a line cut short when the sampler was stopped) are skipped.
+    """
+    header: Dict[str, Any] = {}
+    samples: List[ResourceUsageSample] = []
+    with open(path) as fh:
+        for line in fh:
+            line = line.strip()
+            if line.startswith("#"):
+                for field in line[1:].split():
+                    key, _, value = field.partition("=")
+                    header[key] = value
+                continue
+            if not line or line == SAMPLES_HEADER:
+                continue
+            try:
+                sample = ResourceUsageSample(*(int(value) for value in line.split(",")))
+            except (TypeError, ValueError):
+                log.debug("Skipping malformed resource usage sample [%s]", line)
+                continue
+            samples.append(sample)
+    header["samples"] = samples
+    return header
+
+
+def summarize_samples(samples: List[ResourceUsageSample], slots: Optional[int] = None) -> Dict[str, Any]:
+    """Summarize resource usage ``samples``, ordered by time, into job metrics."""
+    if not samples:
+        return {}
+    first, last = samples[0], samples[-1]
+    memory = [sample.memory_bytes for sample in samples]
+    summary: Dict[str, Any] = {
+        "samples": len(samples),
+        "sampling_duration": last.epoch - first.epoch,
+        "peak_memory_bytes": max(memory),
+        "mean_memory_bytes": int(sum(memory) / len(memory)),
+        "cpu_time": round(max(0, last.cpu_usec - first.cpu_usec) / 10**6, 3),
+        # Counters read from /proc only cover the processes alive at the time of the sample.
+        "io_read_bytes": max(0, max(sample.io_read_bytes for sample in samples) - first.io_read_bytes),
+        "io_write_bytes": max(0, max(sample.io_write_bytes for sample in samples) - first.io_write_bytes),
+    }
+    cpu_percents = []
+    for previous, sample in zip(samples, samples[1:]):
+        elapsed = sample.epoch - previous.epoch
+        if elapsed > 0:
+            cpu_percents.append(max(0, sample.cpu_usec - previous.cpu_usec) / (elapsed * 10**4))
+    if cpu_percents:
+        sorted_percents = sorted(cpu_percents)
+        for percentile in CPU_PERCENTILES:
+            summary[f"cpu_percent_p{percentile}"] = round(_percentile(sorted_percents, percentile), 1)
+        summary["cpu_percent_max"] = round(sorted_percents[-1], 1)
+    if summary["sampling_duration"] > 0:
+        cpu_percent_mean = summary["cpu_time"] * 100 / summary["sampling_duration"]
+        summary["cpu_percent_mean"] = round(cpu_percent_mean, 1)
+        if slots:
+            summary["cpu_efficiency_percent"] = round(cpu_percent_mean / slots, 1)
+    return summary
+
+
+class ResourceUsagePlugin(InstrumentPlugin):
+    """Sample memory, CPU and I/O usage of a job at a regular interval while it runs.
+
+    Counters are read from the job's cgroup (v2 or v1) or, where jobs do not
+    run in their own cgroup, from ``/proc``. Linux only.
+    """
+
+    plugin_type = "resource_usage"
+    formatter = ResourceUsageFormatter()
+
+    def __init__(self, **kwargs):
+        self.interval = int(kwargs.get("interval", DEFAULT_INTERVAL))
+        assert self.interval > 0, "resource_usage metric interval option must be a positive number of seconds"
+        self.cgroup_mount = kwargs.get("cgroup_mount", "/sys/fs/cgroup")
+        self.source = str(kwargs.get("source", "auto"))
+        assert self.source in VALID_SOURCES, f"resource_usage metric source option must be one of {VALID_SOURCES}"
+
+    def pre_execute_instrument(self, job_directory: str) -> List[str]:
+        sampler = self.__sampler_file(job_directory)
+        return [
+            f"cat > '{sampler}' << '{SAMPLER_EOF}'\n{SAMPLER_SCRIPT}\n{SAMPLER_EOF}",
+            f"{self.__sampler_command(job_directory)} > /dev/null 2>&1 &",
+            f"echo $! > '{self.__sampler_pid_file(job_directory)}'",
+        ]
+
+    def post_execute_instrument(self, job_directory: str) -> List[str]:
+        pid_file = self.__sampler_pid_file(job_directory)
+        return [
+            f"""if [ -f '{pid_file}' ]; then sampler_pid="$(cat '{pid_file}')"; """
+            f"""kill "$sampler_pid" 2>/dev/null; wait "$sampler_pid" 2>/dev/null; fi""",
+            # Record a final sample, so that the CPU time of short running tools is accounted for.
+            f"{self.__sampler_command(job_directory)} once 2>/dev/null",
+        ]
+
+    def job_properties(self, job_id, job_directory: str) -> Dict[str, Any]:
+        samples_file = self.__samples_file(job_directory)
+        if not os.path.exists(samples_file):
+            return {}
+        header = read_samples(samples_file)
+        try:
+            slots: Optional[int] = int(header.get("slots", ""))
+        except ValueError:
+            slots = None
+        properties = summarize_samples(header["samples"], slots=slots)
+        if properties:
+            properties["source"] = header.get("source", "unknown")
+            properties["sampling_interval"] = int(header.get("interval", self.interval))
+        return properties
+
+    def __sampler_command(self, job_directory: str) -> str:
+        return (
+            f"sh '{self.__sampler_file(job_directory)}' '{self.__samples_file(job_directory)}' {self.interval} "
+            f"'{self.cgroup_mount}' {self.source} \"$$\""
+        )
+
+    def __samples_file(self, job_directory: str) -> str:
+        return self._instrument_file_path(job_directory, "samples")
+
+    def __sampler_file(self, job_directory: str) -> str:
+        return self._instrument_file_path(job_directory, "sampler.sh")
+
+    def __sampler_pid_file(self, job_directory: str) -> str:
+        return self._instrument_file_path(job_directory, "sampler_pid")
+
+
+__all__ = ("ResourceUsagePlugin",)
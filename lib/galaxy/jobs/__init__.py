@@ -68,6 +68,7 @@ from galaxy.model import (
     Task,
 )
 from galaxy.model.base import transaction
+from galaxy.model.collection_summary import update_summaries_for_job_outputs
 from galaxy.model.store import copy_dataset_instance_metadata_attributes
 from galaxy.model.store.discover import MaxDiscoveredFilesExceededError
 from galaxy.objectstore import (
@@ -336,6 +337,7 @@ class JobConfiguration(ConfiguresHandlers):
         self.handler_assignment_methods_configured = False
         self.handler_max_grab = None
         self.handler_ready_window_size = None
+        self.handler_ready_sweep_interval = 0
         self.destinations = {}
         self.default_destination_id = None
         self.tools = {}
@@ -448,6 +450,7 @@ class JobConfiguration(ConfiguresHandlers):
         self.handler_ready_window_size = int(
             handling_config_dict.get("ready_window_size", JobConfiguration.DEFAULT_HANDLER_READY_WINDOW_SIZE)
         )
+        self.handler_ready_sweep_interval = int(handling_config_dict.get("ready_sweep_interval", 0))
 
         # Parse environments
         job_metrics = self.app.job_metrics
@@ -1508,10 +1511,14 @@ class MinimalJobWrapper(HasResourceParameters):
                 self.tool.job_failed(self, message, exception)
             except Exception:
                 log.exception(f"Error occured while calling tool specific fail actions for job {job.id}")
+        self._job_finalized(job)
         cleanup_job = self.cleanup_job
         delete_files = cleanup_job == "always" or (cleanup_job == "onsuccess" and job.state == job.states.DELETED)
         self.cleanup(delete_files=delete_files)
 
+    def _job_finalized(self, job):
+        """Called once ``fail`` or ``finish`` committed the final state of the job."""
+
     def pause(self, job=None, message=None):
         if job is None:
             job = self.get_job()
@@ -1570,6 +1577,8 @@ class MinimalJobWrapper(HasResourceParameters):
         state_changed = job.set_state(state)
         self.sa_session.add(job)
         if state_changed:
+            # Output dataset states are updated without going through the ORM
+            update_summaries_for_job_outputs(self.sa_session.connection(), job.id, job.state)
             job.update_output_states(self.app.application_stack.supports_skip_locked())
         if flush:
             with transaction(self.sa_session):
@@ -2084,6 +2093,7 @@ class MinimalJobWrapper(HasResourceParameters):
             self._collect_metrics(job, job_metrics_directory)
         with transaction(self.sa_session):
             self.sa_session.commit()
+        self._job_finalized(job)
         if job.state == job.states.ERROR:
             self._report_error()
         elif task_wrapper:
@@ -2356,6 +2366,7 @@ class MinimalJobWrapper(HasResourceParameters):
             job=job,
             max_metadata_value_size=self.app.config.max_metadata_value_size,
             max_discovered_files=self.app.config.max_discovered_files,
+            parallel_metadata=self.app.config.parallel_metadata,
             validate_outputs=self.validate_outputs,
             link_data_only=self.__link_file_check(),
             **kwds,
@@ -2572,6 +2583,12 @@ class JobWrapper(MinimalJobWrapper):
         if use_persisted_destination:
             self.job_runner_mapper.cached_job_destination = JobDestination(from_job=job)
 
+    def _job_finalized(self, job):
+        # The job no longer counts towards the concurrency limits enforced by the handler
+        job_counter = self.queue.job_counter
+        if job_counter is not None:
+            job_counter.remove(job.id)
+
     @property
     def job_destination(self):
         """Return the JobDestination that this job will use to run.  This will
@@ -0,0 +1,116 @@
+"""In-memory counts of dispatched jobs used to enforce job concurrency limits.
+
+Job handlers check user and destination concurrency limits for every job that
+is ready to run. Rather than aggregating the job table for these checks, the
+handler can keep the counts in memory, updating them as it dispatches jobs and
+as these jobs finish, and recount them from the database periodically to pick
+up the jobs dispatched and finished by other handlers.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import (
+    Dict,
+    Iterable,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from galaxy.model import Job
+
+# Jobs in these states count towards the per-destination limits, the user
+# limit also counts resubmitted jobs.
+DESTINATION_COUNTED_STATES = (Job.states.QUEUED, Job.states.RUNNING)
+USER_COUNTED_STATES = DESTINATION_COUNTED_STATES + (Job.states.RESUBMITTED,)
+
+
+class CountedJob(NamedTuple):
+    user_id: Optional[int]
+    destination_id: Optional[str]
+    counts_for_destination: bool
+
+
+class JobConcurrencyCounter:
+    """Counts of queued and running jobs per user, per user and destination and per destination.
+
+    Lookups are constant time. Jobs are added when dispatched by this handler
+    and removed when they reach a final state, and the counts are rebuilt from
+    the database every ``reconcile_interval`` seconds. Removal can happen on job
+    runner threads, so updates are guarded by a lock.
+    """
+
+    def __init__(self, reconcile_interval: float):
+        self.reconcile_interval = reconcile_interval
+        self._lock = threading.Lock()
+        self._jobs: Dict[int, CountedJob] = {}
+        self._user_counts: Dict[Optional[int], int] = defaultdict(int)
+        self._user_destination_counts: Dict[Optional[int], Dict[Optional[str], int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+        self._destination_counts: Dict[Optional[str], int] = defaultdict(int)
+        self._last_reconcile: Optional[float] = None
+
+    def reconcile_due(self, now: Optional[float] = None) -> bool:
+        if self._last_reconcile is None:
+            return True
+        now = time.monotonic() if now is None else now
+        return now - self._last_reconcile >= self.reconcile_interval
+
+    def reconcile(
+        self, active_jobs: Iterable[Tuple[int, Optional[int], Optional[str], str]], now: Optional[float] = None
+    ) -> None:
+        """Replace the counts with ``(job_id, user_id, destination_id, state)`` of the active jobs."""
+        with self._lock:
+            self._jobs.clear()
+            self._user_counts.clear()
+            self._user_destination_counts.clear()
+            self._destination_counts.clear()
+            for job_id, user_id, destination_id, state in active_jobs:
+                if state in USER_COUNTED_STATES:
+                    self._add(job_id, CountedJob(user_id, destination_id, state in DESTINATION_COUNTED_STATES))
+        self._last_reconcile = time.monotonic() if now is None else now
+
+    def add(self, job_id: int, user_id: Optional[int], destination_id: Optional[str]) -> None:
+        """Count a job dispatched to ``destination_id``, replacing any previous count of the job."""
+        with self._lock:
+            self._remove(job_id)
+            self._add(job_id, CountedJob(user_id, destination_id, True))
+
+    def remove(self, job_id: int) -> None:
+        """Stop counting a job, no-op if it is not counted."""
+        with self._lock:
+            self._remove(job_id)
+
+    def _add(self, job_id: int, counted: CountedJob) -> None:
+        self._jobs[job_id] = counted
+        if counted.user_id is not None:
+            self._user_counts[counted.user_id] += 1
+        if counted.counts_for_destination:
+            self._user_destination_counts[counted.user_id][counted.destination_id] += 1
+            self._destination_counts[counted.destination_id] += 1
+
+    def _remove(self, job_id: int) -> None:
+        counted = self._jobs.pop(job_id, None)
+        if counted is None:
+            return
+        if counted.user_id is not None:
+            self._user_counts[counted.user_id] -= 1
+        if counted.counts_for_destination:
+            self._user_destination_counts[counted.user_id][counted.destination_id] -= 1
+            self._destination_counts[counted.destination_id] -= 1
+
+    def user_job_count(self, user_id: Optional[int]) -> int:
+        return self._user_counts.get(user_id, 0)
+
+    def user_job_count_per_destination(self, user_id: Optional[int]) -> Dict[Optional[str], int]:
+        with self._lock:
+            return dict(self._user_destination_counts.get(user_id, {}))
+
+    def total_job_count_per_destination(self) -> Dict[Optional[str], int]:
+        with self._lock:
+            return dict(self._destination_counts)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
@@ -13,6 +13,7 @@ from queue import (
 from typing import (
     Dict,
     List,
+    Optional,
     Tuple,
     Type,
     Union,
@@ -36,14 +37,23 @@ from galaxy.jobs import (
     JobWrapper,
     TaskWrapper,
 )
+from galaxy.jobs.concurrency import (
+    JobConcurrencyCounter,
+    USER_COUNTED_STATES,
+)
 from galaxy.jobs.mapper import JobNotReadyException
+from galaxy.jobs.readiness import JobReadinessTracker
 from galaxy.managers.jobs import get_jobs_to_check_at_startup
 from galaxy.model.base import (
     check_database_connection,
     transaction,
 )
+from galaxy.model.orm.now import now
 from galaxy.structured_app import MinimalManagerApp
-from galaxy.util import unicodify
+from galaxy.util import (
+    chunk_iterable,
+    unicodify,
+)
 from galaxy.util.custom_logging import get_logger
 from galaxy.util.monitors import Monitors
 from galaxy.web_stack.handlers import HANDLER_ASSIGNMENT_METHODS
@@ -72,6 +82,9 @@ log = get_logger(__name__)
     "user_over_quota",
     "user_over_total_walltime",
 )
+# Jobs and datasets updated up to this long before the previous handler loop are checked again, so
+# changes committed some time after being timestamped are not missed by the input readiness tracking
+READINESS_CHANGE_OVERLAP = datetime.timedelta(seconds=60)
 DEFAULT_JOB_RUNNER_FAILURE_MESSAGE = "Unable to run job due to a misconfiguration of the Galaxy job running system.  Please contact a site administrator."
 
 
@@ -94,7 +107,7 @@ class JobHandler(JobHandlerI):
         self.dispatcher = DefaultJobDispatcher(app)
         # Queues for starting and stopping jobs
         self.job_queue = JobHandlerQueue(app, self.dispatcher)
-        self.job_stop_queue = JobHandlerStopQueue(app, self.dispatcher)
+        self.job_stop_queue = JobHandlerStopQueue(app, self.dispatcher, job_counter=self.job_queue.job_counter)
 
     def start(self):
         self.dispatcher.start()
@@ -237,6 +250,8 @@ class BaseJobHandlerQueue(Monitors):
         self.parent_pid = os.getpid()
         # This queue is not used if track_jobs_in_database is True.
         self.queue: Queue[Tuple[int, str]] = Queue()
+        # In-memory concurrency counts, released by job wrappers when their jobs finish
+        self.job_counter: Optional[JobConcurrencyCounter] = None
 
 
 class JobHandlerQueue(BaseJobHandlerQueue):
@@ -251,10 +266,18 @@ class JobHandlerQueue(BaseJobHandlerQueue):
 
         # Initialize structures for handling job limits
         self.__clear_job_count()
+        job_count_reconcile_interval = app.config.job_count_reconcile_interval
+        if job_count_reconcile_interval:
+            self.job_counter = JobConcurrencyCounter(job_count_reconcile_interval)
         # Contains job ids for jobs that are waiting (only use from monitor thread)
         self.waiting_jobs: List[int] = []
         # Contains wrappers of jobs that are limited or ready (so they aren't created unnecessarily/multiple times)
         self.job_wrappers: Dict[int, JobWrapper] = {}
+        # Outstanding inputs of new jobs, if tracked incrementally instead of queried on every iteration
+        self.readiness = None
+        self._readiness_changed_since = None
+        if self.track_jobs_in_database and self.app.job_config.handler_ready_sweep_interval:
+            self.readiness = JobReadinessTracker(self.app.job_config.handler_ready_sweep_interval)
         name = "JobHandlerQueue.monitor_thread"
         self._init_monitor_thread(name, target=self.__monitor, config=app.config)
         self.job_grabber = None
@@ -410,70 +433,10 @@ class JobHandlerQueue(BaseJobHandlerQueue):
         jobs_to_check = []
         resubmit_jobs = []
         if self.track_jobs_in_database:
-            # Clear the session so we get fresh states for job and all datasets
-            self.sa_session.expunge_all()
-            # Fetch all new jobs
-            hda_not_ready = (
-                self.sa_session.query(model.Job.id)
-                .enable_eagerloads(False)
-                .join(model.JobToInputDatasetAssociation)
-                .join(model.HistoryDatasetAssociation)
-                .join(model.Dataset)
-                .filter(
-                    and_(
-                        model.Job.state == model.Job.states.NEW, model.Dataset.state.in_(model.Dataset.non_ready_states)
-                    )
-                )
-                .subquery()
-            )
-            ldda_not_ready = (
-                self.sa_session.query(model.Job.id)
-                .enable_eagerloads(False)
-                .join(model.JobToInputLibraryDatasetAssociation)
-                .join(model.LibraryDatasetDatasetAssociation)
-                .join(model.Dataset)
-                .filter(
-                    and_(
-                        model.Job.state == model.Job.states.NEW, model.Dataset.state.in_(model.Dataset.non_ready_states)
-                    )
-                )
-                .subquery()
-            )
-            coalesce_exp = func.coalesce(
-                model.Job.table.c.user_id, model.Job.table.c.session_id
-            )  # accommodate jobs by anonymous users
-            rank = func.rank().over(partition_by=coalesce_exp, order_by=model.Job.table.c.id).label("rank")
-            job_filter_conditions = (
-                (model.Job.state == model.Job.states.NEW),
-                (model.Job.handler == self.app.config.server_name),
-                ~model.Job.table.c.id.in_(select(hda_not_ready)),
-                ~model.Job.table.c.id.in_(select(ldda_not_ready)),
-            )
-            if self.app.config.user_activation_on:
-                job_filter_conditions = job_filter_conditions + (
-                    or_((model.Job.user_id == null()), (model.User.active == true())),
-                )
-            if self.sa_session.bind.name == "sqlite":
-                query_objects = (model.Job,)
-            else:
-                query_objects = (model.Job, rank)
-            ready_query = (
-                self.sa_session.query(*query_objects)
-                .enable_eagerloads(False)
-                .outerjoin(model.User)
-                .filter(and_(*job_filter_conditions))
-                .order_by(model.Job.id)
-            )
-            if self.sa_session.bind.name == "sqlite":
-                jobs_to_check = ready_query.all()
+            if self.readiness is not None:
+                jobs_to_check = self.__get_tracked_ready_jobs()
             else:
-                ranked = ready_query.subquery()
-                jobs_to_check = (
-                    self.sa_session.query(model.Job)
-                    .join(ranked, model.Job.id == ranked.c.id)
-                    .filter(ranked.c.rank <= self.app.job_config.handler_ready_window_size)
-                    .all()
-                )
+                jobs_to_check = self.__get_ready_jobs()
             # Filter jobs with invalid input states
             jobs_to_check = self.__filter_jobs_with_invalid_input_states(jobs_to_check)
             # Fetch all "resubmit" jobs
@@ -513,7 +476,7 @@ class JobHandlerQueue(BaseJobHandlerQueue):
             # Reassemble resubmit job destination from persisted value
             jw = self.__recover_job_wrapper(job)
             if jw.is_ready_for_resubmission(job):
-                self.increase_running_job_count(job.user_id, jw.job_destination.id)
+                self.increase_running_job_count(job.user_id, jw.job_destination.id, job_id=job.id)
                 self.dispatcher.put(jw)
         # Iterate over new and waiting jobs and look for any that are
         # ready to run
@@ -585,6 +548,183 @@ class JobHandlerQueue(BaseJobHandlerQueue):
         with transaction(self.sa_session):
             self.sa_session.commit()
 
+    def __get_ready_jobs(self):
+        """
+        Query for all new jobs assigned to this handler whose inputs are ready, at most
+        ``handler_ready_window_size`` per user.
+        """
+        # Clear the session so we get fresh states for job and all datasets
+        self.sa_session.expunge_all()
+        # Fetch all new jobs
+        hda_not_ready = (
+            self.sa_session.query(model.Job.id)
+            .enable_eagerloads(False)
+            .join(model.JobToInputDatasetAssociation)
+            .join(model.HistoryDatasetAssociation)
+            .join(model.Dataset)
+            .filter(
+                and_(model.Job.state == model.Job.states.NEW, model.Dataset.state.in_(model.Dataset.non_ready_states))
+            )
+            .subquery()
+        )
+        ldda_not_ready = (
+            self.sa_session.query(model.Job.id)
+            .enable_eagerloads(False)
+            .join(model.JobToInputLibraryDatasetAssociation)
+            .join(model.LibraryDatasetDatasetAssociation)
+            .join(model.Dataset)
+            .filter(
+                and_(model.Job.state == model.Job.states.NEW, model.Dataset.state.in_(model.Dataset.non_ready_states))
+            )
+            .subquery()
+        )
+        coalesce_exp = func.coalesce(
+            model.Job.table.c.user_id, model.Job.table.c.session_id
+        )  # accommodate jobs by anonymous users
+        rank = func.rank().over(partition_by=coalesce_exp, order_by=model.Job.table.c.id).label("rank")
+        job_filter_conditions = (
+            (model.Job.state == model.Job.states.NEW),
+            (model.Job.handler == self.app.config.server_name),
+            ~model.Job.table.c.id.in_(select(hda_not_ready)),
+            ~model.Job.table.c.id.in_(select(ldda_not_ready)),
+        )
+        if self.app.config.user_activation_on:
+            job_filter_conditions = job_filter_conditions + (
+                or_((model.Job.user_id == null()), (model.User.active == true())),
+            )
+        if self.sa_session.bind.name == "sqlite":
+            query_objects = (model.Job,)
+        else:
+            query_objects = (model.Job, rank)
+        ready_query = (
+            self.sa_session.query(*query_objects)
+            .enable_eagerloads(False)
+            .outerjoin(model.User)
+            .filter(and_(*job_filter_conditions))
+            .order_by(model.Job.id)
+        )
+        if self.sa_session.bind.name == "sqlite":
+            jobs_to_check = ready_query.all()
+        else:
+            ranked = ready_query.subquery()
+            jobs_to_check = (
+                self.sa_session.query(model.Job)
+                .join(ranked, model.Job.id == ranked.c.id)
+                .filter(ranked.c.rank <= self.app.job_config.handler_ready_window_size)
+                .all()
+            )
+        return jobs_to_check
+
+    def __get_tracked_ready_jobs(self):
+        """
+        Update the outstanding inputs of new jobs from the jobs and datasets that changed since the
+        previous iteration (or rebuild them with a full sweep every ``handler_ready_sweep_interval``
+        seconds) and load the jobs that are ready, at most ``handler_ready_window_size`` per user.
+        """
+        readiness = self.readiness
+        changed_since = self._readiness_changed_since
+        query_time = now()
+        if readiness.sweep_due():
+            log.debug("Rebuilding input readiness of new jobs assigned to handler: %s", self.app.config.server_name)
+            readiness.reset()
+            changed_since = None
+        new_jobs = self.__get_new_job_owners(changed_since)
+        if changed_since is not None:
+            new_jobs = {job_id: owner for job_id, owner in new_jobs.items() if not readiness.is_tracked(job_id)}
+        outstanding = self.__get_outstanding_inputs(new_jobs if changed_since is not None else None)
+        for job_id, owner in new_jobs.items():
+            readiness.track(job_id, owner, outstanding.get(job_id, ()))
+        if changed_since is not None:
+            ready_datasets = (
+                self.sa_session.query(model.Dataset.id)
+                .filter(
+                    and_(
+                        model.Dataset.update_time >= changed_since,
+                        model.Dataset.state.in_(model.Dataset.ready_states),
+                    )
+                )
+                .all()
+            )
+            readiness.datasets_ready(row[0] for row in ready_datasets)
+        # Overlap the next window so changes committed after being timestamped are not missed
+        self._readiness_changed_since = query_time - READINESS_CHANGE_OVERLAP
+        ready_job_ids = readiness.ready_job_ids(self.app.job_config.handler_ready_window_size)
+        jobs_to_check = []
+        for job_ids in chunk_iterable(ready_job_ids):
+            jobs = (
+                self.sa_session.query(model.Job, model.User.active)
+                .enable_eagerloads(False)
+                .outerjoin(model.User)
+                .filter(
+                    and_(
+                        model.Job.id.in_(job_ids),
+                        model.Job.state == model.Job.states.NEW,
+                        model.Job.handler == self.app.config.server_name,
+                    )
+                )
+                .all()
+            )
+            loaded_job_ids = set()
+            for job, user_active in jobs:
+                loaded_job_ids.add(job.id)
+                if self.app.config.user_activation_on and job.user_id is not None and not user_active:
+                    continue
+                jobs_to_check.append(job)
+            # Jobs no longer new or reassigned to another handler
+            for job_id in set(job_ids) - loaded_job_ids:
+                readiness.discard(job_id)
+        log.trace("Tracking input readiness of %d new jobs, %d ready jobs to check", len(readiness), len(jobs_to_check))
+        return sorted(jobs_to_check, key=lambda job: job.id)
+
+    def __get_new_job_owners(self, changed_since=None):
+        """
+        Return a mapping of new job ids assigned to this handler (updated since ``changed_since`` if
+        set) to the user (or anonymous session) that owns them.
+        """
+        query = self.sa_session.query(model.Job.id, model.Job.user_id, model.Job.session_id).filter(
+            and_(
+                model.Job.state == model.Job.states.NEW,
+                model.Job.handler == self.app.config.server_name,
+            )
+        )
+        if changed_since is not None:
+            query = query.filter(model.Job.update_time >= changed_since)
+        # accommodate jobs by anonymous users
+        return {job_id: user_id if user_id is not None else session_id for job_id, user_id, session_id in query}
+
+    def __get_outstanding_inputs(self, job_ids=None):
+        """
+        Return a mapping of job ids to the ids of their input datasets that are not ready yet, for
+        ``job_ids`` or all new jobs assigned to this handler.
+        """
+        outstanding = defaultdict(set)
+        if job_ids is not None:
+            conditions = [model.Job.id.in_(chunk) for chunk in chunk_iterable(job_ids)]
+        else:
+            conditions = [
+                and_(
+                    model.Job.state == model.Job.states.NEW,
+                    model.Job.handler == self.app.config.server_name,
+                )
+            ]
+        for job_to_input, input_association in [
+            (model.JobToInputDatasetAssociation, model.HistoryDatasetAssociation),
+            (model.JobToInputLibraryDatasetAssociation, model.LibraryDatasetDatasetAssociation),
+        ]:
+            for condition in conditions:
+                rows = (
+                    self.sa_session.query(model.Job.id, model.Dataset.id)
+                    .enable_eagerloads(False)
+                    .join(job_to_input)
+                    .join(input_association)
+                    .join(model.Dataset)
+                    .filter(and_(condition, model.Dataset.state.in_(model.Dataset.non_ready_states)))
+                    .all()
+                )
+                for job_id, dataset_id in rows:
+                    outstanding[job_id].add(dataset_id)
+        return outstanding
+
     def __filter_jobs_with_invalid_input_states(self, jobs):
         """
         Takes  list of jobs and filters out jobs whose input datasets are in invalid state and
@@ -697,7 +837,7 @@ class JobHandlerQueue(BaseJobHandlerQueue):
 
         if state == JOB_READY:
             # PASS.  increase usage by one job (if caching) so that multiple jobs aren't dispatched on this queue iteration
-            self.increase_running_job_count(job.user_id, job_destination.id)
+            self.increase_running_job_count(job.user_id, job_destination.id, job_id=job.id)
             for job_to_input_dataset_association in job.input_datasets:
                 # We record the input dataset version, now that we know the inputs are ready
                 if job_to_input_dataset_association.dataset:
@@ -819,8 +959,28 @@ class JobHandlerQueue(BaseJobHandlerQueue):
         self.user_job_count = None
         self.user_job_count_per_destination = None
         self.total_job_count_per_destination = None
+        if self.job_counter is not None and self.job_counter.reconcile_due():
+            self.__reconcile_job_counter()
+
+    def __reconcile_job_counter(self):
+        """
+        Recount the jobs counting towards concurrency limits from the database, including those dispatched and
+        finished by other handlers since the previous reconciliation.
+        """
+        result = self.sa_session.execute(
+            select(
+                model.Job.table.c.id,
+                model.Job.table.c.user_id,
+                model.Job.table.c.destination_id,
+                model.Job.table.c.state,
+            ).where(model.Job.table.c.state.in_(USER_COUNTED_STATES))
+        )
+        self.job_counter.reconcile(result)
+        log.debug("Reconciled job concurrency counts, %d queued or running jobs", len(self.job_counter))
 
     def get_user_job_count(self, user_id):
+        if self.job_counter is not None:
+            return self.job_counter.user_job_count(user_id)
         self.__cache_user_job_count()
         # This could have been incremented by a previous job dispatched on this iteration, even if we're not caching
         rval = self.user_job_count.get(user_id, 0)
@@ -862,6 +1022,8 @@ class JobHandlerQueue(BaseJobHandlerQueue):
             self.user_job_count = {}
 
     def get_user_job_count_per_destination(self, user_id):
+        if self.job_counter is not None:
+            return self.job_counter.user_job_count_per_destination(user_id)
         self.__cache_user_job_count_per_destination()
         cached = self.user_job_count_per_destination.get(user_id, {})
         if self.app.config.cache_user_job_count:
@@ -910,7 +1072,10 @@ class JobHandlerQueue(BaseJobHandlerQueue):
         elif self.user_job_count_per_destination is None:
             self.user_job_count_per_destination = {}
 
-    def increase_running_job_count(self, user_id, destination_id):
+    def increase_running_job_count(self, user_id, destination_id, job_id=None):
+        if self.job_counter is not None and job_id is not None:
+            self.job_counter.add(job_id, user_id, destination_id)
+            return
         if (
             self.app.job_config.limits.registered_user_concurrent_jobs
             or self.app.job_config.limits.anonymous_user_concurrent_jobs
@@ -1003,6 +1168,8 @@ class JobHandlerQueue(BaseJobHandlerQueue):
                 self.total_job_count_per_destination[row["destination_id"]] = row["job_count"]
 
     def get_total_job_count_per_destination(self):
+        if self.job_counter is not None:
+            return self.job_counter.total_job_count_per_destination()
         self.__cache_total_job_count_per_destination()
         # Always use caching (at worst a job will have to wait one iteration,
         # and this would be more fair anyway as it ensures FIFO scheduling,
@@ -1060,9 +1227,10 @@ class JobHandlerStopQueue(BaseJobHandlerQueue):
     A queue for jobs which need to be terminated prematurely.
     """
 
-    def __init__(self, app: MinimalManagerApp, dispatcher):
+    def __init__(self, app: MinimalManagerApp, dispatcher, job_counter: Optional[JobConcurrencyCounter] = None):
         super().__init__(app, dispatcher)
         # self.queue contains tuples: (job_id, error message)
+        self.job_counter = job_counter
 
         name = "JobHandlerStopQueue.monitor_thread"
         self._init_monitor_thread(name, target=self.__monitor, config=app.config)
@@ -1094,11 +1262,15 @@ class JobHandlerStopQueue(BaseJobHandlerQueue):
         job.set_final_state(final_state, supports_skip_locked=self.app.application_stack.supports_skip_locked())
         session.add(job)
         session.flush()
+        if self.job_counter is not None:
+            self.job_counter.remove(job.id)
 
     def __stop(self, job, session):
         job.set_state(job.states.STOPPED)
         session.add(job)
         session.flush()
+        if self.job_counter is not None:
+            self.job_counter.remove(job.id)
 
     def __monitor_step(self):
         """
@@ -0,0 +1,113 @@
+"""Incremental tracking of which new jobs have all of their inputs ready.
+
+Instead of re-running a query over every ``new`` job on each handler loop, the
+job handler can keep the set of input datasets each job is still waiting on.
+The datasets that changed since the last loop are used to update these
+outstanding inputs, so only the jobs whose inputs just became ready (plus those
+already ready but deferred by limits) have to be evaluated. A full sweep
+rebuilds the state at a low frequency to pick up anything the incremental
+updates missed.
+"""
+
+import time
+from collections import defaultdict
+from typing import (
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Set,
+)
+
+
+class JobReadinessTracker:
+    """Keeps the outstanding (not yet ready) input datasets of new jobs.
+
+    ``owner`` is the key used to limit the number of ready jobs evaluated per
+    user on each loop (the user id, or the session id for anonymous users).
+    Only used from the handler's monitor thread, so it is not thread-safe.
+    """
+
+    def __init__(self, sweep_interval: float):
+        self.sweep_interval = sweep_interval
+        self._owners: Dict[int, Hashable] = {}
+        self._outstanding: Dict[int, Set[int]] = {}
+        self._dependents: Dict[int, Set[int]] = defaultdict(set)
+        self._ready: Set[int] = set()
+        self._last_sweep: Optional[float] = None
+
+    def sweep_due(self, now: Optional[float] = None) -> bool:
+        if self._last_sweep is None:
+            return True
+        now = time.monotonic() if now is None else now
+        return now - self._last_sweep >= self.sweep_interval
+
+    def reset(self, now: Optional[float] = None) -> None:
+        """Forget all tracked jobs, called when starting a full sweep."""
+        self._owners.clear()
+        self._outstanding.clear()
+        self._dependents.clear()
+        self._ready.clear()
+        self._last_sweep = time.monotonic() if now is None else now
+
+    def track(self, job_id: int, owner: Hashable, outstanding_dataset_ids: Iterable[int]) -> None:
+        """Set the input datasets ``job_id`` is waiting on (none if the job is ready)."""
+        self.discard(job_id)
+        outstanding = set(outstanding_dataset_ids)
+        self._owners[job_id] = owner
+        self._outstanding[job_id] = outstanding
+        for dataset_id in outstanding:
+            self._dependents[dataset_id].add(job_id)
+        if not outstanding:
+            self._ready.add(job_id)
+
+    def discard(self, job_id: int) -> None:
+        self._owners.pop(job_id, None)
+        self._ready.discard(job_id)
+        for dataset_id in self._outstanding.pop(job_id, ()):
+            dependents = self._dependents.get(dataset_id)
+            if dependents is not None:
+                dependents.discard(job_id)
+                if not dependents:
+                    del self._dependents[dataset_id]
+
+    def is_tracked(self, job_id: int) -> bool:
+        return job_id in self._outstanding
+
+    def outstanding_count(self, job_id: int) -> int:
+        return len(self._outstanding.get(job_id, ()))
+
+    def datasets_ready(self, dataset_ids: Iterable[int]) -> List[int]:
+        """Mark ``dataset_ids`` as ready.
+
+        Return the ids of the jobs that have no outstanding inputs left as a
+        result.
+        """
+        newly_ready = set()
+        for dataset_id in dataset_ids:
+            for job_id in self._dependents.pop(dataset_id, ()):
+                outstanding = self._outstanding[job_id]
+                outstanding.discard(dataset_id)
+                if not outstanding:
+                    newly_ready.add(job_id)
+        self._ready.update(newly_ready)
+        return sorted(newly_ready)
+
+    def ready_job_ids(self, window_size: Optional[int] = None) -> List[int]:
+        """Return the ids of the jobs with no outstanding inputs, oldest first.
+
+        At most ``window_size`` jobs are returned per owner.
+        """
+        per_owner: Dict[Hashable, int] = defaultdict(int)
+        ready = []
+        for job_id in sorted(self._ready):
+            owner = self._owners[job_id]
+            if window_size is not None and per_owner[owner] >= window_size:
+                continue
+            per_owner[owner] += 1
+            ready.append(job_id)
+        return ready
+
+    def __len__(self) -> int:
+        return len(self._outstanding)
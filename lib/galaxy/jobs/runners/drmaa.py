@@ -3,11 +3,16 @@ Job control via the DRMAA API.
 """
 
 import json
-import logging
 import os
 import shlex
 import string
 import time
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+)
 
 from galaxy import model
 from galaxy.jobs import JobDestination
@@ -21,14 +26,17 @@ from galaxy.util import (
     commands,
     unicodify,
 )
+from galaxy.util.custom_logging import get_logger
 
 drmaa = None
 
-log = logging.getLogger(__name__)
+log = get_logger(__name__)
 
 __all__ = ("DRMAAJobRunner",)
 
 RETRY_EXCEPTIONS_LOWER = frozenset({"invalidjobexception", "internalexception"})
+# with adaptive polling a job is checked again after this fraction of the time it has been watched
+ADAPTIVE_POLL_AGE_FRACTION = 0.1
 
 
 class DRMAAJobRunner(AsynchronousJobRunner):
@@ -43,7 +51,10 @@ class DRMAAJobRunner(AsynchronousJobRunner):
         """Start the job runner"""
         global drmaa
 
-        runner_param_specs = {"drmaa_library_path": dict(map=str, default=os.environ.get("DRMAA_LIBRARY_PATH", None))}
+        runner_param_specs = {
+            "drmaa_library_path": dict(map=str, default=os.environ.get("DRMAA_LIBRARY_PATH", None)),
+            "adaptive_poll_max_interval": dict(map=int, valid=lambda x: int(x) >= 0, default=0),
+        }
         for retry_exception in RETRY_EXCEPTIONS_LOWER:
             runner_param_specs[f"{retry_exception}_state"] = dict(
                 map=str, valid=lambda x: x in (model.Job.states.OK, model.Job.states.ERROR), default=model.Job.states.OK
@@ -258,7 +269,31 @@ class DRMAAJobRunner(AsynchronousJobRunner):
             if job_state != model.Job.states.DELETED:
                 self.work_queue.put((self.finish_job, ajs))
 
-    def check_watched_item(self, ajs, new_watched):
+    def _bulk_job_states(self, external_job_ids: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Return the DRMAA states of many jobs at once, keyed by external job id.
+
+        DRMAA itself only allows querying jobs one by one, subclasses for DRMs
+        with a cheaper bulk query can override this. Jobs missing from the
+        result are checked individually with the DRMAA session.
+        """
+        return None
+
+    def _poll_deferred(self, ajs, now: float) -> bool:
+        """Whether adaptive polling skips checking ``ajs`` in this monitor cycle."""
+        return getattr(ajs, "next_poll_time", 0) > now
+
+    def _schedule_next_poll(self, ajs, now: float) -> None:
+        max_interval = self.runner_params.adaptive_poll_max_interval
+        if not max_interval:
+            return
+        first_polled = getattr(ajs, "first_poll_time", None)
+        if first_polled is None:
+            first_polled = ajs.first_poll_time = now
+        # long waiting or running jobs are unlikely to change state soon, check them less often
+        ajs.next_poll_time = now + min(max_interval, (now - first_polled) * ADAPTIVE_POLL_AGE_FRACTION)
+
+    def check_watched_item(self, ajs, new_watched, bulk_states: Optional[Dict[str, Any]] = None):
         """
         look at a single watched job, determine its state, and deal with errors
         that could happen in this process. to be called from check_watched_items()
@@ -277,13 +312,19 @@ class DRMAAJobRunner(AsynchronousJobRunner):
 
         Note that None is returned in all cases where the loop in check_watched_items
         is to be continued
+
+        If ``bulk_states`` holds the state of the job it is used instead of
+        querying the DRMAA session.
         """
         external_job_id = ajs.job_id
         galaxy_id_tag = ajs.job_wrapper.get_id_tag()
         state = None
         try:
             assert external_job_id not in (None, "None"), f"({galaxy_id_tag}/{external_job_id}) Invalid job id"
-            state = self.ds.job_status(external_job_id)
+            if bulk_states and external_job_id in bulk_states:
+                state = bulk_states[external_job_id]
+            else:
+                state = self.ds.job_status(external_job_id)
             # Reset exception retries
             for retry_exception in RETRY_EXCEPTIONS_LOWER:
                 setattr(ajs, f"{retry_exception}_retries", 0)
@@ -337,12 +378,29 @@ class DRMAAJobRunner(AsynchronousJobRunner):
         Called by the monitor thread to look at each watched job and deal
         with state changes.
         """
+        monitor_cycle_timer = self.app.execution_timer_factory.get_timer(
+            f"internal.galaxy.jobs.runners.{self.runner_name.lower()}.monitor_cycle",
+            f"{self.runner_name} monitor cycle checked ${{checked}} of ${{watched}} watched jobs.",
+        )
+        now = time.time()
         new_watched = []
+        due = []
         for ajs in self.watched:
+            if self._poll_deferred(ajs, now):
+                new_watched.append(ajs)
+            else:
+                due.append(ajs)
+        bulk_states = None
+        if due:
+            try:
+                bulk_states = self._bulk_job_states([ajs.job_id for ajs in due])
+            except Exception:
+                log.exception("Bulk job status check failed, checking jobs individually")
+        for ajs in due:
             external_job_id = ajs.job_id
             galaxy_id_tag = ajs.job_wrapper.get_id_tag()
             old_state = ajs.old_state
-            state = self.check_watched_item(ajs, new_watched)
+            state = self.check_watched_item(ajs, new_watched, bulk_states)
             if state is None:
                 continue
             if state != old_state:
@@ -363,9 +421,11 @@ class DRMAAJobRunner(AsynchronousJobRunner):
                 self.work_queue.put((self.fail_job, ajs))
                 continue
             ajs.old_state = state
+            self._schedule_next_poll(ajs, now)
             new_watched.append(ajs)
         # Replace the watch list with the updated version
         self.watched = new_watched
+        log.trace(monitor_cycle_timer.to_str(checked=len(due), watched=len(new_watched)))
 
     def stop_job(self, job_wrapper):
         """Attempts to delete a job from the DRM queue"""
@@ -4,10 +4,17 @@ SLURM job control via the DRMAA API.
 
 import os
 import time
+from collections import defaultdict
+from typing import (
+    Dict,
+    List,
+    Optional,
+)
 
 from galaxy import model
 from galaxy.jobs.runners.drmaa import DRMAAJobRunner
 from galaxy.util import (
+    asbool,
     commands,
     unicodify,
 )
@@ -35,11 +42,102 @@ SLURM_MEMORY_LIMIT_EXCEEDED_PARTIAL_WARNINGS = [
 OUT_OF_MEMORY_MSG = "This job was terminated because it used more memory than it was allocated."
 PROBABLY_OUT_OF_MEMORY_MSG = "This job was cancelled probably because it used more memory than it was allocated."
 
+# Maximum number of job ids passed to a single squeue call in bulk status mode
+SQUEUE_MAX_JOB_IDS = 500
+# SLURM job states of jobs that have not terminated yet
+SLURM_ACTIVE_STATES = frozenset(
+    [
+        "PENDING",
+        "CONFIGURING",
+        "RUNNING",
+        "COMPLETING",
+        "RESIZING",
+        "REQUEUED",
+        "REQUEUE_FED",
+        "REQUEUE_HOLD",
+        "SIGNALING",
+        "STAGE_OUT",
+        "SUSPENDED",
+        "STOPPED",
+        "RESV_DEL_HOLD",
+    ]
+)
+
+
+def parse_squeue_output(stdout: str) -> Dict[str, str]:
+    """Parse ``squeue --noheader --format='%i %T'`` output into a job id to SLURM state mapping.
+
+    >>> parse_squeue_output("CLUSTER: c1\\n101 RUNNING\\n102 PENDING\\n")
+    {'101': 'RUNNING', '102': 'PENDING'}
+    """
+    states = {}
+    for line in stdout.splitlines():
+        fields = line.split()
+        if len(fields) != 2 or fields[0] == "CLUSTER:":
+            continue
+        states[fields[0]] = fields[1]
+    return states
+
 
 class SlurmJobRunner(DRMAAJobRunner):
     runner_name = "SlurmRunner"
     restrict_job_name_length = False
 
+    def __init__(self, app, nworkers, **kwargs):
+        runner_param_specs = {"bulk_status": dict(map=asbool, default=False)}
+        if "runner_param_specs" not in kwargs:
+            kwargs["runner_param_specs"] = {}
+        kwargs["runner_param_specs"].update(runner_param_specs)
+        super().__init__(app, nworkers, **kwargs)
+        # SLURM states of the watched jobs seen by the last bulk status check
+        self._slurm_states: Dict[str, str] = {}
+
+    def _drmaa_state_for_slurm_state(self, slurm_state: str):
+        """Map active SLURM states to DRMAA states, terminal jobs are left to DRMAA to get exit details."""
+        if slurm_state == "PENDING":
+            return self.drmaa_job_states.QUEUED_ACTIVE
+        elif slurm_state in ("SUSPENDED", "STOPPED"):
+            return self.drmaa_job_states.USER_SUSPENDED
+        elif slurm_state in SLURM_ACTIVE_STATES and not slurm_state.startswith(("REQUEUE", "RESV_DEL")):
+            return self.drmaa_job_states.RUNNING
+        elif slurm_state in SLURM_ACTIVE_STATES:
+            return self.drmaa_job_states.SYSTEM_ON_HOLD
+        return None
+
+    def _bulk_job_states(self, external_job_ids: List[str]):
+        """Get the state of all watched jobs with one squeue call per cluster (and batch of job ids)."""
+        self._slurm_states = {}
+        if not self.runner_params.bulk_status:
+            return None
+        job_ids_by_cluster: Dict[Optional[str], List[str]] = defaultdict(list)
+        for external_job_id in external_job_ids:
+            if "." in external_job_id:
+                # custom slurm-drmaa-with-cluster-support job id syntax
+                job_id, cluster = external_job_id.split(".", 1)
+                job_ids_by_cluster[cluster].append(job_id)
+            else:
+                job_ids_by_cluster[None].append(external_job_id)
+        states = {}
+        for cluster, job_ids in job_ids_by_cluster.items():
+            for i in range(0, len(job_ids), SQUEUE_MAX_JOB_IDS):
+                cmd = ["squeue", "--noheader", "--states=all", "--format=%i %T"]
+                if cluster:
+                    cmd.extend(["-M", cluster])
+                cmd.append(f"--jobs={','.join(job_ids[i : i + SQUEUE_MAX_JOB_IDS])}")
+                try:
+                    stdout = commands.execute(cmd)
+                except commands.CommandLineException as e:
+                    # e.g. a job id no longer known to SLURM, these jobs are checked individually
+                    log.debug("squeue bulk status check failed, checking jobs individually: %s", e)
+                    continue
+                for job_id, slurm_state in parse_squeue_output(stdout).items():
+                    external_job_id = f"{job_id}.{cluster}" if cluster else job_id
+                    self._slurm_states[external_job_id] = slurm_state
+                    drmaa_state = self._drmaa_state_for_slurm_state(slurm_state)
+                    if drmaa_state is not None:
+                        states[external_job_id] = drmaa_state
+        return states
+
     def _complete_terminal_job(self, ajs, drmaa_state, **kwargs):
         def _get_slurm_state_with_sacct(job_id, cluster):
             cmd = ["sacct", "-n", "-o", "state%-32"]
@@ -60,7 +158,11 @@ class SlurmJobRunner(DRMAAJobRunner):
             # Strip whitespaces and the final '+' (if present), only return the first word
             return first_line.strip().rstrip("+").split()[0]
 
-        def _get_slurm_state():
+        def _get_slurm_state(use_bulk_state=False):
+            slurm_state = self._slurm_states.get(ajs.job_id)
+            if use_bulk_state and slurm_state and slurm_state not in SLURM_ACTIVE_STATES:
+                # the final state was already reported by this monitor cycle's squeue call
+                return slurm_state
             cmd = ["scontrol", "-o"]
             if "." in ajs.job_id:
                 # custom slurm-drmaa-with-cluster-support job id syntax
@@ -97,7 +199,7 @@ class SlurmJobRunner(DRMAAJobRunner):
 
         try:
             if drmaa_state == self.drmaa_job_states.FAILED:
-                slurm_state = _get_slurm_state()
+                slurm_state = _get_slurm_state(use_bulk_state=True)
                 sleep = 1
                 while slurm_state == "COMPLETING":
                     log.debug(
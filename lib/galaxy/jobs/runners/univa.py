@@ -58,7 +58,7 @@ class UnivaJobRunner(DRMAAJobRunner):
     # restrict job name length as in the DRMAAJobRunner
     # restrict_job_name_length = 15
 
-    def check_watched_item(self, ajs, new_watched):
+    def check_watched_item(self, ajs, new_watched, bulk_states=None):
         """
         get state with job_status/qstat
 
@@ -43,6 +43,8 @@ from typing import (
     cast,
     List,
     Optional,
+    Tuple,
+    TYPE_CHECKING,
 )
 
 from sqlalchemy import select
@@ -71,6 +73,9 @@ from galaxy.security.vault import UserVaultWrapper
 from galaxy.structured_app import MinimalManagerApp
 from galaxy.util import bunch
 
+if TYPE_CHECKING:
+    from galaxy.model.security import DatasetPermissionResolver
+
 
 class ProvidesAppContext:
     """For transaction-like objects to provide Galaxy convenience layer for
@@ -206,6 +211,7 @@ class ProvidesUserContext(ProvidesAppContext):
 
     galaxy_session: Optional[GalaxySession] = None
     _tag_handler: Optional[GalaxyTagHandlerSession] = None
+    _dataset_permission_resolver: Optional[Tuple[Optional[int], "DatasetPermissionResolver"]] = None
 
     @property
     def tag_handler(self):
@@ -244,6 +250,14 @@ class ProvidesUserContext(ProvidesAppContext):
             roles = []
         return roles
 
+    def get_dataset_permission_resolver(self) -> "DatasetPermissionResolver":
+        """Return the resolver of the current user's dataset permissions, shared for this transaction."""
+        user_id = self.user and self.user.id
+        if self._dataset_permission_resolver is None or self._dataset_permission_resolver[0] != user_id:
+            resolver = self.app.security_agent.dataset_permission_resolver(self.get_current_user_roles())
+            self._dataset_permission_resolver = (user_id, resolver)
+        return self._dataset_permission_resolver[1]
+
     @property
     def user_is_admin(self) -> bool:
         return self.app.config.is_admin_user(self.user)
@@ -116,16 +116,22 @@ class DatasetManager(base.ModelManager[Dataset], secured.AccessibleManagerMixin,
         """
         Is this dataset readable/viewable to user?
         """
-        if self.user_manager.is_admin(user, trans=kwargs.get("trans")):
+        trans = kwargs.get("trans")
+        if self.user_manager.is_admin(user, trans=trans):
             return True
-        if self.has_access_permission(item, user):
+        if self.has_access_permission(item, user, trans=trans):
             return True
         return False
 
-    def has_access_permission(self, dataset, user):
+    def has_access_permission(self, dataset, user, trans=None):
         """
         Return T/F if the user has role-based access to the dataset.
+
+        If `user` is the user of `trans`, permissions already loaded for the
+        transaction (e.g. for all datasets of a listing) are used.
         """
+        if trans is not None and trans.user is user:
+            return trans.get_dataset_permission_resolver().can_access(dataset)
         roles = user.all_roles_exploiting_cache() if user else []
         return self.app.security_agent.can_access_dataset(roles, dataset)
 
@@ -517,7 +523,7 @@ class DatasetAssociationManager(
         self.ensure_can_set_metadata(dataset_assoc)
         assert dataset_assoc.dataset
         path = dataset_assoc.dataset.get_file_name()
-        datatype = sniff.guess_ext(path, self.app.datatypes_registry.sniff_order)
+        datatype = sniff.guess_ext(path, self.app.datatypes_registry.sniffer_index)
         self.app.datatypes_registry.change_datatype(dataset_assoc, datatype)
         with transaction(session):
             session.commit()
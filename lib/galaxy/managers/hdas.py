@@ -8,12 +8,14 @@ history.
 import gettext
 import logging
 import os
+from collections import defaultdict
 from typing import (
     Any,
     Dict,
     List,
     Optional,
     Set,
+    Tuple,
 )
 
 from sqlalchemy import (
@@ -256,6 +258,49 @@ class HDAManager(
             with transaction(session):
                 session.commit()
 
+    def purge_many(self, hdas, user=None) -> Dict[int, str]:
+        """
+        Purge all `hdas` - in a single task if celery tasks are enabled.
+
+        Return a map of the ids of HDAs that could not be purged to the reason why.
+        """
+        self.dataset_manager.error_unless_dataset_purge_allowed()
+        if self.app.config.enable_celery_tasks:
+            from galaxy.celery.tasks import purge_hdas
+
+            purge_hdas.delay(hda_ids=[hda.id for hda in hdas], task_user_id=getattr(user, "id", None))
+            return {}
+        return self._purge_many(hdas)
+
+    def _purge_many(self, hdas) -> Dict[int, str]:
+        """
+        Purge these HDAs and the datasets underlying them, committing and
+        decreasing the space used by their owners once for all of them.
+        """
+        errors: Dict[int, str] = {}
+        quota_amount_reductions: Dict[Tuple[int, Optional[str]], int] = defaultdict(int)
+        users: Dict[int, model.User] = {}
+        for hda in hdas:
+            try:
+                user = hda.history.user or None
+                # computed one HDA after the other, as HDAs purged before affect the amount
+                quota_amount_reduction = hda.quota_amount(user) if user else 0
+                super().purge(hda, flush=False)
+            except Exception as e:
+                log.exception("Unable to purge HDA (%s)", hda.id)
+                errors[hda.id] = str(e)
+                continue
+            quota_source_info = hda.dataset.quota_source_info
+            if quota_amount_reduction and quota_source_info.use:
+                users[user.id] = user
+                quota_amount_reductions[(user.id, quota_source_info.label)] += quota_amount_reduction
+        for (user_id, label), quota_amount_reduction in quota_amount_reductions.items():
+            users[user_id].adjust_total_disk_usage(-quota_amount_reduction, label)
+        session = self.session()
+        with transaction(session):
+            session.commit()
+        return errors
+
     # .... states
     def error_if_uploading(self, hda):
         """
@@ -335,5 +335,4 @@ class HDCASerializer(DCASerializer, taggable.TaggableSerializerMixin, annotatabl
         return item.job_state_summary_dict
 
     def serialize_elements_datatypes(self, item, key, **context):
-        extensions_set = item.dataset_dbkeys_and_extensions_summary[1]
-        return list(extensions_set)
+        return list(item.elements_datatypes)
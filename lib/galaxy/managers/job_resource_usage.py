@@ -0,0 +1,337 @@
+"""Aggregate the resource usage of finished jobs collected as job metrics.
+
+Job metrics are recorded per job (see :mod:`galaxy.job_metrics`), this module
+summarizes them per tool, tool version and destination - runtime and memory
+usage percentiles, memory used vs. allocated and CPU efficiency - and derives
+resource requirements for each tool from the memory and cores its jobs
+actually used.
+
+The numeric metrics of interest are pivoted into one row per job in the
+database, so only a handful of values per job are streamed to Galaxy. Unless
+a start date is given, reports cover the last :data:`REPORT_DAYS` days, and
+at most :data:`MAX_REPORT_JOBS` of the most recently finished jobs are read.
+"""
+
+import math
+import re
+from collections import defaultdict
+from datetime import (
+    date,
+    timedelta,
+)
+from decimal import Decimal
+from typing import (
+    Any,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from sqlalchemy import (
+    and_,
+    case,
+    func,
+    select,
+)
+
+from galaxy.model import (
+    Job,
+    JobMetricNumeric,
+    YIELD_PER_ROWS,
+)
+from galaxy.model.orm.now import now
+from galaxy.model.scoped_session import galaxy_scoped_session
+
+# Days of jobs reported on if no start date is given.
+REPORT_DAYS = 30
+# Maximum number of jobs read for a report.
+MAX_REPORT_JOBS = 100_000
+
+# (plugin, metric name) of the numeric job metrics read, by the column they populate.
+RUNTIME_METRICS = (("core", "runtime_seconds"),)
+SLOTS_METRICS = (("core", "galaxy_slots"),)
+MEMORY_ALLOCATED_MB_METRICS = (("core", "galaxy_memory_mb"),)
+# Peak memory usage in bytes, the largest value recorded for a job is used.
+MEMORY_PEAK_BYTES_METRICS = (
+    ("resource_usage", "peak_memory_bytes"),
+    ("cgroup", "memory.peak"),
+    ("cgroup", "memory.max_usage_in_bytes"),
+)
+# CPU time and the factor converting it to seconds, the first value recorded for a job is used.
+CPU_TIME_METRICS = (
+    (("resource_usage", "cpu_time"), 1),
+    (("cgroup", "cpu.stat.usage_usec"), 10**-6),
+    (("cgroup", "cpuacct.usage"), 10**-9),
+)
+TOOL_SHED_TOOL_ID = re.compile(r"^(?P<repository>.+/repos/[^/]+/[^/]+/[^/]+)/[^/]+$")
+
+
+def percentile(values: List[float], percent: float) -> Optional[float]:
+    """Return the nearest-rank ``percent`` percentile of ``values``, ``None`` if empty."""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(values)))
+    return values[rank - 1]
+
+
+def _round(value: Optional[float], digits: int = 2) -> Optional[float]:
+    return None if value is None else round(value, digits)
+
+
+def _mean(values: List[float]) -> Optional[float]:
+    return sum(values) / len(values) if values else None
+
+
+class JobResourceUsage(NamedTuple):
+    runtime_seconds: Optional[float]
+    slots: Optional[float]
+    memory_allocated_mb: Optional[float]
+    memory_peak_mb: Optional[float]
+    cpu_seconds: Optional[float]
+
+    @property
+    def cores_used(self) -> Optional[float]:
+        """Average number of cores used over the runtime of the job."""
+        if self.cpu_seconds is None or not self.runtime_seconds:
+            return None
+        return self.cpu_seconds / self.runtime_seconds
+
+    @property
+    def cpu_efficiency(self) -> Optional[float]:
+        """Fraction of the allocated slots used over the runtime of the job."""
+        cores_used = self.cores_used
+        if cores_used is None or not self.slots:
+            return None
+        return cores_used / self.slots
+
+
+class ResourceUsageAccumulator:
+    """Collect the resource usage of a group of jobs and summarize it."""
+
+    def __init__(self):
+        self.jobs = 0
+        self.runtime_seconds: List[float] = []
+        self.slots: List[float] = []
+        self.memory_allocated_mb: List[float] = []
+        self.memory_peak_mb: List[float] = []
+        self.memory_utilization: List[float] = []
+        self.cores_used: List[float] = []
+        self.cpu_efficiency: List[float] = []
+
+    def add(self, usage: JobResourceUsage) -> None:
+        self.jobs += 1
+        if usage.runtime_seconds is not None:
+            self.runtime_seconds.append(usage.runtime_seconds)
+        if usage.slots is not None:
+            self.slots.append(usage.slots)
+        if usage.memory_allocated_mb is not None:
+            self.memory_allocated_mb.append(usage.memory_allocated_mb)
+        if usage.memory_peak_mb is not None:
+            self.memory_peak_mb.append(usage.memory_peak_mb)
+            if usage.memory_allocated_mb:
+                self.memory_utilization.append(usage.memory_peak_mb / usage.memory_allocated_mb)
+        if (cores_used := usage.cores_used) is not None:
+            self.cores_used.append(cores_used)
+        if (cpu_efficiency := usage.cpu_efficiency) is not None:
+            self.cpu_efficiency.append(cpu_efficiency)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "jobs": self.jobs,
+            "runtime_seconds_p50": _round(percentile(self.runtime_seconds, 50)),
+            "runtime_seconds_p95": _round(percentile(self.runtime_seconds, 95)),
+            "runtime_seconds_max": _round(max(self.runtime_seconds, default=None)),
+            "slots_max": _round(max(self.slots, default=None)),
+            "memory_allocated_mb_max": _round(max(self.memory_allocated_mb, default=None)),
+            "memory_peak_mb_p50": _round(percentile(self.memory_peak_mb, 50)),
+            "memory_peak_mb_p95": _round(percentile(self.memory_peak_mb, 95)),
+            "memory_peak_mb_max": _round(max(self.memory_peak_mb, default=None)),
+            "memory_utilization_mean": _round(_mean(self.memory_utilization), 3),
+            "cpu_efficiency_mean": _round(_mean(self.cpu_efficiency), 3),
+            "cpu_efficiency_p50": _round(percentile(self.cpu_efficiency, 50), 3),
+        }
+
+
+def tpv_tool_id(tool_id: str) -> str:
+    """Return the TPV tool entry (a regular expression) matching all versions of ``tool_id``."""
+    match = TOOL_SHED_TOOL_ID.match(tool_id)
+    if match:
+        return f"{match.group('repository')}/.*"
+    return tool_id
+
+
+class JobResourceUsageManager:
+    """Summarize job metrics of finished jobs per tool, version and destination."""
+
+    def __init__(self, sa_session: galaxy_scoped_session):
+        self.sa_session = sa_session
+
+    def _job_usage_statement(
+        self,
+        tool_ids: Optional[List[str]] = None,
+        destination_ids: Optional[List[str]] = None,
+        date_range_min: Optional[date] = None,
+        date_range_max: Optional[date] = None,
+        max_jobs: Optional[int] = None,
+    ):
+        metric_columns: Dict[Tuple[str, str], Any] = {}
+        all_metrics = (
+            RUNTIME_METRICS
+            + SLOTS_METRICS
+            + MEMORY_ALLOCATED_MB_METRICS
+            + MEMORY_PEAK_BYTES_METRICS
+            + tuple(metric for metric, _ in CPU_TIME_METRICS)
+        )
+        for plugin, metric_name in all_metrics:
+            condition = and_(JobMetricNumeric.plugin == plugin, JobMetricNumeric.metric_name == metric_name)
+            metric_columns[(plugin, metric_name)] = func.max(case((condition, JobMetricNumeric.metric_value)))
+        stmt = (
+            select(Job.id, Job.tool_id, Job.tool_version, Job.destination_id, *metric_columns.values())
+            .join(JobMetricNumeric, JobMetricNumeric.job_id == Job.id)
+            .where(
+                Job.state == Job.states.OK,
+                JobMetricNumeric.metric_name.in_(sorted({metric_name for _, metric_name in all_metrics})),
+            )
+            .group_by(Job.id, Job.tool_id, Job.tool_version, Job.destination_id)
+            .execution_options(yield_per=YIELD_PER_ROWS)
+        )
+        if tool_ids:
+            stmt = stmt.where(Job.tool_id.in_(tool_ids))
+        if destination_ids:
+            stmt = stmt.where(Job.destination_id.in_(destination_ids))
+        if date_range_min:
+            stmt = stmt.where(Job.update_time >= date_range_min)
+        if date_range_max:
+            stmt = stmt.where(Job.update_time <= date_range_max)
+        if max_jobs is not None:
+            stmt = stmt.order_by(Job.update_time.desc(), Job.id.desc()).limit(max_jobs)
+        return stmt, list(metric_columns)
+
+    def job_usages(self, **filters):
+        """Yield ``(tool_id, tool_version, destination_id, JobResourceUsage)`` for finished jobs."""
+        stmt, metrics = self._job_usage_statement(**filters)
+        for row in self.sa_session.execute(stmt):
+            values: Dict[Tuple[str, str], Optional[float]] = {
+                metric: float(value) if isinstance(value, (Decimal, int, float)) else None
+                for metric, value in zip(metrics, row[4:])
+            }
+            memory_peaks = [values[metric] for metric in MEMORY_PEAK_BYTES_METRICS if values[metric] is not None]
+            cpu_seconds = next(
+                (values[metric] * factor for metric, factor in CPU_TIME_METRICS if values[metric] is not None), None
+            )
+            usage = JobResourceUsage(
+                runtime_seconds=values[RUNTIME_METRICS[0]],
+                slots=values[SLOTS_METRICS[0]],
+                memory_allocated_mb=values[MEMORY_ALLOCATED_MB_METRICS[0]],
+                memory_peak_mb=max(memory_peaks) / 1024**2 if memory_peaks else None,
+                cpu_seconds=cpu_seconds,
+            )
+            yield row.tool_id, row.tool_version, row.destination_id, usage
+
+    def report(
+        self,
+        tool_ids: Optional[List[str]] = None,
+        destination_ids: Optional[List[str]] = None,
+        date_range_min: Optional[date] = None,
+        date_range_max: Optional[date] = None,
+        min_jobs: int = 10,
+        percent: float = 95,
+        memory_headroom: float = 0.2,
+        memory_granularity_mb: int = 512,
+        max_jobs: int = MAX_REPORT_JOBS,
+    ) -> Dict[str, Any]:
+        """Summarize resource usage and suggest resources for each tool.
+
+        The memory suggested for a tool is the ``percent`` percentile of the
+        peak memory used by its jobs plus ``memory_headroom``, rounded up to
+        ``memory_granularity_mb``. The cores suggested are the ``percent``
+        percentile of the cores used on average by its jobs, rounded up. Only
+        tools with at least ``min_jobs`` jobs get suggestions.
+
+        ``date_range_min`` defaults to :data:`REPORT_DAYS` days before
+        ``date_range_max`` or now. If more than ``max_jobs`` jobs finished in
+        the date range, only the most recent ones are summarized and the
+        report is marked as truncated.
+        """
+        if date_range_min is None:
+            date_range_min = (date_range_max or now()) - timedelta(days=REPORT_DAYS)
+        groups: Dict[Tuple[str, Optional[str], Optional[str]], ResourceUsageAccumulator] = defaultdict(
+            ResourceUsageAccumulator
+        )
+        tools: Dict[str, ResourceUsageAccumulator] = defaultdict(ResourceUsageAccumulator)
+        truncated = False
+        # read one job more than reported to find out whether the report is truncated
+        for jobs, (tool_id, tool_version, destination_id, usage) in enumerate(
+            self.job_usages(
+                tool_ids=tool_ids,
+                destination_ids=destination_ids,
+                date_range_min=date_range_min,
+                date_range_max=date_range_max,
+                max_jobs=max_jobs + 1,
+            )
+        ):
+            if jobs == max_jobs:
+                truncated = True
+                break
+            groups[(tool_id, tool_version, destination_id)].add(usage)
+            tools[tool_id].add(usage)
+
+        summaries = []
+        for (tool_id, tool_version, destination_id), accumulator in sorted(groups.items(), key=lambda i: str(i[0])):
+            summaries.append(
+                {
+                    "tool_id": tool_id,
+                    "tool_version": tool_version,
+                    "destination_id": destination_id,
+                    **accumulator.summary(),
+                }
+            )
+        recommendations = []
+        tpv_tools: Dict[str, Dict[str, Any]] = {}
+        for tool_id, accumulator in sorted(tools.items()):
+            recommendation = self._recommend(accumulator, min_jobs, percent, memory_headroom, memory_granularity_mb)
+            if recommendation is None:
+                continue
+            recommendations.append({"tool_id": tool_id, **recommendation})
+            tpv_entry = tpv_tools.setdefault(tpv_tool_id(tool_id), {})
+            # Tool shed tools of several versions share an entry, require what the most demanding version needs.
+            tpv_entry["cores"] = max(tpv_entry.get("cores", 1), recommendation["cores"])
+            tpv_entry["mem"] = max(tpv_entry.get("mem", 0), round(recommendation["memory_mb"] / 1024, 1))
+        return {
+            "date_range_min": date_range_min,
+            "truncated": truncated,
+            "groups": summaries,
+            "recommendations": recommendations,
+            "tpv": {"tools": tpv_tools},
+        }
+
+    def _recommend(
+        self,
+        accumulator: ResourceUsageAccumulator,
+        min_jobs: int,
+        percent: float,
+        memory_headroom: float,
+        memory_granularity_mb: int,
+    ) -> Optional[Dict[str, Any]]:
+        memory_peak_mb = percentile(accumulator.memory_peak_mb, percent)
+        if accumulator.jobs < min_jobs or memory_peak_mb is None:
+            return None
+        granules = math.ceil(memory_peak_mb * (1 + memory_headroom) / memory_granularity_mb)
+        memory_mb = max(1, granules) * memory_granularity_mb
+        cores_used = percentile(accumulator.cores_used, percent)
+        cores = max(1, math.ceil(round(cores_used, 2))) if cores_used is not None else 1
+        if accumulator.slots:
+            # Never suggest more cores than the tool has been allowed to use.
+            cores = min(cores, max(1, int(max(accumulator.slots))))
+        memory_allocated_mb = max(accumulator.memory_allocated_mb, default=None)
+        return {
+            "jobs": accumulator.jobs,
+            "memory_mb": memory_mb,
+            "cores": cores,
+            "memory_allocated_mb": _round(memory_allocated_mb),
+            "cores_allocated": _round(max(accumulator.slots, default=None)),
+            "memory_savings_mb": _round(memory_allocated_mb - memory_mb) if memory_allocated_mb is not None else None,
+        }
@@ -0,0 +1,190 @@
+"""Set metadata of the datasets produced by a job in a pool of processes.
+
+Jobs discovering thousands of datasets (e.g. to populate output collections)
+can spend far longer in the metadata script than in the tool itself, setting
+metadata of one dataset after the other. :class:`ParallelMetadataSetter` runs
+``set_meta`` and ``set_peek`` of these datasets in as many processes as the
+job has slots (``GALAXY_SLOTS``), merging the results back into the datasets
+in their original order and recording how long each dataset took.
+
+Worker processes are forked, so that they share the datatypes registry and
+object store loaded by the metadata script. Where processes cannot be forked,
+metadata is set sequentially.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from galaxy.model import (
+    Dataset,
+    DatasetInstance,
+    HistoryDatasetAssociation,
+)
+from galaxy.util import ExecutionTimer
+
+log = logging.getLogger(__name__)
+
+SET_METADATA_TIMINGS_FILENAME = "set_metadata_timings.json"
+# Smallest number of datasets for which starting worker processes pays off
+MIN_PARALLEL_DATASETS = 4
+
+
+def metadata_workers() -> int:
+    """Return the number of slots allocated to the job, 1 if unknown."""
+    try:
+        return max(1, int(os.environ.get("GALAXY_SLOTS", 1)))
+    except ValueError:
+        return 1
+
+
+class DatasetMetadataTask(NamedTuple):
+    path: str
+    extension: str
+    # Metadata already set on the dataset, in its external (JSON) form
+    metadata: Dict[str, Any]
+    set_meta_kwds: Dict[str, Any]
+
+
+class DatasetMetadataResult(NamedTuple):
+    metadata: Optional[Dict[str, Any]]
+    metadata_error: Optional[str]
+    peek: Optional[str]
+    blurb: Optional[str]
+    peek_error: Optional[str]
+
+
+def set_meta_and_peek_for_file(task: DatasetMetadataTask) -> DatasetMetadataResult:
+    """Set metadata and peek of a transient dataset for the file at ``task.path``."""
+    dataset = Dataset(id=-1, external_filename=task.path)
+    dataset.state = dataset.states.OK
+    dataset_instance = HistoryDatasetAssociation(id=-1, dataset=dataset, extension=task.extension)
+    dataset_instance.metadata.from_JSON_dict(json_dict=task.metadata)
+    metadata = metadata_error = peek = blurb = peek_error = None
+    try:
+        dataset_instance.datatype.set_meta(dataset_instance, **task.set_meta_kwds)
+        metadata = json.loads(dataset_instance.metadata.to_JSON_dict())
+    except Exception:
+        metadata_error = traceback.format_exc()
+    try:
+        dataset_instance.set_peek()
+        peek, blurb = dataset_instance.peek, dataset_instance.blurb
+    except Exception:
+        peek_error = traceback.format_exc()
+    return DatasetMetadataResult(metadata, metadata_error, peek, blurb, peek_error)
+
+
+# The function applied to each item by worker processes, set before forking them
+_worker_func: Optional[Callable[[Any], Any]] = None
+
+
+def _timed_call(item: Any) -> Tuple[float, Any]:
+    assert _worker_func is not None
+    start = time.perf_counter()
+    result = _worker_func(item)
+    return time.perf_counter() - start, result
+
+
+class ParallelMetadataSetter:
+    """Run per-dataset metadata work in a pool of ``workers`` processes.
+
+    Results are returned in the order of the submitted items. If
+    ``timings_path`` is set, the time spent on each item is written there as
+    JSON when the setter is closed.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        metadata_tmp_files_dir: Optional[str] = None,
+        timings_path: Optional[str] = None,
+    ):
+        if workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+            log.info("Cannot fork worker processes, setting metadata sequentially")
+            workers = 1
+        self.workers = workers
+        self.metadata_tmp_files_dir = metadata_tmp_files_dir
+        self.timings_path = timings_path
+        self.timings: List[Dict[str, Any]] = []
+
+    def map(self, func: Callable[[Any], Any], items: Sequence[Any], labels: Iterable[str]) -> List[Any]:
+        """Return ``func`` applied to ``items``, in the order of ``items``.
+
+        ``func`` is inherited by the forked worker processes, so it need not
+        be picklable, but its results and ``items`` have to be.
+        """
+        global _worker_func
+        timer = ExecutionTimer()
+        workers = min(self.workers, len(items))
+        _worker_func = func
+        try:
+            if workers == 1 or len(items) < MIN_PARALLEL_DATASETS:
+                timed_results = list(map(_timed_call, items))
+            else:
+                mp_context = multiprocessing.get_context("fork")
+                with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+                    chunksize = max(1, len(items) // (workers * 4))
+                    timed_results = list(executor.map(_timed_call, items, chunksize=chunksize))
+        finally:
+            _worker_func = None
+        for label, (seconds, _) in zip(labels, timed_results):
+            self.timings.append({"label": label, "seconds": round(seconds, 6)})
+        log.debug("Set metadata of %d datasets using %d worker(s) %s", len(items), workers, timer)
+        return [result for _, result in timed_results]
+
+    def set_meta_and_peek(self, datasets: Sequence[DatasetInstance]) -> None:
+        """Set metadata and peek of ``datasets``, as done sequentially by ``ModelPersistenceContext``."""
+        tasks = []
+        for dataset in datasets:
+            dataset.clear_associated_files(metadata_safe=True)
+            set_meta_kwds = {}
+            if self.metadata_tmp_files_dir:
+                # File metadata is written to temporary files and copied into place when merging results
+                set_meta_kwds["metadata_tmp_files_dir"] = self.metadata_tmp_files_dir
+            tasks.append(
+                DatasetMetadataTask(
+                    path=dataset.get_file_name(),
+                    extension=dataset.extension,
+                    metadata=json.loads(dataset.metadata.to_JSON_dict()),
+                    set_meta_kwds=set_meta_kwds,
+                )
+            )
+        labels = [dataset.name or os.path.basename(task.path) for dataset, task in zip(datasets, tasks)]
+        results = self.map(set_meta_and_peek_for_file, tasks, labels)
+        for dataset, result in zip(datasets, results):
+            if result.metadata_error is None:
+                dataset.metadata.from_JSON_dict(json_dict=result.metadata)
+            else:
+                if dataset.state == HistoryDatasetAssociation.states.OK:
+                    dataset.state = HistoryDatasetAssociation.states.FAILED_METADATA
+                log.error("Exception occured while setting metdata\n%s", result.metadata_error)
+            if result.peek_error is None:
+                dataset.peek, dataset.blurb = result.peek, result.blurb
+            else:
+                log.error("Exception occured while setting dataset peek\n%s", result.peek_error)
+
+    def close(self) -> None:
+        if self.timings_path and self.timings:
+            with open(self.timings_path, "w") as fh:
+                json.dump(self.timings, fh)
+
+    def __enter__(self) -> "ParallelMetadataSetter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -47,6 +47,11 @@ from galaxy.job_execution.output_collect import (
     SessionlessJobContext,
 )
 from galaxy.job_execution.setup import TOOL_PROVIDED_JOB_METADATA_KEYS
+from galaxy.metadata.parallel import (
+    metadata_workers,
+    ParallelMetadataSetter,
+    SET_METADATA_TIMINGS_FILENAME,
+)
 from galaxy.model import (
     Dataset,
     DatasetInstance,
@@ -198,6 +203,13 @@ def set_metadata_portable(
     outputs = metadata_params["outputs"]
 
     tool_provided_metadata = load_job_metadata(job_metadata, provided_metadata_style)
+    metadata_setter = None
+    if metadata_params.get("parallel_metadata"):
+        metadata_setter = ParallelMetadataSetter(
+            workers=metadata_workers(),
+            metadata_tmp_files_dir=metadata_tmp_files_dir,
+            timings_path=os.path.join(metadata_tmp_files_dir, SET_METADATA_TIMINGS_FILENAME),
+        )
 
     def set_meta(new_dataset_instance, file_dict):
         if not extended_metadata_collection:
@@ -318,6 +330,7 @@ def set_metadata_portable(
         tool_job_working_directory / "working",
         final_job_state=final_job_state,
         max_discovered_files=max_discovered_files,
+        metadata_setter=metadata_setter,
     )
 
     if extended_metadata_collection:
@@ -535,7 +548,9 @@ def set_metadata_portable(
     if export_store:
         export_store.push_metadata_files()
         export_store._finalize()
-    write_job_metadata(tool_job_working_directory, job_metadata, set_meta, tool_provided_metadata)
+    write_job_metadata(tool_job_working_directory, job_metadata, set_meta, tool_provided_metadata, metadata_setter)
+    if metadata_setter:
+        metadata_setter.close()
 
 
 def validate_and_load_datatypes_config(datatypes_config):
@@ -566,8 +581,13 @@ def load_job_metadata(job_metadata, provided_metadata_style):
     return parse_tool_provided_metadata(job_metadata, provided_metadata_style=provided_metadata_style)
 
 
-def write_job_metadata(tool_job_working_directory, job_metadata, set_meta, tool_provided_metadata):
-    for i, file_dict in enumerate(tool_provided_metadata.get_new_datasets_for_metadata_collection(), start=1):
+def write_job_metadata(
+    tool_job_working_directory, job_metadata, set_meta, tool_provided_metadata, metadata_setter=None
+):
+    file_dicts = list(tool_provided_metadata.get_new_datasets_for_metadata_collection())
+
+    def set_new_dataset_meta(i_and_file_dict):
+        i, file_dict = i_and_file_dict
         filename = file_dict["filename"]
         new_dataset_filename = os.path.join(tool_job_working_directory, "working", filename)
         new_dataset = Dataset(id=-i, external_filename=new_dataset_filename)
@@ -579,8 +599,15 @@ def write_job_metadata(tool_job_working_directory, job_metadata, set_meta, tool_
             id=-i, dataset=new_dataset, extension=file_dict.get("ext", "data")
         )
         set_meta(new_dataset_instance, file_dict)
-        file_dict["metadata"] = json.loads(
-            new_dataset_instance.metadata.to_JSON_dict()
-        )  # storing metadata in external form, need to turn back into dict, then later jsonify
+        # storing metadata in external form, need to turn back into dict, then later jsonify
+        return json.loads(new_dataset_instance.metadata.to_JSON_dict())
+
+    items = list(enumerate(file_dicts, start=1))
+    if metadata_setter:
+        metadata = metadata_setter.map(set_new_dataset_meta, items, [file_dict["filename"] for file_dict in file_dicts])
+    else:
+        metadata = list(map(set_new_dataset_meta, items))
+    for file_dict, new_dataset_metadata in zip(file_dicts, metadata):
+        file_dict["metadata"] = new_dataset_metadata
 
     tool_provided_metadata.rewrite()
@@ -19,6 +19,7 @@ import string
 from collections import defaultdict
 from collections.abc import Callable
 from datetime import (
+    date,
     datetime,
     timedelta,
 )
@@ -32,6 +33,7 @@ from typing import (
     ClassVar,
     Dict,
     Generic,
+    IO,
     Iterable,
     List,
     NamedTuple,
@@ -1428,7 +1430,7 @@ class Job(Base, JobLike, UsesCreateAndUpdateTime, Dictifiable, Serializable):
     __tablename__ = "job"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    create_time: Mapped[datetime] = mapped_column(default=now, nullable=True)
+    create_time: Mapped[datetime] = mapped_column(default=now, index=True, nullable=True)
     update_time: Mapped[datetime] = mapped_column(default=now, onupdate=now, index=True, nullable=True)
     history_id: Mapped[Optional[int]] = mapped_column(ForeignKey("history.id"), index=True)
     library_folder_id: Mapped[Optional[int]] = mapped_column(ForeignKey("library_folder.id"), index=True)
@@ -2553,6 +2555,36 @@ class JobStateHistory(Base, RepresentById):
         self.info = job.info
 
 
+class JobDailyRollup(Base, RepresentById):
+    """Number of jobs and their summed runtime per day of creation.
+
+    Jobs are grouped by tool, user, state and destination. Maintained
+    incrementally by :mod:`galaxy.model.job_rollups`, which records its progress
+    in :class:`JobRollupState`.
+    """
+
+    __tablename__ = "job_daily_rollup"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    day: Mapped[date] = mapped_column(index=True)
+    tool_id: Mapped[Optional[str]] = mapped_column(String(255))
+    user_id: Mapped[Optional[int]] = mapped_column(ForeignKey("galaxy_user.id"), index=True)
+    state: Mapped[Optional[str]] = mapped_column(String(64))
+    destination_id: Mapped[Optional[str]] = mapped_column(String(255))
+    job_count: Mapped[int] = mapped_column(default=0)
+    runtime_seconds: Mapped[float] = mapped_column(default=0)
+
+
+class JobRollupState(Base, RepresentById):
+    """High-water mark of the job updates included in :class:`JobDailyRollup`."""
+
+    __tablename__ = "job_rollup_state"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    update_time: Mapped[datetime] = mapped_column(default=now, onupdate=now, nullable=True)
+    high_water_mark: Mapped[Optional[datetime]]
+
+
 class ImplicitlyCreatedDatasetCollectionInput(Base, RepresentById):
     __tablename__ = "implicitly_created_dataset_collection_inputs"
 
@@ -4205,6 +4237,18 @@ class Dataset(Base, StorableObject, Serializable):
         # Make filename absolute
         return os.path.abspath(filename)
 
+    def open_data(self) -> IO[bytes]:
+        """Open a seekable binary stream over the dataset contents.
+
+        Object stores supporting ranged reads only fetch the parts of the dataset
+        read from the stream, use this instead of ``get_file_name`` to peek into
+        datasets that may not be in the local object store cache.
+        """
+        if self.external_filename:
+            return open(os.path.abspath(self.external_filename), "rb")
+        object_store = self._assert_object_store_set()
+        return object_store.open_data(self)
+
     @property
     def quota_source_label(self):
         return self.quota_source_info.label
@@ -4682,6 +4726,9 @@ class DatasetInstance(RepresentById, UsesCreateAndUpdateTime, _HasTable):
             return ""
         return self.dataset.get_file_name(sync_cache=sync_cache)
 
+    def open_data(self) -> IO[bytes]:
+        return self.dataset.open_data()
+
     def set_file_name(self, filename: str):
         return self.dataset.set_file_name(filename)
 
@@ -6504,10 +6551,23 @@ class DatasetCollection(Base, Dictifiable, UsesAnnotations, Serializable):
         q = q.order_by(*order_by_columns)
         return q
 
+    @property
+    def summary(self):
+        """Return the materialized summary of the datasets in this collection, ``None`` if there is none yet."""
+        if not hasattr(self, "_summary"):
+            self._summary = None
+            if self.id and (session := object_session(self)):
+                table = DatasetCollectionSummary.__table__
+                stmt = select(table).where(table.c.dataset_collection_id == self.id)
+                self._summary = session.execute(stmt).first()
+        return self._summary
+
     @property
     def elements_deleted(self):
         if not hasattr(self, "_elements_deleted"):
-            if session := object_session(self):
+            if (summary := self.summary) is not None:
+                self._elements_deleted = summary.deleted_count > 0
+            elif session := object_session(self):
                 stmt = self._build_nested_collection_attributes_stmt(
                     hda_attributes=("deleted",), dataset_attributes=("deleted",)
                 )
@@ -6524,6 +6584,9 @@ class DatasetCollection(Base, Dictifiable, UsesAnnotations, Serializable):
     @property
     def dataset_states_and_extensions_summary(self):
         if not hasattr(self, "_dataset_states_and_extensions_summary"):
+            if (summary := self.summary) is not None:
+                self._dataset_states_and_extensions_summary = (set(summary.states), set(summary.extensions))
+                return self._dataset_states_and_extensions_summary
             stmt = self._build_nested_collection_attributes_stmt(
                 hda_attributes=("extension",), dataset_attributes=("state",)
             )
@@ -6547,7 +6610,9 @@ class DatasetCollection(Base, Dictifiable, UsesAnnotations, Serializable):
     def has_deferred_data(self):
         if not hasattr(self, "_has_deferred_data"):
             has_deferred_data = False
-            if object_session(self):
+            if (summary := self.summary) is not None:
+                has_deferred_data = Dataset.states.DEFERRED in summary.states
+            elif object_session(self):
                 # TODO: Optimize by just querying without returning the states...
                 stmt = self._build_nested_collection_attributes_stmt(dataset_attributes=("state",))
                 tuples = object_session(self).execute(stmt)
@@ -6573,6 +6638,8 @@ class DatasetCollection(Base, Dictifiable, UsesAnnotations, Serializable):
             _populated_optimized = True
             if ":" not in self.collection_type:
                 _populated_optimized = self.populated_state == DatasetCollection.populated_states.OK
+            elif (summary := self.summary) is not None:
+                _populated_optimized = summary.populated
             else:
                 stmt = self._build_nested_collection_attributes_stmt(
                     collection_attributes=("populated_state",),
@@ -6797,6 +6864,26 @@ class DatasetCollection(Base, Dictifiable, UsesAnnotations, Serializable):
         return rval
 
 
+class DatasetCollectionSummary(Base, RepresentById):
+    """Summary of the datasets in a (nested) dataset collection.
+
+    Maintained along with changes to the elements of the collection, see
+    :mod:`galaxy.model.collection_summary`. ``states`` and ``extensions`` map
+    dataset states and extensions to the number of datasets having them.
+    """
+
+    __tablename__ = "dataset_collection_summary"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    dataset_collection_id: Mapped[int] = mapped_column(ForeignKey("dataset_collection.id"), index=True, unique=True)
+    update_time: Mapped[datetime] = mapped_column(default=now, onupdate=now, nullable=True)
+    element_count: Mapped[int] = mapped_column(default=0)
+    deleted_count: Mapped[int] = mapped_column(default=0)
+    populated: Mapped[bool] = mapped_column(default=True)
+    states: Mapped[Optional[Dict[str, int]]] = mapped_column(JSONType)
+    extensions: Mapped[Optional[Dict[str, int]]] = mapped_column(JSONType)
+
+
 class DatasetCollectionInstance(HasName, UsesCreateAndUpdateTime):
     @property
     def state(self):
@@ -6823,7 +6910,7 @@ class DatasetCollectionInstance(HasName, UsesCreateAndUpdateTime):
             populated_state=self.collection.populated_state,
             populated_state_message=self.collection.populated_state_message,
             element_count=self.collection.element_count,
-            elements_datatypes=list(self.dataset_dbkeys_and_extensions_summary[1]),
+            elements_datatypes=list(self.elements_datatypes),
             type="collection",  # contents type (distinguished from file or folder (in case of library))
         )
 
@@ -7051,6 +7138,12 @@ class HistoryDatasetCollectionAssociation(
             self._dataset_dbkeys_and_extensions_summary = (dbkeys, extensions)
         return self._dataset_dbkeys_and_extensions_summary
 
+    @property
+    def elements_datatypes(self):
+        if (summary := self.collection.summary) is not None:
+            return set(summary.extensions)
+        return self.dataset_dbkeys_and_extensions_summary[1]
+
     @property
     def job_source_id(self):
         return self.implicit_collection_jobs_id or self.job_id
@@ -0,0 +1,402 @@
+"""Maintain materialized summaries of the datasets in dataset collections.
+
+Serializing a collection needs the states, extensions and deleted flags of
+all of its (nested) datasets, which for collections with many elements is
+expensive to compute every time a history panel polls for changes.
+:class:`galaxy.model.DatasetCollectionSummary` rows hold these per collection
+and are kept up to date in the transaction that changes the elements:
+
+- dataset state and HDA extension changes are applied as increments to the
+  summaries of all collections containing the datasets,
+- anything else (new or replaced elements, deleted datasets, collections
+  being populated) rebuilds the summaries of the affected collections.
+
+Collections only get a summary once they are populated, readers fall back to
+querying the elements of collections without one. Summaries of changes made
+outside of the ORM (e.g. by cleanup scripts updating the database directly)
+can be rebuilt with ``lib/galaxy/model/scripts/rebuild_collection_summaries.py``.
+"""
+
+import logging
+from collections import (
+    Counter,
+    defaultdict,
+)
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from sqlalchemy import (
+    delete,
+    event,
+    func,
+    insert,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as ps_insert
+from sqlalchemy.orm import attributes
+
+from galaxy.model import (
+    Dataset,
+    DatasetCollection,
+    DatasetCollectionElement,
+    DatasetCollectionSummary,
+    HistoryDatasetAssociation,
+)
+from galaxy.model.orm.now import now
+from galaxy.util import (
+    chunk_iterable,
+    ExecutionTimer,
+)
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+summary_table = DatasetCollectionSummary.__table__
+dc_table = DatasetCollection.__table__
+dce_table = DatasetCollectionElement.__table__
+hda_table = HistoryDatasetAssociation.__table__
+dataset_table = Dataset.__table__
+
+# (id of the changed object, old value, new value)
+ValueChange = Tuple[int, Optional[str], Optional[str]]
+
+
+def rebuild_summaries(connection, collection_ids: Iterable[int], with_ancestors: bool = True) -> None:
+    """Rebuild the summaries of the given collections and, unless disabled, the collections containing them."""
+    collection_ids = set(collection_ids)
+    if with_ancestors and collection_ids:
+        collection_ids = _with_ancestors(connection, collection_ids)
+    for chunk in chunk_iterable(sorted(collection_ids), DEFAULT_BATCH_SIZE):
+        _rebuild_chunk(connection, list(chunk))
+
+
+def rebuild_summaries_for_datasets(connection, dataset_ids: Iterable[int]) -> None:
+    ids = _containing_collections(connection, _datasets_start(dataset_ids), with_summary=False)
+    rebuild_summaries(connection, {collection_id for collection_id, _ in ids}, with_ancestors=False)
+
+
+def rebuild_summaries_for_hdas(connection, hda_ids: Iterable[int]) -> None:
+    ids = _containing_collections(connection, _hdas_start(hda_ids), with_summary=False)
+    rebuild_summaries(connection, {collection_id for collection_id, _ in ids}, with_ancestors=False)
+
+
+def apply_dataset_state_changes(connection, changes: Iterable[ValueChange], skip: Iterable[int] = ()) -> None:
+    """Update the state histograms of collections containing datasets that changed state."""
+    changes = list(changes)
+    if changes:
+        counts = _containing_collections(connection, _datasets_start(change[0] for change in changes))
+        _apply_changes(connection, "states", counts, changes, set(skip))
+
+
+def apply_hda_extension_changes(connection, changes: Iterable[ValueChange], skip: Iterable[int] = ()) -> None:
+    """Update the extension counts of collections containing HDAs that changed extension."""
+    changes = list(changes)
+    if changes:
+        counts = _containing_collections(connection, _hdas_start(change[0] for change in changes))
+        _apply_changes(connection, "extensions", counts, changes, set(skip))
+
+
+def update_summaries_for_job_outputs(connection, job_id: int, state: str) -> None:
+    """Update summaries before all datasets created by a job are set to ``state`` without going through the ORM."""
+    stmt = select(dataset_table.c.id, dataset_table.c.state).where(
+        dataset_table.c.job_id == job_id, dataset_table.c.state != state
+    )
+    apply_dataset_state_changes(connection, ((dataset_id, old, state) for dataset_id, old in connection.execute(stmt)))
+
+
+def rebuild_all_summaries(engine, batch_size: Optional[int] = None, only_missing: bool = False) -> int:
+    """Rebuild the summaries of all populated collections, in batches of collection ids.
+
+    Returns the number of collections whose summary was rebuilt.
+    """
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+    rebuilt = 0
+    low = 0
+    while True:
+        with engine.begin() as conn:
+            stmt = (
+                select(dc_table.c.id)
+                .where(dc_table.c.id > low, dc_table.c.populated_state != DatasetCollection.populated_states.NEW)
+                .order_by(dc_table.c.id)
+                .limit(batch_size)
+            )
+            collection_ids = list(conn.scalars(stmt))
+            if not collection_ids:
+                return rebuilt
+            low = collection_ids[-1]
+            if only_missing:
+                existing = set(
+                    conn.scalars(
+                        select(summary_table.c.dataset_collection_id).where(
+                            summary_table.c.dataset_collection_id.in_(collection_ids)
+                        )
+                    )
+                )
+                collection_ids = [collection_id for collection_id in collection_ids if collection_id not in existing]
+            timer = ExecutionTimer()
+            _rebuild_chunk(conn, collection_ids)
+            rebuilt += len(collection_ids)
+            log.info("Rebuilt summaries of %d collections up to id %d %s", len(collection_ids), low, timer)
+
+
+def collection_summary_session(session) -> None:
+    """Maintain collection summaries when flushing ``session``."""
+    event.listens_for(session, "after_flush")(_after_flush)
+
+
+def _after_flush(session, flush_context) -> None:
+    # session.new, session.dirty and attribute histories still reflect what was just flushed
+    rebuild: Set[int] = set()
+    rebuild_datasets: Set[int] = set()
+    rebuild_hdas: Set[int] = set()
+    state_changes: List[ValueChange] = []
+    extension_changes: List[ValueChange] = []
+    for obj in session.new:
+        if isinstance(obj, DatasetCollectionElement) and obj.dataset_collection_id:
+            rebuild.add(obj.dataset_collection_id)
+    for obj in session.deleted:
+        if isinstance(obj, DatasetCollectionElement) and obj.dataset_collection_id:
+            rebuild.add(obj.dataset_collection_id)
+    for obj in session.dirty:
+        if isinstance(obj, Dataset):
+            if not _value_change(obj, "state", state_changes):
+                rebuild_datasets.add(obj.id)
+            if _changed(obj, "deleted"):
+                rebuild_datasets.add(obj.id)
+        elif isinstance(obj, HistoryDatasetAssociation):
+            if not _value_change(obj, "extension", extension_changes):
+                rebuild_hdas.add(obj.id)
+            if _changed(obj, "deleted", "dataset", "dataset_id"):
+                rebuild_hdas.add(obj.id)
+        elif isinstance(obj, DatasetCollectionElement):
+            if _changed(obj, "hda", "hda_id", "child_collection", "child_collection_id", "dataset_collection_id"):
+                rebuild.add(obj.dataset_collection_id)
+        elif isinstance(obj, DatasetCollection):
+            if _changed(obj, "populated_state"):
+                rebuild.add(obj.id)
+    if not (rebuild or rebuild_datasets or rebuild_hdas or state_changes or extension_changes):
+        return
+    connection = session.connection()
+    if rebuild:
+        rebuild = _with_ancestors(connection, rebuild)
+    if rebuild_datasets:
+        rebuild.update(c for c, _ in _containing_collections(connection, _datasets_start(rebuild_datasets), False))
+    if rebuild_hdas:
+        rebuild.update(c for c, _ in _containing_collections(connection, _hdas_start(rebuild_hdas), False))
+    rebuild_summaries(connection, rebuild, with_ancestors=False)
+    apply_dataset_state_changes(connection, state_changes, skip=rebuild)
+    apply_hda_extension_changes(connection, extension_changes, skip=rebuild)
+
+
+def _changed(obj, *keys: str) -> bool:
+    return any(attributes.get_history(obj, key).has_changes() for key in keys)
+
+
+def _value_change(obj, key: str, changes: List[ValueChange]) -> bool:
+    """Record the change of a scalar attribute, return ``False`` if it changed from an unknown value."""
+    history = attributes.get_history(obj, key)
+    if not history.has_changes():
+        return True
+    if not history.deleted:
+        return False
+    changes.append((obj.id, history.deleted[0], history.added[0] if history.added else None))
+    return True
+
+
+def _datasets_start(dataset_ids: Iterable[int]):
+    return (
+        select(dce_table.c.dataset_collection_id.label("collection_id"), hda_table.c.dataset_id.label("key"))
+        .join(hda_table, hda_table.c.id == dce_table.c.hda_id)
+        .where(hda_table.c.dataset_id.in_(set(dataset_ids)))
+    )
+
+
+def _hdas_start(hda_ids: Iterable[int]):
+    return select(dce_table.c.dataset_collection_id.label("collection_id"), dce_table.c.hda_id.label("key")).where(
+        dce_table.c.hda_id.in_(set(hda_ids))
+    )
+
+
+def _containing_collections(connection, start, with_summary: bool = True) -> List[Tuple[int, int]]:
+    """Return ``(collection_id, key)`` for every path from the elements selected by ``start`` up to the collections
+    containing them, i.e. an element counts as often as it appears in a collection, nested or not.
+    """
+    paths = start.cte("paths", recursive=True)
+    parent = dce_table.alias("parent")
+    paths = paths.union_all(
+        select(parent.c.dataset_collection_id, paths.c.key).where(parent.c.child_collection_id == paths.c.collection_id)
+    )
+    stmt = select(paths.c.collection_id, paths.c.key)
+    if with_summary:
+        stmt = stmt.join(summary_table, summary_table.c.dataset_collection_id == paths.c.collection_id)
+    return [(row.collection_id, row.key) for row in connection.execute(stmt)]
+
+
+def _with_ancestors(connection, collection_ids: Set[int]) -> Set[int]:
+    ancestors = select(dc_table.c.id.label("collection_id")).where(dc_table.c.id.in_(collection_ids))
+    ancestors = ancestors.cte("ancestors", recursive=True)
+    ancestors = ancestors.union(
+        select(dce_table.c.dataset_collection_id).where(dce_table.c.child_collection_id == ancestors.c.collection_id)
+    )
+    return set(connection.scalars(select(ancestors.c.collection_id)))
+
+
+def _apply_changes(
+    connection, column: str, paths: List[Tuple[int, int]], changes: List[ValueChange], skip: Set[int]
+) -> None:
+    changes_by_key: Dict[int, List[ValueChange]] = defaultdict(list)
+    for change in changes:
+        changes_by_key[change[0]].append(change)
+    deltas: Dict[int, Counter] = defaultdict(Counter)
+    for collection_id, key in paths:
+        if collection_id in skip:
+            continue
+        for _, old, new in changes_by_key[key]:
+            if old is not None:
+                deltas[collection_id][old] -= 1
+            if new is not None:
+                deltas[collection_id][new] += 1
+    if not deltas:
+        return
+    summary_column = summary_table.c[column]
+    # Lock summaries in a consistent order so that concurrent updates can't deadlock
+    stmt = (
+        select(summary_table.c.dataset_collection_id, summary_column)
+        .where(summary_table.c.dataset_collection_id.in_(deltas))
+        .order_by(summary_table.c.dataset_collection_id)
+        .with_for_update()
+    )
+    drifted = []
+    for collection_id, counts in connection.execute(stmt).all():
+        counts = Counter(counts or {})
+        counts.update(deltas[collection_id])
+        if any(count < 0 for count in counts.values()):
+            drifted.append(collection_id)
+            continue
+        values = {column: {value: count for value, count in counts.items() if count}, "update_time": now()}
+        connection.execute(
+            update(summary_table).where(summary_table.c.dataset_collection_id == collection_id).values(**values)
+        )
+    if drifted:
+        log.warning("Summaries of dataset collections %s out of date, rebuilding them", drifted)
+        rebuild_summaries(connection, drifted, with_ancestors=False)
+
+
+def _rebuild_chunk(connection, collection_ids: List[int]) -> None:
+    if not collection_ids:
+        return
+    populated_states = dict(
+        connection.execute(
+            select(dc_table.c.id, dc_table.c.populated_state).where(dc_table.c.id.in_(collection_ids))
+        ).all()
+    )
+    new = [
+        collection_id
+        for collection_id, populated_state in populated_states.items()
+        if populated_state == DatasetCollection.populated_states.NEW
+    ]
+    if new:
+        connection.execute(delete(summary_table).where(summary_table.c.dataset_collection_id.in_(new)))
+    collection_ids = sorted(collection_id for collection_id in populated_states if collection_id not in new)
+    if not collection_ids:
+        return
+    descendants = select(dc_table.c.id.label("root_id"), dc_table.c.id.label("collection_id")).where(
+        dc_table.c.id.in_(collection_ids)
+    )
+    descendants = descendants.cte("descendants", recursive=True)
+    descendants = descendants.union_all(
+        select(descendants.c.root_id, dce_table.c.child_collection_id).where(
+            dce_table.c.dataset_collection_id == descendants.c.collection_id,
+            dce_table.c.child_collection_id.is_not(None),
+        )
+    )
+    unpopulated = set(
+        connection.scalars(
+            select(descendants.c.root_id)
+            .join(dc_table, dc_table.c.id == descendants.c.collection_id)
+            .where(dc_table.c.populated_state != DatasetCollection.populated_states.OK)
+            .distinct()
+        )
+    )
+    datasets_stmt = (
+        select(
+            descendants.c.root_id,
+            hda_table.c.extension,
+            dataset_table.c.state,
+            hda_table.c.deleted,
+            dataset_table.c.deleted,
+            func.count(),
+        )
+        .select_from(descendants)
+        .join(dce_table, dce_table.c.dataset_collection_id == descendants.c.collection_id)
+        .join(hda_table, hda_table.c.id == dce_table.c.hda_id)
+        .join(dataset_table, dataset_table.c.id == hda_table.c.dataset_id)
+        .group_by(
+            descendants.c.root_id,
+            hda_table.c.extension,
+            dataset_table.c.state,
+            hda_table.c.deleted,
+            dataset_table.c.deleted,
+        )
+    )
+    summaries = {
+        collection_id: {
+            "element_count": 0,
+            "deleted_count": 0,
+            "populated": collection_id not in unpopulated,
+            "states": Counter(),
+            "extensions": Counter(),
+        }
+        for collection_id in collection_ids
+    }
+    for root_id, extension, state, hda_deleted, dataset_deleted, count in connection.execute(datasets_stmt):
+        summary = summaries[root_id]
+        summary["element_count"] += count
+        if hda_deleted or dataset_deleted:
+            summary["deleted_count"] += count
+        if state is not None:
+            summary["states"][state] += count
+        if extension:
+            summary["extensions"][extension] += count
+    _insert_missing(connection, collection_ids)
+    connection.execute(
+        select(summary_table.c.id)
+        .where(summary_table.c.dataset_collection_id.in_(collection_ids))
+        .order_by(summary_table.c.dataset_collection_id)
+        .with_for_update()
+    ).all()
+    update_time = now()
+    for collection_id, summary in summaries.items():
+        values = dict(summary, states=dict(summary["states"]), extensions=dict(summary["extensions"]))
+        connection.execute(
+            update(summary_table)
+            .where(summary_table.c.dataset_collection_id == collection_id)
+            .values(update_time=update_time, **values)
+        )
+
+
+def _insert_missing(connection, collection_ids: List[int]) -> None:
+    existing = set(
+        connection.scalars(
+            select(summary_table.c.dataset_collection_id).where(
+                summary_table.c.dataset_collection_id.in_(collection_ids)
+            )
+        )
+    )
+    missing = [{"dataset_collection_id": i} for i in collection_ids if i not in existing]
+    if not missing:
+        return
+    if connection.dialect.name == "postgresql":
+        # Collections may be summarized concurrently, e.g. by job handlers finishing jobs of their elements
+        stmt = ps_insert(summary_table).on_conflict_do_nothing(index_elements=["dataset_collection_id"])
+    else:
+        stmt = insert(summary_table)
+    connection.execute(stmt, missing)
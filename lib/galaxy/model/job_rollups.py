@@ -0,0 +1,184 @@
+"""Maintain daily rollups of job statistics for the reports webapp.
+
+Counting jobs per month, user or tool straight from the job table means
+scanning all of it for every report page. :class:`galaxy.model.JobDailyRollup`
+rows hold the number of jobs and their summed runtime (update time minus
+create time, as the reports have always computed it) per day of creation,
+tool, user, state and destination.
+
+Rollups are updated incrementally by :func:`update_job_rollups`, which Galaxy
+runs periodically as a Celery task (see ``job_rollup_update_interval``). The
+single :class:`galaxy.model.JobRollupState` row records the high-water mark:
+all job updates up to it are included in the rollups. Each update finds the
+days on which jobs updated since the mark were created and recomputes these
+days from the job table, using the indexes on ``job.update_time`` and
+``job.create_time``. The first update computes the rollups of all jobs.
+
+The mark trails the current time by :data:`SAFETY_MARGIN`, so that jobs
+updated by transactions that were still open during an update are picked up
+by the next one.
+"""
+
+import logging
+from datetime import (
+    date,
+    datetime,
+    time,
+    timedelta,
+)
+from typing import (
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+from sqlalchemy import (
+    and_,
+    delete,
+    extract,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    type_coerce,
+    update,
+)
+from sqlalchemy.types import Date
+
+from galaxy.model import (
+    Job,
+    JobDailyRollup,
+    JobRollupState,
+)
+from galaxy.model.orm.now import now
+from galaxy.util import ExecutionTimer
+
+log = logging.getLogger(__name__)
+
+SAFETY_MARGIN = timedelta(minutes=5)
+STATE_ID = 1
+
+job_table = Job.__table__
+rollup_table = JobDailyRollup.__table__
+state_table = JobRollupState.__table__
+
+
+def update_job_rollups(connection, up_to: Optional[datetime] = None) -> Optional[int]:
+    """Include the job updates since the high-water mark in the rollups.
+
+    ``up_to`` defaults to the current time minus :data:`SAFETY_MARGIN`. Returns
+    the number of days whose rollups were recomputed, or ``None`` if another
+    update is in progress.
+    """
+    up_to = up_to or now() - SAFETY_MARGIN
+    stmt = select(state_table.c.high_water_mark).where(state_table.c.id == STATE_ID)
+    if connection.dialect.name == "postgresql":
+        stmt = stmt.with_for_update(skip_locked=True)
+    row = connection.execute(stmt).first()
+    if row is None:
+        if connection.execute(select(state_table.c.id).where(state_table.c.id == STATE_ID)).first():
+            log.debug("Job rollups are being updated, skipping")
+            return None
+        connection.execute(insert(state_table).values(id=STATE_ID, update_time=now()))
+        high_water_mark = None
+    else:
+        high_water_mark = row.high_water_mark
+    if high_water_mark is not None and high_water_mark >= up_to:
+        return 0
+    timer = ExecutionTimer()
+    if high_water_mark is None:
+        connection.execute(delete(rollup_table))
+        connection.execute(_rollup_insert(connection, job_table.c.create_time <= up_to))
+        days = connection.scalar(select(func.count(func.distinct(rollup_table.c.day))))
+    else:
+        stmt = (
+            select(_day(job_table.c.create_time))
+            .where(job_table.c.update_time > high_water_mark, job_table.c.update_time <= up_to)
+            .distinct()
+        )
+        changed_days = [day for day in connection.scalars(stmt) if day is not None]
+        rebuild_job_rollups(connection, changed_days)
+        days = len(changed_days)
+    connection.execute(
+        update(state_table).where(state_table.c.id == STATE_ID).values(high_water_mark=up_to, update_time=now())
+    )
+    log.info("Updated job rollups of %d days up to %s %s", days, up_to, timer)
+    return days
+
+
+def rebuild_job_rollups(connection, days: Iterable[date]) -> None:
+    """Recompute the rollups of jobs created on ``days``."""
+    ranges = _day_ranges(days)
+    if not ranges:
+        return
+    connection.execute(
+        delete(rollup_table).where(or_(*(rollup_table.c.day.between(first, last) for first, last in ranges)))
+    )
+    in_ranges = or_(
+        *(
+            and_(
+                job_table.c.create_time >= datetime.combine(first, time.min),
+                job_table.c.create_time < datetime.combine(last + timedelta(days=1), time.min),
+            )
+            for first, last in ranges
+        )
+    )
+    connection.execute(_rollup_insert(connection, in_ranges))
+
+
+def reset_job_rollups(connection) -> None:
+    """Make the next update recompute the rollups of all jobs."""
+    connection.execute(update(state_table).where(state_table.c.id == STATE_ID).values(high_water_mark=None))
+
+
+def job_rollups_high_water_mark(connection) -> Optional[datetime]:
+    """Return the time up to which job updates are included in the rollups, if they have been computed."""
+    return connection.scalar(select(state_table.c.high_water_mark).where(state_table.c.id == STATE_ID))
+
+
+def _rollup_insert(connection, where):
+    day = _day(job_table.c.create_time)
+    columns = (job_table.c.tool_id, job_table.c.user_id, job_table.c.state, job_table.c.destination_id)
+    stmt = (
+        select(
+            day,
+            *columns,
+            func.count(job_table.c.id),
+            func.coalesce(func.sum(_runtime_seconds(connection)), 0),
+        )
+        .where(job_table.c.create_time.isnot(None), where)
+        .group_by(day, *columns)
+    )
+    return insert(rollup_table).from_select(
+        ["day", "tool_id", "user_id", "state", "destination_id", "job_count", "runtime_seconds"], stmt
+    )
+
+
+def _day(column):
+    # type_coerce makes SQLite's date strings come back as dates
+    return type_coerce(func.date(column), Date)
+
+
+def _runtime_seconds(connection):
+    create_time = job_table.c.create_time
+    update_time = job_table.c.update_time
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        return extract("epoch", update_time - create_time)
+    elif dialect == "mysql":
+        return func.timestampdiff(literal_column("SECOND"), create_time, update_time)
+    else:
+        return (func.julianday(update_time) - func.julianday(create_time)) * 86400.0
+
+
+def _day_ranges(days: Iterable[date]) -> List[Tuple[date, date]]:
+    """Merge ``days`` into ranges of consecutive days, first and last day included."""
+    ranges: List[Tuple[date, date]] = []
+    for day in sorted(set(days)):
+        if ranges and ranges[-1][1] + timedelta(days=1) == day:
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
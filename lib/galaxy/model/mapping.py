@@ -13,6 +13,7 @@ from galaxy.model import (
     setup_global_object_store_for_models,
 )
 from galaxy.model.base import SharedModelMapping
+from galaxy.model.collection_summary import collection_summary_session
 from galaxy.model.orm.engine_factory import build_engine
 from galaxy.model.security import GalaxyRBACAgent
 from galaxy.model.triggers.update_audit_table import install as install_timestamp_triggers
@@ -31,6 +32,10 @@ class GalaxyModelMapping(SharedModelMapping):
     User: Type
     GalaxySession: Type
 
+    def __init__(self, model_modules, engine):
+        super().__init__(model_modules, engine)
+        collection_summary_session(self._SessionLocal)
+
 
 def init(
     file_path,
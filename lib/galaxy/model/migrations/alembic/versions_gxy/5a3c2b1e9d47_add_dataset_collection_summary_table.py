@@ -0,0 +1,56 @@
+"""add dataset_collection_summary table
+
+Revision ID: 5a3c2b1e9d47
+Revises: eee9229a9765
+Create Date: 2024-06-20 10:12:43.815293
+
+"""
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+)
+
+from galaxy.model.custom_types import JSONType
+from galaxy.model.migrations.util import (
+    create_table,
+    drop_table,
+)
+
+# revision identifiers, used by Alembic.
+revision = "5a3c2b1e9d47"
+down_revision = "eee9229a9765"
+branch_labels = None
+depends_on = None
+
+
+# database object names used in this revision
+table_name = "dataset_collection_summary"
+
+
+def upgrade():
+    create_table(
+        table_name,
+        Column("id", Integer, primary_key=True),
+        Column(
+            "dataset_collection_id",
+            Integer,
+            ForeignKey("dataset_collection.id"),
+            index=True,
+            unique=True,
+            nullable=False,
+        ),
+        Column("update_time", DateTime),
+        Column("element_count", Integer, nullable=False),
+        Column("deleted_count", Integer, nullable=False),
+        Column("populated", Boolean, nullable=False),
+        Column("states", JSONType),
+        Column("extensions", JSONType),
+    )
+
+
+def downgrade():
+    drop_table(table_name)
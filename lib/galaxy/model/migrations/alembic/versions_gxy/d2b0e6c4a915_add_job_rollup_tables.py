@@ -0,0 +1,68 @@
+"""add job_daily_rollup and job_rollup_state tables, index job.create_time
+
+Revision ID: d2b0e6c4a915
+Revises: 5a3c2b1e9d47
+Create Date: 2024-06-27 14:35:02.117960
+
+"""
+
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+)
+
+from galaxy.model.database_object_names import build_index_name
+from galaxy.model.migrations.util import (
+    create_index,
+    create_table,
+    drop_index,
+    drop_table,
+    transaction,
+)
+
+# revision identifiers, used by Alembic.
+revision = "d2b0e6c4a915"
+down_revision = "5a3c2b1e9d47"
+branch_labels = None
+depends_on = None
+
+
+# database object names used in this revision
+rollup_table_name = "job_daily_rollup"
+state_table_name = "job_rollup_state"
+job_table_name = "job"
+job_create_time_index_name = build_index_name(job_table_name, "create_time")
+
+
+def upgrade():
+    with transaction():
+        create_table(
+            rollup_table_name,
+            Column("id", Integer, primary_key=True),
+            Column("day", Date, index=True, nullable=False),
+            Column("tool_id", String(255)),
+            Column("user_id", Integer, ForeignKey("galaxy_user.id"), index=True),
+            Column("state", String(64)),
+            Column("destination_id", String(255)),
+            Column("job_count", Integer, nullable=False),
+            Column("runtime_seconds", Float, nullable=False),
+        )
+        create_table(
+            state_table_name,
+            Column("id", Integer, primary_key=True),
+            Column("update_time", DateTime),
+            Column("high_water_mark", DateTime),
+        )
+        create_index(job_create_time_index_name, job_table_name, ["create_time"])
+
+
+def downgrade():
+    with transaction():
+        drop_index(job_create_time_index_name, job_table_name)
+        drop_table(state_table_name)
+        drop_table(rollup_table_name)
@@ -0,0 +1,42 @@
+import argparse
+import logging
+import os
+import sys
+
+from sqlalchemy import create_engine
+
+sys.path.insert(
+    1, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir, os.pardir, "lib"))
+)
+
+from galaxy.model.collection_summary import rebuild_all_summaries
+from galaxy.model.orm.scripts import get_config
+
+DESCRIPTION = """Rebuild the summaries of the datasets in dataset collections.
+
+Summaries are maintained by Galaxy as collection elements change. Rebuild them
+after upgrading to create summaries for existing collections, or after the
+database has been modified directly (e.g. by pgcleanup.py).
+"""
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    args = _get_parser().parse_args()
+    config = get_config(sys.argv, use_argparse=False, cwd=os.getcwd())
+    engine = create_engine(config["db_url"])
+    rebuilt = rebuild_all_summaries(engine, batch_size=args.batch, only_missing=args.missing)
+    print(f"Rebuilt summaries of {rebuilt} dataset collections")
+
+
+def _get_parser():
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument("--batch", type=int, help="number of collections to rebuild per transaction")
+    parser.add_argument(
+        "--missing", action="store_true", help="only create summaries of collections that do not have one yet"
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    main()
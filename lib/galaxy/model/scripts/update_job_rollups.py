@@ -0,0 +1,48 @@
+import argparse
+import logging
+import os
+import sys
+
+from sqlalchemy import create_engine
+
+sys.path.insert(
+    1, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir, os.pardir, "lib"))
+)
+
+from galaxy.model.job_rollups import (
+    reset_job_rollups,
+    update_job_rollups,
+)
+from galaxy.model.orm.scripts import get_config
+
+DESCRIPTION = """Update the daily job statistics rollups read by the reports webapp.
+
+Rollups are updated periodically by a Galaxy Celery task. Run this script to
+compute the rollups of existing jobs outside of Celery after upgrading, or with
+--rebuild after the job table has been modified directly (e.g. by pgcleanup.py).
+"""
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    args = _get_parser().parse_args()
+    config = get_config(sys.argv, use_argparse=False, cwd=os.getcwd())
+    engine = create_engine(config["db_url"])
+    with engine.begin() as connection:
+        if args.rebuild:
+            reset_job_rollups(connection)
+        days = update_job_rollups(connection)
+    if days is None:
+        print("Job rollups are being updated by another process")
+    else:
+        print(f"Updated job rollups of {days} days")
+
+
+def _get_parser():
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument("--rebuild", action="store_true", help="recompute the rollups of all jobs")
+    return parser
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,19 @@ from datetime import (
     datetime,
     timedelta,
 )
-from typing import List
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Set,
+    Tuple,
+)
 
 from sqlalchemy import (
     and_,
     false,
     func,
+    inspect,
     not_,
     or_,
     select,
@@ -44,7 +51,10 @@ from galaxy.security import (
     get_permitted_actions,
     RBACAgent,
 )
-from galaxy.util import listify
+from galaxy.util import (
+    chunk_iterable,
+    listify,
+)
 from galaxy.util.bunch import Bunch
 
 log = logging.getLogger(__name__)
@@ -507,6 +517,10 @@ class GalaxyRBACAgent(RBACAgent):
         )
         return retval
 
+    def dataset_permission_resolver(self, user_roles) -> "DatasetPermissionResolver":
+        """Return a resolver for checking permissions of many datasets for ``user_roles`` in bulk."""
+        return DatasetPermissionResolver(self, user_roles)
+
     def can_access_datasets(self, user_roles, action_tuples):
         user_role_ids = [galaxy.model.cached_id(r) for r in user_roles]
 
@@ -1571,6 +1585,73 @@ WHERE history.user_id != :user_id and history_dataset_association.dataset_id = :
         return False, hidden_folder_ids
 
 
+class DatasetPermissionResolver:
+    """
+    Resolves access and manage permissions of datasets for a user's roles.
+
+    Permissions of datasets passed to :meth:`load` are fetched in bulk and kept
+    for the lifetime of the resolver - typically a single request listing many
+    datasets - so that checking each of them afterwards does not emit queries.
+    Permissions of datasets whose ``actions`` are already loaded are taken from
+    the dataset itself, and datasets not loaded before fall back to their
+    ``actions``, as ``GalaxyRBACAgent.can_access_dataset`` does.
+    """
+
+    def __init__(self, security_agent: GalaxyRBACAgent, user_roles: List[Role]):
+        self.sa_session = security_agent.sa_session
+        self.access_action = security_agent.permitted_actions.DATASET_ACCESS.action
+        self.manage_action = security_agent.permitted_actions.DATASET_MANAGE_PERMISSIONS.action
+        self.user_role_ids = {galaxy.model.cached_id(role) for role in user_roles}
+        # dataset id -> (ids of access roles, ids of manage roles)
+        self._role_ids: Dict[int, Tuple[Set[int], Set[int]]] = {}
+
+    def load(self, dataset_ids: Iterable[int]) -> None:
+        """Fetch the permissions of all datasets with ids in ``dataset_ids`` not loaded yet."""
+        to_load = [dataset_id for dataset_id in dict.fromkeys(dataset_ids) if dataset_id not in self._role_ids]
+        for dataset_ids_chunk in chunk_iterable(to_load):
+            for dataset_id in dataset_ids_chunk:
+                self._role_ids[dataset_id] = (set(), set())
+            stmt = select(DatasetPermissions.dataset_id, DatasetPermissions.action, DatasetPermissions.role_id).where(
+                DatasetPermissions.dataset_id.in_(dataset_ids_chunk),
+                DatasetPermissions.action.in_([self.access_action, self.manage_action]),
+            )
+            for dataset_id, action, role_id in self.sa_session.execute(stmt):
+                self._add(self._role_ids[dataset_id], action, role_id)
+
+    def _add(self, role_ids: Tuple[Set[int], Set[int]], action: str, role_id: int) -> None:
+        if action == self.access_action:
+            role_ids[0].add(role_id)
+        elif action == self.manage_action:
+            role_ids[1].add(role_id)
+
+    def _dataset_role_ids(self, dataset: Dataset) -> Tuple[Set[int], Set[int]]:
+        if "actions" in inspect(dataset).unloaded and dataset.id in self._role_ids:
+            return self._role_ids[dataset.id]
+        role_ids: Tuple[Set[int], Set[int]] = (set(), set())
+        for dataset_permission in dataset.actions:
+            role_id = dataset_permission.role_id
+            if role_id is None and dataset_permission.role is not None:
+                # not flushed yet
+                role_id = galaxy.model.cached_id(dataset_permission.role)
+            self._add(role_ids, dataset_permission.action, role_id)
+        return role_ids
+
+    def access_role_ids(self, dataset: Dataset) -> Set[int]:
+        return self._dataset_role_ids(dataset)[0]
+
+    def is_public(self, dataset: Dataset) -> bool:
+        """A dataset is public if there are no access roles associated with it."""
+        return not self.access_role_ids(dataset)
+
+    def can_access(self, dataset: Dataset) -> bool:
+        """The user needs all of the dataset's access roles, public datasets can be accessed by anyone."""
+        return self.access_role_ids(dataset) <= self.user_role_ids
+
+    def can_manage(self, dataset: Dataset) -> bool:
+        """The user needs any of the dataset's manage roles."""
+        return not self._dataset_role_ids(dataset)[1].isdisjoint(self.user_role_ids)
+
+
 class HostAgent(RBACAgent):
     """
     A simple security agent which allows access to datasets based on host.
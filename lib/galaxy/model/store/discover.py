@@ -57,6 +57,19 @@ class MaxDiscoveredFilesExceededError(ValueError):
 CollectorT = Union["DatasetCollector", "ToolMetadataDatasetCollector"]
 
 
+def _metadata_failed(primary_data):
+    if primary_data.state == galaxy.model.HistoryDatasetAssociation.states.OK:
+        primary_data.state = galaxy.model.HistoryDatasetAssociation.states.FAILED_METADATA
+    log.exception("Exception occured while setting metdata")
+
+
+def _set_peek(primary_data):
+    try:
+        primary_data.set_peek()
+    except Exception:
+        log.exception("Exception occured while setting dataset peek")
+
+
 class ModelPersistenceContext(metaclass=abc.ABCMeta):
     """Class for creating datasets while finding files.
 
@@ -246,9 +259,9 @@ class ModelPersistenceContext(metaclass=abc.ABCMeta):
         # TODO: this might run set_meta after copying the file to the object store, which could be inefficient if job working directory is closer to the node.
         self.set_datasets_metadata(datasets=[primary_data], datasets_attributes=[dataset_attributes])
 
-    @staticmethod
-    def set_datasets_metadata(datasets, datasets_attributes=None):
+    def set_datasets_metadata(self, datasets, datasets_attributes=None):
         datasets_attributes = datasets_attributes or [{} for _ in datasets]
+        datasets_to_set_meta = []
         for primary_data, dataset_attributes in zip(datasets, datasets_attributes):
             # add tool/metadata provided information
             if dataset_attributes:
@@ -264,26 +277,31 @@ class ModelPersistenceContext(metaclass=abc.ABCMeta):
                         dataset_attributes.get(att_set, getattr(primary_data, dataset_att_name)),
                     )
 
+            if dataset_attributes is not None and not dataset_attributes.get("metadata", None):
+                datasets_to_set_meta.append(primary_data)
+                continue
             try:
-                metadata_dict = dataset_attributes.get("metadata", None)
-                if metadata_dict:
-                    if "dbkey" in dataset_attributes:
-                        metadata_dict["dbkey"] = dataset_attributes["dbkey"]
-                    # branch tested with tool_provided_metadata_3 / tool_provided_metadata_10
-                    primary_data.metadata.from_JSON_dict(json_dict=metadata_dict)
-                else:
-                    primary_data.set_meta()
+                metadata_dict = dataset_attributes["metadata"]
+                if "dbkey" in dataset_attributes:
+                    metadata_dict["dbkey"] = dataset_attributes["dbkey"]
+                # branch tested with tool_provided_metadata_3 / tool_provided_metadata_10
+                primary_data.metadata.from_JSON_dict(json_dict=metadata_dict)
             except Exception:
-                if primary_data.state == galaxy.model.HistoryDatasetAssociation.states.OK:
-                    primary_data.state = galaxy.model.HistoryDatasetAssociation.states.FAILED_METADATA
-                log.exception("Exception occured while setting metdata")
+                _metadata_failed(primary_data)
+            _set_peek(primary_data)
 
+        self.set_meta_and_peek(datasets_to_set_meta)
+        for primary_data in datasets:
+            primary_data.set_total_size()
+
+    def set_meta_and_peek(self, datasets):
+        """Set metadata and peek of datasets without tool provided metadata."""
+        for primary_data in datasets:
             try:
-                primary_data.set_peek()
+                primary_data.set_meta()
             except Exception:
-                log.exception("Exception occured while setting dataset peek")
-
-            primary_data.set_total_size()
+                _metadata_failed(primary_data)
+            _set_peek(primary_data)
 
     def populate_collection_elements(
         self,
@@ -10,7 +10,11 @@ from typing import (
 
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.sql import select
+from sqlalchemy.sql import (
+    delete,
+    insert,
+    select,
+)
 from sqlalchemy.sql.expression import func
 
 import galaxy.model
@@ -18,6 +22,7 @@ from galaxy.exceptions import ItemOwnershipException
 from galaxy.model.base import transaction
 from galaxy.model.scoped_session import galaxy_scoped_session
 from galaxy.util import (
+    chunk_iterable,
     strip_control_characters,
     unicodify,
 )
@@ -98,6 +103,106 @@ class TagHandler:
         item.update()
         return item.tags
 
+    def add_tags_to_items(self, user, item_class, item_ids: List[int], tags_list: List[str]) -> List[int]:
+        """
+        Add tags to all items of `item_class` with ids in `item_ids` owned by `user`,
+        inserting the associations missing from each item in bulk.
+
+        Returns the ids of the items skipped because `user` does not own them.
+        """
+        item_tag_assoc_class = self.get_tag_assoc_class(item_class)
+        item_id_col = self.get_id_col_in_item_tag_assoc_table(item_class)
+        owned_item_ids = self._owned_item_ids(user, item_class, item_ids)
+        user_id = user.id if user else None
+        for name, value in self.parse_tags(",".join(tags_list)):
+            # Scrub as for single items, see `_get_item_tag_assoc`.
+            scrubbed_name = self._scrub_tag_name(name)
+            if scrubbed_name is None:
+                continue
+            tag = self._get_or_create_tag(scrubbed_name.lower())
+            if not tag:
+                log.warning(f"Failed to create tag with name {scrubbed_name.lower()}")
+                continue
+            lc_value = value.lower() if value else None
+            for item_ids_chunk in chunk_iterable(owned_item_ids):
+                stmt = select(item_id_col).where(
+                    item_id_col.in_(item_ids_chunk),
+                    item_tag_assoc_class.user_id == user_id,
+                    item_tag_assoc_class.user_tname == scrubbed_name,
+                    item_tag_assoc_class.value == lc_value,
+                )
+                tagged_item_ids = set(self.sa_session.scalars(stmt))
+                rows = [
+                    {
+                        item_id_col.key: item_id,
+                        "tag_id": tag.id,
+                        "user_id": user_id,
+                        "user_tname": scrubbed_name,
+                        "user_value": value,
+                        "value": lc_value,
+                    }
+                    for item_id in item_ids_chunk
+                    if item_id not in tagged_item_ids
+                ]
+                if rows:
+                    self.sa_session.execute(insert(item_tag_assoc_class), rows)
+        return self._unowned_item_ids(item_ids, owned_item_ids)
+
+    def remove_tags_from_items(self, user, item_class, item_ids: List[int], tags_list: List[str]) -> List[int]:
+        """
+        Remove tags from all items of `item_class` with ids in `item_ids` owned by `user`, in bulk.
+
+        Returns the ids of the items skipped because `user` does not own them.
+        """
+        item_tag_assoc_class = self.get_tag_assoc_class(item_class)
+        item_id_col = self.get_id_col_in_item_tag_assoc_table(item_class)
+        owned_item_ids = self._owned_item_ids(user, item_class, item_ids)
+        for name, value in self.parse_tags(",".join(tags_list)):
+            scrubbed_name = self._scrub_tag_name(name)
+            if scrubbed_name is None:
+                continue
+            for item_ids_chunk in chunk_iterable(owned_item_ids):
+                stmt = delete(item_tag_assoc_class).where(
+                    item_id_col.in_(item_ids_chunk),
+                    item_tag_assoc_class.user_tname == scrubbed_name,
+                    item_tag_assoc_class.user_value == value,
+                )
+                self.sa_session.execute(stmt, execution_options={"synchronize_session": False})
+        return self._unowned_item_ids(item_ids, owned_item_ids)
+
+    def _owned_item_ids(self, user: Optional["User"], item_class, item_ids: List[int]) -> List[int]:
+        """Return the ids in `item_ids` of items `user` owns, checked as in `_ensure_user_owns_item`."""
+        History = galaxy.model.History
+        history_id_col = None
+        if item_class is History:
+            stmt = select(History.id)
+            owner_col = History.user_id
+            history_id_col = History.id
+        elif hasattr(item_class, "history_id"):
+            # Prefer checking ownership via history, as for single items
+            stmt = select(item_class.id).join(History, item_class.history_id == History.id)
+            owner_col = History.user_id
+            history_id_col = History.id
+        else:
+            stmt = select(item_class.id)
+            owner_col = item_class.user_id
+        if user:
+            stmt = stmt.where(owner_col == user.id)
+        elif self.galaxy_session and history_id_col is not None:
+            # anon users can only tag their current history and its items
+            stmt = stmt.where(history_id_col == self.galaxy_session.current_history_id)
+        else:
+            return []
+        owned_item_ids: List[int] = []
+        for item_ids_chunk in chunk_iterable(item_ids):
+            owned_item_ids.extend(self.sa_session.scalars(stmt.where(item_class.id.in_(item_ids_chunk))))
+        return owned_item_ids
+
+    @staticmethod
+    def _unowned_item_ids(item_ids: List[int], owned_item_ids: List[int]) -> List[int]:
+        owned = set(owned_item_ids)
+        return [item_id for item_id in item_ids if item_id not in owned]
+
     def get_tag_assoc_class(self, item_class):
         """Returns tag association class for item class."""
         return self.item_tag_assoc_info[item_class.__name__].tag_assoc_class
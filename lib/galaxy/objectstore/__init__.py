@@ -15,6 +15,7 @@ import time
 from typing import (
     Any,
     Dict,
+    IO,
     List,
     NamedTuple,
     Optional,
@@ -60,6 +61,10 @@ from .badges import (
     StoredBadgeDict,
 )
 from .caching import CacheTarget
+from .location_index import (
+    object_location_key,
+    ObjectLocationIndex,
+)
 from .templates import ObjectStoreConfiguration
 
 if TYPE_CHECKING:
@@ -259,6 +264,28 @@ class ObjectStore(metaclass=abc.ABCMeta):
         """
         raise NotImplementedError()
 
+    @abc.abstractmethod
+    def open_data(
+        self,
+        obj,
+        base_dir=None,
+        extra_dir=None,
+        extra_dir_at_root=False,
+        alt_name=None,
+        obj_dir: bool = False,
+    ) -> IO[bytes]:
+        """
+        Open a seekable binary stream over the contents of `obj`.
+
+        Unlike `get_filename` this does not require remote objects to be pulled
+        into a local cache in full - object stores supporting ranged reads only
+        fetch the regions of the object actually read, so this should be used
+        when only a small window of a potentially large object is needed.
+
+        If the object does not exist raises `ObjectNotFound`.
+        """
+        raise NotImplementedError()
+
     @abc.abstractmethod
     def get_filename(
         self,
@@ -308,6 +335,17 @@ class ObjectStore(metaclass=abc.ABCMeta):
         """
         raise NotImplementedError()
 
+    @abc.abstractmethod
+    def update_from_files(self, obj, files: List[Dict[str, Any]]) -> None:
+        """
+        Update many files associated with `obj` (e.g. its extra files).
+
+        Each entry of `files` holds the keyword arguments of one
+        `update_from_file` call. Object stores backed by remote storage may
+        transfer the files concurrently.
+        """
+        raise NotImplementedError()
+
     @abc.abstractmethod
     def get_object_url(self, obj, extra_dir=None, extra_dir_at_root=False, alt_name=None, obj_dir: bool = False):
         """
@@ -611,6 +649,29 @@ class BaseObjectStore(ObjectStore):
             obj_dir=obj_dir,
         )
 
+    def open_data(
+        self,
+        obj,
+        base_dir=None,
+        extra_dir=None,
+        extra_dir_at_root=False,
+        alt_name=None,
+        obj_dir: bool = False,
+    ) -> IO[bytes]:
+        return self._invoke(
+            "open_data",
+            obj,
+            base_dir=base_dir,
+            extra_dir=extra_dir,
+            extra_dir_at_root=extra_dir_at_root,
+            alt_name=alt_name,
+            obj_dir=obj_dir,
+        )
+
+    def _open_data(self, obj, **kwargs) -> IO[bytes]:
+        """Default to opening the (locally cached) file, override to support ranged reads."""
+        return open(self._get_filename(obj, **kwargs), "rb")
+
     def get_filename(
         self,
         obj,
@@ -659,6 +720,13 @@ class BaseObjectStore(ObjectStore):
             preserve_symlinks=preserve_symlinks,
         )
 
+    def update_from_files(self, obj, files: List[Dict[str, Any]]) -> None:
+        return self._invoke("update_from_files", obj, files=files)
+
+    def _update_from_files(self, obj, files: List[Dict[str, Any]], **kwargs) -> None:
+        for file_kwds in files:
+            self._update_from_file(obj, **file_kwds)
+
     def get_object_url(self, obj, extra_dir=None, extra_dir_at_root=False, alt_name=None, obj_dir: bool = False):
         return self._invoke(
             "get_object_url",
@@ -1161,16 +1229,24 @@ class NestedObjectStore(BaseObjectStore):
     """
 
     backends: Dict
+    location_index: Optional[ObjectLocationIndex]
 
-    def __init__(self, config, config_xml=None):
+    def __init__(self, config, config_dict=None):
         """Extend `ObjectStore`'s constructor."""
         super().__init__(config)
         self.backends = {}
+        self.location_index = ObjectLocationIndex.from_config_dict((config_dict or {}).get("location_index"))
+
+    @classmethod
+    def parse_location_index_from_config_xml(clazz, config_xml) -> Optional[Dict[str, Any]]:
+        return ObjectLocationIndex.parse_xml(config_xml.find("location_index"))
 
     def shutdown(self):
         """For each backend, shuts them down."""
         for store in self.backends.values():
             store.shutdown()
+        if self.location_index is not None:
+            self.location_index.close()
         super().shutdown()
 
     def _exists(self, obj, **kwargs) -> bool:
@@ -1179,8 +1255,11 @@ class NestedObjectStore(BaseObjectStore):
 
     def _create(self, obj, **kwargs):
         """Create a backing file in a random backend."""
-        objectstore = random.choice(list(self.backends.values()))
-        return objectstore.create(obj, **kwargs)
+        backend_key = random.choice(list(self.backends.keys()))
+        objectstore = self.backends[backend_key]
+        rval = objectstore.create(obj, **kwargs)
+        self._record_location(obj, backend_key, **kwargs)
+        return rval
 
     def cache_targets(self) -> List[CacheTarget]:
         cache_targets = []
@@ -1199,7 +1278,12 @@ class NestedObjectStore(BaseObjectStore):
 
     def _delete(self, obj, **kwargs) -> bool:
         """For the first backend that has this `obj`, delete it."""
-        return self._call_method("_delete", obj, False, False, **kwargs)
+        deleted = self._call_method("_delete", obj, False, False, **kwargs)
+        if deleted and self.location_index is not None and _is_primary_object_lookup(**kwargs):
+            key = object_location_key(obj)
+            if key is not None:
+                self.location_index.remove(key)
+        return deleted
 
     def _get_data(self, obj, **kwargs):
         """For the first backend that has this `obj`, get data from it."""
@@ -1209,6 +1293,10 @@ class NestedObjectStore(BaseObjectStore):
         """For the first backend that has this `obj`, get its filename."""
         return self._call_method("_get_filename", obj, ObjectNotFound, True, **kwargs)
 
+    def _open_data(self, obj, **kwargs) -> IO[bytes]:
+        """For the first backend that has this `obj`, open a stream of its contents."""
+        return self._call_method("_open_data", obj, ObjectNotFound, True, **kwargs)
+
     def _update_from_file(
         self,
         obj,
@@ -1273,25 +1361,88 @@ class NestedObjectStore(BaseObjectStore):
         except AttributeError:
             return str(obj)
 
+    def _backend_has_object(self, store, obj, **kwargs) -> bool:
+        return store.exists(
+            obj,
+            base_dir=kwargs.get("base_dir", None),
+            dir_only=kwargs.get("dir_only", False),
+            extra_dir=kwargs.get("extra_dir", None),
+            extra_dir_at_root=kwargs.get("extra_dir_at_root", False),
+            alt_name=kwargs.get("alt_name", None),
+            obj_dir=kwargs.get("obj_dir", False),
+        )
+
+    def _record_location(self, obj, backend_key, **kwargs) -> None:
+        if self.location_index is None or not _is_primary_object_lookup(**kwargs):
+            return
+        key = object_location_key(obj)
+        if key is not None:
+            self.location_index.set(key, str(backend_key))
+
+    def _indexed_backend_key(self, obj, **kwargs):
+        """Return the backend key recorded for `obj` in the location index if it still holds the object.
+
+        Stale entries for the primary object are dropped from the index so the
+        subsequent scan of all backends can record the correct location.
+        """
+        if self.location_index is None:
+            return None
+        key = object_location_key(obj)
+        if key is None:
+            return None
+        indexed_id = self.location_index.get(key)
+        if indexed_id is None:
+            return None
+        for backend_key, store in self.backends.items():
+            if str(backend_key) == indexed_id:
+                if self._backend_has_object(store, obj, **kwargs):
+                    return backend_key
+                break
+        if _is_primary_object_lookup(**kwargs):
+            log.debug("Removing stale location index entry %s -> %s", key, indexed_id)
+            self.location_index.remove(key)
+        return None
+
+    def _find_backend_key(self, obj, **kwargs):
+        """Find the key of the first backend holding `obj`, consulting the location index first."""
+        backend_key = self._indexed_backend_key(obj, **kwargs)
+        if backend_key is not None:
+            return backend_key
+        for backend_key, store in self.backends.items():
+            if self._backend_has_object(store, obj, **kwargs):
+                self._record_location(obj, backend_key, **kwargs)
+                return backend_key
+        return None
+
+    def index_object_locations(self, objs, batch_size: int = 1000) -> int:
+        """Locate each of `objs` by probing the backends and bulk record them in the location index.
+
+        Return the number of objects found and indexed.
+        """
+        if self.location_index is None:
+            raise ObjectInvalid("No location_index configured for this object store.")
+        indexed = 0
+        batch: List[Tuple[str, str]] = []
+        for obj in objs:
+            key = object_location_key(obj)
+            if key is None:
+                continue
+            for backend_key, store in self.backends.items():
+                if self._backend_has_object(store, obj):
+                    batch.append((key, str(backend_key)))
+                    break
+            if len(batch) >= batch_size:
+                indexed += self.location_index.set_many(batch)
+                batch = []
+        if batch:
+            indexed += self.location_index.set_many(batch)
+        return indexed
+
     def _call_method(self, method, obj, default, default_is_exception, **kwargs):
         """Check all children object stores for the first one with the dataset."""
-        base_dir = kwargs.get("base_dir", None)
-        dir_only = kwargs.get("dir_only", False)
-        extra_dir = kwargs.get("extra_dir", None)
-        extra_dir_at_root = kwargs.get("extra_dir_at_root", False)
-        alt_name = kwargs.get("alt_name", None)
-        obj_dir = kwargs.get("obj_dir", False)
-        for store in self.backends.values():
-            if store.exists(
-                obj,
-                base_dir=base_dir,
-                dir_only=dir_only,
-                extra_dir=extra_dir,
-                extra_dir_at_root=extra_dir_at_root,
-                alt_name=alt_name,
-                obj_dir=obj_dir,
-            ):
-                return store.__getattribute__(method)(obj, **kwargs)
+        backend_key = self._find_backend_key(obj, **kwargs)
+        if backend_key is not None:
+            return self.backends[backend_key].__getattribute__(method)(obj, **kwargs)
         if default_is_exception:
             raise default(
                 f"objectstore, _call_method failed: {method} on {self._repr_object_for_exception(obj)}, kwargs: {kwargs}"
@@ -1396,6 +1547,9 @@ class DistributedObjectStore(NestedObjectStore):
             "global_max_percent_full": float(backends_root.get("maxpctfull", 0)),
             "backends": backends,
         }
+        location_index = clazz.parse_location_index_from_config_xml(config_xml)
+        if location_index is not None:
+            config_dict["location_index"] = location_index
 
         for b in [e for e in backends_root if e.tag == "backend"]:
             store_id = b.get("id")
@@ -1514,10 +1668,20 @@ class DistributedObjectStore(NestedObjectStore):
                     obj.__class__.__name__,
                     obj.id,
                 )
-            return self._resolve_backend(object_store_id).create(obj, **kwargs)
+            rval = self._resolve_backend(object_store_id).create(obj, **kwargs)
+            if object_store_id in self.backends:
+                self._record_location(obj, object_store_id, **kwargs)
+            return rval
         else:
             return self._resolve_backend(object_store_id)
 
+    def _update_from_files(self, obj, files: List[Dict[str, Any]], **kwargs) -> None:
+        object_store_id = obj.object_store_id
+        if object_store_id is None or (object_store_id not in self.backends and "://" not in object_store_id):
+            return super()._update_from_files(obj, files, **kwargs)
+        # all files of an object live in the backend selected for it
+        return self._resolve_backend(object_store_id).update_from_files(obj, files)
+
     def _call_method(self, method, obj, default, default_is_exception, **kwargs):
         object_store_id = self.__get_store_id_for(obj, **kwargs)
         if object_store_id is not None:
@@ -1583,28 +1747,15 @@ class DistributedObjectStore(NestedObjectStore):
         elif self.search_for_missing:
             # if this instance has been switched from a non-distributed to a
             # distributed object store, or if the object's store id is invalid,
-            # try to locate the object
-            base_dir = kwargs.get("base_dir", None)
-            dir_only = kwargs.get("dir_only", False)
-            extra_dir = kwargs.get("extra_dir", None)
-            extra_dir_at_root = kwargs.get("extra_dir_at_root", False)
-            alt_name = kwargs.get("alt_name", None)
-            obj_dir = kwargs.get("obj_dir", False)
-            for id, store in self.backends.items():
-                if store.exists(
-                    obj,
-                    base_dir=base_dir,
-                    dir_only=dir_only,
-                    extra_dir=extra_dir,
-                    extra_dir_at_root=extra_dir_at_root,
-                    alt_name=alt_name,
-                    obj_dir=obj_dir,
-                ):
-                    log.warning(
-                        f"{obj.__class__.__name__} object with ID {obj.id} found in backend object store with ID {id}"
-                    )
-                    obj.object_store_id = id
-                    return id
+            # try to locate the object - the location index (if configured)
+            # saves probing every backend.
+            id = self._find_backend_key(obj, **kwargs)
+            if id is not None:
+                log.warning(
+                    f"{obj.__class__.__name__} object with ID {obj.id} found in backend object store with ID {id}"
+                )
+                obj.object_store_id = id
+                return id
         return None
 
     def object_store_ids(self, private=None):
@@ -1696,6 +1847,9 @@ class HierarchicalObjectStore(NestedObjectStore):
 
         config_dict = {"backends": backends_list}
         config_dict["private"] = is_private
+        location_index = clazz.parse_location_index_from_config_xml(config_xml)
+        if location_index is not None:
+            config_dict["location_index"] = location_index
         return config_dict
 
     def to_dict(self):
@@ -1710,17 +1864,22 @@ class HierarchicalObjectStore(NestedObjectStore):
 
     def _exists(self, obj, **kwargs) -> bool:
         """Check all child object stores."""
-        for store in self.backends.values():
-            if store.exists(obj, **kwargs):
-                return True
-        return False
+        return self._find_backend_key(obj, **kwargs) is not None
 
     def _construct_path(self, obj, **kwargs) -> str:
         return self.backends[0].construct_path(obj, **kwargs)
 
     def _create(self, obj, **kwargs):
         """Call the primary object store."""
-        return self.backends[0].create(obj, **kwargs)
+        rval = self.backends[0].create(obj, **kwargs)
+        self._record_location(obj, 0, **kwargs)
+        return rval
+
+    def _update_from_files(self, obj, files: List[Dict[str, Any]], **kwargs) -> None:
+        if all(file_kwds.get("create") for file_kwds in files):
+            # created files always end up in the primary object store, let it transfer them all at once
+            return self.backends[0].update_from_files(obj, files)
+        return super()._update_from_files(obj, files, **kwargs)
 
     def _is_private(self, obj) -> bool:
         # Unlink the DistributedObjectStore - the HierarchicalObjectStore does not use
@@ -1956,6 +2115,11 @@ def concrete_object_store(
     )
 
 
+def _is_primary_object_lookup(**kwargs) -> bool:
+    """Return True if the arguments address the object itself rather than an extra file or directory."""
+    return not (kwargs.get("alt_name") or kwargs.get("extra_dir") or kwargs.get("dir_only") or kwargs.get("base_dir"))
+
+
 def local_extra_dirs(func):
     """Non-local plugin decorator using local directories for the extra_dirs (job_work and temp)."""
 
@@ -2135,6 +2299,7 @@ def persist_extra_files_for_dataset(
     dataset: "Dataset",
     extra_files_path_name: str,
 ):
+    extra_files = []
     for root, _dirs, files in safe_walk(src_extra_files_path):
         extra_dir = os.path.join(extra_files_path_name, os.path.relpath(root, src_extra_files_path))
         extra_dir = os.path.normpath(extra_dir)
@@ -2142,11 +2307,14 @@ def persist_extra_files_for_dataset(
             if not in_directory(f, src_extra_files_path):
                 # Unclear if this can ever happen if we use safe_walk ... probably not ?
                 raise MalformedContents(f"Invalid dataset path: {f}")
-            object_store.update_from_file(
-                dataset,
-                extra_dir=extra_dir,
-                alt_name=f,
-                file_name=os.path.join(root, f),
-                create=True,
-                preserve_symlinks=True,
+            extra_files.append(
+                dict(
+                    extra_dir=extra_dir,
+                    alt_name=f,
+                    file_name=os.path.join(root, f),
+                    create=True,
+                    preserve_symlinks=True,
+                )
             )
+    if extra_files:
+        object_store.update_from_files(dataset, extra_files)
@@ -1,10 +1,17 @@
+import io
 import logging
 import os
 import shutil
+import tempfile
+import threading
 from datetime import datetime
 from typing import (
     Any,
+    Callable,
     Dict,
+    IO,
+    Iterable,
+    List,
     Optional,
 )
 
@@ -18,14 +25,76 @@ from galaxy.util import (
     unlink,
 )
 from galaxy.util.path import safe_relpath
+from ._transfer import TransferPool
 from ._util import fix_permissions
 from .caching import (
+    CacheIndex,
     CacheTarget,
+    DEFAULT_EVICTION_POLICY,
+    get_cache_index,
     InProcessCacheMonitor,
 )
 
 log = logging.getLogger(__name__)
 
+CACHE_LIMIT = 0.9
+# indexed caches are cleaned down to this percent once CACHE_LIMIT is exceeded
+INDEXED_CACHE_LOW_LIMIT = 0.8
+# granularity of ranged reads from remote storage, fetched blocks are cached
+DEFAULT_RANGE_BLOCK_SIZE = 1024 * 1024
+PARTIAL_CACHE_SUFFIX = ".partial"
+
+
+class RangedObjectReader(io.RawIOBase):
+    """Seekable read-only stream over a remote object fetched block by block.
+
+    Blocks are requested from the object store with ``_get_range_block`` so
+    only the regions of the object actually read are downloaded.
+    """
+
+    def __init__(self, object_store: "CachingConcreteObjectStore", rel_path: str, size: int, block_size: int):
+        self.object_store = object_store
+        self.rel_path = rel_path
+        self.size = size
+        self.block_size = block_size
+        self.name = rel_path
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence ({whence})")
+        if position < 0:
+            raise OSError(f"Negative seek position {position}")
+        self._position = position
+        return position
+
+    def readinto(self, buffer) -> int:
+        if self._position >= self.size:
+            return 0
+        block_index, block_offset = divmod(self._position, self.block_size)
+        block = self.object_store._get_range_block(self.rel_path, block_index, self.block_size, self.size)
+        data = block[block_offset : block_offset + len(buffer)]
+        if not data:
+            return 0
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
 
 class CachingConcreteObjectStore(ConcreteObjectStore):
     staging_path: str
@@ -36,6 +105,12 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
     cache_size: int
     cache_monitor: Optional[InProcessCacheMonitor] = None
     cache_monitor_interval: int
+    _cache_index: Optional[CacheIndex] = None
+    range_block_size: int = DEFAULT_RANGE_BLOCK_SIZE
+    # backends with thread-safe clients opt into concurrent transfers of many files
+    max_file_concurrency: int = 1
+    _transfer_pool: Optional[TransferPool] = None
+    _transfer_pool_lock = threading.Lock()
 
     def _ensure_staging_path_writable(self):
         staging_path = self.staging_path
@@ -111,6 +186,51 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
         cache_path = self._get_cache_path(rel_path)
         return os.path.exists(cache_path)
 
+    @property
+    def cache_index(self) -> Optional[CacheIndex]:
+        if self._cache_index is None:
+            cache_target = self.cache_target
+            if cache_target.indexed:
+                self._cache_index = get_cache_index(cache_target)
+        return self._cache_index
+
+    def _record_cache_access(self, cache_path: str, size: Optional[int] = None, directory: bool = False) -> None:
+        cache_index = self.cache_index
+        if cache_index is None:
+            return
+        # cache accounting must never prevent access to the data itself
+        try:
+            if directory:
+                cache_index.record_directory(cache_path)
+            else:
+                cache_index.record_access(cache_path, size)
+        except Exception:
+            log.exception("Failed to record access of '%s' in cache index", cache_path)
+
+    def _record_cache_removal(self, cache_path: str) -> None:
+        cache_index = self.cache_index
+        if cache_index is None:
+            return
+        try:
+            cache_index.record_removal(cache_path)
+        except Exception:
+            log.exception("Failed to record removal of '%s' in cache index", cache_path)
+
+    @property
+    def transfer_pool(self) -> TransferPool:
+        if self._transfer_pool is None:
+            with self._transfer_pool_lock:
+                if self._transfer_pool is None:
+                    self._transfer_pool = TransferPool(self.max_file_concurrency, name=self.store_type)
+        return self._transfer_pool
+
+    def _transfer_files(self, transfer: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+        """Run ``transfer`` for each item on this object store's bounded transfer pool."""
+        return self.transfer_pool.map(transfer, items)
+
+    def _shutdown_transfer_pool(self) -> None:
+        self._transfer_pool and self._transfer_pool.shutdown()
+
     def _pull_into_cache(self, rel_path, **kwargs) -> bool:
         # Ensure the cache directory structure exists (e.g., dataset_#_files/)
         rel_path_dir = os.path.dirname(rel_path)
@@ -120,6 +240,9 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
         file_ok = self._download(rel_path)
         if file_ok:
             fix_permissions(self.config, self._get_cache_path(rel_path_dir))
+            self._record_cache_access(self._get_cache_path(rel_path))
+            # blocks from earlier ranged reads are redundant now
+            self._remove_partial_cache(rel_path)
         else:
             unlink(self._get_cache_path(rel_path), ignore_errors=True)
         return file_ok
@@ -128,7 +251,16 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
         rel_path = self._construct_path(obj, **kwargs)
         # Check cache first and get file if not there
         if not self._in_cache(rel_path):
+            if count >= 0 and self._supports_ranged_reads() and self._exists_remotely(rel_path):
+                # only a window of the object is needed, don't pull it in full
+                stream = self._open_ranged(rel_path)
+                stream.seek(start)
+                # count is in characters, as when reading from the cache
+                with io.TextIOWrapper(stream, encoding="utf-8", errors="replace") as data_file:
+                    return data_file.read(count)
             self._pull_into_cache(rel_path, **kwargs)
+        else:
+            self._record_cache_access(self._get_cache_path(rel_path))
         # Read the file content from cache
         data_file = open(self._get_cache_path(rel_path))
         data_file.seek(start)
@@ -136,6 +268,58 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
         data_file.close()
         return content
 
+    def _open_data(self, obj, **kwargs) -> IO[bytes]:
+        rel_path = self._construct_path(obj, **kwargs)
+        cache_path = self._get_cache_path(rel_path)
+        if self._in_cache(rel_path) and os.path.getsize(cache_path) > 0:
+            self._record_cache_access(cache_path)
+            return open(cache_path, "rb")
+        if self._supports_ranged_reads() and self._exists_remotely(rel_path):
+            return self._open_ranged(rel_path)
+        return open(self._get_filename(obj, **kwargs), "rb")
+
+    def _supports_ranged_reads(self) -> bool:
+        return type(self)._get_remote_range is not CachingConcreteObjectStore._get_remote_range
+
+    def _open_ranged(self, rel_path: str) -> IO[bytes]:
+        size = self._get_remote_size(rel_path)
+        if size < 0:
+            raise ObjectNotFound(f"objectstore.open_data, could not determine size of: {rel_path}")
+        block_size = self.range_block_size
+        return io.BufferedReader(RangedObjectReader(self, rel_path, size, block_size), buffer_size=block_size)
+
+    def _get_partial_cache_path(self, rel_path: str) -> str:
+        return f"{self._get_cache_path(rel_path)}{PARTIAL_CACHE_SUFFIX}"
+
+    def _remove_partial_cache(self, rel_path: str) -> None:
+        partial_path = self._get_partial_cache_path(rel_path)
+        if os.path.exists(partial_path):
+            shutil.rmtree(partial_path, ignore_errors=True)
+            self._record_cache_removal(partial_path)
+
+    def _get_range_block(self, rel_path: str, block_index: int, block_size: int, size: int) -> bytes:
+        """Return block ``block_index`` of the remote object, from the cache if it was fetched before."""
+        partial_path = self._get_partial_cache_path(rel_path)
+        block_path = os.path.join(partial_path, str(block_index))
+        if os.path.exists(block_path):
+            with open(block_path, "rb") as f:
+                data = f.read()
+            self._record_cache_access(block_path, len(data))
+            return data
+        start = block_index * block_size
+        data = self._get_remote_range(rel_path, start, min(block_size, size - start))
+        try:
+            os.makedirs(partial_path, exist_ok=True)
+            # write atomically so concurrent readers never see a truncated block
+            with tempfile.NamedTemporaryFile(dir=partial_path, delete=False) as f:
+                f.write(data)
+            os.replace(f.name, block_path)
+            fix_permissions(self.config, partial_path)
+            self._record_cache_access(block_path, len(data))
+        except OSError:
+            log.exception("Failed to cache block %s of '%s'", block_index, rel_path)
+        return data
+
     def _exists(self, obj, **kwargs) -> bool:
         in_cache = exists_remotely = False
         rel_path = self._construct_path(obj, **kwargs)
@@ -194,6 +378,7 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
             if not dir_only:
                 rel_path = os.path.join(rel_path, alt_name if alt_name else f"dataset_{self._get_object_id(obj)}.dat")
                 open(os.path.join(self.staging_path, rel_path), "w").close()
+                self._record_cache_access(os.path.join(self.staging_path, rel_path), 0)
                 self._push_to_storage(rel_path, from_string="")
         return self
 
@@ -287,13 +472,17 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
         # For dir_only - the cache cleaning may have left empty directories so I think we need to
         # always resync the cache. Gotta make sure we're being judicious in out data.extra_files_path
         # calls I think.
-        if not dir_only and self._in_cache(rel_path) and os.path.getsize(self._get_cache_path(rel_path)) > 0:
-            return cache_path
+        if not dir_only and self._in_cache(rel_path):
+            size = os.path.getsize(cache_path)
+            if size > 0:
+                self._record_cache_access(cache_path, size)
+                return cache_path
 
         # Check if the file exists in persistent storage and, if it does, pull it into cache
-        elif self._exists(obj, **kwargs):
+        if self._exists(obj, **kwargs):
             if dir_only:
                 self._download_directory_into_cache(rel_path, cache_path)
+                self._record_cache_access(cache_path, directory=True)
                 return cache_path
             else:
                 if self._pull_into_cache(rel_path, **kwargs):
@@ -329,10 +518,13 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
             # but requires iterating through each individual key in S3 and deleing it.
             if entire_dir and extra_dir:
                 shutil.rmtree(self._get_cache_path(rel_path), ignore_errors=True)
+                self._record_cache_removal(self._get_cache_path(rel_path))
                 return self._delete_remote_all(rel_path)
             else:
                 # Delete from cache first
                 unlink(self._get_cache_path(rel_path), ignore_errors=True)
+                self._record_cache_removal(self._get_cache_path(rel_path))
+                self._remove_partial_cache(rel_path)
                 # Delete from S3 as well
                 if self._exists_remotely(rel_path):
                     return self._delete_existing_remote(rel_path)
@@ -358,24 +550,34 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
                         # FIXME? Should this be a `move`?
                         shutil.copy2(source_file, cache_file)
                     fix_permissions(self.config, cache_file)
+                    if os.path.exists(cache_file):
+                        self._record_cache_access(cache_file)
                 except OSError:
                     log.exception("Trouble copying source file '%s' to cache '%s'", source_file, cache_file)
             else:
                 source_file = self._get_cache_path(rel_path)
 
             self._push_to_storage(rel_path, source_file)
+            self._remove_partial_cache(rel_path)
 
         else:
             raise ObjectNotFound(
                 f"objectstore.update_from_file, object does not exist: {str(obj)}, kwargs: {str(kwargs)}"
             )
 
+    def _update_from_files(self, obj, files: List[Dict[str, Any]], **kwargs) -> None:
+        self._transfer_files(lambda file_kwds: self._update_from_file(obj, **file_kwds), files)
+
     @property
     def cache_target(self) -> CacheTarget:
+        indexed = bool(getattr(self.config, "object_store_cache_index", False))
         return CacheTarget(
             self.staging_path,
             self.cache_size,
-            0.9,
+            CACHE_LIMIT,
+            low_limit=INDEXED_CACHE_LOW_LIMIT if indexed else None,
+            indexed=indexed,
+            eviction_policy=getattr(self.config, "object_store_cache_eviction_policy", None) or DEFAULT_EVICTION_POLICY,
         )
 
     def _shutdown_cache_monitor(self) -> None:
@@ -394,6 +596,10 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
     def _download(self, rel_path: str) -> bool:
         raise NotImplementedError()
 
+    # Override to allow reading parts of objects without downloading them in full
+    def _get_remote_range(self, rel_path: str, start: int, length: int) -> bytes:
+        raise NotImplementedError()
+
     # Do not need to override these if instead replacing _delete
     def _delete_existing_remote(self, rel_path) -> bool:
         raise NotImplementedError()
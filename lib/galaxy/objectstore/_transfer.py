@@ -0,0 +1,88 @@
+"""Bounded thread pool shared by the transfers of a caching object store.
+
+Transfers of many small files (e.g. the extra files of a dataset) are
+dominated by per-request latency rather than bandwidth, so running them
+concurrently speeds them up roughly by the number of workers. The pool is
+bounded per object store so one job finishing cannot open an unbounded number
+of connections to the remote storage.
+"""
+
+import logging
+import threading
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+)
+from typing import (
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    TypeVar,
+)
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_FILE_CONCURRENCY = 8
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class TransferPool:
+    """Run transfer callables concurrently on at most ``max_workers`` threads."""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_FILE_CONCURRENCY, name: str = "transfer"):
+        self.max_workers = max(1, max_workers)
+        self.name = name
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._worker_threads = threading.local()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=f"{self.name}-transfer",
+                    initializer=self._mark_worker,
+                )
+            return self._executor
+
+    def _mark_worker(self) -> None:
+        self._worker_threads.is_worker = True
+
+    def _in_worker(self) -> bool:
+        return getattr(self._worker_threads, "is_worker", False)
+
+    def map(self, func: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """Apply ``func`` to every item concurrently and return the results in order.
+
+        All transfers are allowed to finish before the first exception raised by
+        any of them is re-raised. Calls made from within a transfer run serially
+        so nested use of the pool cannot deadlock waiting for free workers.
+        """
+        items = list(items)
+        if self.max_workers == 1 or len(items) <= 1 or self._in_worker():
+            return [func(item) for item in items]
+        executor = self._get_executor()
+        futures: List[Future] = [executor.submit(func, item) for item in items]
+        results: List[R] = []
+        error: Optional[BaseException] = None
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if error is None:
+                    error = e
+                else:
+                    log.debug("Additional transfer failure: %s", e)
+        if error is not None:
+            raise error
+        return results
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
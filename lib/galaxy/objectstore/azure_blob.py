@@ -20,6 +20,7 @@ except ImportError:
     BlobServiceClient = None  # type: ignore[assignment,unused-ignore,misc]
 
 from ._caching_base import CachingConcreteObjectStore
+from ._transfer import DEFAULT_MAX_FILE_CONCURRENCY
 from .caching import (
     enable_cache_monitor,
     parse_caching_config_dict_from_xml,
@@ -57,6 +58,7 @@ def parse_config_xml(config_xml):
             "max_single_put_size",
             "max_single_get_size",
             "max_block_size",
+            "max_file_concurrency",
         ]:
             value = transfer_xml.get(key)
             if transfer_xml.get(key) is not None:
@@ -132,11 +134,13 @@ class AzureBlobObjectStore(CachingConcreteObjectStore):
             "max_single_put_size",
             "max_single_get_size",
             "max_block_size",
+            "max_file_concurrency",
         ]:
             value = raw_transfer_dict.get(key)
             if value is not None:
                 typed_transfer_dict[key] = int(value)
         self.transfer_dict = typed_transfer_dict
+        self.max_file_concurrency = typed_transfer_dict.get("max_file_concurrency", DEFAULT_MAX_FILE_CONCURRENCY)
 
         self.cache_size = cache_dict.get("size") or self.config.object_store_cache_size
         self.staging_path = cache_dict.get("path") or self.config.object_store_cache_path
@@ -261,9 +265,11 @@ class AzureBlobObjectStore(CachingConcreteObjectStore):
         with open(local_destination, "wb") as f:
             self._blob_client(rel_path).download_blob().download_to_stream(f, **kwd)
 
+    def _get_remote_range(self, rel_path, start, length):
+        return self._blob_client(rel_path).download_blob(offset=start, length=length).readall()
+
     def _download_directory_into_cache(self, rel_path, cache_path):
-        blobs = self._blobs_from(rel_path)
-        for blob in blobs:
+        def download(blob):
             key = blob.name
             local_file_path = os.path.join(cache_path, os.path.relpath(key, rel_path))
 
@@ -273,6 +279,8 @@ class AzureBlobObjectStore(CachingConcreteObjectStore):
             # Download the file
             self._download_to_file(key, local_file_path)
 
+        self._transfer_files(download, self._blobs_from(rel_path))
+
     def _push_string_to_path(self, rel_path: str, from_string: str) -> bool:
         try:
             self._blob_client(rel_path).upload_blob(from_string, overwrite=True)
@@ -341,3 +349,4 @@ class AzureBlobObjectStore(CachingConcreteObjectStore):
 
     def shutdown(self):
         self._shutdown_cache_monitor()
+        self._shutdown_transfer_pool()
@@ -3,10 +3,12 @@
 
 import logging
 import os
+import sqlite3
 import threading
 import time
 from math import inf
 from typing import (
+    Dict,
     List,
     Optional,
     Tuple,
@@ -25,6 +27,20 @@ log = logging.getLogger(__name__)
 
 ONE_GIGA_BYTE = 1024 * 1024 * 1024
 
+# Name (prefix) of the SQLite database tracking cache entries, it lives at the
+# root of the cache directory and is never considered for eviction.
+CACHE_INDEX_FILENAME = ".galaxy_cache_index.sqlite"
+DEFAULT_EVICTION_POLICY = "lru"
+# ORDER BY clauses selecting eviction candidates first, backed by indices on cache_entry.
+EVICTION_ORDER = {
+    "lru": "last_access",
+    "lfu": "access_count, last_access",
+}
+EVICTION_BATCH_SIZE = 1000
+# Files can enter the cache without passing through the object store (e.g.
+# directories of extra files), so indexed caches are periodically re-walked.
+DEFAULT_RECONCILE_INTERVAL = 24 * 60 * 60
+
 
 FileListT = List[Tuple[time.struct_time, str, int]]
 
@@ -33,6 +49,22 @@ class CacheTarget(NamedTuple):
     path: str
     size: int  # cache size in gigabytes
     limit: float  # cache limit as a percent
+    # once the limit is exceeded, evict files until the cache is below this percent (defaults to limit)
+    low_limit: Optional[float] = None
+    # track cache entries in a CacheIndex instead of walking the cache directory
+    indexed: bool = False
+    eviction_policy: str = DEFAULT_EVICTION_POLICY
+
+    @property
+    def high_watermark(self) -> float:
+        """Cache size in bytes above which cleaning is initiated."""
+        return self.size * ONE_GIGA_BYTE * self.limit
+
+    @property
+    def low_watermark(self) -> float:
+        """Cache size in bytes cleaning reduces the cache to."""
+        low_limit = self.limit if self.low_limit is None else min(self.low_limit, self.limit)
+        return self.size * ONE_GIGA_BYTE * low_limit
 
     def fits_in_cache(self, bytes: int) -> bool:
         # if we don't have a positive cache size - interpret it as an unbounded
@@ -56,30 +88,48 @@ def check_caches(targets: List[CacheTarget]):
 
 def check_cache(cache_target: CacheTarget):
     """Run a step of the cache monitor."""
+    if cache_target.indexed:
+        _check_indexed_cache(cache_target)
+        return
     total_size, file_list = _get_cache_size_files(cache_target.path)
     # Sort the file list (based on access time)
     file_list.sort()
     # Initiate cleaning once we reach cache_monitor_cache_limit percentage of the defined cache size?
-    # Convert GBs to bytes for comparison
-    cache_size_in_gb = cache_target.size * ONE_GIGA_BYTE
-    cache_limit = cache_size_in_gb * cache_target.limit
+    cache_limit = cache_target.high_watermark
     if total_size > cache_limit:
         log.debug(
             "Initiating cache cleaning: current cache size: %s; clean until smaller than: %s",
             nice_size(total_size),
-            nice_size(cache_limit),
+            nice_size(cache_target.low_watermark),
         )
         # How much to delete? If simply deleting up to the cache-10% limit,
         # is likely to be deleting frequently and may run the risk of hitting
         # the limit - maybe delete additional #%?
         # For now, delete enough to leave at least 10% of the total cache free
-        delete_this_much = total_size - cache_limit
+        delete_this_much = total_size - cache_target.low_watermark
         _clean_cache(file_list, delete_this_much)
 
 
+def _check_indexed_cache(cache_target: CacheTarget):
+    cache_index = get_cache_index(cache_target)
+    if cache_index.needs_reconcile():
+        cache_index.reconcile()
+    total_size = cache_index.total_size()
+    if total_size > cache_target.high_watermark:
+        log.debug(
+            "Initiating indexed cache cleaning: current cache size: %s; clean until smaller than: %s",
+            nice_size(total_size),
+            nice_size(cache_target.low_watermark),
+        )
+        freed = cache_index.evict(total_size - cache_target.low_watermark)
+        log.debug("Cache cleaning done. Total space freed: %s", nice_size(freed))
+
+
 def reset_cache(cache_target: CacheTarget):
     _, file_list = _get_cache_size_files(cache_target.path)
     _clean_cache(file_list, inf)
+    if cache_target.indexed:
+        get_cache_index(cache_target).clear()
 
 
 def _clean_cache(file_list: FileListT, delete_this_much: float) -> None:
@@ -116,6 +166,8 @@ def _get_cache_size_files(cache_path) -> Tuple[int, FileListT]:
 
     for dirpath, _, filenames in os.walk(cache_path):
         for filename in filenames:
+            if filename.startswith(CACHE_INDEX_FILENAME):
+                continue
             file_path = os.path.join(dirpath, filename)
             file_size = os.path.getsize(file_path)
             cache_size += file_size
@@ -127,6 +179,184 @@ def _get_cache_size_files(cache_path) -> Tuple[int, FileListT]:
     return cache_size, file_list
 
 
+class CacheIndex:
+    """Persistent accounting of the files held in a cache directory.
+
+    Caching object stores record files as they are pulled into, read from or
+    written through the cache along with the time and number of accesses. The
+    total cache size is maintained by triggers so checking the cache is O(1),
+    and eviction walks an index ordered by the eviction policy so cleaning is
+    O(evicted) rather than O(cache). The database lives in the cache directory
+    so that cache monitors in other processes (e.g. celery) share it.
+    """
+
+    def __init__(
+        self,
+        cache_path: str,
+        eviction_policy: str = DEFAULT_EVICTION_POLICY,
+        reconcile_interval: int = DEFAULT_RECONCILE_INTERVAL,
+    ):
+        if eviction_policy not in EVICTION_ORDER:
+            raise Exception(f"Unknown cache eviction policy [{eviction_policy}]")
+        self.cache_path = os.path.abspath(cache_path)
+        self.eviction_policy = eviction_policy
+        self.reconcile_interval = reconcile_interval
+        self._local = threading.local()
+        os.makedirs(self.cache_path, exist_ok=True)
+        conn = self._connection()
+        with conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS cache_entry (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL,
+                    access_count INTEGER NOT NULL DEFAULT 1
+                );
+                CREATE INDEX IF NOT EXISTS ix_cache_entry_lru ON cache_entry (last_access);
+                CREATE INDEX IF NOT EXISTS ix_cache_entry_lfu ON cache_entry (access_count, last_access);
+                CREATE TABLE IF NOT EXISTS cache_meta (
+                    key TEXT PRIMARY KEY,
+                    value REAL NOT NULL
+                );
+                INSERT OR IGNORE INTO cache_meta (key, value) VALUES ('total_size', 0);
+                CREATE TRIGGER IF NOT EXISTS cache_entry_insert AFTER INSERT ON cache_entry BEGIN
+                    UPDATE cache_meta SET value = value + NEW.size WHERE key = 'total_size';
+                END;
+                CREATE TRIGGER IF NOT EXISTS cache_entry_update AFTER UPDATE OF size ON cache_entry BEGIN
+                    UPDATE cache_meta SET value = value + NEW.size - OLD.size WHERE key = 'total_size';
+                END;
+                CREATE TRIGGER IF NOT EXISTS cache_entry_delete AFTER DELETE ON cache_entry BEGIN
+                    UPDATE cache_meta SET value = value - OLD.size WHERE key = 'total_size';
+                END;
+                """
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.cache_path, CACHE_INDEX_FILENAME), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = conn
+        return conn
+
+    def _key(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), self.cache_path)
+
+    def record_access(self, path: str, size: Optional[int] = None) -> None:
+        """Record that the cached file ``path`` was just written or read."""
+        if size is None:
+            size = os.path.getsize(path)
+        with self._connection() as conn:
+            conn.execute(
+                """INSERT INTO cache_entry (path, size, last_access, access_count) VALUES (?, ?, ?, 1)
+                   ON CONFLICT(path) DO UPDATE SET
+                       size = excluded.size,
+                       last_access = excluded.last_access,
+                       access_count = access_count + 1""",
+                (self._key(path), size, time.time()),
+            )
+
+    def record_directory(self, path: str) -> None:
+        """Record every file below the cached directory ``path``."""
+        for dirpath, _, filenames in os.walk(path):
+            for filename in filenames:
+                self.record_access(os.path.join(dirpath, filename))
+
+    def record_removal(self, path: str) -> None:
+        """Forget the cached file (or all files below the cached directory) ``path``."""
+        key = self._key(path)
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache_entry WHERE path = ?", (key,))
+            conn.execute(
+                "DELETE FROM cache_entry WHERE path >= ? AND path < ?",
+                (f"{key}{os.sep}", f"{key}{chr(ord(os.sep) + 1)}"),
+            )
+
+    def total_size(self) -> int:
+        row = self._connection().execute("SELECT value FROM cache_meta WHERE key = 'total_size'").fetchone()
+        return int(row[0])
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM cache_entry").fetchone()[0]
+
+    def needs_reconcile(self) -> bool:
+        row = self._connection().execute("SELECT value FROM cache_meta WHERE key = 'last_reconcile'").fetchone()
+        return row is None or (time.time() - row[0]) > self.reconcile_interval
+
+    def reconcile(self) -> None:
+        """Walk the cache directory and bring the index in line with what is on disk.
+
+        Access counts of files already tracked are preserved, new files are
+        recorded with their last access time from the file system.
+        """
+        _, file_list = _get_cache_size_files(self.cache_path)
+        with self._connection() as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS cache_walk (path TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM cache_walk")
+            for last_access_time, file_path, file_size in file_list:
+                key = self._key(file_path)
+                conn.execute("INSERT OR IGNORE INTO cache_walk (path) VALUES (?)", (key,))
+                conn.execute(
+                    """INSERT INTO cache_entry (path, size, last_access, access_count) VALUES (?, ?, ?, 0)
+                       ON CONFLICT(path) DO UPDATE SET size = excluded.size""",
+                    (key, file_size, time.mktime(last_access_time)),
+                )
+            conn.execute("DELETE FROM cache_entry WHERE path NOT IN (SELECT path FROM cache_walk)")
+            conn.execute("DELETE FROM cache_walk")
+            conn.execute("INSERT OR REPLACE INTO cache_meta (key, value) VALUES ('last_reconcile', ?)", (time.time(),))
+        log.debug("Reconciled cache index for %s: %s files", self.cache_path, len(file_list))
+
+    def evict(self, delete_this_much: float) -> int:
+        """Delete files in eviction policy order until ``delete_this_much`` bytes are freed.
+
+        Return the number of bytes freed.
+        """
+        conn = self._connection()
+        order_by = EVICTION_ORDER[self.eviction_policy]
+        freed = 0
+        while freed < delete_this_much:
+            candidates = conn.execute(
+                f"SELECT path, size FROM cache_entry ORDER BY {order_by} LIMIT ?", (EVICTION_BATCH_SIZE,)
+            ).fetchall()
+            if not candidates:
+                break
+            evicted = []
+            for path, size in candidates:
+                if freed >= delete_this_much:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_path, path))
+                    freed += size
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    log.exception("Failed to evict cache file %s", path)
+                # forget the entry either way, a later reconcile picks up files that could not be removed
+                evicted.append((path,))
+            with conn:
+                conn.executemany("DELETE FROM cache_entry WHERE path = ?", evicted)
+        return freed
+
+    def clear(self) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache_entry")
+
+
+_cache_indices: Dict[Tuple[str, str], CacheIndex] = {}
+_cache_indices_lock = threading.Lock()
+
+
+def get_cache_index(cache_target: CacheTarget) -> CacheIndex:
+    """Return the (per-process shared) CacheIndex for the supplied cache target."""
+    key = (os.path.abspath(cache_target.path), cache_target.eviction_policy)
+    with _cache_indices_lock:
+        if key not in _cache_indices:
+            _cache_indices[key] = CacheIndex(key[0], eviction_policy=cache_target.eviction_policy)
+        return _cache_indices[key]
+
+
 def parse_caching_config_dict_from_xml(config_xml):
     cache_els = config_xml.findall("cache")
     if len(cache_els) > 0:
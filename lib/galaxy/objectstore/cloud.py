@@ -345,3 +345,4 @@ class Cloud(CachingConcreteObjectStore, UsesAxel):
 
     def shutdown(self):
         self._shutdown_cache_monitor()
+        self._shutdown_transfer_pool()
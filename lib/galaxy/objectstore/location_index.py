@@ -0,0 +1,171 @@
+"""Persistent index recording which backend of a nested object store holds an object.
+
+Nested object stores (hierarchical and distributed) without an authoritative
+``object_store_id`` have to probe every backend with ``exists()`` to find an
+object. With remote backends each probe is a network round trip, so this
+module keeps a small SQLite database (shared between the Galaxy processes of a
+host) mapping object keys to backend ids fronted by an in-process LRU cache.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Optional,
+    Tuple,
+)
+
+log = logging.getLogger(__name__)
+
+DEFAULT_LOCATION_INDEX_CACHE_SIZE = 10000
+
+CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS object_location (
+    object_key TEXT PRIMARY KEY,
+    backend_id TEXT NOT NULL
+)
+"""
+
+
+def object_location_key(obj) -> Optional[str]:
+    """Return the key used to index ``obj`` or ``None`` if it cannot be indexed yet."""
+    obj_id = getattr(obj, "id", None)
+    if obj_id is None:
+        return None
+    return f"{obj.__class__.__name__}:{obj_id}"
+
+
+class LocationIndexLRUCache:
+    """Thread-safe bounded mapping evicting the least recently used key."""
+
+    def __init__(self, max_size: int = DEFAULT_LOCATION_INDEX_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, str] = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ObjectLocationIndex:
+    """SQLite backed ``object key -> backend id`` mapping with an LRU front.
+
+    Web and job handler processes can share one index file. It uses SQLite's
+    default rollback journal and relies on file locking, so it should be kept on
+    a local file system - Galaxy servers spread over several hosts should give
+    each host its own index. Entries are hints - callers are expected to validate
+    a hit against the backend and call :meth:`remove` when it turns out to be stale.
+    """
+
+    def __init__(self, path: str, cache_size: int = DEFAULT_LOCATION_INDEX_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self._cache = LocationIndexLRUCache(cache_size)
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(CREATE_TABLE)
+
+    @classmethod
+    def from_config_dict(cls, config_dict: Optional[Dict[str, Any]]) -> Optional["ObjectLocationIndex"]:
+        if not config_dict or not config_dict.get("path"):
+            return None
+        cache_size = int(config_dict.get("cache_size", DEFAULT_LOCATION_INDEX_CACHE_SIZE))
+        return cls(config_dict["path"], cache_size=cache_size)
+
+    @classmethod
+    def parse_xml(cls, location_index_el) -> Optional[Dict[str, Any]]:
+        if location_index_el is None:
+            return None
+        config_dict: Dict[str, Any] = {"path": location_index_el.get("path")}
+        cache_size = location_index_el.get("cache_size")
+        if cache_size is not None:
+            config_dict["cache_size"] = int(cache_size)
+        return config_dict
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared across threads, keep one per thread.
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.connection = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        backend_id = self._cache.get(key)
+        if backend_id is not None:
+            return backend_id
+        row = (
+            self._connection().execute("SELECT backend_id FROM object_location WHERE object_key = ?", (key,)).fetchone()
+        )
+        if row is None:
+            return None
+        backend_id = row[0]
+        self._cache.put(key, backend_id)
+        return backend_id
+
+    def set(self, key: str, backend_id: str) -> None:
+        if self._cache.get(key) == backend_id:
+            return
+        self._connection().execute(
+            "INSERT OR REPLACE INTO object_location (object_key, backend_id) VALUES (?, ?)", (key, backend_id)
+        )
+        self._cache.put(key, backend_id)
+
+    def set_many(self, entries: Iterable[Tuple[str, str]]) -> int:
+        """Record many locations in a single transaction, return the number written."""
+        entries = list(entries)
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany("INSERT OR REPLACE INTO object_location (object_key, backend_id) VALUES (?, ?)", entries)
+        for key, backend_id in entries:
+            self._cache.put(key, backend_id)
+        return len(entries)
+
+    def remove(self, key: str) -> None:
+        self._cache.remove(key)
+        self._connection().execute("DELETE FROM object_location WHERE object_key = ?", (key,))
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._connection().execute("DELETE FROM object_location")
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM object_location").fetchone()[0]
+
+    def close(self) -> None:
+        conn = getattr(self._local, "connection", None)
+        if conn is not None:
+            conn.close()
+            self._local.connection = None
@@ -295,6 +295,7 @@ class OnedataObjectStore(CachingConcreteObjectStore):
 
     def shutdown(self):
         self._shutdown_cache_monitor()
+        self._shutdown_transfer_pool()
 
 
 def _is_not_found_onedata_rest_error(ex):
@@ -561,3 +561,4 @@ class RucioObjectStore(CachingConcreteObjectStore):
 
     def shutdown(self):
         self._shutdown_cache_monitor()
+        self._shutdown_transfer_pool()
@@ -16,6 +16,7 @@ try:
 except ImportError:
     boto = None  # type: ignore[assignment]
 
+from galaxy.exceptions import ObjectNotFound
 from galaxy.util import string_as_bool
 from ._caching_base import CachingConcreteObjectStore
 from ._util import UsesAxel
@@ -326,6 +327,12 @@ class S3ObjectStore(CachingConcreteObjectStore, CloudConfigMixin, UsesAxel):
             log.exception("Problem downloading key '%s' from S3 bucket '%s'", rel_path, self._bucket.name)
         return False
 
+    def _get_remote_range(self, rel_path, start, length):
+        key = self._bucket.get_key(rel_path)
+        if key is None:
+            raise ObjectNotFound(f"Attempting to read an invalid key for path {rel_path}.")
+        return key.get_contents_as_string(headers={"Range": f"bytes={start}-{start + length - 1}"})
+
     def _push_to_storage(self, rel_path, source_file=None, from_string=None):
         """
         Push the file pointed to by ``rel_path`` to the object store naming the key
@@ -421,6 +428,7 @@ class S3ObjectStore(CachingConcreteObjectStore, CloudConfigMixin, UsesAxel):
 
     def shutdown(self):
         self._shutdown_cache_monitor()
+        self._shutdown_transfer_pool()
 
 
 class GenericS3ObjectStore(S3ObjectStore):
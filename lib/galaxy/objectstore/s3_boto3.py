@@ -30,6 +30,7 @@ except ImportError:
 
 from galaxy.util import asbool
 from ._caching_base import CachingConcreteObjectStore
+from ._transfer import DEFAULT_MAX_FILE_CONCURRENCY
 from .caching import (
     enable_cache_monitor,
     parse_caching_config_dict_from_xml,
@@ -100,6 +101,8 @@ def parse_config_xml(config_xml):
                 value = transfer_xml.get(full_key)
                 if transfer_xml.get(full_key) is not None:
                     transfer_dict[full_key] = value
+        if transfer_xml.get("max_file_concurrency") is not None:
+            transfer_dict["max_file_concurrency"] = transfer_xml.get("max_file_concurrency")
 
         tag, attrs = "extra_dir", ("type", "path")
         extra_dirs = config_xml.findall(tag)
@@ -183,7 +186,10 @@ class S3ObjectStore(CachingConcreteObjectStore):
                 transfer_value = transfer_dict.get(full_key)
                 if transfer_value is not None:
                     typed_transfer_dict[full_key] = key_type(transfer_value)
+        if transfer_dict.get("max_file_concurrency") is not None:
+            typed_transfer_dict["max_file_concurrency"] = int(transfer_dict["max_file_concurrency"])
         self.transfer_dict = typed_transfer_dict
+        self.max_file_concurrency = typed_transfer_dict.get("max_file_concurrency", DEFAULT_MAX_FILE_CONCURRENCY)
 
         self.enable_cache_monitor, self.cache_monitor_interval = enable_cache_monitor(config, config_dict)
 
@@ -327,6 +333,12 @@ class S3ObjectStore(CachingConcreteObjectStore):
             log.exception("Failed to download file from S3")
         return False
 
+    def _get_remote_range(self, rel_path: str, start: int, length: int) -> bytes:
+        response = self._client.get_object(
+            Bucket=self.bucket, Key=rel_path, Range=f"bytes={start}-{start + length - 1}"
+        )
+        return response["Body"].read()
+
     def _push_string_to_path(self, rel_path: str, from_string: str) -> bool:
         try:
             self._client.put_object(Body=from_string.encode("utf-8"), Bucket=self.bucket, Key=rel_path)
@@ -371,14 +383,18 @@ class S3ObjectStore(CachingConcreteObjectStore):
                 yield content["Key"]
 
     def _download_directory_into_cache(self, rel_path, cache_path):
-        for key in self._keys(rel_path):
+        config = self._transfer_config("download")
+
+        def download(key):
             local_file_path = os.path.join(cache_path, os.path.relpath(key, rel_path))
 
             # Create directories if they don't exist
             os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
 
             # Download the file
-            self._client.download_file(self.bucket, key, local_file_path)
+            self._client.download_file(self.bucket, key, local_file_path, Config=config)
+
+        self._transfer_files(download, self._keys(rel_path))
 
     def _get_object_url(self, obj, **kwargs):
         try:
@@ -422,3 +438,4 @@ class S3ObjectStore(CachingConcreteObjectStore):
 
     def shutdown(self):
         self._shutdown_cache_monitor()
+        self._shutdown_transfer_pool()
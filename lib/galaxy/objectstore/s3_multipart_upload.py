@@ -1,14 +1,13 @@
 #!/usr/bin/env python
 """
 Split large file into multiple pieces for upload to S3.
-This parallelizes the task over available cores using multiprocessing.
+Parts are uploaded concurrently on a bounded thread pool.
 Code mostly taken form CloudBioLinux.
 """
 
 import glob
 import os
 import subprocess
-import threading
 
 try:
     import boto
@@ -16,6 +15,11 @@ try:
 except ImportError:
     boto = None  # type: ignore[assignment]
 
+from ._transfer import (
+    DEFAULT_MAX_FILE_CONCURRENCY,
+    TransferPool,
+)
+
 
 def mp_from_ids(s3server, mp_id, mp_keyname, mp_bucketname):
     """Get the multipart upload from the bucket and multipart IDs.
@@ -54,7 +58,7 @@ def transfer_part(s3server, mp_id, mp_keyname, mp_bucketname, i, part):
     os.remove(part)
 
 
-def multipart_upload(s3server, bucket, s3_key_name, tarball, mb_size):
+def multipart_upload(s3server, bucket, s3_key_name, tarball, mb_size, max_concurrency=DEFAULT_MAX_FILE_CONCURRENCY):
     """Upload large files using Amazon's multipart upload functionality."""
 
     def split_file(in_file, mb_size, split_num=5):
@@ -69,9 +73,17 @@ def multipart_upload(s3server, bucket, s3_key_name, tarball, mb_size):
 
     mp = bucket.initiate_multipart_upload(s3_key_name, reduced_redundancy=s3server["use_rr"])
 
-    for i, part in enumerate(split_file(tarball, mb_size)):
-        t = threading.Thread(target=transfer_part, args=(s3server, mp.id, mp.key_name, mp.bucket_name, i, part))
-        t.start()
-        t.join()
+    # each part opens its own connection so the parts can be uploaded concurrently
+    pool = TransferPool(max_concurrency, name="s3-multipart")
+    try:
+        pool.map(
+            lambda indexed_part: transfer_part(s3server, mp.id, mp.key_name, mp.bucket_name, *indexed_part),
+            enumerate(split_file(tarball, mb_size)),
+        )
+    except Exception:
+        mp.cancel_upload()
+        raise
+    finally:
+        pool.shutdown()
 
     mp.complete_upload()
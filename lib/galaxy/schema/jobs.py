@@ -1,4 +1,8 @@
 import json
+from datetime import (
+    date,
+    datetime,
+)
 from typing import (
     Any,
     Dict,
@@ -207,6 +211,76 @@ class JobDestinationParams(Model):
     model_config = ConfigDict(extra="allow")  # JobDestinationParams can have extra fields
 
 
+class JobResourceUsageGroup(Model):
+    tool_id: str = Field(default=..., title="Tool ID", description="The tool ID of the jobs.")
+    tool_version: Optional[str] = Field(None, title="Tool version", description="The tool version of the jobs.")
+    destination_id: Optional[str] = Field(
+        None, title="Destination ID", description="The destination (environment) the jobs ran on."
+    )
+    jobs: int = Field(default=..., title="Jobs", description="The number of finished jobs with metrics.")
+    runtime_seconds_p50: Optional[float] = Field(None, title="Median runtime (seconds)")
+    runtime_seconds_p95: Optional[float] = Field(None, title="95th percentile of the runtime (seconds)")
+    runtime_seconds_max: Optional[float] = Field(None, title="Maximum runtime (seconds)")
+    slots_max: Optional[float] = Field(None, title="Maximum slots allocated")
+    memory_allocated_mb_max: Optional[float] = Field(None, title="Maximum memory allocated (MB)")
+    memory_peak_mb_p50: Optional[float] = Field(None, title="Median peak memory usage (MB)")
+    memory_peak_mb_p95: Optional[float] = Field(None, title="95th percentile of the peak memory usage (MB)")
+    memory_peak_mb_max: Optional[float] = Field(None, title="Maximum peak memory usage (MB)")
+    memory_utilization_mean: Optional[float] = Field(
+        None,
+        title="Mean memory utilization",
+        description="Mean fraction of the memory allocated to the jobs that was used at peak.",
+    )
+    cpu_efficiency_mean: Optional[float] = Field(
+        None,
+        title="Mean CPU efficiency",
+        description="Mean fraction of the allocated slots the jobs used over their runtime.",
+    )
+    cpu_efficiency_p50: Optional[float] = Field(None, title="Median CPU efficiency")
+
+
+class JobResourceRecommendation(Model):
+    tool_id: str = Field(default=..., title="Tool ID")
+    jobs: int = Field(default=..., title="Jobs", description="The number of jobs the recommendation is based on.")
+    memory_mb: int = Field(default=..., title="Suggested memory (MB)")
+    cores: int = Field(default=..., title="Suggested cores")
+    memory_allocated_mb: Optional[float] = Field(None, title="Maximum memory allocated (MB)")
+    cores_allocated: Optional[float] = Field(None, title="Maximum cores allocated")
+    memory_savings_mb: Optional[float] = Field(
+        None,
+        title="Memory savings (MB)",
+        description="Memory allocated per job that the suggested memory would free up.",
+    )
+
+
+class JobResourceUsageReport(Model):
+    date_range_min: Union[datetime, date] = Field(
+        default=...,
+        title="Date range minimum",
+        description="The start of the date range the report covers.",
+    )
+    truncated: bool = Field(
+        default=...,
+        title="Truncated",
+        description="Whether only the most recent of the jobs finished in the date range were summarized.",
+    )
+    groups: List[JobResourceUsageGroup] = Field(
+        default=...,
+        title="Groups",
+        description="Resource usage of finished jobs per tool, tool version and destination.",
+    )
+    recommendations: List[JobResourceRecommendation] = Field(
+        default=...,
+        title="Recommendations",
+        description="Resources suggested per tool, based on the resources used by its jobs.",
+    )
+    tpv: Dict[str, Any] = Field(
+        default=...,
+        title="TPV tool resources",
+        description="The suggested resources as a Total Perspective Vortex `tools` configuration (memory in GB).",
+    )
+
+
 class JobOutput(Model):
     label: Any = Field(default=..., title="Output label", description="The output label")  # check if this is true
     value: EncodedDataItemSourceId = Field(default=..., title="Dataset", description="The associated dataset.")
@@ -310,6 +310,9 @@ class TabularToolDataTable(ToolDataTable):
 
     type_key = "tabular"
 
+    # Lazily built lookup indexes over self.data, see _current_indexes
+    _indexes_key: Optional[Tuple[int, int]] = None
+
     def __init__(
         self,
         config_element: Element,
@@ -329,6 +332,7 @@ class TabularToolDataTable(ToolDataTable):
         )
         self.config_element = config_element
         self.data = []
+        self._reset_indexes()
         self.configure_and_load(config_element, tool_data_path, from_shed_config)
 
     def configure_and_load(
@@ -492,27 +496,67 @@ class TabularToolDataTable(ToolDataTable):
         return self.data.copy()
 
     def get_field(self, value):
-        rval = None
-        for i in self.get_named_fields_list():
-            if i["value"] == value:
-                rval = TabularToolDataField(i)
-        return rval
+        # the last entry with this value wins
+        entries = self._column_index(self.columns["value"]).get(value)
+        if entries:
+            return TabularToolDataField(self._named_fields(entries[-1], self.get_column_name_list()))
+        return None
 
     # This method is used in tools, so need to keep its API stable
     def get_named_fields_list(self) -> List[Dict[Union[str, int], str]]:
-        rval = []
         named_columns = self.get_column_name_list()
-        for fields in self.get_fields():
-            field_dict = {}
-            for i, field in enumerate(fields):
-                if i == len(named_columns):
-                    break
-                field_name: Optional[Union[str, int]] = named_columns[i]
-                if field_name is None:
-                    field_name = i  # check that this is supposed to be 0 based.
-                field_dict[field_name] = field
-            rval.append(field_dict)
-        return rval
+        return [self._named_fields(fields, named_columns) for fields in self.get_fields()]
+
+    @staticmethod
+    def _named_fields(fields: List[str], named_columns: List[Union[str, None]]) -> Dict[Union[str, int], str]:
+        field_dict: Dict[Union[str, int], str] = {}
+        for i, field in enumerate(fields):
+            if i == len(named_columns):
+                break
+            field_name: Optional[Union[str, int]] = named_columns[i]
+            if field_name is None:
+                field_name = i  # check that this is supposed to be 0 based.
+            field_dict[field_name] = field
+        return field_dict
+
+    def _reset_indexes(self) -> None:
+        self._indexes_key = None
+        self._column_indexes: Dict[int, Dict[str, List[List[str]]]] = {}
+        self._entries: Optional[Set[Tuple[str, ...]]] = None
+
+    def _current_indexes(self) -> None:
+        # Indexes are dropped whenever self.data changes (or is replaced) behind our back.
+        indexes_key = (id(self.data), len(self.data))
+        if self._indexes_key != indexes_key:
+            self._reset_indexes()
+            self._indexes_key = indexes_key
+
+    def _column_index(self, column: int) -> Dict[str, List[List[str]]]:
+        """Return the entries of this table by their value in ``column``, in table order."""
+        self._current_indexes()
+        index = self._column_indexes.get(column)
+        if index is None:
+            index = {}
+            for fields in self.data:
+                index.setdefault(fields[column], []).append(fields)
+            self._column_indexes[column] = index
+        return index
+
+    def _entry_set(self) -> Set[Tuple[str, ...]]:
+        self._current_indexes()
+        if self._entries is None:
+            self._entries = {tuple(fields) for fields in self.data}
+        return self._entries
+
+    def _index_appended_entry(self, fields: List[str]) -> None:
+        if self._indexes_key != (id(self.data), len(self.data) - 1):
+            self._reset_indexes()
+            return
+        for column, index in self._column_indexes.items():
+            index.setdefault(fields[column], []).append(fields)
+        if self._entries is not None:
+            self._entries.add(tuple(fields))
+        self._indexes_key = (id(self.data), len(self.data))
 
     def get_version_fields(self):
         return (self._loaded_content_version, self.get_fields())
@@ -626,20 +670,14 @@ class TabularToolDataTable(ToolDataTable):
             return_col = self.columns.get(return_attr, None)
             if return_col is None:
                 return []
-        rval = []
-        # Look for table entry.
-        for fields in self.get_fields():
-            if fields[query_col] == query_val:
-                if return_attr is None:
-                    field_dict = {}
-                    for i, col_name in enumerate(self.get_column_name_list()):
-                        field_dict[col_name or i] = fields[i]
-                    rval.append(field_dict)
-                else:
-                    rval.append(fields[return_col])
-                if limit is not None and len(rval) == limit:
-                    break
-        return rval
+        # Look for table entries.
+        entries = self._column_index(query_col).get(query_val, [])
+        if limit is not None:
+            entries = entries[:limit]
+        if return_attr is None:
+            column_names = self.get_column_name_list()
+            return [{col_name or i: fields[i] for i, col_name in enumerate(column_names)} for fields in entries]
+        return [fields[return_col] for fields in entries]
 
     # This method is used in tools, so need to keep its API stable
     def get_filename_for_source(self, source: EntrySource, default: Optional[str] = None) -> Optional[str]:
@@ -697,8 +735,9 @@ class TabularToolDataTable(ToolDataTable):
             fields = entry
         if self.largest_index < len(fields):
             fields = self._replace_field_separators(fields)
-            if (allow_duplicates and self.allow_duplicate_entries) or fields not in self.get_fields():
+            if (allow_duplicates and self.allow_duplicate_entries) or tuple(fields) not in self._entry_set():
                 self.data.append(fields)
+                self._index_appended_entry(fields)
             else:
                 raise MessageException(
                     f"Attempted to add fields ({fields}) to data table '{self.name}', but this entry already exists and allow_duplicates is False.",
@@ -800,21 +839,24 @@ class TabularToolDataTable(ToolDataTable):
 
     def _deduplicate_data(self):
         # Remove duplicate entries, without recreating self.data object
-        dup_lines = []
-        hash_set = set()
-        for i, fields in enumerate(self.data):
-            fields_hash = hash(self.separator.join(fields))
-            if fields_hash in hash_set:
-                dup_lines.append(i)
+        entries = set()
+        deduplicated_data = []
+        for fields in self.data:
+            entry = tuple(fields)
+            if entry in entries:
                 log.debug(
                     'Found duplicate entry in tool data table "%s", but duplicates are not allowed, removing additional entry for: "%s"',
                     self.name,
                     fields,
                 )
             else:
-                hash_set.add(fields_hash)
-        for i in reversed(dup_lines):
-            self.data.pop(i)
+                entries.add(entry)
+                deduplicated_data.append(fields)
+        if len(deduplicated_data) != len(self.data):
+            self.data[:] = deduplicated_data
+        # keep the set of entries for checking duplicates when adding entries
+        self._current_indexes()
+        self._entries = entries
 
     @property
     def xml_string(self):
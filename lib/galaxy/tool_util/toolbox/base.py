@@ -46,6 +46,7 @@ from .parser import (
     ensure_tool_conf_item,
     get_toolbox_parser,
 )
+from .snapshot import ToolDocumentPreloader
 from .views.edam import (
     EdamPanelMode,
     EdamToolPanelView,
@@ -175,6 +176,7 @@ class AbstractToolBox(ManagesIntegratedToolPanelMixin):
         self._tool_panel = ToolPanelElements()
         self._index = 0
         self.data_manager_tools = {}
+        self._tool_documents = ToolDocumentPreloader()
         self._lineage_map = LineageMap(app)
         # Sets self._integrated_tool_panel and self._integrated_tool_panel_config_has_contents
         self._init_integrated_tool_panel(app.config)
@@ -276,6 +278,8 @@ class AbstractToolBox(ManagesIntegratedToolPanelMixin):
             directory_contents = sorted(os.listdir(config_directory))
             directory_config_files = [config_file for config_file in directory_contents if config_file.endswith(".xml")]
             config_filenames.extend(directory_config_files)
+        self._preload_tool_documents(config_filenames)
+        load_timer = ExecutionTimer()
         for config_filename in config_filenames:
             if not self.can_load_config_file(config_filename):
                 continue
@@ -292,8 +296,57 @@ class AbstractToolBox(ManagesIntegratedToolPanelMixin):
                     raise
             except Exception:
                 log.exception("Error loading tools defined in config %s", config_filename)
+        # Documents of tools that were not loaded, e.g. because they were found in the tool cache
+        self._tool_documents.clear()
+        log.debug("Loading tools from config files finished %s", load_timer)
         log.debug("Reading tools from config files finished %s", execution_timer)
 
+    def _preload_tool_documents(self, config_filenames):
+        """Expand the documents of the tools referenced by ``config_filenames`` before loading them.
+
+        Documents are expanded in parallel if ``tool_loading_workers`` is greater than 1 and are
+        read from and written to ``toolbox_snapshot_file`` if ``enable_toolbox_snapshot`` is set.
+        """
+        workers = getattr(self.app.config, "tool_loading_workers", 1) or 1
+        snapshot_path = None
+        if getattr(self.app.config, "enable_toolbox_snapshot", False):
+            snapshot_path = self.app.config.toolbox_snapshot_file
+        if workers == 1 and not snapshot_path:
+            return
+        preload_timer = ExecutionTimer()
+        self._tool_documents = ToolDocumentPreloader(snapshot_path=snapshot_path, workers=workers)
+        paths = [
+            path for path in self._tool_paths_from_configs(config_filenames) if not self.load_tool_from_cache(path)
+        ]
+        self._tool_documents.preload(paths)
+        log.debug(
+            "Preloading tool documents finished (%d expanded, %d from snapshot) %s",
+            self._tool_documents.expanded_count,
+            self._tool_documents.snapshot_count,
+            preload_timer,
+        )
+
+    def _tool_paths_from_configs(self, config_filenames):
+        """Return the paths of the tool files referenced (directly or in sections) by ``config_filenames``."""
+        template_kwds = self._path_template_kwds()
+        paths = []
+        for config_filename in config_filenames:
+            try:
+                tool_conf_source = get_toolbox_parser(config_filename)
+            except Exception:
+                # Errors are reported when loading the config file.
+                continue
+            tool_path = self.__resolve_tool_path(tool_conf_source.parse_tool_path(), config_filename)
+            items = list(tool_conf_source.parse_items())
+            while items:
+                item = ensure_tool_conf_item(items.pop())
+                if item.type == "section":
+                    items.extend(item.items)
+                elif item.type == "tool" and item.get("file"):
+                    path = string.Template(item.get("file")).safe_substitute(**template_kwds)
+                    paths.append(os.path.join(tool_path, path))
+        return paths
+
     def _init_tools_from_config(self, config_filename):
         """
         Read the configuration file and load each tool.  The following tags are currently supported:
@@ -0,0 +1,146 @@
+"""Expand tool XML documents ahead of building a toolbox.
+
+Loading a large toolbox is dominated by reading every tool XML file and
+expanding its macros. :class:`ToolDocumentPreloader` expands the documents of
+all tools of a toolbox up front - in parallel in a pool of worker processes -
+and optionally keeps the expanded documents in a snapshot file keyed by the
+modification times of the tool and macro files, so that later toolbox loads
+(new web workers, toolbox reloads, restarts) only expand tools that changed.
+"""
+
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+from galaxy.tool_util.loader import load_tool_with_refereces
+from galaxy.tool_util.parser.xml import XmlToolSource
+from galaxy.util import ExecutionTimer
+
+log = logging.getLogger(__name__)
+
+CURRENT_SNAPSHOT_VERSION = 1
+EXPAND_CHUNK_SIZE = 16
+
+ToolDocument = Dict[str, Any]
+
+
+def expand_tool_document(path: str) -> Tuple[str, Optional[ToolDocument]]:
+    """Return the expanded XML document of the tool at ``path``.
+
+    Errors are not raised, the tool is loaded (and its errors reported) the
+    regular way instead.
+    """
+    try:
+        tree, macro_paths = load_tool_with_refereces(path)
+        tool_source = XmlToolSource(tree, source_path=path, macro_paths=macro_paths)
+        return path, {
+            "document": tool_source.to_string(),
+            "macro_paths": tool_source.macro_paths,
+            "paths_and_modtimes": tool_source.paths_and_modtimes(),
+        }
+    except Exception as e:
+        log.debug("Failed to expand tool document %s: %s", path, e)
+        return path, None
+
+
+def _is_current(tool_document: ToolDocument) -> bool:
+    try:
+        return all(os.path.getmtime(path) == modtime for path, modtime in tool_document["paths_and_modtimes"].items())
+    except OSError:
+        return False
+
+
+class ToolDocumentPreloader:
+    """Expanded tool documents for the tools about to be loaded into a toolbox."""
+
+    def __init__(self, snapshot_path: Optional[str] = None, workers: int = 1):
+        self.snapshot_path = snapshot_path
+        self.workers = max(1, workers)
+        self._documents: Dict[str, ToolDocument] = {}
+        self.expanded_count = 0
+        self.snapshot_count = 0
+
+    def _read_snapshot(self) -> Dict[str, ToolDocument]:
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return {}
+        try:
+            with gzip.open(self.snapshot_path, "rt", encoding="utf-8") as fh:
+                snapshot = json.load(fh)
+        except Exception as e:
+            log.warning("Ignoring unreadable toolbox snapshot %s: %s", self.snapshot_path, e)
+            return {}
+        if snapshot.get("version") != CURRENT_SNAPSHOT_VERSION:
+            return {}
+        return snapshot.get("documents", {})
+
+    def _write_snapshot(self) -> None:
+        assert self.snapshot_path
+        snapshot_dir = os.path.dirname(os.path.abspath(self.snapshot_path))
+        try:
+            os.makedirs(snapshot_dir, exist_ok=True)
+            # Write to a temporary file first, concurrently starting processes may replace the snapshot.
+            with tempfile.NamedTemporaryFile(dir=snapshot_dir, suffix=".tmp", delete=False) as tmp:
+                with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=1) as fh:
+                    json.dump({"version": CURRENT_SNAPSHOT_VERSION, "documents": self._documents}, fh)
+            os.replace(tmp.name, self.snapshot_path)
+        except OSError as e:
+            log.warning("Failed to write toolbox snapshot %s: %s", self.snapshot_path, e)
+
+    def _expand(self, paths: List[str]) -> Iterable[Tuple[str, Optional[ToolDocument]]]:
+        if self.workers == 1 or len(paths) < 2 * EXPAND_CHUNK_SIZE:
+            return map(expand_tool_document, paths)
+        # Spawn rather than fork, the toolbox may be loaded while other threads are running.
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            return list(executor.map(expand_tool_document, paths, chunksize=EXPAND_CHUNK_SIZE))
+
+    def preload(self, paths: Iterable[str]) -> None:
+        """Expand the documents of the XML tools at ``paths`` not found in the snapshot."""
+        paths = list(dict.fromkeys(path for path in paths if path.endswith(".xml") and os.path.exists(path)))
+        snapshot_timer = ExecutionTimer()
+        snapshot = self._read_snapshot()
+        to_expand = []
+        for path in paths:
+            tool_document = snapshot.get(path)
+            if tool_document is not None and _is_current(tool_document):
+                self._documents[path] = tool_document
+            else:
+                to_expand.append(path)
+        self.snapshot_count = len(self._documents)
+        if self.snapshot_path:
+            log.debug("Read %d tool documents from toolbox snapshot %s", self.snapshot_count, snapshot_timer)
+        expand_timer = ExecutionTimer()
+        try:
+            for path, tool_document in self._expand(to_expand):
+                if tool_document is not None:
+                    self._documents[path] = tool_document
+                    self.expanded_count += 1
+        except Exception:
+            # Tools not expanded here are loaded the regular way.
+            log.exception("Failed to expand tool documents in parallel")
+        log.debug("Expanded %d tool documents using %d worker(s) %s", self.expanded_count, self.workers, expand_timer)
+        if self.snapshot_path and (self.expanded_count or len(snapshot) != self.snapshot_count):
+            write_timer = ExecutionTimer()
+            self._write_snapshot()
+            log.debug("Wrote toolbox snapshot %s", write_timer)
+
+    def pop(self, path: str) -> Optional[ToolDocument]:
+        """Return (and release) the expanded document of the tool at ``path``, if preloaded."""
+        return self._documents.pop(path, None)
+
+    def clear(self) -> None:
+        self._documents.clear()
+
+    def __len__(self) -> int:
+        return len(self._documents)
@@ -562,7 +562,17 @@ class ToolBox(AbstractToolBox):
 
     def create_tool(self, config_file, tool_cache_data_dir=None, **kwds):
         cache = self.get_cache_region(tool_cache_data_dir)
-        if config_file.endswith(".xml") and cache and not cache.disabled:
+        if (tool_document := self._tool_documents.pop(config_file)) is not None:
+            # Expanded ahead of time while loading the toolbox (in parallel or from the toolbox snapshot)
+            tool_source = self.get_expanded_tool_source(
+                config_file=config_file,
+                xml_tree=parse_xml_string_to_etree(tool_document["document"]),
+                macro_paths=tool_document["macro_paths"],
+            )
+            if config_file.endswith(".xml") and cache and not cache.disabled and not cache.get(config_file):
+                # Keep the document cache populated for later loads without preloading
+                cache.set(config_file, tool_source)
+        elif config_file.endswith(".xml") and cache and not cache.disabled:
             tool_document = cache.get(config_file)
             if tool_document:
                 tool_source = self.get_expanded_tool_source(
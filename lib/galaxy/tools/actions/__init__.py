@@ -487,12 +487,8 @@ class DefaultToolAction(ToolAction):
         incoming["chromInfo"] = chrom_info
 
         if not completed_job:
-            # Determine output dataset permission/roles list
-            if all_permissions:
-                output_permissions = app.security_agent.guess_derived_permissions(all_permissions)
-            else:
-                # No valid inputs, we will use history defaults
-                output_permissions = app.security_agent.history_get_default_permissions(history)
+            # Determine output dataset permission/roles list, history defaults are used without valid inputs
+            output_permissions = execution_cache.get_output_permissions(all_permissions, history)
 
         # Add the dbkey to the incoming parameters
         incoming["dbkey"] = input_dbkey
@@ -696,7 +692,10 @@ class DefaultToolAction(ToolAction):
             if name not in incoming and name not in child_dataset_names:
                 # don't add already existing datasets, i.e. async created
                 history.stage_addition(data)
-        history.add_pending_items(set_output_hid=set_output_hid)
+        if execution_cache.defer_history_additions and set_output_hid:
+            execution_cache.stage_history_additions(history)
+        else:
+            history.add_pending_items(set_output_hid=set_output_hid)
 
         log.info(add_datasets_timer)
         job_setup_timer = ExecutionTimer()
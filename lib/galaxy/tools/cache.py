@@ -1,24 +1,45 @@
 import json
 import logging
 import os
-import shutil
 import sqlite3
-import tempfile
 import zlib
 from threading import Lock
 from typing import (
     Dict,
+    List,
     Optional,
+    Tuple,
 )
 
-from sqlitedict import SqliteDict
-
 from galaxy.util import unicodify
-from galaxy.util.hash_util import md5_hash_file
+from galaxy.util.hash_util import (
+    md5_hash_file,
+    md5_hash_str,
+)
 
 log = logging.getLogger(__name__)
 
-CURRENT_TOOL_CACHE_VERSION = 0
+CURRENT_TOOL_CACHE_VERSION = 2
+# Tool caches written by SqliteDict before documents were stored by tool hash.
+LEGACY_TOOL_CACHE_VERSION = 0
+LEGACY_TOOL_CACHE_TABLE = "unnamed"
+
+# Created next to the table of legacy caches, which older releases sharing the cache keep using.
+TOOL_DOCUMENT_CACHE_SCHEMA = (
+    """
+CREATE TABLE IF NOT EXISTS tool_document (
+    tool_hash TEXT PRIMARY KEY,
+    document BLOB NOT NULL
+)""",
+    """
+CREATE TABLE IF NOT EXISTS tool_path (
+    path TEXT PRIMARY KEY,
+    tool_hash TEXT NOT NULL,
+    macro_paths TEXT NOT NULL,
+    paths_and_modtimes TEXT NOT NULL
+)""",
+    "CREATE INDEX IF NOT EXISTS ix_tool_path_tool_hash ON tool_path (tool_hash)",
+)
 
 
 def encoder(obj):
@@ -30,104 +51,293 @@ def decoder(obj):
 
 
 class ToolDocumentCache:
+    """
+    Cache expanded tool XML documents in a SQLite database.
+
+    Documents are stored once per tool hash - the hash of the contents of the
+    tool file and all the macro files it imports - and tool paths point to the
+    hash they were last expanded from, so identical tools installed at
+    different paths share a document. A cached document is valid while the
+    modification times of the tool's files are unchanged, or, if they changed,
+    while the files still hash to it.
+
+    The database is written to incrementally in short transactions, so that
+    several Galaxy processes can share the cache. It uses the default rollback
+    journal, WAL is unsafe for databases shared between hosts (e.g. on NFS).
+    Cache directories that are not writeable (e.g. a cache shipped with the
+    tools on a read-only file system) are trusted and used without validation.
+    Caches written by older Galaxy releases are migrated when writeable and
+    read as they are otherwise.
+    """
+
     def __init__(self, cache_dir):
         self.cache_dir = cache_dir
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
         self.cache_file = os.path.join(self.cache_dir, "cache.sqlite")
-        self.writeable_cache_file = None
-        self._cache = None
+        self._lock = Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._legacy = False
+        # Macro files are shared by many tools, only hash them again if they change on disk.
+        self._file_hashes: Dict[str, Tuple[Tuple[int, int, int], Optional[str]]] = {}
         self.disabled = False
-        self._get_cache(create_if_necessary=True)
+        self._connect()
 
-    def close(self):
-        self._cache and self._cache.close()
+    @property
+    def cache_file_is_writeable(self):
+        return os.access(self.cache_dir, os.W_OK) and (
+            not os.path.exists(self.cache_file) or os.access(self.cache_file, os.W_OK)
+        )
 
-    def _get_cache(self, flag="r", create_if_necessary=False):
+    def _connect(self):
         try:
-            if create_if_necessary and not os.path.exists(self.cache_file):
-                # Create database if necessary using 'c' flag
-                self._cache = SqliteDict(self.cache_file, flag="c", encode=encoder, decode=decoder, autocommit=False)
-                if flag == "r":
-                    self._cache.flag = flag
+            legacy = False
+            if self.cache_file_is_writeable:
+                # Writes run in the transactions the sqlite3 module opens implicitly,
+                # committed by using the connection as a context manager.
+                connection = sqlite3.connect(self.cache_file, timeout=30, check_same_thread=False)
+                version = connection.execute("PRAGMA user_version").fetchone()[0]
+                if version != CURRENT_TOOL_CACHE_VERSION:
+                    self._upgrade(connection)
+            elif os.path.exists(self.cache_file):
+                connection = sqlite3.connect(
+                    f"file:{self.cache_file}?immutable=1", uri=True, isolation_level=None, check_same_thread=False
+                )
+                version = connection.execute("PRAGMA user_version").fetchone()[0]
+                legacy = version == LEGACY_TOOL_CACHE_VERSION and _has_legacy_table(connection)
+                if version != CURRENT_TOOL_CACHE_VERSION and not legacy:
+                    raise RuntimeError(f"Unsupported tool document cache version in {self.cache_file}")
             else:
-                cache_file = self.writeable_cache_file.name if self.writeable_cache_file else self.cache_file
-                self._cache = SqliteDict(cache_file, flag=flag, encode=encoder, decode=decoder, autocommit=False)
-        except (sqlite3.OperationalError, RuntimeError):
-            log.warning("Tool document cache unavailable")
-            self._cache = None
+                raise RuntimeError(f"Tool document cache {self.cache_file} does not exist and cannot be created")
+        except (sqlite3.Error, RuntimeError) as e:
+            log.warning("Tool document cache unavailable: %s", unicodify(e))
+            self._connection = None
             self.disabled = True
+        else:
+            self._connection = connection
+            self._legacy = legacy
+            self.disabled = False
+
+    def _upgrade(self, connection: sqlite3.Connection):
+        migrated = 0
+        with connection:
+            # Lock the database before checking its version again, so that processes
+            # starting together don't undo each other's upgrade.
+            connection.execute("BEGIN IMMEDIATE")
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version == CURRENT_TOOL_CACHE_VERSION:
+                return
+            legacy_documents = []
+            if version == LEGACY_TOOL_CACHE_VERSION and _has_legacy_table(connection):
+                legacy_documents = connection.execute(f"SELECT key, value FROM {LEGACY_TOOL_CACHE_TABLE}").fetchall()
+            else:
+                # Tables of an unknown version of this cache, the legacy table is left alone.
+                connection.execute("DROP TABLE IF EXISTS tool_path")
+                connection.execute("DROP TABLE IF EXISTS tool_document")
+            for statement in TOOL_DOCUMENT_CACHE_SCHEMA:
+                connection.execute(statement)
+            for config_file, value in legacy_documents:
+                tool_document = decoder(value)
+                if tool_document.get("tool_cache_version") != LEGACY_TOOL_CACHE_VERSION:
+                    continue
+                paths_and_modtimes = tool_document.get("paths_and_modtimes")
+                if not _modtimes_match(paths_and_modtimes):
+                    continue
+                macro_paths = tool_document["macro_paths"]
+                tool_hash = self._tool_hash(config_file, macro_paths)
+                if tool_hash is not None:
+                    self._insert(
+                        connection, config_file, tool_hash, tool_document["document"], macro_paths, paths_and_modtimes
+                    )
+                    migrated += 1
+            connection.execute(f"PRAGMA user_version={CURRENT_TOOL_CACHE_VERSION}")
+        if legacy_documents:
+            log.info(
+                "Migrated %d of %d documents in tool document cache %s",
+                migrated,
+                len(legacy_documents),
+                self.cache_file,
+            )
 
-    @property
-    def cache_file_is_writeable(self):
-        return os.access(self.cache_file, os.W_OK)
+    def close(self):
+        with self._lock:
+            if self._connection:
+                self._connection.close()
+                self._connection = None
 
     def reopen_ro(self):
-        self._get_cache(flag="r")
-        self.writeable_cache_file = None
+        # Kept for the post-fork hook, every process needs its own connection.
+        self.close()
+        self._connect()
+
+    def _file_hash(self, path: str) -> Optional[str]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._file_hashes.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+        file_hash = md5_hash_file(path)
+        self._file_hashes[path] = (key, file_hash)
+        return file_hash
+
+    def _tool_hash(self, config_file: str, macro_paths: List[str]) -> Optional[str]:
+        # Tool files are always read, only the (shared) macro files are hashed by modification.
+        file_hashes = [md5_hash_file(config_file)]
+        file_hashes.extend(self._file_hash(path) for path in macro_paths)
+        if None in file_hashes:
+            return None
+        return md5_hash_str(":".join(str(file_hash) for file_hash in file_hashes))
 
     def get(self, config_file):
+        if self._connection is None:
+            return None
+        if self._legacy:
+            return self._get_legacy(config_file)
         try:
-            tool_document = self._cache.get(config_file)
-        except sqlite3.OperationalError:
+            with self._lock:
+                row = self._connection.execute(
+                    "SELECT tool_path.tool_hash, tool_path.macro_paths, tool_path.paths_and_modtimes, "
+                    "tool_document.document FROM tool_path "
+                    "JOIN tool_document ON tool_path.tool_hash = tool_document.tool_hash WHERE tool_path.path = ?",
+                    (config_file,),
+                ).fetchone()
+        except sqlite3.Error:
             log.debug("Tool document cache unavailable")
             return None
-        if not tool_document:
-            return None
-        if tool_document.get("tool_cache_version") != CURRENT_TOOL_CACHE_VERSION:
+        if not row:
             return None
-        if self.cache_file_is_writeable:
-            for path, modtime in tool_document["paths_and_modtimes"].items():
-                if os.path.getmtime(path) != modtime:
-                    return None
+        tool_hash, macro_paths, paths_and_modtimes, document = row
+        macro_paths = json.loads(macro_paths)
+        if self.cache_file_is_writeable and not _modtimes_match(json.loads(paths_and_modtimes)):
+            # Only hash the tool's files if they have been touched since they were cached.
+            if self._tool_hash(config_file, macro_paths) != tool_hash:
+                return None
+            self._update_modtimes(config_file, tool_hash, macro_paths)
+        tool_document = decoder(document)
+        tool_document["macro_paths"] = macro_paths
         return tool_document
 
-    def _make_writable(self):
-        if not self.writeable_cache_file:
-            self.writeable_cache_file = tempfile.NamedTemporaryFile(
-                dir=self.cache_dir, suffix="cache.sqlite.tmp", delete=False
-            )
-            if os.path.exists(self.cache_file):
-                shutil.copy(self.cache_file, self.writeable_cache_file.name)
-            self._get_cache(flag="c")
+    def _get_legacy(self, config_file):
+        try:
+            with self._lock:
+                row = self._connection.execute(
+                    f"SELECT value FROM {LEGACY_TOOL_CACHE_TABLE} WHERE key = ?", (config_file,)
+                ).fetchone()
+        except sqlite3.Error:
+            log.debug("Tool document cache unavailable")
+            return None
+        if not row:
+            return None
+        tool_document = decoder(row[0])
+        if tool_document.get("tool_cache_version") != LEGACY_TOOL_CACHE_VERSION:
+            return None
+        return tool_document
 
-    def persist(self):
-        if self.writeable_cache_file:
-            self._cache.commit()
-            os.rename(self.writeable_cache_file.name, self.cache_file)
-            self.reopen_ro()
+    def _update_modtimes(self, config_file, tool_hash, macro_paths):
+        try:
+            paths_and_modtimes = _paths_and_modtimes(config_file, macro_paths)
+            with self._lock, self._connection:
+                self._connection.execute(
+                    "UPDATE tool_path SET paths_and_modtimes = ? WHERE path = ? AND tool_hash = ?",
+                    (json.dumps(paths_and_modtimes), config_file, tool_hash),
+                )
+        except (OSError, sqlite3.Error):
+            log.debug("Tool document cache not writeable")
 
     def set(self, config_file, tool_source):
+        if self._connection is None or not self.cache_file_is_writeable:
+            return
+        macro_paths = tool_source.macro_paths
         try:
-            if self.cache_file_is_writeable:
-                self._make_writable()
-                to_persist = {
-                    "document": tool_source.to_string(),
-                    "macro_paths": tool_source.macro_paths,
-                    "paths_and_modtimes": tool_source.paths_and_modtimes(),
-                    "tool_cache_version": CURRENT_TOOL_CACHE_VERSION,
-                }
-                try:
-                    self._cache[config_file] = to_persist
-                except RuntimeError:
-                    log.debug("Tool document cache not writeable")
-        except sqlite3.OperationalError:
-            log.debug("Tool document cache unavailable")
+            paths_and_modtimes = tool_source.paths_and_modtimes()
+        except OSError:
+            return
+        tool_hash = self._tool_hash(config_file, macro_paths)
+        if tool_hash is None:
+            return
+        try:
+            with self._lock, self._connection:
+                self._insert(
+                    self._connection,
+                    config_file,
+                    tool_hash,
+                    tool_source.to_string(),
+                    macro_paths,
+                    paths_and_modtimes,
+                )
+        except sqlite3.Error:
+            log.debug("Tool document cache not writeable")
+
+    @staticmethod
+    def _insert(connection, config_file, tool_hash, document, macro_paths, paths_and_modtimes):
+        connection.execute(
+            "INSERT OR IGNORE INTO tool_document (tool_hash, document) VALUES (?, ?)",
+            (tool_hash, encoder({"document": document})),
+        )
+        connection.execute(
+            "INSERT OR REPLACE INTO tool_path (path, tool_hash, macro_paths, paths_and_modtimes) VALUES (?, ?, ?, ?)",
+            (config_file, tool_hash, json.dumps(macro_paths), json.dumps(paths_and_modtimes)),
+        )
 
     def delete(self, config_file):
-        if self.cache_file_is_writeable:
-            self._make_writable()
-            try:
-                del self._cache[config_file]
-            except (KeyError, RuntimeError):
-                pass
-
-    def __del__(self):
-        if self.writeable_cache_file:
-            try:
-                os.unlink(self.writeable_cache_file.name)
-            except Exception:
-                pass
+        if self._connection is None or not self.cache_file_is_writeable:
+            return
+        try:
+            with self._lock, self._connection:
+                self._connection.execute("DELETE FROM tool_path WHERE path = ?", (config_file,))
+        except sqlite3.Error:
+            log.debug("Tool document cache not writeable")
+
+    def prune(self):
+        """Remove the paths of tools that no longer exist and the documents no path points to."""
+        if self._connection is None or not self.cache_file_is_writeable:
+            return
+        try:
+            with self._lock:
+                paths = [row[0] for row in self._connection.execute("SELECT path FROM tool_path")]
+            missing_paths = [(path,) for path in paths if not os.path.exists(path)]
+            with self._lock, self._connection:
+                self._connection.executemany("DELETE FROM tool_path WHERE path = ?", missing_paths)
+                pruned = self._connection.execute(
+                    "DELETE FROM tool_document WHERE tool_hash NOT IN (SELECT tool_hash FROM tool_path)"
+                ).rowcount
+        except sqlite3.Error:
+            log.debug("Tool document cache not writeable")
+            return
+        if missing_paths or pruned:
+            log.debug(
+                "Pruned %d missing tool paths and %d stale documents from tool document cache %s",
+                len(missing_paths),
+                pruned,
+                self.cache_file,
+            )
+
+    def persist(self):
+        # Documents are written as tools are loaded, just drop what is no longer referenced.
+        self.prune()
+
+
+def _has_legacy_table(connection: sqlite3.Connection) -> bool:
+    stmt = "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?"
+    return connection.execute(stmt, (LEGACY_TOOL_CACHE_TABLE,)).fetchone() is not None
+
+
+def _paths_and_modtimes(config_file: str, macro_paths: List[str]) -> Dict[str, float]:
+    paths_and_modtimes = {path: os.path.getmtime(path) for path in macro_paths}
+    paths_and_modtimes[config_file] = os.path.getmtime(config_file)
+    return paths_and_modtimes
+
+
+def _modtimes_match(paths_and_modtimes: Optional[Dict[str, float]]) -> bool:
+    if not paths_and_modtimes:
+        return False
+    try:
+        return all(os.path.getmtime(path) == modtime for path, modtime in paths_and_modtimes.items())
+    except OSError:
+        return False
 
 
 class ToolCache:
@@ -5,9 +5,15 @@ import os
 import shutil
 import sys
 import tempfile
+import threading
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+)
 from io import StringIO
 from typing import (
     Any,
+    Callable,
     Dict,
     List,
     Optional,
@@ -39,6 +45,10 @@ from galaxy.util.hash_util import (
 
 DESCRIPTION = """Data Import Script"""
 
+# Downloads mostly wait on the network, so these get more threads than resolving elements
+DOWNLOAD_WORKERS_PER_WORKER = 4
+MAX_DOWNLOAD_WORKERS = 16
+
 
 def main(argv=None):
     if argv is None:
@@ -46,7 +56,12 @@ def main(argv=None):
     args = _arg_parser().parse_args(argv)
     registry = Registry()
     registry.load_datatypes(root_dir=args.galaxy_root, config=args.datatypes_registry)
-    do_fetch(args.request, working_directory=args.working_directory or os.getcwd(), registry=registry)
+    do_fetch(
+        args.request,
+        working_directory=args.working_directory or os.getcwd(),
+        registry=registry,
+        workers=args.workers or 1,
+    )
 
 
 def do_fetch(
@@ -54,6 +69,7 @@ def do_fetch(
     working_directory: str,
     registry: Registry,
     file_sources_dict: Optional[Dict] = None,
+    workers: int = 1,
 ):
     assert os.path.exists(request_path)
     with open(request_path) as f:
@@ -66,6 +82,7 @@ def do_fetch(
         working_directory,
         allow_failed_collections,
         file_sources_dict,
+        workers=workers,
     )
     galaxy_json = _request_to_galaxy_json(upload_config, request)
     galaxy_json_path = os.path.join(working_directory, "galaxy.json")
@@ -386,17 +403,37 @@ def _fetch_target(upload_config: "UploadConfig", target):
             rval["extra_files"] = os.path.abspath(staged_extra_files)
         return _copy_and_validate_simple_attributes(item, rval)
 
-    def _resolve_item_capture_error(item):
+    def _needs_download(item):
+        return item.get("src") == "url" and not upload_config.get_option(item, "deferred") and "composite" not in item
+
+    def _download_item(item):
+        name, path = _has_src_to_path(upload_config, item, is_dataset=True)
+        return dict(item, src="path", path=path, name=name)
+
+    def _resolve_item_capture_error(item, download: Optional[Future] = None):
         try:
-            return _resolve_item(item)
+            if download is not None:
+                item = download.result()
+            return _resolve_item(item), False
         except Exception as e:
             rval = {"error_message": str(e)}
             rval = _copy_and_validate_simple_attributes(item, rval)
+            return rval, True
+
+    def _record_failure(resolved):
+        rval, failed = resolved
+        if failed:
             failed_elements.append(rval)
-            return rval
+        return rval
 
     if expansion_error is None:
-        elements = elements_tree_map(_resolve_item_capture_error, items)
+        if upload_config.workers > 1:
+            with ConcurrentElementsResolver(upload_config.workers) as resolver:
+                resolved = resolver.map(_resolve_item_capture_error, items, _needs_download, _download_item)
+        else:
+            resolved = elements_tree_map(_resolve_item_capture_error, items)
+        # Failures are recorded in element order, also when elements were resolved concurrently
+        elements = elements_tree_map(_record_failure, resolved)
         if is_collection and not upload_config.allow_failed_collections and len(failed_elements) > 0:
             element_error = "Failed to fetch collection element(s):\n"
             for failed_element in failed_elements:
@@ -434,7 +471,7 @@ def _decompress_target(upload_config: "UploadConfig", target):
 def elements_tree_map(f, items):
     new_items = []
     for item in items:
-        if "elements" in item:
+        if isinstance(item, dict) and "elements" in item:
             new_item = item.copy()
             new_item["elements"] = elements_tree_map(f, item["elements"])
             new_items.append(new_item)
@@ -443,6 +480,68 @@ def elements_tree_map(f, items):
     return new_items
 
 
+class ConcurrentElementsResolver:
+    """Resolve the leaves of elements trees concurrently, preserving their order.
+
+    Items that need to be downloaded first are downloaded on a pool of
+    ``download_workers`` threads. Resolving items (decompression, hashing,
+    sniffing, newline conversion) runs on a separate pool of ``workers``
+    threads, so that downloads waiting on the network don't hold up items
+    that are available locally and vice versa.
+    """
+
+    def __init__(self, workers: int, download_workers: Optional[int] = None) -> None:
+        if download_workers is None:
+            download_workers = min(workers * DOWNLOAD_WORKERS_PER_WORKER, MAX_DOWNLOAD_WORKERS)
+        self._resolve_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="DataFetchResolve")
+        self._download_pool = ThreadPoolExecutor(max_workers=download_workers, thread_name_prefix="DataFetchDownload")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        self._download_pool.shutdown(wait=True)
+        self._resolve_pool.shutdown(wait=True)
+
+    def map(
+        self,
+        resolve: Callable[..., Any],
+        items,
+        needs_download: Callable[[Dict[str, Any]], bool],
+        download: Callable[[Dict[str, Any]], Dict[str, Any]],
+    ):
+        """Return ``items`` with leaves replaced by what ``resolve`` returns for them.
+
+        Leaves for which ``needs_download`` is true are passed to ``resolve``
+        along with the (completed) future of ``download`` for them.
+        """
+        futures = elements_tree_map(lambda item: self._submit(resolve, item, needs_download, download), items)
+        return elements_tree_map(lambda future: future.result(), futures)
+
+    def _submit(self, resolve, item, needs_download, download) -> Future:
+        if not needs_download(item):
+            return self._resolve_pool.submit(resolve, item)
+        resolved: Future = Future()
+
+        def copy_result(resolve_future: Future) -> None:
+            if (exception := resolve_future.exception()) is not None:
+                resolved.set_exception(exception)
+            else:
+                resolved.set_result(resolve_future.result())
+
+        def downloaded(download_future: Future) -> None:
+            try:
+                self._resolve_pool.submit(resolve, item, download_future).add_done_callback(copy_result)
+            except Exception as e:
+                resolved.set_exception(e)
+
+        self._download_pool.submit(download, item).add_done_callback(downloaded)
+        return resolved
+
+
 def _directory_to_items(directory):
     items: List[Dict[str, Any]] = []
     dir_elements: Dict[str, Any] = {}
@@ -525,6 +624,11 @@ def _arg_parser():
     parser.add_argument("--request-version")
     parser.add_argument("--request")
     parser.add_argument("--working-directory")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="number of elements to resolve concurrently, elements are resolved one by one by default",
+    )
     return parser
 
 
@@ -553,6 +657,7 @@ class UploadConfig:
         working_directory,
         allow_failed_collections,
         file_sources_dict=None,
+        workers=1,
     ):
         self.registry = registry
         self.working_directory = working_directory
@@ -566,14 +671,20 @@ class UploadConfig:
         self.link_data_only = _link_data_only(request)
         self.file_sources_dict = file_sources_dict
         self._file_sources = None
+        self.workers = workers
 
         self.__workdir = os.path.abspath(working_directory)
         self.__upload_count = 0
+        # Elements may be resolved concurrently, see ConcurrentElementsResolver
+        self.__lock = threading.Lock()
 
     @property
     def file_sources(self):
-        if self._file_sources is None:
-            self._file_sources = get_file_sources(self.working_directory, file_sources_as_dict=self.file_sources_dict)
+        with self.__lock:
+            if self._file_sources is None:
+                self._file_sources = get_file_sources(
+                    self.working_directory, file_sources_as_dict=self.file_sources_dict
+                )
         return self._file_sources
 
     def get_option(self, item, key):
@@ -588,8 +699,9 @@ class UploadConfig:
             return getattr(self, key)
 
     def __new_dataset_path(self):
-        path = os.path.join(self.working_directory, f"gxupload_{self.__upload_count}")
-        self.__upload_count += 1
+        with self.__lock:
+            path = os.path.join(self.working_directory, f"gxupload_{self.__upload_count}")
+            self.__upload_count += 1
         return path
 
     def ensure_in_working_directory(self, path, purge_source, in_place):
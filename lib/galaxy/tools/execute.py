@@ -37,6 +37,7 @@ from galaxy.tools.execution_helpers import (
     ToolExecutionCache,
 )
 from galaxy.tools.parameters.workflow_utils import is_runtime_value
+from galaxy.util import ExecutionTimer
 from ._types import (
     ToolRequestT,
     ToolStateJobInstancePopulatedT,
@@ -49,6 +50,8 @@ log = logging.getLogger(__name__)
 
 SINGLE_EXECUTION_SUCCESS_MESSAGE = "Tool ${tool_id} created job ${job_id}"
 BATCH_EXECUTION_MESSAGE = "Created ${job_count} job(s) for tool ${tool_id} request"
+# Log progress of creating jobs for large requests every that many jobs
+JOB_PROGRESS_INTERVAL = 500
 
 
 CompletedJobsT = Dict[int, Optional[model.Job]]
@@ -111,7 +114,8 @@ def execute(
         execution_tracker = WorkflowStepExecutionTracker(
             trans, tool, mapping_params, collection_info, invocation_step, completed_jobs=completed_jobs
         )
-    execution_cache = ToolExecutionCache(trans)
+    # Outputs of all jobs are added to the history at once, rerun jobs need hids to remap outputs
+    execution_cache = ToolExecutionCache(trans, defer_history_additions=rerun_remap_job_id is None)
 
     def execute_single_job(execution_slice: "ExecutionSlice", completed_job: Optional[model.Job], skip: bool = False):
         job_timer = tool.app.execution_timer_factory.get_timer(
@@ -179,6 +183,7 @@ def execute(
     job_count = len(execution_tracker.param_combinations)
 
     jobs_executed = 0
+    jobs_timer = ExecutionTimer()
     has_remaining_jobs = False
     execution_slice = None
     job_datasets: Dict[str, List[model.DatasetInstance]] = {}  # job: list of dataset instances created by job
@@ -192,7 +197,16 @@ def execute(
             execute_single_job(execution_slice, completed_jobs[i], skip=skip)
             history = execution_slice.history or history
             jobs_executed += 1
+            if jobs_executed % JOB_PROGRESS_INTERVAL == 0:
+                log.debug(
+                    "Created %d of %d jobs for tool %s (%.1f jobs/sec)",
+                    jobs_executed,
+                    job_count,
+                    tool.id,
+                    jobs_executed / max(jobs_timer.elapsed, 1e-6),
+                )
 
+    execution_cache.add_pending_history_items()
     if execution_slice:
         history.add_pending_items()
     # Make sure collections, implicit jobs etc are flushed even if there are no precreated output datasets
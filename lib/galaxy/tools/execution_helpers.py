@@ -5,6 +5,12 @@ tool execution code, and tool action code.
 """
 
 import logging
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Tuple,
+)
 
 log = logging.getLogger(__name__)
 
@@ -14,11 +20,17 @@ class ToolExecutionCache:
     the same tool by the same user with slightly different parameters.
     """
 
-    def __init__(self, trans):
+    def __init__(self, trans, defer_history_additions: bool = False):
         self.trans = trans
         self.current_user_roles = trans.get_current_user_roles()
         self.chrom_info = {}
         self.cached_collection_elements = {}
+        self.derived_permissions: Dict[FrozenSet[Tuple[str, FrozenSet[Any]]], Dict] = {}
+        self.history_default_permissions: Dict[Any, Dict] = {}
+        # When executing a batch of jobs, outputs stay staged in their history until the whole
+        # batch is added at once by add_pending_history_items - allocating hids in one go.
+        self.defer_history_additions = defer_history_additions
+        self.histories_with_pending_additions: Dict[int, Any] = {}
 
     def get_chrom_info(self, tool_id, input_dbkey):
         genome_builds = self.trans.app.genome_builds
@@ -36,6 +48,30 @@ class ToolExecutionCache:
 
         return chrom_info_pair
 
+    def get_output_permissions(self, all_input_permissions, history):
+        """Return the permissions of outputs derived from ``all_input_permissions``.
+
+        If there are no input permissions, the default permissions of ``history`` are used.
+        """
+        security_agent = self.trans.app.security_agent
+        if all_input_permissions:
+            key = frozenset((action, frozenset(role_ids)) for action, role_ids in all_input_permissions.items())
+            if key not in self.derived_permissions:
+                self.derived_permissions[key] = security_agent.guess_derived_permissions(all_input_permissions)
+            return self.derived_permissions[key]
+        if history not in self.history_default_permissions:
+            self.history_default_permissions[history] = security_agent.history_get_default_permissions(history)
+        return self.history_default_permissions[history]
+
+    def stage_history_additions(self, history) -> None:
+        """Record that ``history`` has outputs staged for addition by :meth:`add_pending_history_items`."""
+        self.histories_with_pending_additions[id(history)] = history
+
+    def add_pending_history_items(self) -> None:
+        for history in self.histories_with_pending_additions.values():
+            history.add_pending_items()
+        self.histories_with_pending_additions.clear()
+
 
 def filter_output(tool, output, incoming):
     for filter in output.filters:
@@ -23,6 +23,7 @@ from typing import (
 
 from typing_extensions import Literal
 
+from galaxy import util
 from galaxy.util.path import (
     safe_relpath,
     StrPath,
@@ -143,6 +144,90 @@ def get_fileobj_raw(
         return compressed_format, fh
 
 
+class _ClosingReader(io.BufferedIOBase):
+    """
+    Binary reader over a decompressing file object that also closes the
+    objects it was opened from (e.g. the compressed stream) when closed.
+    """
+
+    def __init__(self, fh: FileObjTypeBytes, *closables: Any) -> None:
+        self._fh = fh
+        self._closables = closables
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        return self._fh.read(-1 if size is None else size)
+
+    def read1(self, size: int = -1) -> bytes:
+        return self._fh.read1(size)  # type: ignore[union-attr]
+
+    def readline(self, size: Optional[int] = -1) -> bytes:
+        return self._fh.readline(-1 if size is None else size)
+
+    def seekable(self) -> bool:
+        return self._fh.seekable()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._fh.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._fh.tell()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            self._fh.close()
+            for closable in self._closables:
+                closable.close()
+        finally:
+            super().close()
+
+
+def get_fileobj_from_stream(
+    stream: IO[bytes], mode: str = "r", compressed_formats: Optional[List[str]] = None
+) -> FileObjType:
+    """
+    Like :func:`get_fileobj` but wrapping an already opened seekable binary
+    stream (e.g. from ``ObjectStore.open_data``) instead of opening a path.
+    Closing the returned file object closes ``stream``.
+
+    >>> get_fileobj_from_stream(io.BytesIO(gzip.compress(b"chr1 10"))).read()
+    'chr1 10'
+    >>> get_fileobj_from_stream(io.BytesIO(b"plain"), "rb").read()
+    b'plain'
+    >>> stream = io.BytesIO(gzip.compress(b"chr1 10"))
+    >>> with get_fileobj_from_stream(stream, "rb") as fh:
+    ...     fh.readline()
+    b'chr1 10'
+    >>> stream.closed
+    True
+    """
+    if compressed_formats is None:
+        compressed_formats = ["bz2", "gzip", "xz", "zip"]
+    magic = stream.read(6)
+    stream.seek(0)
+    # the decompressing file objects don't close file objects passed to them
+    if "gzip" in compressed_formats and magic.startswith(util.gzip_magic):
+        fh: FileObjTypeBytes = _ClosingReader(gzip.GzipFile(fileobj=stream, mode="rb"), stream)
+    elif "bz2" in compressed_formats and magic.startswith(util.bz2_magic):
+        fh = _ClosingReader(bz2.BZ2File(stream, "rb"), stream)
+    elif "xz" in compressed_formats and magic.startswith(util.xz_magic):
+        fh = _ClosingReader(lzma.LZMAFile(stream, "rb"), stream)
+    elif "zip" in compressed_formats and zipfile.is_zipfile(stream):
+        stream.seek(0)
+        zh = zipfile.ZipFile(stream)
+        fh = _ClosingReader(zh.open(zh.namelist()[0]), zh, stream)
+    else:
+        stream.seek(0)
+        fh = stream
+    if "b" not in mode:
+        return io.TextIOWrapper(cast(IO[bytes], fh), encoding="utf-8")
+    return fh
+
+
 def file_iter(fname: str, sep: Optional[Any] = None) -> Generator[Union[List[bytes], Any, List[str]], None, None]:
     """
     This generator iterates over a file and yields its lines
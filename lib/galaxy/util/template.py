@@ -1,7 +1,18 @@
 """Entry point for the usage of Cheetah templating within Galaxy."""
 
+import hashlib
+import threading
 import traceback
+from collections import OrderedDict
+from functools import lru_cache
 from lib2to3.refactor import RefactoringTool
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Tuple,
+    Type,
+)
 
 from Cheetah.Compiler import Compiler
 from Cheetah.NameMapper import NotFound
@@ -13,6 +24,8 @@ from past.translation import myfixes
 from galaxy.util.tree_dict import TreeDict
 from . import unicodify
 
+DEFAULT_TEMPLATE_CACHE_SIZE = 1000
+
 # Skip libpasteurize fixers, which make sure code is py2 and py3 compatible.
 # This is not needed, we only translate code on py3.
 myfixes = [f for f in myfixes if not f.startswith("libpasteurize")]
@@ -39,6 +52,80 @@ def create_compiler_class(module_code):
     return CustomCompilerClass
 
 
+class CompiledTemplateCache:
+    """Thread-safe LRU cache of compiled Cheetah template classes.
+
+    Cheetah caches compiled templates itself, but without bound and keyed on
+    the Python hash of the template text, and the compiler classes created for
+    Python 2 templates (see :func:`create_compiler_class`) never hit that cache.
+    Templates are compiled once per (template text, compiler, Python template
+    version) here instead - command lines and configfiles of a tool are
+    rendered for every job, e.g. thousands of times when mapping a tool over a
+    collection.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_TEMPLATE_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Tuple[Hashable, ...], Type[Template]] = OrderedDict()
+
+    @staticmethod
+    def _key(template_text: str, compiler_class: Type[Compiler], python_template_version: Any) -> Tuple[Hashable, ...]:
+        module_code = getattr(compiler_class, "module_code", None)
+        if module_code is not None:
+            # Compiler classes with fixed module code are created for every fill, identify them by their code.
+            compiler_key: Hashable = hashlib.sha1(module_code.encode("utf-8")).hexdigest()
+        else:
+            compiler_key = compiler_class
+        template_hash = hashlib.sha1(template_text.encode("utf-8")).hexdigest()
+        return (template_hash, compiler_key, str(python_template_version))
+
+    def compile(
+        self, template_text: str, compiler_class: Type[Compiler] = Compiler, python_template_version: Any = "3"
+    ) -> Type[Template]:
+        """Return the compiled template class for ``template_text``, compiling it if not cached."""
+        key = self._key(template_text, compiler_class, python_template_version)
+        with self._lock:
+            klass = self._entries.get(key)
+            if klass is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return klass
+            self.misses += 1
+        klass = Template.compile(
+            source=template_text, compilerClass=compiler_class, useCache=False, cacheCompilationResults=False
+        )
+        if self.max_size > 0:
+            with self._lock:
+                self._entries[key] = klass
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return klass
+
+    def resize(self, max_size: int) -> None:
+        with self._lock:
+            self.max_size = max_size
+            while len(self._entries) > max(max_size, 0):
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "max_size": self.max_size}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Shared by everything filling Cheetah templates (command lines, configfiles, dynamic options, output filters, ...)
+compiled_template_cache = CompiledTemplateCache()
+
+
 def fill_template(
     template_text,
     context=None,
@@ -62,7 +149,7 @@ def fill_template(
     if isinstance(python_template_version, str):
         python_template_version = Version(python_template_version)
     try:
-        klass = Template.compile(source=template_text, compilerClass=compiler_class)
+        klass = compiled_template_cache.compile(template_text, compiler_class, python_template_version)
     except ParseError as e:
         # Might happen on invalid syntax within a cheetah statement, like `#if $smxsize <> 128.0`
         if first_exception is None:
@@ -143,6 +230,7 @@ def fill_template(
         raise first_exception or e
 
 
+@lru_cache(maxsize=128)
 def futurize_preprocessor(source):
     source = str(refactoring_tool.refactor_string(source, name="auto_translate_cheetah"))
     # libfuturize.fixes.fix_unicode_keep_u' breaks from Cheetah.compat import unicode
@@ -28,6 +28,7 @@ from galaxy.managers.context import (
     ProvidesHistoryContext,
     ProvidesUserContext,
 )
+from galaxy.managers.job_resource_usage import MAX_REPORT_JOBS
 from galaxy.managers.jobs import (
     JobManager,
     summarize_destination_params,
@@ -44,6 +45,7 @@ from galaxy.schema.jobs import (
     JobInputAssociation,
     JobInputSummary,
     JobOutputAssociation,
+    JobResourceUsageReport,
     ReportJobErrorPayload,
     SearchJobsPayload,
     ShowFullJobResponse,
@@ -161,6 +163,42 @@ SortByQueryParam: JobIndexSortByEnum = Query(
     description="Sort results by specified field.",
 )
 
+DestinationIdQueryParam = Query(
+    default=None,
+    alias="destination_id",
+    title="Destination ID(s)",
+    description="Limit the report to jobs that ran on one of the included destinations. If none, all are included",
+)
+
+MinJobsQueryParam: int = Query(
+    default=10,
+    ge=1,
+    title="Minimum jobs",
+    description="Minimum number of jobs of a tool required to suggest resources for it.",
+)
+
+PercentQueryParam: float = Query(
+    default=95,
+    gt=0,
+    le=100,
+    title="Percentile",
+    description="Percentile of the memory and cores used by the jobs of a tool that the suggested resources cover.",
+)
+
+MemoryHeadroomQueryParam: float = Query(
+    default=0.2,
+    ge=0,
+    title="Memory headroom",
+    description="Fraction of the memory used added to the suggested memory (e.g. 0.2 for 20% headroom).",
+)
+
+MaxJobsQueryParam: int = Query(
+    default=MAX_REPORT_JOBS,
+    ge=1,
+    title="Maximum jobs",
+    description="Maximum number of jobs summarized, the most recently finished jobs are used.",
+)
+
 LimitQueryParam: int = Query(default=500, ge=1, title="Limit", description="Maximum number of jobs to return.")
 
 OffsetQueryParam: int = Query(
@@ -248,6 +286,41 @@ class FastAPIJobs:
         )
         return self.service.index(trans, payload)
 
+    @router.get(
+        "/api/jobs/resource_usage",
+        name="job_resource_usage_report",
+        summary="Summarize the resource usage of finished jobs and suggest resources per tool.",
+        require_admin=True,
+    )
+    def resource_usage_report(
+        self,
+        trans: ProvidesUserContext = DependsOnTrans,
+        tool_ids: Optional[List[str]] = Depends(query_parameter_as_list(ToolIdQueryParam)),
+        destination_ids: Optional[List[str]] = Depends(query_parameter_as_list(DestinationIdQueryParam)),
+        date_range_min: Optional[Union[datetime, date]] = DateRangeMinQueryParam,
+        date_range_max: Optional[Union[datetime, date]] = DateRangeMaxQueryParam,
+        min_jobs: int = MinJobsQueryParam,
+        percent: float = PercentQueryParam,
+        memory_headroom: float = MemoryHeadroomQueryParam,
+        max_jobs: int = MaxJobsQueryParam,
+    ) -> JobResourceUsageReport:
+        """
+        Aggregate the job metrics (runtime, memory allocated and used, CPU time) of successfully
+        finished jobs per tool, tool version and destination, and suggest the memory and cores to
+        allocate to each tool, also as a Total Perspective Vortex ``tools`` configuration.
+        """
+        return self.service.resource_usage_report(
+            trans,
+            tool_ids=tool_ids,
+            destination_ids=destination_ids,
+            date_range_min=date_range_min,
+            date_range_max=date_range_max,
+            min_jobs=min_jobs,
+            percent=percent,
+            memory_headroom=memory_headroom,
+            max_jobs=max_jobs,
+        )
+
     @router.get(
         "/api/jobs/{job_id}/common_problems",
         name="check_common_problems",
@@ -74,6 +74,7 @@ class LibraryContentsController(
         """
         rval = []
         current_user_roles = trans.get_current_user_roles()
+        dataset_permissions = trans.get_dataset_permission_resolver()
 
         def traverse(folder):
             admin = trans.user_is_admin
@@ -88,11 +89,11 @@ class LibraryContentsController(
                     subfolder.api_type = "folder"
                     rval.append(subfolder)
                     rval.extend(traverse(subfolder))
+            if not admin:
+                dataset_permissions.load(ld.library_dataset_dataset_association.dataset_id for ld in folder.datasets)
             for ld in folder.datasets:
                 if not admin:
-                    can_access = trans.app.security_agent.can_access_dataset(
-                        current_user_roles, ld.library_dataset_dataset_association.dataset
-                    )
+                    can_access = dataset_permissions.can_access(ld.library_dataset_dataset_association.dataset)
                 if (admin or can_access) and not ld.deleted:
                     ld.api_path = f"{folder.api_path}/{ld.name}"
                     ld.api_type = "file"
@@ -5,10 +5,11 @@ from typing import (
     Any,
     cast,
     Dict,
-    Iterable,
     List,
     Optional,
     Set,
+    Tuple,
+    Type,
     TYPE_CHECKING,
     Union,
 )
@@ -18,6 +19,11 @@ from pydantic import (
     ConfigDict,
     Field,
 )
+from sqlalchemy import (
+    select,
+    true,
+    update,
+)
 from typing_extensions import (
     Literal,
     Protocol,
@@ -66,6 +72,8 @@ from galaxy.model import (
     User,
 )
 from galaxy.model.base import transaction
+from galaxy.model.collection_summary import rebuild_summaries_for_hdas
+from galaxy.model.orm.now import now
 from galaxy.model.security import GalaxyRBACAgent
 from galaxy.objectstore import BaseObjectStore
 from galaxy.schema import (
@@ -118,6 +126,7 @@ from galaxy.schema.tasks import (
 )
 from galaxy.security.idencoding import IdEncodingHelper
 from galaxy.short_term_storage import ShortTermStorageAllocator
+from galaxy.util import chunk_iterable
 from galaxy.util.zipstream import ZipstreamWrapper
 from galaxy.webapps.galaxy.services.base import (
     async_task_summary,
@@ -697,22 +706,28 @@ class HistoriesContentsService(ServiceBase, ServesExportStores, ConsumesModelSto
         history = self.history_manager.get_mutable(history_id, trans.user, current_history=trans.history)
         filters = self.history_contents_filters.parse_query_filters(filter_query_params)
         self._validate_bulk_operation_params(payload, trans.user, trans)
-        contents: List[HistoryItem]
+        items: List[HistoryItemKey]
         if payload.items:
             contents = self._get_contents_by_item_list(
                 trans,
                 history,
                 payload.items,
             )
+            items = [(type(item), item.id) for item in contents]
+        elif self.history_contents_filters.contains_non_orm_filter(filters):
+            items = [(type(item), item.id) for item in self.history_contents_manager.contents(history, filters)]
         else:
-            contents = self.history_contents_manager.contents(
-                history,
-                filters,
-            )
-        errors = self._apply_bulk_operation(contents, payload.operation, payload.params, trans)
+            # the operations load the items they can't apply using their ids only
+            item_classes = {
+                HistoryContentType.dataset: HistoryDatasetAssociation,
+                HistoryContentType.dataset_collection: HistoryDatasetCollectionAssociation,
+            }
+            rows = self.history_contents_manager.contents(history, filters, expand_models=False)
+            items = [(item_classes[row.history_content_type], row.id) for row in rows]
+        errors = self._apply_bulk_operation(items, payload.operation, payload.params, trans)
         with transaction(trans.sa_session):
             trans.sa_session.commit()
-        success_count = len(contents) - len(errors)
+        success_count = len(items) - len(errors)
         return HistoryContentBulkOperationResult(success_count=success_count, errors=errors)
 
     def validate(self, trans, history_id: DecodedDatabaseIdField, history_content_id: DecodedDatabaseIdField):
@@ -954,7 +969,10 @@ class HistoriesContentsService(ServiceBase, ServesExportStores, ConsumesModelSto
             object_store_ids = self.object_store.object_store_ids(private=not shareable)
             if object_store_ids:
                 legacy_params_dict["object_store_ids"] = object_store_ids
-        contents = history.contents_iter(**legacy_params_dict)
+        contents = list(history.contents_iter(**legacy_params_dict))
+        trans.get_dataset_permission_resolver().load(
+            content.dataset_id for content in contents if isinstance(content, HistoryDatasetAssociation)
+        )
         items = [
             self._serialize_legacy_content_item(trans, content, legacy_params_dict.get("dataset_details"))
             for content in contents
@@ -1335,33 +1353,19 @@ class HistoriesContentsService(ServiceBase, ServesExportStores, ConsumesModelSto
 
     def _apply_bulk_operation(
         self,
-        contents: Iterable["HistoryItem"],
+        items: List["HistoryItemKey"],
         operation: HistoryContentItemOperation,
         params: Optional[AnyBulkOperationParams],
         trans: ProvidesHistoryContext,
     ) -> List[BulkOperationItemError]:
-        errors: List[BulkOperationItemError] = []
-        for item in contents:
-            error = self._apply_operation_to_item(operation, item, params, trans)
-            if error:
-                errors.append(error)
-        return errors
-
-    def _apply_operation_to_item(
-        self,
-        operation: HistoryContentItemOperation,
-        item: "HistoryItem",
-        params: Optional[AnyBulkOperationParams],
-        trans: ProvidesHistoryContext,
-    ) -> Optional[BulkOperationItemError]:
-        try:
-            self.item_operator.apply(operation, item, params, trans)
-            return None
-        except Exception as exc:
-            return BulkOperationItemError(
-                item=EncodedHistoryContentItem(id=item.id, history_content_type=item.history_content_type),
-                error=str(exc),
+        failures = self.item_operator.apply_bulk(operation, items, params, trans)
+        return [
+            BulkOperationItemError(
+                item=EncodedHistoryContentItem(id=item_id, history_content_type=item_class.history_content_type),
+                error=error,
             )
+            for (item_class, item_id), error in failures
+        ]
 
     def _get_contents_by_item_list(
         self, trans, history: History, items: List[HistoryContentItem]
@@ -1391,6 +1395,20 @@ class ItemOperation(Protocol):
     ) -> None: ...
 
 
+# A history item by its class and id
+HistoryItemKey = Tuple[Type["HistoryItem"], int]
+
+
+class BulkItemOperation(Protocol):
+    def __call__(
+        self,
+        item_class: Type["HistoryItem"],
+        item_ids: List[int],
+        params: Optional[AnyBulkOperationParams],
+        trans: ProvidesHistoryContext,
+    ) -> List[Tuple[int, str]]: ...
+
+
 class HistoryItemOperator:
     """Defines operations on history items."""
 
@@ -1417,6 +1435,52 @@ class HistoryItemOperator:
             HistoryContentItemOperation.add_tags: lambda item, params, trans: self._add_tags(trans, item, params),
             HistoryContentItemOperation.remove_tags: lambda item, params, trans: self._remove_tags(trans, item, params),
         }
+        hda, hdca = HistoryDatasetAssociation, HistoryDatasetCollectionAssociation
+        # Operations applied to all items of the listed classes at once, using statements over their ids
+        self._bulk_operation_map: Dict[
+            HistoryContentItemOperation, Tuple[Tuple[Type[HistoryItem], ...], BulkItemOperation]
+        ] = {
+            HistoryContentItemOperation.hide: (
+                (hda, hdca),
+                lambda item_class, item_ids, params, trans: self._bulk_update(
+                    trans, item_class, item_ids, visible=False
+                ),
+            ),
+            HistoryContentItemOperation.unhide: (
+                (hda, hdca),
+                lambda item_class, item_ids, params, trans: self._bulk_update(
+                    trans, item_class, item_ids, visible=True
+                ),
+            ),
+            HistoryContentItemOperation.delete: (
+                (hda,),
+                lambda item_class, item_ids, params, trans: self._bulk_update(
+                    trans, item_class, item_ids, deleted=True
+                ),
+            ),
+            HistoryContentItemOperation.undelete: (
+                (hda,),
+                lambda item_class, item_ids, params, trans: self._bulk_undelete(trans, item_class, item_ids),
+            ),
+            HistoryContentItemOperation.purge: (
+                (hda,),
+                lambda item_class, item_ids, params, trans: self._bulk_purge(trans, item_class, item_ids),
+            ),
+            HistoryContentItemOperation.change_datatype: (
+                (hda,),
+                lambda item_class, item_ids, params, trans: self._bulk_change_datatype(
+                    trans, item_class, item_ids, params
+                ),
+            ),
+            HistoryContentItemOperation.add_tags: (
+                (hda, hdca),
+                lambda item_class, item_ids, params, trans: self._bulk_add_tags(trans, item_class, item_ids, params),
+            ),
+            HistoryContentItemOperation.remove_tags: (
+                (hda, hdca),
+                lambda item_class, item_ids, params, trans: self._bulk_remove_tags(trans, item_class, item_ids, params),
+            ),
+        }
 
     def apply(
         self,
@@ -1427,6 +1491,139 @@ class HistoryItemOperator:
     ):
         self._operation_map[operation](item, params, trans)
 
+    def apply_bulk(
+        self,
+        operation: HistoryContentItemOperation,
+        items: List[HistoryItemKey],
+        params: Optional[AnyBulkOperationParams],
+        trans: ProvidesHistoryContext,
+    ) -> List[Tuple[HistoryItemKey, str]]:
+        """
+        Apply the operation to all items, returning the items it failed for along with the error.
+
+        Items of the classes the operation has a bulk implementation for are operated on
+        at once by their ids, all other items are loaded and operated on one after the other.
+        """
+        failures: List[Tuple[HistoryItemKey, str]] = []
+        item_classes, bulk_operation = self._bulk_operation_map.get(operation, ((), None))
+        item_ids_by_class: Dict[Type[HistoryItem], List[int]] = {}
+        for item_class, item_id in items:
+            item_ids_by_class.setdefault(item_class, []).append(item_id)
+        for item_class, item_ids in item_ids_by_class.items():
+            if item_class in item_classes:
+                assert bulk_operation
+                class_failures = bulk_operation(item_class, item_ids, params, trans)
+                failures.extend(((item_class, item_id), error) for item_id, error in class_failures)
+                continue
+            for item in self._load_items(trans, item_class, item_ids):
+                try:
+                    self.apply(operation, item, params, trans)
+                except Exception as exc:
+                    failures.append(((item_class, item.id), str(exc)))
+        return failures
+
+    def _load_items(
+        self, trans: ProvidesHistoryContext, item_class: Type["HistoryItem"], item_ids: List[int]
+    ) -> List["HistoryItem"]:
+        items: List[HistoryItem] = []
+        for item_ids_chunk in chunk_iterable(item_ids):
+            items.extend(trans.sa_session.scalars(select(item_class).where(item_class.id.in_(item_ids_chunk))))
+        return items
+
+    def _bulk_update(
+        self, trans: ProvidesHistoryContext, item_class: Type["HistoryItem"], item_ids: List[int], **values
+    ) -> List[Tuple[int, str]]:
+        # update_time is always set, so that the history is notified even if the values were set already
+        for item_ids_chunk in chunk_iterable(item_ids):
+            stmt = update(item_class).where(item_class.id.in_(item_ids_chunk)).values(update_time=now(), **values)
+            trans.sa_session.execute(stmt)
+            if "deleted" in values and item_class is HistoryDatasetAssociation:
+                rebuild_summaries_for_hdas(trans.sa_session.connection(), item_ids_chunk)
+        return []
+
+    def _bulk_undelete(
+        self, trans: ProvidesHistoryContext, item_class: Type["HistoryItem"], item_ids: List[int]
+    ) -> List[Tuple[int, str]]:
+        purged_ids: Set[int] = set()
+        for item_ids_chunk in chunk_iterable(item_ids):
+            stmt = select(item_class.id).where(item_class.id.in_(item_ids_chunk), item_class.purged == true())
+            purged_ids.update(trans.sa_session.scalars(stmt))
+        failures = [
+            (item_id, "This item has been permanently deleted and cannot be recovered.") for item_id in purged_ids
+        ]
+        item_ids = [item_id for item_id in item_ids if item_id not in purged_ids]
+        return failures + self._bulk_update(trans, item_class, item_ids, deleted=False)
+
+    def _bulk_purge(
+        self, trans: ProvidesHistoryContext, item_class: Type["HistoryItem"], item_ids: List[int]
+    ) -> List[Tuple[int, str]]:
+        items = self._load_items(trans, item_class, item_ids)
+        # TODO: remove this `update` when we can properly track the operation results to notify the history
+        self._bulk_update(trans, item_class, [item.id for item in items if item.purged])
+        items = [item for item in items if not item.purged]
+        if not items:
+            return []
+        try:
+            errors = self.hda_manager.purge_many(items, user=trans.user)
+        except Exception as exc:
+            return [(item.id, str(exc)) for item in items]
+        return [(item.id, errors[item.id]) for item in items if item.id in errors]
+
+    def _bulk_change_datatype(
+        self,
+        trans: ProvidesHistoryContext,
+        item_class: Type["HistoryItem"],
+        item_ids: List[int],
+        params: ChangeDatatypeOperationParams,
+    ) -> List[Tuple[int, str]]:
+        failures: List[Tuple[int, str]] = []
+        wrapped_tasks = []
+        for item in self._load_items(trans, item_class, item_ids):
+            try:
+                wrapped_task = self._change_item_datatype(cast(HistoryDatasetAssociation, item), params, trans)
+            except Exception as exc:
+                failures.append((item.id, str(exc)))
+                continue
+            if wrapped_task:
+                wrapped_tasks.append(wrapped_task)
+        # commit the new states once, before any of the tasks may run
+        with transaction(trans.sa_session):
+            trans.sa_session.commit()
+        for wrapped_task in wrapped_tasks:
+            wrapped_task.delay()
+        return failures
+
+    def _bulk_add_tags(
+        self,
+        trans: ProvidesHistoryContext,
+        item_class: Type["HistoryItem"],
+        item_ids: List[int],
+        params: TagOperationParams,
+    ) -> List[Tuple[int, str]]:
+        unowned_ids = trans.tag_handler.add_tags_to_items(trans.user, item_class, item_ids, params.tags)
+        return self._bulk_tags_updated(trans, item_class, item_ids, unowned_ids)
+
+    def _bulk_remove_tags(
+        self,
+        trans: ProvidesHistoryContext,
+        item_class: Type["HistoryItem"],
+        item_ids: List[int],
+        params: TagOperationParams,
+    ) -> List[Tuple[int, str]]:
+        unowned_ids = trans.tag_handler.remove_tags_from_items(trans.user, item_class, item_ids, params.tags)
+        return self._bulk_tags_updated(trans, item_class, item_ids, unowned_ids)
+
+    def _bulk_tags_updated(
+        self,
+        trans: ProvidesHistoryContext,
+        item_class: Type["HistoryItem"],
+        item_ids: List[int],
+        unowned_ids: List[int],
+    ) -> List[Tuple[int, str]]:
+        unowned = set(unowned_ids)
+        self._bulk_update(trans, item_class, [item_id for item_id in item_ids if item_id not in unowned])
+        return [(item_id, "User does not own item.") for item_id in unowned_ids]
+
     def _get_item_manager(self, item: "HistoryItem"):
         if isinstance(item, HistoryDatasetAssociation):
             return self.hda_manager
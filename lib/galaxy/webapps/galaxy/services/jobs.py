@@ -1,9 +1,14 @@
+from datetime import (
+    date,
+    datetime,
+)
 from enum import Enum
 from typing import (
     Any,
     Dict,
     List,
     Optional,
+    Union,
 )
 
 from galaxy import (
@@ -13,6 +18,10 @@ from galaxy import (
 from galaxy.managers import hdas
 from galaxy.managers.base import security_check
 from galaxy.managers.context import ProvidesUserContext
+from galaxy.managers.job_resource_usage import (
+    JobResourceUsageManager,
+    MAX_REPORT_JOBS,
+)
 from galaxy.managers.jobs import (
     JobManager,
     JobSearch,
@@ -20,7 +29,10 @@ from galaxy.managers.jobs import (
 )
 from galaxy.model import Job
 from galaxy.schema.fields import DecodedDatabaseIdField
-from galaxy.schema.jobs import JobAssociation
+from galaxy.schema.jobs import (
+    JobAssociation,
+    JobResourceUsageReport,
+)
 from galaxy.schema.schema import JobIndexQueryPayload
 from galaxy.security.idencoding import IdEncodingHelper
 from galaxy.webapps.galaxy.services.base import ServiceBase
@@ -39,6 +51,7 @@ class JobsService(ServiceBase):
     job_manager: JobManager
     job_search: JobSearch
     hda_manager: hdas.HDAManager
+    job_resource_usage_manager: JobResourceUsageManager
 
     def __init__(
         self,
@@ -46,11 +59,13 @@ class JobsService(ServiceBase):
         job_manager: JobManager,
         job_search: JobSearch,
         hda_manager: hdas.HDAManager,
+        job_resource_usage_manager: JobResourceUsageManager,
     ):
         super().__init__(security=security)
         self.job_manager = job_manager
         self.job_search = job_search
         self.hda_manager = hda_manager
+        self.job_resource_usage_manager = job_resource_usage_manager
 
     def show(
         self,
@@ -95,6 +110,32 @@ class JobsService(ServiceBase):
 
         return out
 
+    def resource_usage_report(
+        self,
+        trans: ProvidesUserContext,
+        tool_ids: Optional[List[str]] = None,
+        destination_ids: Optional[List[str]] = None,
+        date_range_min: Optional[Union[datetime, date]] = None,
+        date_range_max: Optional[Union[datetime, date]] = None,
+        min_jobs: int = 10,
+        percent: float = 95,
+        memory_headroom: float = 0.2,
+        max_jobs: int = MAX_REPORT_JOBS,
+    ) -> JobResourceUsageReport:
+        if not trans.user_is_admin:
+            raise exceptions.AdminRequiredException("Only admins can report on the resource usage of jobs")
+        report = self.job_resource_usage_manager.report(
+            tool_ids=tool_ids,
+            destination_ids=destination_ids,
+            date_range_min=date_range_min,
+            date_range_max=date_range_max,
+            min_jobs=min_jobs,
+            percent=percent,
+            memory_headroom=memory_headroom,
+            max_jobs=max_jobs,
+        )
+        return JobResourceUsageReport(**report)
+
     def _check_nonadmin_access(
         self,
         view: JobIndexViewEnum,
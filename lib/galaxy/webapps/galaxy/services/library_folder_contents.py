@@ -1,6 +1,9 @@
 import logging
 from dataclasses import dataclass
-from typing import List
+from typing import (
+    List,
+    Optional,
+)
 
 from galaxy import (
     exceptions,
@@ -12,7 +15,10 @@ from galaxy.managers.context import ProvidesUserContext
 from galaxy.managers.folders import FolderManager
 from galaxy.managers.hdas import HDAManager
 from galaxy.model import tags
-from galaxy.model.security import GalaxyRBACAgent
+from galaxy.model.security import (
+    DatasetPermissionResolver,
+    GalaxyRBACAgent,
+)
 from galaxy.schema.fields import LibraryFolderDatabaseIdField
 from galaxy.schema.schema import (
     AnyLibraryFolderItem,
@@ -74,13 +80,21 @@ class LibraryFolderContentsService(ServiceBase, UsesLibraryMixinItems):
 
         folder_contents: List[AnyLibraryFolderItem] = []
         contents, total_rows = self.folder_manager.get_contents(trans, folder, payload)
+        # resolve permissions of all datasets listed at once
+        dataset_permissions = trans.get_dataset_permission_resolver()
+        dataset_permissions.load(
+            content_item.library_dataset_dataset_association.dataset_id
+            for content_item in contents
+            if isinstance(content_item, model.LibraryDataset)
+        )
+        private_role = trans.user and trans.app.security_agent.get_private_user_role(trans.user)
         for content_item in contents:
             if isinstance(content_item, model.LibraryFolder):
                 folder_contents.append(self._serialize_library_folder(user_permissions, content_item))
 
             elif isinstance(content_item, model.LibraryDataset):
                 folder_contents.append(
-                    self._serialize_library_dataset(trans, current_user_roles, tag_manager, content_item)
+                    self._serialize_library_dataset(trans, dataset_permissions, private_role, tag_manager, content_item)
                 )
 
         metadata = self._serialize_library_folder_metadata(trans, folder, user_permissions, total_rows)
@@ -153,16 +167,22 @@ class LibraryFolderContentsService(ServiceBase, UsesLibraryMixinItems):
     def _serialize_library_dataset(
         self,
         trans: ProvidesUserContext,
-        current_user_roles: List[model.Role],
+        dataset_permissions: DatasetPermissionResolver,
+        private_role: Optional[model.Role],
         tag_manager: tags.GalaxyTagHandler,
         library_dataset: model.LibraryDataset,
     ) -> FileLibraryFolderItem:
-        security_agent = trans.app.security_agent
         is_admin = trans.user_is_admin
         ldda = library_dataset.library_dataset_dataset_association
         dataset = ldda.dataset
         #  Access rights are checked on the dataset level, not on the ld or ldda level to maintain consistency
-        is_unrestricted = security_agent.dataset_is_public(dataset)
+        is_unrestricted = dataset_permissions.is_public(dataset)
+        # private datasets have the user's private role as their only access role
+        is_private = (
+            not is_unrestricted
+            and private_role is not None
+            and dataset_permissions.access_role_ids(dataset) == {private_role.id}
+        )
         raw_size = int(ldda.get_size())
         library_dataset_dict = library_dataset.to_dict()
         dataset_item = FileLibraryFolderItem(
@@ -171,14 +191,14 @@ class LibraryFolderContentsService(ServiceBase, UsesLibraryMixinItems):
             type="file",
             create_time=library_dataset.create_time.isoformat(),
             update_time=ldda.update_time.isoformat(),
-            can_manage=is_admin or bool(trans.user and security_agent.can_manage_dataset(current_user_roles, dataset)),
+            can_manage=is_admin or bool(trans.user and dataset_permissions.can_manage(dataset)),
             deleted=library_dataset.deleted,
             file_ext=library_dataset_dict["file_ext"],
             date_uploaded=library_dataset_dict["date_uploaded"],
             #  Is the dataset public or private?
             #  When both are False the dataset is 'restricted'
             is_unrestricted=is_unrestricted,
-            is_private=not is_unrestricted and trans.user and security_agent.dataset_is_private_to_user(trans, dataset),
+            is_private=is_private,
             state=library_dataset_dict["state"],
             file_size=util.nice_size(raw_size),
             raw_size=raw_size,
@@ -26,6 +26,7 @@ from galaxy import (
 )
 from galaxy.model import Job
 from galaxy.model.db.user import get_user_by_email
+from galaxy.model.job_rollups import job_rollups_high_water_mark
 from galaxy.web.legacy_framework import grids
 from galaxy.webapps.base.controller import (
     BaseUIController,
@@ -35,6 +36,8 @@ from galaxy.webapps.reports.controllers.query import ReportQueryBuilder
 
 log = logging.getLogger(__name__)
 
+JobCounts = namedtuple("JobCounts", ["table", "date", "total_jobs", "execute_time"])
+
 
 class Timer:
     def __init__(self):
@@ -130,6 +133,16 @@ def get_curr_item(check_item, unique_items):
     return (check_item, unique_items)
 
 
+def get_execute_time(execute_time):
+    """
+    Job rollups sum up runtimes in seconds, the job
+    table in intervals.
+    """
+    if execute_time is None or isinstance(execute_time, timedelta):
+        return execute_time
+    return timedelta(seconds=float(execute_time))
+
+
 class SpecifiedDateListGrid(grids.Grid):
     class JobIdColumn(grids.IntegerColumn):
         def get_value(self, trans, grid, job):
@@ -323,6 +336,21 @@ class Jobs(BaseUIController, ReportQueryBuilder):
                 kwd["f-tool_id"] = kwd["tool_id"]
         return self.specified_date_list_grid(trans, **kwd)
 
+    def _job_counts(self, trans):
+        """
+        Where to count jobs from: the daily job rollups once
+        Galaxy has computed them, the job table otherwise.
+        """
+        if job_rollups_high_water_mark(trans.sa_session.connection()) is not None:
+            rollup = model.JobDailyRollup.table
+            return JobCounts(
+                rollup, rollup.c.day, sa.func.sum(rollup.c.job_count), sa.func.sum(rollup.c.runtime_seconds)
+            )
+        job = model.Job.table
+        return JobCounts(
+            job, job.c.create_time, sa.func.count(job.c.id), sa.func.sum(job.c.update_time - job.c.create_time)
+        )
+
     def _calculate_trends_for_jobs(self, sa_session, jobs_query):
         trends = {}
         for job in sa_session.execute(jobs_query):
@@ -333,12 +361,22 @@ class Jobs(BaseUIController, ReportQueryBuilder):
             key = str(job_month_name + job_year)
 
             try:
-                trends[key][job_day] += 1
+                trends[key][job_day] += job.total_jobs
             except KeyError:
                 job_year = int(job_year)
                 wday, day_range = calendar.monthrange(job_year, job_month)
                 trends[key] = [0] * day_range
-                trends[key][job_day] += 1
+                trends[key][job_day] += job.total_jobs
+        return trends
+
+    def _calculate_sparklines(self, sa_session, jobs_query, get_key, time_period, spark_limit):
+        currday = date.today()
+        trends = {}
+        for job in sa_session.execute(jobs_query):
+            job_date = job.date.date() if isinstance(job.date, datetime) else job.date
+            container = int(floor((currday - job_date).days / time_period))
+            if container < spark_limit:
+                trends.setdefault(get_key(job), [0] * spark_limit)[container] += job.total_jobs
         return trends
 
     def _calculate_job_table(self, sa_session, jobs_query, by_destination=False):
@@ -365,7 +403,7 @@ class Jobs(BaseUIController, ReportQueryBuilder):
                         curr_year,
                         row.user_email,
                         row.destination_id,
-                        row.execute_time,
+                        get_execute_time(row.execute_time),
                     )
                 )
             else:
@@ -634,18 +672,20 @@ class Jobs(BaseUIController, ReportQueryBuilder):
         # In case we don't know which is the monitor user we will query for all jobs
         monitor_user_id = get_monitor_id(trans, monitor_email)
 
+        counts = self._job_counts(trans)
+
         # Use to make the page table
         if by_destination == "true":
             jobs_by_month = (
                 sa.select(
-                    self.select_month(model.Job.table.c.create_time).label("date"),
-                    model.Job.table.c.destination_id.label("destination_id"),
-                    sa.func.sum(model.Job.table.c.update_time - model.Job.table.c.create_time).label("execute_time"),
-                    sa.func.count(model.Job.table.c.id).label("total_jobs"),
+                    self.select_month(counts.date).label("date"),
+                    counts.table.c.destination_id.label("destination_id"),
+                    counts.execute_time.label("execute_time"),
+                    counts.total_jobs.label("total_jobs"),
                     model.User.table.c.email.label("user_email"),
                 )
-                .where(model.Job.table.c.user_id != monitor_user_id)
-                .select_from(sa.join(model.Job.table, model.User.table))
+                .where(counts.table.c.user_id != monitor_user_id)
+                .select_from(sa.join(counts.table, model.User.table))
                 .group_by("user_email", "date", "destination_id")
                 .order_by(_order)
                 .offset(offset)
@@ -654,11 +694,11 @@ class Jobs(BaseUIController, ReportQueryBuilder):
         else:
             jobs_by_month = (
                 sa.select(
-                    self.select_month(model.Job.table.c.create_time).label("date"),
-                    sa.func.count(model.Job.table.c.id).label("total_jobs"),
+                    self.select_month(counts.date).label("date"),
+                    counts.total_jobs.label("total_jobs"),
                 )
-                .where(model.Job.table.c.user_id != monitor_user_id)
-                .group_by(self.group_by_month(model.Job.table.c.create_time))
+                .where(counts.table.c.user_id != monitor_user_id)
+                .group_by(self.group_by_month(counts.date))
                 .order_by(_order)
                 .offset(offset)
                 .limit(limit)
@@ -666,8 +706,8 @@ class Jobs(BaseUIController, ReportQueryBuilder):
 
         # Use to make sparkline
         all_jobs = sa.select(
-            self.select_day(model.Job.table.c.create_time).label("date"), model.Job.table.c.id.label("id")
-        )
+            self.select_day(counts.date).label("date"), counts.total_jobs.label("total_jobs")
+        ).group_by("date")
 
         trends = self._calculate_trends_for_jobs(trans.sa_session, all_jobs)
         jobs = self._calculate_job_table(trans.sa_session, jobs_by_month, by_destination=by_destination)
@@ -729,23 +769,28 @@ class Jobs(BaseUIController, ReportQueryBuilder):
         # In case we don't know which is the monitor user we will query for all jobs
         monitor_user_id = get_monitor_id(trans, monitor_email)
 
+        counts = self._job_counts(trans)
+        in_error = sa.and_(counts.table.c.state == "error", counts.table.c.user_id != monitor_user_id)
+
         # Use to make the page table
         jobs_in_error_by_month = (
             sa.select(
-                self.select_month(model.Job.table.c.create_time).label("date"),
-                sa.func.count(model.Job.table.c.id).label("total_jobs"),
+                self.select_month(counts.date).label("date"),
+                counts.total_jobs.label("total_jobs"),
             )
-            .where(sa.and_(model.Job.table.c.state == "error", model.Job.table.c.user_id != monitor_user_id))
-            .group_by(self.group_by_month(model.Job.table.c.create_time))
+            .where(in_error)
+            .group_by(self.group_by_month(counts.date))
             .order_by(_order)
             .offset(offset)
             .limit(limit)
         )
 
         # Use to make trendline
-        all_jobs = sa.select(
-            self.select_day(model.Job.table.c.create_time).label("date"), model.Job.table.c.id.label("id")
-        ).where(sa.and_(model.Job.table.c.state == "error", model.Job.table.c.user_id != monitor_user_id))
+        all_jobs = (
+            sa.select(self.select_day(counts.date).label("date"), counts.total_jobs.label("total_jobs"))
+            .where(in_error)
+            .group_by("date")
+        )
 
         trends = self._calculate_trends_for_jobs(trans.sa_session, all_jobs)
         jobs = self._calculate_job_table(trans.sa_session, jobs_in_error_by_month)
@@ -810,15 +855,16 @@ class Jobs(BaseUIController, ReportQueryBuilder):
         else:
             page = 1
 
+        counts = self._job_counts(trans)
         jobs = []
         if by_destination == "true":
             jobs_per_user = (
                 sa.select(
                     model.User.table.c.email.label("user_email"),
-                    sa.func.count(model.Job.table.c.id).label("total_jobs"),
-                    model.Job.table.c.destination_id.label("destination_id"),
+                    counts.total_jobs.label("total_jobs"),
+                    counts.table.c.destination_id.label("destination_id"),
                 )
-                .select_from(sa.outerjoin(model.Job.table, model.User.table))
+                .select_from(sa.outerjoin(counts.table, model.User.table))
                 .group_by("user_email", "destination_id")
                 .order_by(_order)
                 .offset(offset)
@@ -829,9 +875,9 @@ class Jobs(BaseUIController, ReportQueryBuilder):
             jobs_per_user = (
                 sa.select(
                     model.User.table.c.email.label("user_email"),
-                    sa.func.count(model.Job.table.c.id).label("total_jobs"),
+                    counts.total_jobs.label("total_jobs"),
                 )
-                .select_from(sa.outerjoin(model.Job.table, model.User.table))
+                .select_from(sa.outerjoin(counts.table, model.User.table))
                 .group_by("user_email")
                 .order_by(_order)
                 .offset(offset)
@@ -858,42 +904,26 @@ class Jobs(BaseUIController, ReportQueryBuilder):
         q_time.stop()
         query1time = q_time.time_elapsed()
 
-        users = sa.select(model.User.table.c.email).select_from(model.User.table)
-
+        spark_start = date.today() - timedelta(days=spark_limit * _time_period)
         all_jobs_per_user = (
             sa.select(
-                model.Job.table.c.id.label("id"),
-                model.Job.table.c.create_time.label("date"),
+                self.select_day(counts.date).label("date"),
                 model.User.table.c.email.label("user_email"),
+                counts.total_jobs.label("total_jobs"),
             )
-            .select_from(sa.outerjoin(model.Job.table, model.User.table))
-            .where(model.User.table.c.email.in_(users))
+            .select_from(sa.join(counts.table, model.User.table))
+            .where(counts.date >= spark_start)
+            .group_by("date", "user_email")
         )
 
-        currday = datetime.today()
-        trends = {}
         q_time.start()
-        for job in trans.sa_session.execute(all_jobs_per_user):
-            if job.user_email is None:
-                curr_user = "Anonymous"
-            else:
-                curr_user = re.sub(r"\W+", "", job.user_email)
-
-            try:
-                day = currday - job.date
-            except TypeError:
-                day = currday - datetime.date(job.date)
-
-            day = day.days
-            container = floor(day / _time_period)
-            container = int(container)
-            try:
-                if container < spark_limit:
-                    trends[curr_user][container] += 1
-            except KeyError:
-                trends[curr_user] = [0] * spark_limit
-                if container < spark_limit:
-                    trends[curr_user][container] += 1
+        trends = self._calculate_sparklines(
+            trans.sa_session,
+            all_jobs_per_user,
+            lambda job: re.sub(r"\W+", "", job.user_email),
+            _time_period,
+            spark_limit,
+        )
         q_time.stop()
         query2time = q_time.time_elapsed()
 
@@ -1065,43 +1095,35 @@ class Jobs(BaseUIController, ReportQueryBuilder):
         # In case we don't know which is the monitor user we will query for all jobs
         monitor_user_id = get_monitor_id(trans, monitor_email)
 
+        counts = self._job_counts(trans)
         jobs = []
         q = (
-            sa.select(
-                model.Job.table.c.tool_id.label("tool_id"), sa.func.count(model.Job.table.c.id).label("total_jobs")
-            )
-            .where(model.Job.table.c.user_id != monitor_user_id)
+            sa.select(counts.table.c.tool_id.label("tool_id"), counts.total_jobs.label("total_jobs"))
+            .where(counts.table.c.user_id != monitor_user_id)
             .group_by("tool_id")
             .order_by(_order)
             .offset(offset)
             .limit(limit)
         )
 
-        all_jobs_per_tool = sa.select(
-            model.Job.table.c.tool_id.label("tool_id"),
-            model.Job.table.c.id.label("id"),
-            self.select_day(model.Job.table.c.create_time).label("date"),
-        ).where(model.Job.table.c.user_id != monitor_user_id)
-
-        currday = date.today()
-        trends = {}
-        for job in trans.sa_session.execute(all_jobs_per_tool):
-            curr_tool = re.sub(r"\W+", "", str(job.tool_id))
-            try:
-                day = currday - job.date
-            except TypeError:
-                day = currday - datetime.date(job.date)
+        spark_start = date.today() - timedelta(days=spark_limit * _time_period)
+        all_jobs_per_tool = (
+            sa.select(
+                counts.table.c.tool_id.label("tool_id"),
+                self.select_day(counts.date).label("date"),
+                counts.total_jobs.label("total_jobs"),
+            )
+            .where(counts.table.c.user_id != monitor_user_id, counts.date >= spark_start)
+            .group_by("tool_id", "date")
+        )
 
-            day = day.days
-            container = floor(day / _time_period)
-            container = int(container)
-            try:
-                if container < spark_limit:
-                    trends[curr_tool][container] += 1
-            except KeyError:
-                trends[curr_tool] = [0] * spark_limit
-                if container < spark_limit:
-                    trends[curr_tool][container] += 1
+        trends = self._calculate_sparklines(
+            trans.sa_session,
+            all_jobs_per_tool,
+            lambda job: re.sub(r"\W+", "", str(job.tool_id)),
+            _time_period,
+            spark_limit,
+        )
 
         for row in trans.sa_session.execute(q):
             jobs.append((row.tool_id, row.total_jobs))
@@ -102,6 +102,11 @@ from galaxy.util.json import safe_loads
 from galaxy.util.rules_dsl import RuleSet
 from galaxy.util.template import fill_template
 from galaxy.util.tool_shed.common_util import get_tool_shed_url_from_tool_shed_registry
+from galaxy.workflow.wakeups import (
+    dataset_wakeup_key,
+    invocation_step_wakeup_key,
+    WakeupKey,
+)
 
 if TYPE_CHECKING:
     from galaxy.schema.invocation import InvocationMessageUnion
@@ -142,7 +147,7 @@ def to_cwl(value, hda_references, step):
         # not be needed.
         if not value.dataset.in_ready_state():
             why = f"dataset [{value.id}] is needed for valueFrom expression and is non-ready"
-            raise DelayedWorkflowEvaluation(why=why)
+            raise DelayedWorkflowEvaluation(why=why, depends_on=[dataset_wakeup_key(value)])
         if not value.is_ok:
             raise FailWorkflowEvaluation(
                 why=InvocationFailureDatasetFailed(
@@ -1712,6 +1717,8 @@ class PauseModule(WorkflowModule):
         self, trans, progress: "WorkflowProgress", invocation_step, use_cached_job: bool = False
     ) -> Optional[bool]:
         step = invocation_step.workflow_step
+        # Reschedule right away, to wait for the review of the paused step
+        progress.invocation_blockers.record_unknown()
         progress.mark_step_outputs_delayed(step, why="executing pause step")
         return None
 
@@ -1731,7 +1738,8 @@ class PauseModule(WorkflowModule):
                     )
                 )
         delayed_why = "workflow paused at this step waiting for review"
-        raise DelayedWorkflowEvaluation(why=delayed_why)
+        depends_on = [invocation_step_wakeup_key(invocation_step)] if invocation_step else None
+        raise DelayedWorkflowEvaluation(why=delayed_why, depends_on=depends_on)
 
     def do_invocation_step_action(self, step, action):
         """Update or set the workflow invocation state action - generic
@@ -2497,8 +2505,15 @@ def load_module_sections(trans):
 
 
 class DelayedWorkflowEvaluation(Exception):
-    def __init__(self, why=None):
+    """Raised when a step cannot be scheduled yet.
+
+    ``depends_on`` lists the objects the step waits for, an empty list if it
+    only waits for other steps of the invocation and ``None`` if unknown.
+    """
+
+    def __init__(self, why=None, depends_on: Optional[Iterable[WakeupKey]] = None):
         self.why = why
+        self.depends_on = depends_on
 
 
 class CancelWorkflowEvaluation(Exception):
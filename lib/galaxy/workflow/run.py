@@ -45,6 +45,12 @@ from galaxy.workflow.run_request import (
     workflow_run_config_to_request,
     WorkflowRunConfig,
 )
+from galaxy.workflow.wakeups import (
+    collection_wakeup_key,
+    dataset_wakeup_key,
+    InvocationBlockers,
+    job_wakeup_key,
+)
 
 if TYPE_CHECKING:
     from galaxy.model import (
@@ -68,8 +74,9 @@ def schedule(
     workflow: "Workflow",
     workflow_run_config: WorkflowRunConfig,
     workflow_invocation: WorkflowInvocation,
+    invocation_blockers: Optional[InvocationBlockers] = None,
 ) -> Tuple[WorkflowOutputsType, WorkflowInvocation]:
-    return __invoke(trans, workflow, workflow_run_config, workflow_invocation)
+    return __invoke(trans, workflow, workflow_run_config, workflow_invocation, invocation_blockers=invocation_blockers)
 
 
 def __invoke(
@@ -78,6 +85,7 @@ def __invoke(
     workflow_run_config: WorkflowRunConfig,
     workflow_invocation: Optional[WorkflowInvocation] = None,
     populate_state: bool = False,
+    invocation_blockers: Optional[InvocationBlockers] = None,
 ) -> Tuple[WorkflowOutputsType, WorkflowInvocation]:
     """Run the supplied workflow in the supplied target_history."""
     if populate_state:
@@ -93,6 +101,7 @@ def __invoke(
         workflow,
         workflow_run_config,
         workflow_invocation=workflow_invocation,
+        invocation_blockers=invocation_blockers,
     )
     workflow_invocation = invoker.workflow_invocation
     outputs = {}
@@ -157,6 +166,7 @@ class WorkflowInvoker:
         workflow_run_config: WorkflowRunConfig,
         workflow_invocation: Optional[WorkflowInvocation] = None,
         progress: Optional["WorkflowProgress"] = None,
+        invocation_blockers: Optional[InvocationBlockers] = None,
     ) -> None:
         self.trans = trans
         self.workflow = workflow
@@ -191,6 +201,7 @@ class WorkflowInvoker:
                 copy_inputs_to_history=workflow_run_config.copy_inputs_to_history,
                 use_cached_job=workflow_run_config.use_cached_job,
                 replacement_dict=workflow_run_config.replacement_dict,
+                invocation_blockers=invocation_blockers,
             )
         self.progress = progress
 
@@ -224,6 +235,7 @@ class WorkflowInvoker:
             max_jobs_to_schedule = self.progress.maximum_jobs_to_schedule_or_none
             if max_jobs_to_schedule is not None and max_jobs_to_schedule <= 0:
                 max_jobs_per_iteration_reached = True
+                self.progress.invocation_blockers.record_unknown()
                 break
             step_delayed = False
             step_timer = ExecutionTimer()
@@ -245,11 +257,13 @@ class WorkflowInvoker:
                 if incomplete_or_none is False:
                     step_delayed = delayed_steps = True
                     workflow_invocation_step.state = "ready"
+                    self.progress.invocation_blockers.record_unknown()
                     self.progress.mark_step_outputs_delayed(step, why="Not all jobs scheduled for state.")
                 else:
                     workflow_invocation_step.state = "scheduled"
             except modules.DelayedWorkflowEvaluation as de:
                 step_delayed = delayed_steps = True
+                self.progress.invocation_blockers.record(de.depends_on)
                 self.progress.mark_step_outputs_delayed(step, why=de.why)
             except Exception as e:
                 log_function = log.exception
@@ -303,11 +317,11 @@ class WorkflowInvoker:
         # No steps created yet - have to delay evaluation.
         if not step_invocation:
             delayed_why = f"depends on step [{output_id}] but that step has not been invoked yet"
-            raise modules.DelayedWorkflowEvaluation(why=delayed_why)
+            raise modules.DelayedWorkflowEvaluation(why=delayed_why, depends_on=[])
 
         if step_invocation.state != "scheduled":
             delayed_why = f"depends on step [{output_id}] job has not finished scheduling yet"
-            raise modules.DelayedWorkflowEvaluation(delayed_why)
+            raise modules.DelayedWorkflowEvaluation(delayed_why, depends_on=[])
 
         # TODO: Handle implicit dependency on stuff like pause steps.
         for job in step_invocation.jobs:
@@ -316,7 +330,8 @@ class WorkflowInvoker:
                 delayed_why = (
                     f"depends on step [{output_id}] but one or more jobs created from that step have not finished yet"
                 )
-                raise modules.DelayedWorkflowEvaluation(why=delayed_why)
+                depends_on = [job_wakeup_key(job) for job in step_invocation.jobs if not job.finished]
+                raise modules.DelayedWorkflowEvaluation(why=delayed_why, depends_on=depends_on)
 
             if job.state != job.states.OK:
                 raise modules.FailWorkflowEvaluation(
@@ -367,8 +382,11 @@ class WorkflowProgress:
         replacement_dict: Optional[Dict[str, str]] = None,
         subworkflow_collection_info=None,
         when_values=None,
+        invocation_blockers: Optional[InvocationBlockers] = None,
     ) -> None:
         self.outputs: Dict[int, Any] = {}
+        # Objects delayed steps wait for, shared with subworkflows scheduled as part of this invocation
+        self.invocation_blockers = invocation_blockers or InvocationBlockers()
         self.module_injector = module_injector
         self.workflow_invocation = workflow_invocation
         self.inputs_by_step_id = inputs_by_step_id
@@ -477,7 +495,7 @@ class WorkflowProgress:
         step_outputs = self.outputs[output_step_id]
         if step_outputs is STEP_OUTPUT_DELAYED:
             delayed_why = f"dependent step [{output_step_id}] delayed, so this step must be delayed"
-            raise modules.DelayedWorkflowEvaluation(why=delayed_why)
+            raise modules.DelayedWorkflowEvaluation(why=delayed_why, depends_on=[])
         try:
             replacement = step_outputs[output_name]
         except KeyError:
@@ -505,7 +523,9 @@ class WorkflowProgress:
                     )
 
                 delayed_why = f"dependent collection [{replacement.id}] not yet populated with datasets"
-                raise modules.DelayedWorkflowEvaluation(why=delayed_why)
+                raise modules.DelayedWorkflowEvaluation(
+                    why=delayed_why, depends_on=[collection_wakeup_key(replacement)]
+                )
 
         if isinstance(replacement, model.DatasetCollection):
             raise NotImplementedError
@@ -514,7 +534,7 @@ class WorkflowProgress:
         ):
             if isinstance(replacement, model.HistoryDatasetAssociation):
                 if replacement.is_pending:
-                    raise modules.DelayedWorkflowEvaluation()
+                    raise modules.DelayedWorkflowEvaluation(depends_on=[dataset_wakeup_key(replacement)])
                 if not replacement.is_ok:
                     raise modules.FailWorkflowEvaluation(
                         why=InvocationFailureDatasetFailed(
@@ -526,11 +546,11 @@ class WorkflowProgress:
                     )
             else:
                 if not replacement.collection.populated:
-                    raise modules.DelayedWorkflowEvaluation()
-                pending = False
+                    raise modules.DelayedWorkflowEvaluation(depends_on=[collection_wakeup_key(replacement)])
+                pending = []
                 for dataset_instance in replacement.dataset_instances:
                     if dataset_instance.is_pending:
-                        pending = True
+                        pending.append(dataset_wakeup_key(dataset_instance))
                     elif not dataset_instance.is_ok:
                         raise modules.FailWorkflowEvaluation(
                             why=InvocationFailureDatasetFailed(
@@ -541,7 +561,7 @@ class WorkflowProgress:
                             )
                         )
                 if pending:
-                    raise modules.DelayedWorkflowEvaluation()
+                    raise modules.DelayedWorkflowEvaluation(depends_on=pending)
 
         return replacement
 
@@ -551,7 +571,7 @@ class WorkflowProgress:
         step_outputs = self.outputs[step.id]
         if step_outputs is STEP_OUTPUT_DELAYED:
             delayed_why = f"depends on workflow output [{output_name}] but that output has not been created yet"
-            raise modules.DelayedWorkflowEvaluation(why=delayed_why)
+            raise modules.DelayedWorkflowEvaluation(why=delayed_why, depends_on=[])
         else:
             return step_outputs[output_name]
 
@@ -725,6 +745,7 @@ class WorkflowProgress:
             replacement_dict=self.replacement_dict,
             subworkflow_collection_info=subworkflow_collection_info,
             when_values=when_values,
+            invocation_blockers=self.invocation_blockers,
         )
 
     def raw_to_galaxy(self, value: dict):
@@ -734,6 +755,7 @@ class WorkflowProgress:
         try:
             step_invocation.workflow_step.module.recover_mapping(step_invocation, self)
         except modules.DelayedWorkflowEvaluation as de:
+            self.invocation_blockers.record(de.depends_on)
             self.mark_step_outputs_delayed(step_invocation.workflow_step, de.why)
 
 
@@ -36,7 +36,10 @@ class WorkflowSchedulingPlugin(metaclass=ABCMeta):
 class ActiveWorkflowSchedulingPlugin(WorkflowSchedulingPlugin, metaclass=ABCMeta):
     @abstractmethod
     def schedule(self, workflow_invocation):
-        """Optionally return one or more commands to instrument job. These
-        commands will be executed on the compute server prior to the job
-        running.
+        """Schedule the workflow invocation as far as possible.
+
+        Optionally return the objects (as ``galaxy.workflow.wakeups.WakeupKey``
+        instances) the invocation waits for, it is only scheduled again once
+        one of them reached a terminal state. If ``None`` is returned, the
+        invocation is scheduled again on the next iteration.
         """
@@ -3,13 +3,21 @@ it simply schedules the whole workflow up front when offered.
 """
 
 import logging
-from typing import TYPE_CHECKING
+from typing import (
+    FrozenSet,
+    Optional,
+    TYPE_CHECKING,
+)
 
 from galaxy.work import context
 from galaxy.workflow import (
     run,
     run_request,
 )
+from galaxy.workflow.wakeups import (
+    InvocationBlockers,
+    WakeupKey,
+)
 from . import ActiveWorkflowSchedulingPlugin
 
 if TYPE_CHECKING:
@@ -31,19 +39,22 @@ class CoreWorkflowSchedulingPlugin(ActiveWorkflowSchedulingPlugin):
     def shutdown(self):
         pass
 
-    def schedule(self, workflow_invocation: "WorkflowInvocation") -> None:
+    def schedule(self, workflow_invocation: "WorkflowInvocation") -> Optional[FrozenSet[WakeupKey]]:
         workflow = workflow_invocation.workflow
         history = workflow_invocation.history
         request_context = context.WorkRequestContext(
             app=self.app, history=history, user=history.user
         )  # trans-like object not tied to a web-thread.
         workflow_run_config = run_request.workflow_request_to_run_config(workflow_invocation)
+        invocation_blockers = InvocationBlockers()
         run.schedule(
             trans=request_context,
             workflow=workflow,
             workflow_run_config=workflow_run_config,
             workflow_invocation=workflow_invocation,
+            invocation_blockers=invocation_blockers,
         )
+        return invocation_blockers.wakeup_keys
 
 
 __all__ = ("CoreWorkflowSchedulingPlugin",)
@@ -0,0 +1,205 @@
+"""Schedule workflow invocations of a workflow handler on a pool of threads.
+
+Scheduling a single invocation can take minutes (e.g. mapping a tool over a
+collection with thousands of elements), so scheduling invocations one after
+another lets one invocation stall the workflows of every other user.
+:class:`WorkflowSchedulingExecutor` schedules independent invocations
+concurrently, taking turns between users, and stops waiting for the
+invocations of an iteration once its time budget is spent - invocations that
+did not get their turn are ordered first in the next iteration.
+
+Invocations of the same history are scheduled one after another (unless
+``parallelize_workflow_scheduling_within_histories`` is set), since the order
+of their outputs in the history would otherwise be unpredictable. An
+invocation is only ever scheduled by the handler it is assigned to, so
+locking invocations in memory is sufficient to never schedule one twice at
+the same time.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from itertools import zip_longest
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from sqlalchemy import select
+
+from galaxy import model
+from galaxy.util import chunk_iterable
+
+log = logging.getLogger(__name__)
+
+METRIC_PREFIX = "internal.galaxy.workflows.scheduling_manager"
+
+
+class InvocationOwner(NamedTuple):
+    invocation_id: int
+    history_id: int
+    user_id: Optional[int]
+
+
+class SchedulingTask(NamedTuple):
+    """Invocations to schedule one after another, in order."""
+
+    key: Tuple[str, int]
+    user_id: Optional[int]
+    invocation_ids: List[int]
+
+
+def invocation_owners(engine, invocation_ids: Iterable[int]) -> List[InvocationOwner]:
+    """Return histories and users of the given invocations, in the order of ``invocation_ids``."""
+    invocation_ids = list(invocation_ids)
+    owners: Dict[int, InvocationOwner] = {}
+    with engine.connect() as conn:
+        for chunk in chunk_iterable(invocation_ids):
+            stmt = (
+                select(model.WorkflowInvocation.id, model.History.id, model.History.user_id)
+                .join(model.History, model.History.id == model.WorkflowInvocation.history_id)
+                .where(model.WorkflowInvocation.id.in_(chunk))
+            )
+            for row in conn.execute(stmt):
+                owners[row[0]] = InvocationOwner(*row)
+    return [owners[invocation_id] for invocation_id in invocation_ids if invocation_id in owners]
+
+
+class WorkflowSchedulingExecutor:
+    def __init__(self, workers: int = 1, serialize_histories: bool = True, statsd_client=None) -> None:
+        self.workers = max(1, workers)
+        self.serialize_histories = serialize_histories
+        self.statsd_client = statsd_client
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="WorkflowScheduler")
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Tuple[str, int], SchedulingTask] = {}
+        # When tasks and users last had their turn, to let the ones waiting longest go first
+        self._last_turn: Dict[Tuple[str, int], float] = {}
+        self._user_last_turn: Dict[Optional[int], float] = {}
+
+    def tasks(self, owners: Iterable[InvocationOwner]) -> List[SchedulingTask]:
+        """Group invocations into tasks and order these fairly across users.
+
+        Invocations already being scheduled are left out. Users take turns,
+        starting with the user that had the last turn longest ago, as do the
+        tasks of each user.
+        """
+        tasks: Dict[Tuple[str, int], SchedulingTask] = {}
+        with self._lock:
+            in_flight_invocations = {i for task in self._in_flight.values() for i in task.invocation_ids}
+            for owner in owners:
+                if self.serialize_histories:
+                    key = ("history", owner.history_id)
+                else:
+                    key = ("invocation", owner.invocation_id)
+                if key in self._in_flight or owner.invocation_id in in_flight_invocations:
+                    continue
+                if key not in tasks:
+                    tasks[key] = SchedulingTask(key, owner.user_id, [])
+                tasks[key].invocation_ids.append(owner.invocation_id)
+            tasks_by_user: Dict[Optional[int], List[SchedulingTask]] = {}
+            for task in tasks.values():
+                tasks_by_user.setdefault(task.user_id, []).append(task)
+            users = sorted(tasks_by_user, key=lambda user_id: self._user_last_turn.get(user_id, 0.0))
+            for user_tasks in tasks_by_user.values():
+                user_tasks.sort(key=lambda task: self._last_turn.get(task.key, 0.0))
+            # Forget about tasks and users that have nothing to schedule anymore
+            for key in set(self._last_turn) - set(tasks) - set(self._in_flight):
+                del self._last_turn[key]
+            active_users = set(tasks_by_user) | {task.user_id for task in self._in_flight.values()}
+            for user_id in set(self._user_last_turn) - active_users:
+                del self._user_last_turn[user_id]
+        turns = zip_longest(*(tasks_by_user[user_id] for user_id in users))
+        return [task for turn in turns for task in turn if task is not None]
+
+    def schedule(
+        self,
+        owners: Iterable[InvocationOwner],
+        schedule_invocation: Callable[[int], object],
+        budget: Optional[float] = None,
+        should_continue: Callable[[], bool] = lambda: True,
+    ) -> int:
+        """Schedule invocations with ``schedule_invocation`` and return the number of tasks that completed.
+
+        Waits at most ``budget`` seconds for tasks to complete, tasks that
+        did not start by then are cancelled. Tasks that started keep running
+        and their invocations are left out of following iterations until done.
+        """
+        tasks = self.tasks(owners)
+        self._gauge("queue_depth", len(tasks))
+        if not tasks:
+            return 0
+        futures: List[Future] = []
+        submitted = time.monotonic()
+        for task in tasks:
+            with self._lock:
+                self._in_flight[task.key] = task
+            futures.append(self._executor.submit(self._run, task, schedule_invocation, submitted, should_continue))
+        done, not_done = wait(futures, timeout=budget or None)
+        cancelled = 0
+        for task, future in zip(tasks, futures):
+            if future in not_done and future.cancel():
+                cancelled += 1
+                with self._lock:
+                    self._in_flight.pop(task.key, None)
+        if not_done:
+            log.debug(
+                "Workflow scheduling iteration budget of %s seconds spent, %d tasks still running, %d postponed",
+                budget,
+                len(not_done) - cancelled,
+                cancelled,
+            )
+        return len(done)
+
+    def _run(
+        self,
+        task: SchedulingTask,
+        schedule_invocation: Callable[[int], object],
+        submitted: float,
+        should_continue: Callable[[], bool],
+    ) -> None:
+        started = time.monotonic()
+        with self._lock:
+            self._last_turn[task.key] = started
+            self._user_last_turn[task.user_id] = started
+        self._timing("queue_wait", started - submitted)
+        try:
+            for invocation_id in task.invocation_ids:
+                if not should_continue():
+                    return
+                invocation_started = time.monotonic()
+                try:
+                    schedule_invocation(invocation_id)
+                except Exception:
+                    log.exception("Exception raised while scheduling workflow invocation [%s]", invocation_id)
+                self._timing("schedule_invocation", time.monotonic() - invocation_started)
+        finally:
+            with self._lock:
+                self._in_flight.pop(task.key, None)
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._in_flight)
+
+    def shutdown(self) -> None:
+        # Tasks that did not start yet return right away once scheduling should not continue
+        self._executor.shutdown(wait=True)
+
+    def _gauge(self, name: str, value: int) -> None:
+        if self.statsd_client:
+            self.statsd_client.gauge(f"{METRIC_PREFIX}.{name}", value)
+
+    def _timing(self, name: str, seconds: float) -> None:
+        if self.statsd_client:
+            self.statsd_client.timing(f"{METRIC_PREFIX}.{name}", seconds * 1000.0)
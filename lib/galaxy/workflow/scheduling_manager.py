@@ -12,6 +12,11 @@ from galaxy.util.monitors import Monitors
 from galaxy.util.xml_macros import load
 from galaxy.web_stack.handlers import ConfiguresHandlers
 from galaxy.web_stack.message import WorkflowSchedulingMessage
+from galaxy.workflow.scheduling_executor import (
+    invocation_owners,
+    WorkflowSchedulingExecutor,
+)
+from galaxy.workflow.wakeups import InvocationWakeupIndex
 
 log = get_logger(__name__)
 
@@ -296,6 +301,13 @@ class WorkflowRequestMonitor(Monitors):
                 self_handler_tags=self_handler_tags,
                 handler_tags=self_handler_tags,
             )
+        # Invocations waiting for jobs, datasets or collections are only scheduled when these change
+        self.wakeup_index = InvocationWakeupIndex(app.config.workflow_scheduling_sweep_interval)
+        self.scheduling_executor = WorkflowSchedulingExecutor(
+            workers=app.config.workflow_scheduling_workers,
+            serialize_histories=not app.config.parallelize_workflow_scheduling_within_histories,
+            statsd_client=app.execution_timer_factory.galaxy_statsd_client,
+        )
 
     def __monitor(self):
         to_monitor = self.workflow_scheduling_manager.active_workflow_schedulers
@@ -319,14 +331,19 @@ class WorkflowRequestMonitor(Monitors):
             self._monitor_sleep(self.app.config.workflow_monitor_sleep)
 
     def __schedule(self, workflow_scheduler_id, workflow_scheduler):
-        invocation_ids = self.__active_invocation_ids(workflow_scheduler_id)
-        for invocation_id in invocation_ids:
-            log.debug("Attempting to schedule workflow invocation [%s]", invocation_id)
-            self.__attempt_schedule(invocation_id, workflow_scheduler)
-            if not self.monitor_running:
-                return
+        invocation_ids = self.wakeup_index.invocations_to_schedule(
+            self.app.model.engine, self.__active_invocation_ids(workflow_scheduler_id)
+        )
+        self.scheduling_executor.schedule(
+            invocation_owners(self.app.model.engine, invocation_ids),
+            lambda invocation_id: self.__attempt_schedule(invocation_id, workflow_scheduler),
+            budget=self.app.config.workflow_scheduling_iteration_budget,
+            should_continue=lambda: self.monitor_running,
+        )
 
     def __attempt_schedule(self, invocation_id, workflow_scheduler):
+        log.debug("Attempting to schedule workflow invocation [%s]", invocation_id)
+        self.wakeup_index.forget(invocation_id)
         with self.app.model.context() as session:
             workflow_invocation = session.get(model.WorkflowInvocation, invocation_id)
 
@@ -347,7 +364,8 @@ class WorkflowRequestMonitor(Monitors):
                     for i in workflow_invocation.history.workflow_invocations:
                         if i.active and i.id < workflow_invocation.id:
                             return False
-                workflow_scheduler.schedule(workflow_invocation)
+                wakeup_keys = workflow_scheduler.schedule(workflow_invocation)
+                self.wakeup_index.record(invocation_id, wakeup_keys)
                 log.debug("Workflow invocation [%s] scheduled", workflow_invocation.id)
             except Exception:
                 # TODO: eventually fail this - or fail it right away?
@@ -370,3 +388,4 @@ class WorkflowRequestMonitor(Monitors):
 
     def shutdown(self):
         self.shutdown_monitor()
+        self.scheduling_executor.shutdown()
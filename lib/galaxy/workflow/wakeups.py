@@ -0,0 +1,182 @@
+"""Track what delayed workflow invocations wait for, to only reschedule them when it changes.
+
+Scheduling an invocation re-walks all of its remaining steps, most of which are
+delayed on jobs, datasets or collections that are still being produced. While
+scheduling, the objects delayed steps wait for are recorded as
+:class:`WakeupKey` instances in :class:`InvocationBlockers`. The workflow
+request monitor keeps these in an :class:`InvocationWakeupIndex` and only
+reschedules invocations once one of the objects they wait for reached a
+terminal state. Invocations whose delays are not fully known are rescheduled
+on every iteration, and all active invocations are rescheduled periodically as
+a safety net.
+"""
+
+import logging
+import threading
+import time
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+)
+
+from sqlalchemy import select
+
+from galaxy import model
+from galaxy.util import (
+    chunk_iterable,
+    ExecutionTimer,
+)
+
+log = logging.getLogger(__name__)
+
+# Number of object ids checked per query
+WAKEUP_QUERY_CHUNK_SIZE = 1000
+
+
+class WakeupKey(NamedTuple):
+    kind: str
+    id: int
+
+
+def job_wakeup_key(job: model.Job) -> WakeupKey:
+    return WakeupKey("job", job.id)
+
+
+def dataset_wakeup_key(dataset_instance: model.DatasetInstance) -> WakeupKey:
+    return WakeupKey("dataset", dataset_instance.dataset_id)
+
+
+def collection_wakeup_key(hdca: model.HistoryDatasetCollectionAssociation) -> WakeupKey:
+    return WakeupKey("collection", hdca.collection_id)
+
+
+def invocation_step_wakeup_key(invocation_step: model.WorkflowInvocationStep) -> WakeupKey:
+    return WakeupKey("invocation_step", invocation_step.id)
+
+
+def invocation_wakeup_key(invocation_id: int) -> WakeupKey:
+    return WakeupKey("invocation", invocation_id)
+
+
+# Statements selecting the ids of objects, out of the given ids, that should wake up invocations waiting on them
+_WAKEUP_STATEMENTS = {
+    "job": lambda ids: select(model.Job.id).where(
+        model.Job.id.in_(ids), model.Job.state.in_(model.Job.finished_states)
+    ),
+    "dataset": lambda ids: select(model.Dataset.id).where(
+        model.Dataset.id.in_(ids), model.Dataset.state.not_in(model.Dataset.non_ready_states)
+    ),
+    "collection": lambda ids: select(model.DatasetCollection.id).where(
+        model.DatasetCollection.id.in_(ids),
+        model.DatasetCollection.populated_state != model.DatasetCollection.populated_states.NEW,
+    ),
+    "invocation_step": lambda ids: select(model.WorkflowInvocationStep.id).where(
+        model.WorkflowInvocationStep.id.in_(ids), model.WorkflowInvocationStep.action.is_not(None)
+    ),
+    "invocation": lambda ids: select(model.WorkflowInvocation.id).where(
+        model.WorkflowInvocation.id.in_(ids),
+        model.WorkflowInvocation.state == model.WorkflowInvocation.states.CANCELLING,
+    ),
+}
+
+
+class InvocationBlockers:
+    """Objects the delayed steps of a workflow invocation wait for.
+
+    Delays caused by other steps of the same invocation do not add anything,
+    delays with an unknown cause make the invocation be rescheduled on every
+    iteration.
+    """
+
+    def __init__(self) -> None:
+        self.keys: Set[WakeupKey] = set()
+        self.unknown = False
+
+    def record(self, depends_on: Optional[Iterable[WakeupKey]]) -> None:
+        if depends_on is None:
+            self.unknown = True
+        else:
+            self.keys.update(depends_on)
+
+    def record_unknown(self) -> None:
+        self.unknown = True
+
+    @property
+    def wakeup_keys(self) -> Optional[FrozenSet[WakeupKey]]:
+        """Return the objects to wait for, ``None`` if the invocation should be rescheduled right away."""
+        if self.unknown or not self.keys:
+            return None
+        return frozenset(self.keys)
+
+
+class InvocationWakeupIndex:
+    """Index of the objects the active invocations of a workflow handler wait for."""
+
+    def __init__(self, sweep_interval: float) -> None:
+        # Rescheduling all active invocations every ``sweep_interval`` seconds, on every iteration if 0
+        self.sweep_interval = sweep_interval
+        self._waiting_on: Dict[int, FrozenSet[WakeupKey]] = {}
+        self._last_sweep: Optional[float] = None
+        # Invocations may be scheduled concurrently, see galaxy.workflow.scheduling_executor
+        self._lock = threading.Lock()
+
+    def record(self, invocation_id: int, wakeup_keys: Optional[FrozenSet[WakeupKey]]) -> None:
+        """Record the objects a scheduled invocation waits for, ``None`` to reschedule it on the next iteration."""
+        with self._lock:
+            if wakeup_keys is None or not self.sweep_interval:
+                self._waiting_on.pop(invocation_id, None)
+            else:
+                self._waiting_on[invocation_id] = wakeup_keys | {invocation_wakeup_key(invocation_id)}
+
+    def forget(self, invocation_id: int) -> None:
+        with self._lock:
+            self._waiting_on.pop(invocation_id, None)
+
+    def __len__(self) -> int:
+        return len(self._waiting_on)
+
+    def invocations_to_schedule(self, engine, active_invocation_ids: Iterable[int]) -> List[int]:
+        """Return the ids of the active invocations that should be scheduled, in the given order."""
+        active_invocation_ids = list(active_invocation_ids)
+        active = set(active_invocation_ids)
+        with self._lock:
+            for invocation_id in list(self._waiting_on):
+                if invocation_id not in active:
+                    del self._waiting_on[invocation_id]
+            now = time.monotonic()
+            if self._last_sweep is None or now - self._last_sweep >= self.sweep_interval:
+                self._last_sweep = now
+                self._waiting_on.clear()
+                return active_invocation_ids
+            waiting_on = dict(self._waiting_on)
+        if not waiting_on:
+            return active_invocation_ids
+        timer = ExecutionTimer()
+        woken_keys = self._woken_keys(engine, waiting_on.values())
+        woken = {
+            invocation_id for invocation_id, wakeup_keys in waiting_on.items() if not wakeup_keys.isdisjoint(woken_keys)
+        }
+        with self._lock:
+            for invocation_id in woken:
+                self._waiting_on.pop(invocation_id, None)
+            waiting = set(self._waiting_on)
+        log.debug("Woke up %d of %d waiting workflow invocations %s", len(woken), len(waiting_on), timer)
+        return [invocation_id for invocation_id in active_invocation_ids if invocation_id not in waiting]
+
+    def _woken_keys(self, engine, waiting_on: Iterable[FrozenSet[WakeupKey]]) -> Set[WakeupKey]:
+        ids_by_kind: Dict[str, Set[int]] = {}
+        for wakeup_keys in waiting_on:
+            for wakeup_key in wakeup_keys:
+                ids_by_kind.setdefault(wakeup_key.kind, set()).add(wakeup_key.id)
+        woken_keys: Set[WakeupKey] = set()
+        with engine.connect() as conn:
+            for kind, ids in ids_by_kind.items():
+                for chunk in chunk_iterable(sorted(ids), WAKEUP_QUERY_CHUNK_SIZE):
+                    for object_id in conn.scalars(_WAKEUP_STATEMENTS[kind](list(chunk))):
+                        woken_keys.add(WakeupKey(kind, object_id))
+        return woken_keys
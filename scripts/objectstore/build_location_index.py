@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""Populate the location index of a hierarchical or distributed object store.
+
+The object store configuration must declare a ``location_index`` (e.g.
+``<location_index path="/data/galaxy/object_location_index.sqlite"/>``). Every
+non-purged dataset is located by probing the backends once and recorded in bulk
+so later lookups no longer need to scan all backends.
+"""
+
+import argparse
+import os
+import sys
+
+from sqlalchemy import false
+
+sys.path.insert(1, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "lib")))
+
+import galaxy.config
+from galaxy.model.mapping import init_models_from_config
+from galaxy.objectstore import (
+    build_object_store_from_config,
+    NestedObjectStore,
+)
+from galaxy.util.script import (
+    app_properties_from_args,
+    populate_config_args,
+)
+
+parser = argparse.ArgumentParser(description=__doc__)
+populate_config_args(parser)
+parser.add_argument("--batch-size", type=int, default=1000, help="Number of index entries written per transaction")
+parser.add_argument("--clear", action="store_true", help="Remove all existing entries before rebuilding the index")
+args = parser.parse_args()
+
+
+def init():
+    app_properties = app_properties_from_args(args)
+    config = galaxy.config.Configuration(**app_properties)
+
+    object_store = build_object_store_from_config(config)
+    model = init_models_from_config(config, object_store=object_store)
+    return model, object_store
+
+
+if __name__ == "__main__":
+    print("Loading Galaxy model...")
+    model, object_store = init()
+    if not isinstance(object_store, NestedObjectStore) or object_store.location_index is None:
+        print("Configured object store is not a hierarchical or distributed object store with a location_index")
+        sys.exit(1)
+    if args.clear:
+        object_store.location_index.clear()
+    sa_session = model.context.current
+    query = sa_session.query(model.Dataset).filter(model.Dataset.purged == false()).enable_eagerloads(False)
+    print("Indexing %i datasets..." % query.count())
+    indexed = object_store.index_object_locations(query.yield_per(args.batch_size), batch_size=args.batch_size)
+    print("Indexed %i datasets" % indexed)
+    object_store.shutdown()
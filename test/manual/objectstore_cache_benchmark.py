@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""Compare directory walking and indexed object store cache cleaning.
+
+Builds a synthetic cache of small files, then times a cache check step with
+the legacy walking monitor and with the indexed monitor (including the one-off
+reconciliation that seeds the index and a steady-state check).
+
+% python test/manual/objectstore_cache_benchmark.py --files 1000000 --directory /scratch/cache_bench
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path.insert(1, os.path.join(galaxy_root, "lib"))
+
+from galaxy.objectstore.caching import (  # noqa: E402
+    CacheTarget,
+    check_cache,
+    get_cache_index,
+    ONE_GIGA_BYTE,
+)
+
+DESCRIPTION = "Benchmark object store cache cleaning over a synthetic cache."
+
+
+def populate(directory: str, count: int, file_size: int) -> int:
+    contents = b"x" * file_size
+    for i in range(count):
+        subdir = os.path.join(directory, f"{i // 1000000:03d}", f"{(i // 1000) % 1000:03d}")
+        if i % 1000 == 0:
+            os.makedirs(subdir, exist_ok=True)
+        with open(os.path.join(subdir, f"dataset_{i}.dat"), "wb") as f:
+            f.write(contents)
+    return count * file_size
+
+
+def timed(label: str, func) -> None:
+    start = time.perf_counter()
+    func()
+    print(f"{label}: {time.perf_counter() - start:.2f} sec")
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--files", type=int, default=100000)
+    arg_parser.add_argument("--file_size", type=int, default=1024)
+    arg_parser.add_argument("--evict_fraction", type=float, default=0.05)
+    arg_parser.add_argument("--directory", default=None)
+    args = arg_parser.parse_args(argv)
+
+    base_directory = args.directory or tempfile.mkdtemp()
+    try:
+        walk_directory = os.path.join(base_directory, "walk")
+        indexed_directory = os.path.join(base_directory, "indexed")
+        for directory in (walk_directory, indexed_directory):
+            total_size = populate(directory, args.files, args.file_size)
+        print(f"Populated caches with {args.files} files ({total_size} bytes per cache)")
+
+        # size the cache so a cleaning step evicts roughly evict_fraction of the files
+        size_gb = total_size / ONE_GIGA_BYTE * (1 - args.evict_fraction) / 0.9
+        walk_target = CacheTarget(walk_directory, size_gb, 0.9)
+        indexed_target = CacheTarget(indexed_directory, size_gb, 0.9, indexed=True)
+
+        timed("walking check_cache", lambda: check_cache(walk_target))
+        timed("indexed check_cache (initial reconcile)", lambda: check_cache(indexed_target))
+        timed("indexed check_cache (steady state, nothing to evict)", lambda: check_cache(indexed_target))
+        cache_index = get_cache_index(indexed_target)
+        timed(
+            "indexed eviction of 1% of the files",
+            lambda: cache_index.evict(args.files * args.file_size * 0.01),
+        )
+    finally:
+        if args.directory is None:
+            shutil.rmtree(base_directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""Compare sniffing with the whole sniff order and with the sniffer index.
+
+Guesses the datatype of every file in the given directories (by default the
+datatype test files and ``test-data``) by walking the whole sniff order and
+by using the registry's sniffer index, checks both give the same results and
+reports timings and the slowest sniffers.
+
+% python test/manual/sniff_benchmark.py --repeat 3 test-data
+"""
+
+import os
+import sys
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path.insert(1, os.path.join(galaxy_root, "lib"))
+
+from galaxy.datatypes import sniff  # noqa: E402
+from galaxy.datatypes.registry import example_datatype_registry_for_sample  # noqa: E402
+from galaxy.datatypes.sniff import (  # noqa: E402
+    FilePrefix,
+    guess_ext,
+)
+
+DESCRIPTION = "Benchmark datatype sniffing with and without the sniffer index."
+DEFAULT_DIRECTORIES = [
+    os.path.join(galaxy_root, "lib", "galaxy", "datatypes", "test"),
+    os.path.join(galaxy_root, "test-data"),
+]
+
+
+def corpus(directories):
+    for directory in directories:
+        for dirpath, _, filenames in os.walk(directory):
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                if os.path.isfile(path) and not os.path.islink(path):
+                    yield path
+
+
+def sniff_all(file_prefixes, sniff_order, repeat):
+    results = {}
+    # Don't let one run reuse the tar archive listings of the other
+    sniff._tar_member_names.cache_clear()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for file_prefix in file_prefixes:
+            try:
+                results[file_prefix.filename] = guess_ext(file_prefix, sniff_order)
+            except Exception as e:
+                results[file_prefix.filename] = repr(e)
+    return results, time.perf_counter() - start
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("directories", nargs="*", default=DEFAULT_DIRECTORIES)
+    arg_parser.add_argument("--repeat", type=int, default=1)
+    arg_parser.add_argument("--slowest", type=int, default=10)
+    args = arg_parser.parse_args(argv)
+
+    registry = example_datatype_registry_for_sample()
+    file_prefixes = []
+    for path in corpus(args.directories):
+        try:
+            file_prefixes.append(FilePrefix(path))
+        except Exception:
+            pass
+    print(f"Sniffing {len(file_prefixes)} files with {len(registry.sniff_order)} sniffers")
+
+    full_results, full_time = sniff_all(file_prefixes, registry.sniff_order, args.repeat)
+    indexed_results, indexed_time = sniff_all(file_prefixes, registry.sniffer_index, args.repeat)
+    print(f"Whole sniff order: {full_time:.2f} sec")
+    print(f"Sniffer index: {indexed_time:.2f} sec")
+    differences = [path for path in full_results if full_results[path] != indexed_results[path]]
+    for path in differences:
+        print(f"Different result for {path}: {full_results[path]} != {indexed_results[path]}")
+    print(f"{len(differences)} different results")
+
+    print("Slowest sniffers:")
+    for timing in registry.sniffer_index.timings()[: args.slowest]:
+        print(f"  {timing['ext']}: {timing['seconds']:.3f} sec, {timing['calls']} calls, {timing['matches']} matches")
+    return 1 if differences else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""Benchmark setting the metadata of a large tabular dataset.
+
+Writes a synthetic tabular file and times guessing its column types and
+counting its lines with ``scan_tabular_metadata`` against the line by line
+algorithm ``Tabular.set_meta`` used before, checking both agree.
+
+% python test/manual/tabular_set_meta_benchmark.py --rows 2000000
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path.insert(1, os.path.join(galaxy_root, "lib"))
+
+from galaxy.datatypes.tabular import (  # noqa: E402
+    COLUMN_TYPE_SET_ORDER,
+    DEFAULT_COLUMN_TYPE,
+    scan_tabular_metadata,
+)
+from galaxy.util import compression_utils  # noqa: E402
+
+DESCRIPTION = "Benchmark setting the metadata of a large tabular dataset."
+
+
+def write_tabular(path: str, rows: int, str_columns: bool) -> None:
+    with open(path, "w") as f:
+        f.write("#chrom\tstart\tend\tname\tscore\tstrand\n")
+        for i in range(rows):
+            name = f"feature{i}" if str_columns else str(i)
+            f.write(f"chr{i % 22 + 1}\t{i * 100}\t{i * 100 + 50}\t{name}\t{random.random():.4f}\t{'+-'[i % 2]}\n")
+
+
+def legacy_guess_column_type(column_text):
+    if "_" not in column_text:
+        try:
+            int(column_text)
+            return "int"
+        except ValueError:
+            pass
+        try:
+            float(column_text)
+            return "float"
+        except ValueError:
+            if column_text.strip().lower() == "na":
+                return "float"
+    if "," in column_text:
+        return "list"
+    if column_text:
+        return "str"
+    return None
+
+
+def legacy_scan(fh, max_data_lines, max_guess_type_data_lines):
+    """The line by line scan of ``Tabular.set_meta`` for files without a header line."""
+    data_lines = 0
+    comment_lines = 0
+    column_types = []
+    for line in iter(fh.readline, ""):
+        line = line.rstrip("\r\n")
+        if not line or line.startswith("#"):
+            comment_lines += 1
+        else:
+            data_lines += 1
+            if max_guess_type_data_lines is None or data_lines <= max_guess_type_data_lines:
+                for field_count, field in enumerate(line.split("\t")):
+                    if field_count >= len(column_types):
+                        column_types.append(None)
+                    column_type = legacy_guess_column_type(field)
+                    old_column_type = column_types[field_count]
+                    if column_type is not None and (
+                        old_column_type is None
+                        or COLUMN_TYPE_SET_ORDER.index(column_type) > COLUMN_TYPE_SET_ORDER.index(old_column_type)
+                    ):
+                        column_types[field_count] = column_type
+        if max_data_lines is not None and data_lines >= max_data_lines:
+            if fh.readline():
+                data_lines = None
+                comment_lines = None
+            break
+    return data_lines, comment_lines, [column_type or DEFAULT_COLUMN_TYPE for column_type in column_types]
+
+
+def timed(label: str, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label}: {time.perf_counter() - start:.2f} sec")
+    return result
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--rows", type=int, default=1000000)
+    arg_parser.add_argument("--max_data_lines", type=int, default=None)
+    arg_parser.add_argument("--max_guess_type_data_lines", type=int, default=None)
+    arg_parser.add_argument(
+        "--numeric", action="store_true", help="Use a numeric name column, so fewer columns settle on str"
+    )
+    args = arg_parser.parse_args(argv)
+
+    with tempfile.NamedTemporaryFile(suffix=".tabular") as tmp:
+        write_tabular(tmp.name, args.rows, str_columns=not args.numeric)
+
+        def legacy():
+            with compression_utils.get_fileobj(tmp.name) as fh:
+                return legacy_scan(fh, args.max_data_lines, args.max_guess_type_data_lines)
+
+        def chunked():
+            with compression_utils.get_fileobj(tmp.name) as fh:
+                metadata = scan_tabular_metadata(
+                    fh,
+                    max_data_lines=args.max_data_lines,
+                    max_guess_type_data_lines=args.max_guess_type_data_lines,
+                )
+            return metadata.data_lines, metadata.comment_lines, metadata.column_types
+
+        size = os.path.getsize(tmp.name) / 1024**2
+        legacy_result = timed(f"Line by line scan of {args.rows} rows ({size:.0f} MB)", legacy)
+        result = timed(f"Chunked scan of {args.rows} rows ({size:.0f} MB)", chunked)
+        print(f"Metadata: {result}")
+        assert result == legacy_result, legacy_result
+
+
+if __name__ == "__main__":
+    main()
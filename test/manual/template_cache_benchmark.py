@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""Benchmark filling the Cheetah templates of a tool for many jobs.
+
+Fills a command line and a configfile template, as ``ToolEvaluator`` does when
+preparing a job, for as many jobs as when mapping a tool over a large
+collection. Templates are compiled by the compiled template cache, by
+Cheetah's own compilation cache (as ``fill_template`` did before) and without
+any cache.
+
+% python test/manual/template_cache_benchmark.py --jobs 10000 --python-template-version 2
+"""
+
+import os
+import sys
+import time
+from argparse import ArgumentParser
+from unittest import mock
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path.insert(1, os.path.join(galaxy_root, "lib"))
+
+from Cheetah.Template import Template  # noqa: E402
+
+from galaxy.util.template import (  # noqa: E402
+    compiled_template_cache,
+    fill_template,
+)
+
+DESCRIPTION = "Benchmark filling the Cheetah templates of a tool for many jobs."
+
+COMMAND_TEMPLATE = """
+#if $reference_source.reference_source_selector == "history":
+    ln -s '$reference_source.ref_file' 'reference.fa' &&
+    bwa index 'reference.fa' &&
+    #set $reference = 'reference.fa'
+#else
+    #set $reference = $reference_source.index_path
+#end if
+bwa mem -t \\${GALAXY_SLOTS:-1}
+#for $read_group in $read_groups:
+    -R '@RG\\tID:$read_group.id\\tSM:$read_group.sample'
+#end for
+#if $min_seed_length:
+    -k $min_seed_length
+#end if
+'$reference' '$input' > '$output'
+"""
+
+CONFIGFILE_TEMPLATE = """
+#for $i, $read_group in enumerate($read_groups):
+read_group_$i=$read_group.id
+#end for
+sort_order=$sort_order
+"""
+
+
+def job_context(i: int):
+    return {
+        "reference_source": {"reference_source_selector": "history", "ref_file": f"/data/ref_{i % 3}.fa"},
+        "read_groups": [{"id": f"rg{i}", "sample": f"sample{i}"}],
+        "min_seed_length": 19,
+        "input": f"/data/dataset_{i}.fastqsanger",
+        "output": f"/data/dataset_{i}.bam",
+        "sort_order": "coordinate",
+    }
+
+
+def cheetah_cache_compile(template_text, compiler_class, python_template_version):
+    """How ``fill_template`` compiled templates before the compiled template cache."""
+    return Template.compile(source=template_text, compilerClass=compiler_class)
+
+
+def uncached_compile(template_text, compiler_class, python_template_version):
+    return Template.compile(
+        source=template_text, compilerClass=compiler_class, useCache=False, cacheCompilationResults=False
+    )
+
+
+def timed(label: str, jobs: int, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label}: {elapsed:.2f} sec ({jobs / elapsed:.0f} jobs/sec)")
+    return result
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--jobs", type=int, default=10000)
+    arg_parser.add_argument("--python-template-version", default="3")
+    arg_parser.add_argument("--skip-uncached", action="store_true", help="skip compiling templates for every job")
+    args = arg_parser.parse_args(argv)
+    contexts = [job_context(i) for i in range(args.jobs)]
+
+    def prepare_jobs():
+        return [
+            (
+                fill_template(COMMAND_TEMPLATE, context=context, python_template_version=args.python_template_version),
+                fill_template(
+                    CONFIGFILE_TEMPLATE, context=context, python_template_version=args.python_template_version
+                ),
+            )
+            for context in contexts
+        ]
+
+    compiled_template_cache.clear()
+    expected = timed(f"Filling templates of {args.jobs} jobs (compiled template cache)", args.jobs, prepare_jobs)
+    print(f"Compiled template cache: {compiled_template_cache.stats()}")
+    with mock.patch.object(compiled_template_cache, "compile", cheetah_cache_compile):
+        result = timed(f"Filling templates of {args.jobs} jobs (Cheetah cache)", args.jobs, prepare_jobs)
+    assert result == expected
+    if not args.skip_uncached:
+        with mock.patch.object(compiled_template_cache, "compile", uncached_compile):
+            result = timed(f"Filling templates of {args.jobs} jobs (no cache)", args.jobs, prepare_jobs)
+        assert result == expected
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""Benchmark lookups in a large tabular tool data table.
+
+Writes a synthetic ``.loc`` file, loads it into a tabular data table and
+times ``get_entry`` lookups against a linear scan over the table's fields (as
+done before tables were indexed), as well as adding entries to a table that
+does not allow duplicates.
+
+% python test/manual/tool_data_table_benchmark.py --rows 500000 --lookups 10000
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path.insert(1, os.path.join(galaxy_root, "lib"))
+
+from galaxy.tool_util.data import ToolDataTableManager  # noqa: E402
+
+DESCRIPTION = "Benchmark lookups in a large tabular tool data table."
+
+TOOL_DATA_TABLE_CONF_XML = """<tables>
+  <table name="all_fasta" comment_char="#" allow_duplicate_entries="{allow_duplicate_entries}">
+    <columns>value, dbkey, name, path</columns>
+    <file path="{loc_path}" />
+  </table>
+</tables>
+"""
+
+
+def write_loc(path: str, rows: int) -> None:
+    with open(path, "w") as f:
+        for i in range(rows):
+            f.write(f"genome{i}\tdbkey{i % 1000}\tGenome {i}\t/data/genomes/genome{i}/seq.fa\n")
+
+
+def load_table(directory: str, rows: int, allow_duplicate_entries: bool = True):
+    loc_path = os.path.join(directory, "all_fasta.loc")
+    if not os.path.exists(loc_path):
+        write_loc(loc_path, rows)
+    conf = os.path.join(directory, "tool_data_table_conf.xml")
+    with open(conf, "w") as f:
+        f.write(TOOL_DATA_TABLE_CONF_XML.format(allow_duplicate_entries=allow_duplicate_entries, loc_path=loc_path))
+    return ToolDataTableManager(directory, conf)["all_fasta"]
+
+
+def linear_get_entry(table, query_attr, query_val, return_attr):
+    query_col = table.columns[query_attr]
+    return_col = table.columns[return_attr]
+    for fields in table.get_fields():
+        if fields[query_col] == query_val:
+            return fields[return_col]
+    return None
+
+
+def timed(label: str, func) -> None:
+    start = time.perf_counter()
+    func()
+    print(f"{label}: {time.perf_counter() - start:.2f} sec")
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--rows", type=int, default=200000)
+    arg_parser.add_argument("--lookups", type=int, default=1000)
+    arg_parser.add_argument("--linear_lookups", type=int, default=100)
+    arg_parser.add_argument("--adds", type=int, default=1000)
+    args = arg_parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp()
+    try:
+        timed(f"Loading table with {args.rows} rows", lambda: load_table(directory, args.rows))
+        table = load_table(directory, args.rows)
+        keys = [f"genome{random.randrange(args.rows)}" for _ in range(args.lookups)]
+
+        def linear():
+            for key in keys[: args.linear_lookups]:
+                assert linear_get_entry(table, "value", key, "path")
+
+        def indexed():
+            for key in keys:
+                assert table.get_entry("value", key, "path")
+
+        timed(f"{args.linear_lookups} linear scan lookups", linear)
+        timed(f"{args.lookups} indexed lookups (including building the index)", indexed)
+        timed(f"{args.lookups} indexed lookups", indexed)
+
+        table = load_table(directory, args.rows, allow_duplicate_entries=False)
+        entries = [[f"new{i}", "dbkey", f"New {i}", f"/data/new{i}.fa"] for i in range(args.adds)]
+        timed(
+            f"Adding {args.adds} entries to a table without duplicates",
+            lambda: table.add_entries(entries, allow_duplicates=False),
+        )
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
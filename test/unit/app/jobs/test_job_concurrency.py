@@ -0,0 +1,51 @@
+from galaxy.jobs.concurrency import JobConcurrencyCounter
+
+
+def test_counts_follow_dispatch_and_finish():
+    counter = JobConcurrencyCounter(reconcile_interval=60)
+    counter.add(1, 5, "cluster")
+    counter.add(2, 5, "local")
+    counter.add(3, 6, "cluster")
+    assert counter.user_job_count(5) == 2
+    assert counter.user_job_count_per_destination(5) == {"cluster": 1, "local": 1}
+    assert counter.total_job_count_per_destination() == {"cluster": 2, "local": 1}
+
+    counter.remove(1)
+    counter.remove(1)
+    counter.remove(42)
+    assert counter.user_job_count(5) == 1
+    assert counter.user_job_count_per_destination(5) == {"cluster": 0, "local": 1}
+    assert counter.total_job_count_per_destination()["cluster"] == 1
+    assert len(counter) == 2
+
+
+def test_reconcile_replaces_counts():
+    counter = JobConcurrencyCounter(reconcile_interval=60)
+    counter.add(1, 5, "cluster")
+    counter.reconcile(
+        [
+            (2, 5, "cluster", "running"),
+            (3, 5, "cluster", "resubmitted"),
+            (4, None, "local", "queued"),
+            (5, 6, "local", "new"),
+        ],
+        now=0,
+    )
+    # resubmitted jobs only count towards the user limit
+    assert counter.user_job_count(5) == 2
+    assert counter.user_job_count_per_destination(5) == {"cluster": 1}
+    assert counter.total_job_count_per_destination() == {"cluster": 1, "local": 1}
+    assert counter.user_job_count(6) == 0
+
+    # dispatching the resubmitted job again replaces its previous count
+    counter.add(3, 5, "local")
+    assert counter.user_job_count(5) == 2
+    assert counter.user_job_count_per_destination(5) == {"cluster": 1, "local": 1}
+
+
+def test_reconcile_due():
+    counter = JobConcurrencyCounter(reconcile_interval=60)
+    assert counter.reconcile_due(now=0)
+    counter.reconcile([], now=10)
+    assert not counter.reconcile_due(now=69)
+    assert counter.reconcile_due(now=70)
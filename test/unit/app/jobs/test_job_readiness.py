@@ -0,0 +1,50 @@
+from galaxy.jobs.readiness import JobReadinessTracker
+
+
+def test_jobs_become_ready_when_inputs_do():
+    tracker = JobReadinessTracker(sweep_interval=300)
+    tracker.track(1, "user1", [10, 11])
+    tracker.track(2, "user1", [11])
+    tracker.track(3, "user2", [])
+    assert tracker.ready_job_ids() == [3]
+    assert tracker.outstanding_count(1) == 2
+
+    assert tracker.datasets_ready([11, 99]) == [2]
+    assert tracker.outstanding_count(1) == 1
+    assert tracker.ready_job_ids() == [2, 3]
+
+    assert tracker.datasets_ready([10]) == [1]
+    assert tracker.ready_job_ids() == [1, 2, 3]
+
+
+def test_ready_window_per_owner():
+    tracker = JobReadinessTracker(sweep_interval=300)
+    for job_id in range(1, 6):
+        tracker.track(job_id, "user1", [])
+    tracker.track(6, "user2", [])
+    assert tracker.ready_job_ids(window_size=2) == [1, 2, 6]
+    tracker.discard(1)
+    assert tracker.ready_job_ids(window_size=2) == [2, 3, 6]
+
+
+def test_discard_and_retrack():
+    tracker = JobReadinessTracker(sweep_interval=300)
+    tracker.track(1, "user1", [10])
+    tracker.discard(1)
+    assert not tracker.is_tracked(1)
+    assert tracker.datasets_ready([10]) == []
+    tracker.track(1, "user1", [10])
+    tracker.track(1, "user1", [12])
+    assert tracker.datasets_ready([10]) == []
+    assert tracker.datasets_ready([12]) == [1]
+    assert len(tracker) == 1
+
+
+def test_sweep_due():
+    tracker = JobReadinessTracker(sweep_interval=300)
+    assert tracker.sweep_due(now=0)
+    tracker.track(1, "user1", [])
+    tracker.reset(now=100)
+    assert len(tracker) == 0
+    assert not tracker.sweep_due(now=399)
+    assert tracker.sweep_due(now=400)
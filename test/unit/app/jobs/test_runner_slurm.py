@@ -0,0 +1,52 @@
+from unittest import mock
+
+from galaxy.jobs import runners
+from galaxy.jobs.runners.slurm import SlurmJobRunner
+
+
+class JobState:
+    QUEUED_ACTIVE = "queued_active"
+    SYSTEM_ON_HOLD = "system_on_hold"
+    USER_SUSPENDED = "user_suspended"
+    RUNNING = "running"
+
+
+def _runner(bulk_status=True):
+    # avoid loading the DRMAA library, only the squeue handling is tested here
+    runner = SlurmJobRunner.__new__(SlurmJobRunner)
+    runner.runner_params = runners.RunnerParams(
+        specs={"bulk_status": dict(map=bool, default=False)}, params=dict(bulk_status=bulk_status)
+    )
+    runner.drmaa_job_states = JobState
+    runner._slurm_states = {}
+    return runner
+
+
+def test_bulk_job_states():
+    runner = _runner()
+    squeue_output = "101 RUNNING\n102 PENDING\n103 FAILED\n"
+    with mock.patch("galaxy.jobs.runners.slurm.commands.execute", return_value=squeue_output) as execute:
+        states = runner._bulk_job_states(["101", "102", "103", "104"])
+    execute.assert_called_once()
+    assert execute.call_args[0][0][-1] == "--jobs=101,102,103,104"
+    # terminal and unknown jobs are left to DRMAA
+    assert states == {"101": JobState.RUNNING, "102": JobState.QUEUED_ACTIVE}
+    assert runner._slurm_states["103"] == "FAILED"
+
+
+def test_bulk_job_states_per_cluster():
+    runner = _runner()
+    with mock.patch(
+        "galaxy.jobs.runners.slurm.commands.execute", side_effect=["CLUSTER: c2\n5 RUNNING\n", "6 PENDING\n"]
+    ) as execute:
+        states = runner._bulk_job_states(["5.c2", "6"])
+    assert execute.call_count == 2
+    assert ["-M", "c2"] == execute.call_args_list[0][0][0][4:6]
+    assert states == {"5.c2": JobState.RUNNING, "6": JobState.QUEUED_ACTIVE}
+
+
+def test_bulk_job_states_disabled():
+    runner = _runner(bulk_status=False)
+    with mock.patch("galaxy.jobs.runners.slurm.commands.execute") as execute:
+        assert runner._bulk_job_states(["101"]) is None
+    execute.assert_not_called()
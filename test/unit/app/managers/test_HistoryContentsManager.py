@@ -15,10 +15,16 @@ from galaxy.managers import (
     base,
     collections,
     hdas,
+    hdcas,
     history_contents,
 )
 from galaxy.managers.histories import HistoryManager
 from galaxy.model.base import transaction
+from galaxy.schema.schema import (
+    HistoryContentItemOperation,
+    TagOperationParams,
+)
+from galaxy.webapps.galaxy.services.history_contents import HistoryItemOperator
 from .base import (
     BaseTestCase,
     CreatesCollectionsMixin,
@@ -322,6 +328,59 @@ class TestHistoryAsContainer(HistoryAsContainerBaseTestCase):
         assert self.contents_manager.contents(history, filters=filters) == [contents[1], contents[6]]
 
 
+# =============================================================================
+class TestHistoryItemOperator(HistoryAsContainerBaseTestCase):
+    def set_up_managers(self):
+        super().set_up_managers()
+        self.item_operator = HistoryItemOperator(self.hda_manager, self.app[hdcas.HDCAManager], self.collection_manager)
+
+    def apply_bulk(self, history, operation, params=None):
+        items = [(type(item), item.id) for item in self.contents_manager.contents(history)]
+        failures = self.item_operator.apply_bulk(operation, items, params, self.trans)
+        with transaction(self.trans.sa_session):
+            self.trans.sa_session.commit()
+        return failures
+
+    def test_bulk_operations(self):
+        user2 = self.user_manager.create(**user2_data)
+        self.trans.set_user(user2)
+        history = self.history_manager.create(name="history", user=user2)
+        hdas = [self.add_hda_to_history(history, name=f"hda-{x}") for x in range(3)]
+        hdca = self.add_list_collection_to_history(history, hdas[:2])
+
+        self.log("hiding should hide datasets and collections")
+        assert self.apply_bulk(history, HistoryContentItemOperation.hide) == []
+        assert not any(item.visible for item in [*hdas, hdca])
+
+        self.log("tags should be added to items once and removed by name and value")
+        tags = TagOperationParams(type="add_tags", tags=["a", "name:b"])
+        assert self.apply_bulk(history, HistoryContentItemOperation.add_tags, tags) == []
+        assert self.apply_bulk(history, HistoryContentItemOperation.add_tags, tags) == []
+        assert all(sorted(item.make_tag_string_list()) == ["a", "name:b"] for item in [*hdas, hdca])
+        tags = TagOperationParams(type="remove_tags", tags=["#b"])
+        assert self.apply_bulk(history, HistoryContentItemOperation.remove_tags, tags) == []
+        assert all(item.make_tag_string_list() == ["a"] for item in [*hdas, hdca])
+
+        self.log("tags should not be added to items of other users")
+        other_history = self.history_manager.create(name="other", user=self.admin_user)
+        other_hda = self.add_hda_to_history(other_history, name="other")
+        tags = TagOperationParams(type="add_tags", tags=["c"])
+        failures = self.item_operator.apply_bulk(
+            HistoryContentItemOperation.add_tags, [(type(other_hda), other_hda.id)], tags, self.trans
+        )
+        assert failures == [((type(other_hda), other_hda.id), "User does not own item.")]
+        self.trans.sa_session.refresh(other_hda)
+        assert other_hda.make_tag_string_list() == []
+
+        self.log("purging should purge datasets and report purged datasets that can't be undeleted")
+        self.hda_manager.purge(hdas[0])
+        failures = self.apply_bulk(history, HistoryContentItemOperation.undelete)
+        assert [item for item, _ in failures] == [(type(hdas[0]), hdas[0].id)]
+        assert self.apply_bulk(history, HistoryContentItemOperation.purge) == []
+        assert all(hda.purged and hda.dataset.purged for hda in hdas)
+        assert hdca.deleted
+
+
 class TestHistoryContentsFilterParser(HistoryAsContainerBaseTestCase):
     def set_up_managers(self):
         super().set_up_managers()
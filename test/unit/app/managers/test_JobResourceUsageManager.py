@@ -0,0 +1,110 @@
+from datetime import timedelta
+
+import pytest
+
+from galaxy.managers.job_resource_usage import (
+    JobResourceUsageManager,
+    tpv_tool_id,
+)
+from galaxy.model import Job
+from galaxy.model.base import transaction
+from galaxy.model.orm.now import now
+from galaxy.model.unittest_utils import GalaxyDataTestApp
+
+BWA_TOOL_ID = "toolshed.g2.bx.psu.edu/repos/devteam/bwa/bwa_mem/0.7.17.2"
+
+
+@pytest.fixture
+def sa_session():
+    return GalaxyDataTestApp().model.session
+
+
+@pytest.fixture
+def job_resource_usage_manager(sa_session) -> JobResourceUsageManager:
+    return JobResourceUsageManager(sa_session)
+
+
+def add_job(sa_session, tool_id, metrics, state=Job.states.OK, destination_id="cluster", update_time=None):
+    job = Job()
+    if update_time:
+        job.update_time = update_time
+    job.tool_id = tool_id
+    job.tool_version = "1.0"
+    job.destination_id = destination_id
+    job.state = state
+    for (plugin, metric_name), value in metrics.items():
+        job.add_metric(plugin, metric_name, value)
+    sa_session.add(job)
+
+
+def setup_jobs(sa_session):
+    for i in range(10):
+        runtime = 100 + i
+        metrics = {
+            ("core", "runtime_seconds"): runtime,
+            ("core", "galaxy_slots"): 4,
+            ("core", "galaxy_memory_mb"): 8192,
+            ("cgroup", "memory.peak"): (1000 + 100 * i) * 1024**2,
+            # on average, jobs use from 1 to 2 of their 4 cores
+            ("cgroup", "cpu.stat.usage_usec"): runtime * (1 + i / 9) * 10**6,
+        }
+        add_job(sa_session, BWA_TOOL_ID, metrics)
+    add_job(sa_session, "cat1", {("core", "runtime_seconds"): 5, ("resource_usage", "peak_memory_bytes"): 10 * 1024**2})
+    add_job(sa_session, "cat1", {("core", "runtime_seconds"): 50}, state=Job.states.ERROR)
+    with transaction(sa_session):
+        sa_session.commit()
+
+
+def test_report(sa_session, job_resource_usage_manager: JobResourceUsageManager):
+    setup_jobs(sa_session)
+    report = job_resource_usage_manager.report(min_jobs=5)
+    groups = {group["tool_id"]: group for group in report["groups"]}
+    bwa = groups[BWA_TOOL_ID]
+    assert bwa["jobs"] == 10
+    assert bwa["destination_id"] == "cluster"
+    assert bwa["runtime_seconds_p50"] == 104
+    assert bwa["runtime_seconds_max"] == 109
+    assert bwa["memory_allocated_mb_max"] == 8192
+    assert bwa["memory_peak_mb_p95"] == 1900
+    assert bwa["cpu_efficiency_mean"] == 0.375
+    # failed jobs are not reported
+    assert groups["cat1"]["jobs"] == 1
+    assert groups["cat1"]["memory_peak_mb_max"] == 10
+
+    # cat1 has too few jobs for a recommendation
+    (recommendation,) = report["recommendations"]
+    assert recommendation["tool_id"] == BWA_TOOL_ID
+    # 1900 MB + 20% headroom, rounded up to 512 MB
+    assert recommendation["memory_mb"] == 2560
+    assert recommendation["cores"] == 2
+    assert recommendation["memory_savings_mb"] == 8192 - 2560
+    assert report["tpv"] == {"tools": {"toolshed.g2.bx.psu.edu/repos/devteam/bwa/bwa_mem/.*": {"cores": 2, "mem": 2.5}}}
+
+
+def test_report_filters(sa_session, job_resource_usage_manager: JobResourceUsageManager):
+    setup_jobs(sa_session)
+    report = job_resource_usage_manager.report(tool_ids=["cat1"], min_jobs=1)
+    assert [group["tool_id"] for group in report["groups"]] == ["cat1"]
+    assert report["recommendations"][0]["memory_mb"] == 512
+    assert job_resource_usage_manager.report(destination_ids=["local"])["groups"] == []
+
+
+def test_report_bounded(sa_session, job_resource_usage_manager: JobResourceUsageManager):
+    setup_jobs(sa_session)
+    add_job(sa_session, "cat1", {("core", "runtime_seconds"): 5}, update_time=now() - timedelta(days=60))
+    with transaction(sa_session):
+        sa_session.commit()
+    report = job_resource_usage_manager.report(tool_ids=["cat1"])
+    # jobs older than 30 days are not reported on by default
+    assert report["groups"][0]["jobs"] == 1
+    assert not report["truncated"]
+    report = job_resource_usage_manager.report(tool_ids=["cat1"], date_range_min=now() - timedelta(days=90))
+    assert report["groups"][0]["jobs"] == 2
+    report = job_resource_usage_manager.report(max_jobs=4)
+    assert report["truncated"]
+    assert sum(group["jobs"] for group in report["groups"]) == 4
+
+
+def test_tpv_tool_id():
+    assert tpv_tool_id(BWA_TOOL_ID) == "toolshed.g2.bx.psu.edu/repos/devteam/bwa/bwa_mem/.*"
+    assert tpv_tool_id("cat1") == "cat1"
@@ -15,7 +15,10 @@ from galaxy.tools.actions import (
     DefaultToolAction,
     determine_output_format,
 )
-from galaxy.tools.execution_helpers import on_text_for_names
+from galaxy.tools.execution_helpers import (
+    on_text_for_names,
+    ToolExecutionCache,
+)
 from galaxy.util import XML
 from galaxy.util.unittest import TestCase
 
@@ -123,6 +126,24 @@ class TestDefaultToolAction(TestCase, tools_support.UsesTools):
             return
         raise AssertionError("Tool execution succeeded for inactive user!")
 
+    def test_deferred_history_additions(self):
+        execution_cache = ToolExecutionCache(self.trans, defer_history_additions=True)
+        outputs = [
+            self._simple_execute(incoming=dict(param1=f"moo{i}"), execution_cache=execution_cache)[1]["out1"]
+            for i in range(3)
+        ]
+        assert all(output.hid is None for output in outputs)
+        execution_cache.add_pending_history_items()
+        hids = [output.hid for output in outputs]
+        assert hids == list(range(hids[0], hids[0] + 3))
+        assert all(output.history == self.history for output in outputs)
+        assert not execution_cache.histories_with_pending_additions
+
+    def test_output_permissions_cached(self):
+        execution_cache = ToolExecutionCache(self.trans)
+        permissions = execution_cache.get_output_permissions({}, self.history)
+        assert execution_cache.get_output_permissions({}, self.history) is permissions
+
     def __add_dataset(self, state="ok"):
         hda = model.HistoryDatasetAssociation()
         hda.dataset = model.Dataset()
@@ -134,7 +155,7 @@ class TestDefaultToolAction(TestCase, tools_support.UsesTools):
             session.commit()
         return hda
 
-    def _simple_execute(self, contents=None, incoming=None):
+    def _simple_execute(self, contents=None, incoming=None, execution_cache=None):
         if contents is None:
             contents = tools_support.SIMPLE_TOOL_CONTENTS
         if incoming is None:
@@ -145,6 +166,7 @@ class TestDefaultToolAction(TestCase, tools_support.UsesTools):
             trans=self.trans,
             history=self.history,
             incoming=incoming,
+            execution_cache=execution_cache,
         )
         return job, out_data
 
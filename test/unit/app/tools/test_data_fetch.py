@@ -1,11 +1,15 @@
 import json
 import os
 import tempfile
+import threading
 from contextlib import contextmanager
 from shutil import rmtree
 from tempfile import mkdtemp
 
-from galaxy.tools.data_fetch import main
+from galaxy.tools.data_fetch import (
+    ConcurrentElementsResolver,
+    main,
+)
 from galaxy.util.unittest_utils import skip_if_github_down
 
 
@@ -239,6 +243,75 @@ def test_hdca_failed_expansion():
         assert "Expected bagit.txt does not exist" in output["error_message"]
 
 
+def test_concurrent_list_path_get():
+    with _execute_context() as execute_context:
+        job_directory = execute_context.job_directory
+        elements = []
+        for i in range(8):
+            example_path = os.path.join(job_directory, f"example_file_{i}")
+            with open(example_path, "w") as f:
+                f.write(f"chr1\t{i}\t{i + 100}\n")
+            elements.append({"src": "path", "path": example_path, "name": f"element {i}"})
+        elements.insert(3, {"src": "path", "path": os.path.join(job_directory, "missing"), "name": "missing"})
+        request = {
+            "allow_failed_collections": True,
+            "targets": [
+                {
+                    "destination": {
+                        "type": "hdca",
+                    },
+                    "elements": [{"name": "inner", "elements": elements[:5]}, *elements[5:]],
+                }
+            ],
+        }
+        execute_context.execute_request(request, workers=4)
+        output = _unnamed_output(execute_context)
+        inner = output["elements"][0]
+        assert inner["name"] == "inner"
+        resolved = inner["elements"] + output["elements"][1:]
+        assert "error_message" in resolved[3]
+        expected_names = [element["name"] for element in elements[:3] + elements[4:]]
+        assert [element["name"] for element in resolved[:3] + resolved[4:]] == expected_names
+        for element in resolved[:3] + resolved[4:]:
+            assert "error_message" not in element
+            assert element["ext"] == "bed"
+        # each element ends up in its own file
+        assert len({element["filename"] for element in resolved[:3] + resolved[4:]}) == 8
+
+
+def test_concurrent_elements_resolver():
+    items = [
+        {"name": "a", "download": True},
+        {"name": "b", "elements": [{"name": "c"}, {"name": "d", "download": True, "fail": True}]},
+        {"name": "e"},
+    ]
+    threads = set()
+
+    def download(item):
+        threads.add(threading.current_thread().name)
+        if item.get("fail"):
+            raise Exception(f"Failed to fetch {item['name']}")
+        return dict(item, downloaded=True)
+
+    def resolve(item, download_future=None):
+        threads.add(threading.current_thread().name)
+        if download_future is not None:
+            try:
+                item = download_future.result()
+            except Exception as e:
+                return str(e)
+        return f"{item['name']} downloaded" if item.get("downloaded") else item["name"]
+
+    with ConcurrentElementsResolver(2) as resolver:
+        resolved = resolver.map(resolve, items, lambda item: bool(item.get("download")), download)
+    assert resolved[0] == "a downloaded"
+    assert resolved[1]["name"] == "b"
+    assert resolved[1]["elements"] == ["c", "Failed to fetch d"]
+    assert resolved[2] == "e"
+    assert any(name.startswith("DataFetchDownload") for name in threads)
+    assert any(name.startswith("DataFetchResolve") for name in threads)
+
+
 @contextmanager
 def _execute_context():
     job_directory = mkdtemp()
@@ -268,11 +341,14 @@ class ExecuteContext:
         self.job_directory = directory
         self.galaxy_json_path = os.path.join(directory, "galaxy.json")
 
-    def execute_request(self, request):
+    def execute_request(self, request, workers=None):
         request_path = os.path.join(self.job_directory, "request.json")
         with open(request_path, "w") as f:
             json.dump(request, f)
-        self._execute(["--request", request_path])
+        args = ["--request", request_path]
+        if workers:
+            args.extend(["--workers", str(workers)])
+        self._execute(args)
 
     def _execute(self, args):
         args.extend(["--working-directory", self.job_directory])
@@ -1,3 +1,4 @@
+import json
 import os
 import subprocess
 
@@ -165,6 +166,33 @@ class TestMetadata(TestCase, tools_support.UsesTools):
         self.exec_metadata_command(command)
         # Emulate job stuff here...
 
+    def test_list_discovery_extended_parallel(self):
+        self.app.config.metadata_strategy = "extended"
+        source_file_name = os.path.join(galaxy_directory(), "test/functional/tools/collection_split_on_column.xml")
+        self._init_tool_for_path(source_file_name)
+        collection = model.DatasetCollection(populated=False)
+        collection.collection_type = "list"
+        output_dataset_collection = self._create_output_dataset_collection(
+            collection=collection,
+        )
+        command = self.metadata_command({}, {"split_output": output_dataset_collection}, parallel_metadata=True)
+        os.mkdir(os.path.join(self.tool_working_directory, "outputs"))
+        for i in range(1, 7):
+            self._write_work_dir_file(f"outputs/{i}.tabular", f"{i}\t{i}.5\n{i}\tx\n")
+        self._write_job_files()
+        self.exec_metadata_command(command, env={"GALAXY_SLOTS": "2"})
+        with open(os.path.join(self.job_working_directory, "metadata", "set_metadata_timings.json")) as f:
+            timings = json.load(f)
+        assert [timing["label"] for timing in timings] == [str(i) for i in range(1, 7)]
+        with open(os.path.join(self.job_working_directory, "metadata", "outputs_populated", "datasets_attrs.txt")) as f:
+            datasets_attrs = sorted(json.load(f), key=lambda attrs: attrs["name"])
+        assert [attrs["name"] for attrs in datasets_attrs] == [str(i) for i in range(1, 7)]
+        for attrs in datasets_attrs:
+            assert attrs["metadata"]["column_types"] == ["int", "str"]
+            assert attrs["metadata"]["data_lines"] == 2
+            assert attrs["blurb"] == "2 lines 2 columns"
+            assert attrs["peek"] == f"{attrs['name']}\t{attrs['name']}.5\n{attrs['name']}\tx\n"
+
     def _create_output_dataset_collection(self, **kwd):
         output_dataset_collection = model.HistoryDatasetCollectionAssociation(**kwd)
         self.history.add_dataset_collection(output_dataset_collection)
@@ -204,7 +232,7 @@ class TestMetadata(TestCase, tools_support.UsesTools):
         with open(os.path.join(self.job_working_directory, "tool_stderr"), "w") as f:
             f.write(stderr)
 
-    def metadata_command(self, output_datasets, output_collections=None):
+    def metadata_command(self, output_datasets, output_collections=None, parallel_metadata=False):
         output_collections = output_collections or {}
         metadata_compute_strategy = get_metadata_compute_strategy(self.app.config, self.job.id)
         self.metadata_compute_strategy = metadata_compute_strategy
@@ -234,12 +262,14 @@ class TestMetadata(TestCase, tools_support.UsesTools):
             job=self.job,
             object_store_conf=self.app.object_store.to_dict(),
             max_metadata_value_size=10000,
+            parallel_metadata=parallel_metadata,
         )
         return command
 
-    def exec_metadata_command(self, command):
+    def exec_metadata_command(self, command, env=None):
         with open(self.stdout_path, "wb") as stdout_file, open(self.stderr_path, "wb") as stderr_file:
             _environ = os.environ.copy()
+            _environ.update(env or {})
             _environ["PYTHONPATH"] = os.path.abspath("lib")
             proc = subprocess.Popen(
                 args=command,
@@ -0,0 +1,156 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from galaxy.tool_util.parser import get_tool_source
+from galaxy.tool_util.unittest_utils.sample_data import (
+    SIMPLE_MACRO,
+    SIMPLE_TOOL_WITH_MACRO,
+)
+from galaxy.tools.cache import (
+    encoder,
+    ToolDocumentCache,
+)
+
+
+def _write_tool(directory, filename="tool.xml", tool_version="1.0"):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "external.xml"), "w") as out:
+        out.write(SIMPLE_MACRO.substitute(tool_version=tool_version))
+    path = os.path.join(directory, filename)
+    with open(path, "w") as out:
+        out.write(SIMPLE_TOOL_WITH_MACRO)
+    return path
+
+
+def _cache_tool(cache, path):
+    tool_source = get_tool_source(path)
+    cache.set(path, tool_source)
+    return tool_source
+
+
+def test_get_set(tmp_path):
+    path = _write_tool(str(tmp_path / "tools"))
+    cache = ToolDocumentCache(str(tmp_path / "cache"))
+    assert cache.get(path) is None
+    tool_source = _cache_tool(cache, path)
+    tool_document = cache.get(path)
+    assert tool_document["document"] == tool_source.to_string()
+    assert tool_document["macro_paths"] == tool_source.macro_paths
+
+    # shared with other processes
+    assert ToolDocumentCache(str(tmp_path / "cache")).get(path) == tool_document
+
+
+def test_invalidated_by_content(tmp_path):
+    path = _write_tool(str(tmp_path / "tools"))
+    cache = ToolDocumentCache(str(tmp_path / "cache"))
+    _cache_tool(cache, path)
+    macro_path = os.path.join(str(tmp_path / "tools"), "external.xml")
+    stat = os.stat(macro_path)
+    with open(macro_path, "w") as out:
+        out.write(SIMPLE_MACRO.substitute(tool_version="2.0"))
+    os.utime(macro_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert ToolDocumentCache(str(tmp_path / "cache")).get(path) is None
+
+
+def test_touched_files_hashed(tmp_path, monkeypatch):
+    path = _write_tool(str(tmp_path / "tools"))
+    cache = ToolDocumentCache(str(tmp_path / "cache"))
+    _cache_tool(cache, path)
+    hashed = []
+    monkeypatch.setattr(
+        cache, "_tool_hash", lambda *args: hashed.append(args) or ToolDocumentCache._tool_hash(cache, *args)
+    )
+    assert cache.get(path)
+    assert not hashed
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    # unchanged content, the new modification time is recorded
+    assert cache.get(path)
+    assert cache.get(path)
+    assert len(hashed) == 1
+
+
+def test_documents_shared_and_pruned(tmp_path):
+    path1 = _write_tool(str(tmp_path / "tools1"))
+    path2 = _write_tool(str(tmp_path / "tools2"))
+    cache = ToolDocumentCache(str(tmp_path / "cache"))
+    _cache_tool(cache, path1)
+    _cache_tool(cache, path2)
+    count = "SELECT count(*) FROM tool_document"
+    assert cache._connection.execute(count).fetchone()[0] == 1
+
+    cache.delete(path1)
+    assert cache.get(path1) is None
+    cache.persist()
+    assert cache._connection.execute(count).fetchone()[0] == 1
+
+    shutil.rmtree(str(tmp_path / "tools2"))
+    cache.persist()
+    assert cache._connection.execute(count).fetchone()[0] == 0
+
+
+def test_read_only_cache(tmp_path):
+    path = _write_tool(str(tmp_path / "tools"))
+    cache_dir = str(tmp_path / "cache")
+    cache = ToolDocumentCache(cache_dir)
+    _cache_tool(cache, path)
+    cache.close()
+    os.chmod(cache.cache_file, 0o444)
+    os.chmod(cache_dir, 0o555)
+    try:
+        read_only_cache = ToolDocumentCache(cache_dir)
+        if read_only_cache.cache_file_is_writeable:
+            pytest.skip("file permissions not enforced for this user")
+        assert not read_only_cache.disabled
+        assert read_only_cache.get(path)
+    finally:
+        os.chmod(cache_dir, 0o755)
+
+
+def _write_legacy_cache(cache_dir, path):
+    tool_source = get_tool_source(path)
+    tool_document = {
+        "document": tool_source.to_string(),
+        "macro_paths": tool_source.macro_paths,
+        "paths_and_modtimes": tool_source.paths_and_modtimes(),
+        "tool_cache_version": 0,
+    }
+    os.makedirs(cache_dir)
+    connection = sqlite3.connect(os.path.join(cache_dir, "cache.sqlite"))
+    with connection:
+        connection.execute("CREATE TABLE unnamed (key TEXT PRIMARY KEY, value BLOB)")
+        connection.execute("INSERT INTO unnamed (key, value) VALUES (?, ?)", (path, encoder(tool_document)))
+    connection.close()
+    return tool_source
+
+
+def test_legacy_cache_migrated(tmp_path):
+    path = _write_tool(str(tmp_path / "tools"))
+    cache_dir = str(tmp_path / "cache")
+    tool_source = _write_legacy_cache(cache_dir, path)
+    cache = ToolDocumentCache(cache_dir)
+    assert cache.get(path)["document"] == tool_source.to_string()
+    assert cache._connection.execute("SELECT count(*) FROM tool_document").fetchone()[0] == 1
+    # older releases sharing the cache keep reading the legacy table
+    assert cache._connection.execute("SELECT count(*) FROM unnamed").fetchone()[0] == 1
+    assert cache._connection.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+
+    # a process that found the cache not upgraded yet leaves the upgraded cache alone
+    other_cache = ToolDocumentCache(cache_dir)
+    other_cache._upgrade(other_cache._connection)
+    assert other_cache.get(path)["document"] == tool_source.to_string()
+
+
+def test_read_only_legacy_cache(tmp_path, monkeypatch):
+    path = _write_tool(str(tmp_path / "tools"))
+    cache_dir = str(tmp_path / "cache")
+    tool_source = _write_legacy_cache(cache_dir, path)
+    # e.g. a cache shipped with the tools on CVMFS
+    monkeypatch.setattr(ToolDocumentCache, "cache_file_is_writeable", property(lambda self: False))
+    read_only_cache = ToolDocumentCache(cache_dir)
+    assert not read_only_cache.disabled
+    assert read_only_cache.get(path)["document"] == tool_source.to_string()
@@ -1,4 +1,5 @@
 import logging
+import os
 import time
 
 import pytest
@@ -12,6 +13,10 @@ from galaxy.tool_util.unittest_utils.sample_data import (
     SIMPLE_MACRO,
     SIMPLE_TOOL_WITH_MACRO,
 )
+from galaxy.tools.cache import (
+    ToolCache,
+    ToolDocumentCache,
+)
 
 log = logging.getLogger(__name__)
 
@@ -25,6 +30,30 @@ class TestToolBox(BaseToolBoxTestCase):
         assert toolbox.get_tool("test_tool") is not None
         assert toolbox.get_tool("not_a_test_tool") is None
 
+    def test_load_file_from_toolbox_snapshot(self):
+        self.app.config.enable_toolbox_snapshot = True
+        self.app.config.toolbox_snapshot_file = os.path.join(self.test_directory, "toolbox_snapshot.json.gz")
+        self._init_tool()
+        self._add_config("""<toolbox><tool file="tool.xml" /></toolbox>""")
+
+        assert self.toolbox.get_tool("test_tool") is not None
+        assert os.path.exists(self.app.config.toolbox_snapshot_file)
+        self.app.tool_cache = ToolCache()
+        self._toolbox = None
+        assert self.toolbox.get_tool("test_tool") is not None
+
+    def test_toolbox_snapshot_populates_tool_document_cache(self):
+        self.app.config.enable_toolbox_snapshot = True
+        self.app.config.toolbox_snapshot_file = os.path.join(self.test_directory, "toolbox_snapshot.json.gz")
+        self.app.config.enable_tool_document_cache = True
+        cache_dir = os.path.join(self.test_directory, "tool_cache")
+        self._init_tool()
+        self._add_config(f"""<toolbox tool_cache_data_dir="{cache_dir}"><tool file="tool.xml" /></toolbox>""")
+
+        tool = self.toolbox.get_tool("test_tool")
+        assert tool is not None
+        assert ToolDocumentCache(cache_dir).get(tool.config_file) is not None
+
     def test_record_macros(self):
         self._init_tool()
         self._init_tool(
@@ -1,3 +1,5 @@
+import os
+
 from galaxy.datatypes import sniff
 from galaxy.datatypes.registry import example_datatype_registry_for_sample
 
@@ -114,3 +116,39 @@ def test_sniff_compressed_dynamic_datatypes_default_off():
     assert "fastq" not in sniff.guess_ext(fname, sniff_order)
     fname = sniff.get_test_fname("1.fastqsanger.bz2")
     assert "fastq" not in sniff.guess_ext(fname, sniff_order)
+
+
+def test_sniffer_index_matches_sniff_order():
+    datatypes_registry = example_datatype_registry_for_sample()
+    sniffer_index = datatypes_registry.sniffer_index
+    assert list(sniffer_index) == datatypes_registry.sniff_order
+    test_data_dir = os.path.dirname(sniff.get_test_fname("1.bam"))
+    for fname in sorted(os.listdir(test_data_dir)):
+        path = os.path.join(test_data_dir, fname)
+        if not os.path.isfile(path):
+            continue
+        assert sniff.guess_ext(path, sniffer_index) == sniff.guess_ext(path, datatypes_registry.sniff_order), fname
+    timings = {timing["ext"]: timing for timing in sniffer_index.timings()}
+    assert timings["bam"]["matches"] >= 1
+
+
+def test_sniffer_index_candidates():
+    datatypes_registry = example_datatype_registry_for_sample()
+    sniffer_index = datatypes_registry.sniffer_index
+    candidates = {d.file_ext for d in sniffer_index.candidates(sniff.FilePrefix(sniff.get_test_fname("1.sff")))}
+    assert "sff" in candidates
+    assert "sra" not in candidates
+    assert "fasta" not in candidates
+    candidates = {d.file_ext for d in sniffer_index.candidates(sniff.FilePrefix(sniff.get_test_fname("1.fasta")))}
+    assert "fasta" in candidates
+    assert "sff" not in candidates
+    assert "mtx" not in candidates
+    candidates = {
+        d.file_ext for d in sniffer_index.candidates(sniff.FilePrefix(sniff.get_test_fname("1.fastqsanger.gz")))
+    }
+    assert candidates
+    assert all(getattr(d, "compressed", False) for d in datatypes_registry.sniff_order if d.file_ext in candidates)
+
+    # The index follows changes to the sniff order
+    datatypes_registry.sniff_order.pop()
+    assert datatypes_registry.sniffer_index is not sniffer_index
@@ -1,7 +1,12 @@
+import io
+import sys
 import tempfile
 
+from galaxy.datatypes.sniff import get_test_fname
 from galaxy.datatypes.tabular import (
+    guess_column_type,
     MAX_DATA_LINES,
+    scan_tabular_metadata,
     Tabular,
 )
 from .util import MockDataset
@@ -112,3 +117,47 @@ def test_tabular_column_types_override():
         assert dataset.metadata.columns == 6
         assert dataset.metadata.delimiter == "\t"
         assert not hasattr(dataset.metadata, "column_names")
+
+
+def test_scan_tabular_metadata_chunks():
+    """
+    metadata does not depend on where chunks of the file end
+    - columns typed str are only counted, unless a line adds a column
+    """
+    lines = ["#comment", "a\t1\t2.5", "", "b\t2\t1,2", "c\td\te"] * 20 + ["e\t3\tf\t4", "f\tg"]
+    text = "\n".join(lines)
+    expected = scan_tabular_metadata(io.StringIO(text), chunk_size=len(text) + 1)
+    assert expected.data_lines == 62
+    assert expected.comment_lines == 40
+    assert expected.column_types == ["str", "str", "str", "int"]
+    for chunk_size in (1, 2, 7, 64):
+        assert scan_tabular_metadata(io.StringIO(text), chunk_size=chunk_size) == expected
+
+
+def test_scan_tabular_metadata_max_data_lines():
+    text = "1\t2\n3\tx\n#\n"
+    for chunk_size in (1, 4, 100):
+        # the remaining line is a comment line, but we cannot know without reading it
+        metadata = scan_tabular_metadata(io.StringIO(text), max_data_lines=2, chunk_size=chunk_size)
+        assert metadata.data_lines is None
+        assert metadata.comment_lines is None
+        assert metadata.column_types == ["int", "str"]
+        metadata = scan_tabular_metadata(io.StringIO(text[:-2]), max_data_lines=2, chunk_size=chunk_size)
+        assert metadata.data_lines == 2
+        assert metadata.comment_lines == 0
+
+
+def test_guess_column_type_long_digit_string():
+    # int() rejects digit strings longer than sys.get_int_max_str_digits()
+    max_str_digits = getattr(sys, "get_int_max_str_digits", lambda: 0)()
+    if max_str_digits:
+        assert guess_column_type("1" * (max_str_digits + 1)) == "float"
+        assert guess_column_type("-" + "1" * max_str_digits) == "int"
+    assert guess_column_type("1" * 640) == "int"
+
+
+def test_tabular_set_meta_long_digit_string():
+    dataset = MockDataset(id=1)
+    dataset.set_file_name(get_test_fname("mothur_datatypetest_true.mothur.filter"))
+    Tabular().set_meta(dataset)  # type: ignore [arg-type]
+    assert dataset.metadata.column_types == ["float"]
@@ -0,0 +1,157 @@
+from sqlalchemy import (
+    select,
+    update,
+)
+
+from galaxy import model
+from galaxy.model.base import transaction
+from galaxy.model.collection_summary import (
+    rebuild_all_summaries,
+    update_summaries_for_job_outputs,
+)
+from galaxy.model.unittest_utils import GalaxyDataTestApp
+
+summary_table = model.DatasetCollectionSummary.__table__
+
+
+def _hda(session, history, extension="txt"):
+    return model.HistoryDatasetAssociation(
+        extension=extension, history=history, create_dataset=True, sa_session=session, flush=False
+    )
+
+
+def _setup():
+    """A list:paired with two pairs of datasets."""
+    app = GalaxyDataTestApp()
+    session = app.model.session
+    history = model.History()
+    extensions = ("fastqsanger", "fastqsanger", "fastqsanger", "fastqsanger.gz")
+    hdas = [_hda(session, history, extension) for extension in extensions]
+    outer = model.DatasetCollection(collection_type="list:paired")
+    pairs = []
+    for i, (forward, reverse) in enumerate([hdas[:2], hdas[2:]]):
+        pair = model.DatasetCollection(collection_type="paired")
+        model.DatasetCollectionElement(collection=pair, element=forward, element_identifier="forward", element_index=0)
+        model.DatasetCollectionElement(collection=pair, element=reverse, element_identifier="reverse", element_index=1)
+        model.DatasetCollectionElement(collection=outer, element=pair, element_identifier=f"pair{i}", element_index=i)
+        pairs.append(pair)
+    session.add_all([history, outer, *pairs, *hdas])
+    with transaction(session):
+        session.commit()
+    return app, session, outer, pairs, hdas
+
+
+def _summary(session, collection):
+    stmt = select(summary_table).where(summary_table.c.dataset_collection_id == collection.id)
+    return session.execute(stmt).first()
+
+
+def _commit(session):
+    with transaction(session):
+        session.commit()
+
+
+def test_summaries_of_new_collections():
+    _, session, outer, pairs, _ = _setup()
+    summary = _summary(session, outer)
+    assert summary.element_count == 4
+    assert summary.deleted_count == 0
+    assert summary.populated
+    assert summary.states == {"new": 4}
+    assert summary.extensions == {"fastqsanger": 3, "fastqsanger.gz": 1}
+    summary = _summary(session, pairs[1])
+    assert summary.element_count == 2
+    assert summary.extensions == {"fastqsanger": 1, "fastqsanger.gz": 1}
+
+
+def test_dataset_state_changes():
+    _, session, outer, pairs, hdas = _setup()
+    hdas[0].dataset.state = "ok"
+    hdas[3].state = "error"
+    _commit(session)
+    assert _summary(session, outer).states == {"new": 2, "ok": 1, "error": 1}
+    assert _summary(session, pairs[0]).states == {"new": 1, "ok": 1}
+    assert _summary(session, pairs[1]).states == {"new": 1, "error": 1}
+
+
+def test_extension_and_deleted_changes():
+    _, session, outer, pairs, hdas = _setup()
+    hdas[3].extension = "fastqsanger"
+    hdas[1].deleted = True
+    _commit(session)
+    summary = _summary(session, outer)
+    assert summary.extensions == {"fastqsanger": 4}
+    assert summary.deleted_count == 1
+    assert _summary(session, pairs[0]).deleted_count == 1
+    assert _summary(session, pairs[1]).deleted_count == 0
+
+
+def test_job_output_state_changes():
+    _, session, outer, pairs, hdas = _setup()
+    job = model.Job()
+    session.add(job)
+    _commit(session)
+    for hda in hdas[2:]:
+        hda.dataset.job = job
+    _commit(session)
+    connection = session.connection()
+    update_summaries_for_job_outputs(connection, job.id, "running")
+    session.execute(update(model.Dataset).where(model.Dataset.job_id == job.id).values(state="running"))
+    _commit(session)
+    assert _summary(session, outer).states == {"new": 2, "running": 2}
+    assert _summary(session, pairs[1]).states == {"running": 2}
+
+
+def test_summaries_of_collections_being_populated():
+    app = GalaxyDataTestApp()
+    session = app.model.session
+    history = model.History()
+    collection = model.DatasetCollection(collection_type="list", populated=False)
+    model.DatasetCollectionElement(collection=collection, element=_hda(session, history), element_identifier="a")
+    session.add_all([history, collection])
+    _commit(session)
+    assert _summary(session, collection) is None
+    collection.mark_as_populated()
+    _commit(session)
+    assert _summary(session, collection).element_count == 1
+
+
+def test_nested_collections_being_populated():
+    _, session, outer, pairs, hdas = _setup()
+    pairs[0].populated_state = model.DatasetCollection.populated_states.NEW
+    _commit(session)
+    assert _summary(session, pairs[0]) is None
+    assert not _summary(session, outer).populated
+    outer_id = outer.id
+    session.expunge_all()
+    outer = session.get(model.DatasetCollection, outer_id)
+    assert not outer.populated_optimized
+
+
+def test_collection_properties_use_summary():
+    _, session, outer, _, hdas = _setup()
+    hdas[0].dataset.state = "deferred"
+    hdas[1].deleted = True
+    _commit(session)
+    outer_id = outer.id
+    session.expunge_all()
+    outer = session.get(model.DatasetCollection, outer_id)
+    assert outer.summary is not None
+    assert outer.dataset_states_and_extensions_summary == ({"new", "deferred"}, {"fastqsanger", "fastqsanger.gz"})
+    assert outer.elements_deleted
+    assert outer.has_deferred_data
+    assert outer.populated_optimized
+
+
+def test_rebuild_all_summaries():
+    app, session, outer, pairs, _ = _setup()
+    session.execute(
+        update(summary_table).where(summary_table.c.dataset_collection_id == outer.id).values(states={"ok": 1})
+    )
+    session.execute(summary_table.delete().where(summary_table.c.dataset_collection_id == pairs[0].id))
+    _commit(session)
+    assert rebuild_all_summaries(app.model.engine, only_missing=True) == 1
+    assert _summary(session, pairs[0]).states == {"new": 2}
+    assert _summary(session, outer).states == {"ok": 1}
+    assert rebuild_all_summaries(app.model.engine, batch_size=2) == 3
+    assert _summary(session, outer).states == {"new": 4}
@@ -568,6 +568,41 @@ class TestMappings(BaseModelTestCase):
         assert security_agent.can_manage_dataset(u_from.all_roles(), d1.dataset)
         assert not security_agent.can_manage_dataset(u_other.all_roles(), d1.dataset)
 
+    def test_dataset_permission_resolver(self):
+        security_agent = GalaxyRBACAgent(self.model)
+        u_from, u_to, u_other = self._three_users("dataset_permission_resolver")
+
+        h = model.History(name="History for Resolving Permissions", user=u_from)
+        d_public, d_private, d_shared = (self.new_hda(h, extension="txt") for _ in range(3))
+        self.persist(h, d_public, d_private, d_shared)
+        self._make_private(security_agent, u_from, d_private)
+        self._make_owned(security_agent, u_from, d_shared)
+        security_agent.privately_share_dataset(d_shared.dataset, [u_to])
+        datasets = [d_public.dataset, d_private.dataset, d_shared.dataset]
+        self.model.session.expire_all()
+
+        for user in (u_from, u_to, u_other):
+            roles = user.all_roles()
+            resolver = security_agent.dataset_permission_resolver(roles)
+            resolver.load(dataset.id for dataset in datasets)
+            # permissions of datasets loaded in bulk
+            resolved = [(resolver.can_access(d), resolver.can_manage(d), resolver.is_public(d)) for d in datasets]
+            expected = [
+                (
+                    security_agent.can_access_dataset(roles, d),
+                    security_agent.can_manage_dataset(roles, d),
+                    security_agent.dataset_is_public(d),
+                )
+                for d in datasets
+            ]
+            assert resolved == expected
+            # and of datasets with their actions loaded
+            assert [
+                (resolver.can_access(d), resolver.can_manage(d), resolver.is_public(d)) for d in datasets
+            ] == expected
+            self.model.session.expire_all()
+        assert resolved == [(True, False, True), (False, False, False), (False, False, False)]
+
     def test_cannot_make_private_objectstore_dataset_public(self):
         security_agent = GalaxyRBACAgent(self.model)
         u_from, u_to, _ = self._three_users("cannot_make_private_public")
@@ -0,0 +1,123 @@
+from datetime import (
+    date,
+    datetime,
+    timedelta,
+)
+
+from sqlalchemy import (
+    select,
+    update,
+)
+
+from galaxy import model
+from galaxy.model.base import transaction
+from galaxy.model.job_rollups import (
+    _day_ranges,
+    job_rollups_high_water_mark,
+    reset_job_rollups,
+    update_job_rollups,
+)
+from galaxy.model.unittest_utils import GalaxyDataTestApp
+
+rollup_table = model.JobDailyRollup.__table__
+
+DAY = datetime(2024, 6, 3, 10)
+
+
+def _job(user, tool_id, state, create_time, runtime=60):
+    job = model.Job()
+    job.user = user
+    job.tool_id = tool_id
+    job.state = state
+    job.destination_id = "local"
+    job.create_time = create_time
+    job.update_time = create_time + timedelta(seconds=runtime)
+    return job
+
+
+def _setup():
+    app = GalaxyDataTestApp()
+    session = app.model.session
+    user = model.User(email="alice@example.org", password="password")
+    jobs = [
+        _job(user, "cat1", "ok", DAY),
+        _job(user, "cat1", "ok", DAY + timedelta(hours=1), runtime=30),
+        _job(user, "cat1", "error", DAY + timedelta(hours=2)),
+        _job(None, "upload1", "ok", DAY + timedelta(days=1)),
+        _job(user, "cat1", "ok", DAY + timedelta(days=3)),
+    ]
+    session.add_all([user, *jobs])
+    _commit(session)
+    return app, session, user, jobs
+
+
+def _commit(session):
+    with transaction(session):
+        session.commit()
+
+
+def _rollups(session):
+    stmt = select(rollup_table).order_by(
+        rollup_table.c.day, rollup_table.c.tool_id, rollup_table.c.state, rollup_table.c.user_id
+    )
+    return [
+        (row.day, row.tool_id, row.user_id, row.state, row.job_count, round(row.runtime_seconds))
+        for row in session.execute(stmt)
+    ]
+
+
+def _update(app, up_to):
+    with app.model.engine.begin() as connection:
+        return update_job_rollups(connection, up_to=up_to)
+
+
+def test_initial_update_computes_all_rollups():
+    app, session, user, _ = _setup()
+    assert job_rollups_high_water_mark(session.connection()) is None
+    assert _update(app, DAY + timedelta(days=10)) == 3
+    assert _rollups(session) == [
+        (date(2024, 6, 3), "cat1", user.id, "error", 1, 60),
+        (date(2024, 6, 3), "cat1", user.id, "ok", 2, 90),
+        (date(2024, 6, 4), "upload1", None, "ok", 1, 60),
+        (date(2024, 6, 6), "cat1", user.id, "ok", 1, 60),
+    ]
+    assert job_rollups_high_water_mark(session.connection()) == DAY + timedelta(days=10)
+
+
+def test_update_recomputes_days_of_updated_jobs():
+    app, session, user, jobs = _setup()
+    _update(app, DAY + timedelta(days=10))
+    mark = DAY + timedelta(days=10)
+    session.execute(
+        update(model.Job.__table__)
+        .where(model.Job.__table__.c.id == jobs[2].id)
+        .values(state="ok", update_time=mark + timedelta(hours=1))
+    )
+    session.add(_job(user, "cat1", "running", mark + timedelta(hours=2)))
+    _commit(session)
+    # no jobs were updated in between
+    assert _update(app, mark + timedelta(minutes=30)) == 0
+    assert _update(app, mark + timedelta(days=1)) == 2
+    rollups = _rollups(session)
+    runtime = 90 + (timedelta(days=10) - timedelta(hours=1)).total_seconds()
+    assert (date(2024, 6, 3), "cat1", user.id, "ok", 3, runtime) in rollups
+    assert (date(2024, 6, 3), "cat1", user.id, "error", 1, 60) not in rollups
+    assert (date(2024, 6, 13), "cat1", user.id, "running", 1, 60) in rollups
+    assert len(rollups) == 4
+    assert _update(app, mark) == 0
+
+
+def test_reset_recomputes_all_rollups():
+    app, session, user, _ = _setup()
+    _update(app, DAY + timedelta(days=10))
+    session.execute(rollup_table.delete().where(rollup_table.c.tool_id == "upload1"))
+    _commit(session)
+    with app.model.engine.begin() as connection:
+        reset_job_rollups(connection)
+    assert _update(app, DAY + timedelta(days=11)) == 3
+    assert (date(2024, 6, 4), "upload1", None, "ok", 1, 60) in _rollups(session)
+
+
+def test_day_ranges():
+    days = [date(2024, 6, 3), date(2024, 6, 1), date(2024, 6, 2), date(2024, 6, 6), date(2024, 6, 2)]
+    assert _day_ranges(days) == [(date(2024, 6, 1), date(2024, 6, 3)), (date(2024, 6, 6), date(2024, 6, 6))]
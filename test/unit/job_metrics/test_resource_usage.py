@@ -0,0 +1,51 @@
+import subprocess
+
+from galaxy.job_metrics.instrumenters.resource_usage import ResourceUsagePlugin
+from galaxy.util import listify
+
+SAMPLES = """# source=cgroupv2 interval=10 slots=2
+epoch,memory_bytes,cpu_usec,io_read_bytes,io_write_bytes
+1700000000,1000,5000000,100,0
+1700000010,4000,15000000,300,50
+1700000020,3000,35000000,600,50
+1700000030,2000,55000000
+1700000030,2000,55000000,1000,2050
+"""
+
+
+def test_resource_usage_summary(tmpdir):
+    plugin = ResourceUsagePlugin()
+    tmpdir.join("__instrument_resource_usage_samples").write(SAMPLES)
+    properties = plugin.job_properties(1, tmpdir)
+    assert properties["source"] == "cgroupv2"
+    assert properties["sampling_interval"] == 10
+    # the truncated line is skipped
+    assert properties["samples"] == 4
+    assert properties["sampling_duration"] == 30
+    assert properties["peak_memory_bytes"] == 4000
+    assert properties["mean_memory_bytes"] == 2500
+    assert properties["cpu_time"] == 50
+    assert properties["cpu_percent_p50"] == 200.0
+    assert properties["cpu_percent_max"] == 200.0
+    assert properties["cpu_percent_mean"] == 166.7
+    assert properties["cpu_efficiency_percent"] == 83.3
+    assert properties["io_read_bytes"] == 900
+    assert properties["io_write_bytes"] == 2050
+    assert plugin.formatter.format("peak_memory_bytes", 4000) == ("Peak memory usage", "3.9 KB")
+    assert plugin.formatter.format("cpu_percent_p95", 200.0) == ("95th percentile CPU utilization", "200.0%")
+
+
+def test_resource_usage_missing_samples(tmpdir):
+    assert ResourceUsagePlugin().job_properties(1, tmpdir) == {}
+
+
+def test_resource_usage_instrumentation(tmpdir):
+    plugin = ResourceUsagePlugin(interval=1, source="proc")
+    commands = listify(plugin.pre_execute_instrument(tmpdir)) + ["sleep 2"]
+    commands += listify(plugin.post_execute_instrument(tmpdir))
+    subprocess.run("\n".join(commands), shell=True, cwd=tmpdir, env={"GALAXY_SLOTS": "1"})
+    properties = plugin.job_properties(1, tmpdir)
+    assert properties["source"] == "proc"
+    assert properties["sampling_interval"] == 1
+    assert properties["samples"] >= 2
+    assert properties["peak_memory_bytes"] > 0
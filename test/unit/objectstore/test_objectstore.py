@@ -1,7 +1,9 @@
 import os
 import shutil
+import threading
 import time
 from functools import wraps
+from io import BytesIO
 from tempfile import (
     mkdtemp,
     mkstemp,
@@ -14,15 +16,20 @@ from requests import get
 
 from galaxy.exceptions import ObjectInvalid
 from galaxy.objectstore import persist_extra_files_for_dataset
+from galaxy.objectstore._transfer import TransferPool
 from galaxy.objectstore.azure_blob import AzureBlobObjectStore
 from galaxy.objectstore.caching import (
+    CACHE_INDEX_FILENAME,
+    CacheIndex,
     CacheTarget,
     check_cache,
+    get_cache_index,
     InProcessCacheMonitor,
     reset_cache,
 )
 from galaxy.objectstore.cloud import Cloud
 from galaxy.objectstore.examples import get_example
+from galaxy.objectstore.location_index import ObjectLocationIndex
 from galaxy.objectstore.pithos import PithosObjectStore
 from galaxy.objectstore.s3 import S3ObjectStore
 from galaxy.objectstore.s3_boto3 import S3ObjectStore as Boto3ObjectStore
@@ -302,6 +309,63 @@ def test_hierarchical_store():
             _assert_key_has_value(as_dict, "type", "hierarchical")
 
 
+HIERARCHICAL_LOCATION_INDEX_CONFIG = get_example("hierarchical_location_index.xml")
+HIERARCHICAL_LOCATION_INDEX_CONFIG_YAML = get_example("hierarchical_location_index.yml")
+
+
+def test_hierarchical_store_location_index():
+    for config_str in [HIERARCHICAL_LOCATION_INDEX_CONFIG, HIERARCHICAL_LOCATION_INDEX_CONFIG_YAML]:
+        with TestConfig(config_str) as (directory, object_store):
+            location_index = object_store.location_index
+            assert location_index is not None
+
+            # creation records the primary backend
+            dataset = MockDataset(1)
+            object_store.create(dataset)
+            assert location_index.get("MockDataset:1") == "0"
+
+            # lookups of datasets on a later backend are recorded on first access
+            directory.write("Hello World!", "files2/000/dataset_2.dat")
+            assert object_store.size(MockDataset(2)) == 12
+            assert location_index.get("MockDataset:2") == "1"
+            assert "files2" in object_store.get_filename(MockDataset(2))
+
+            # stale entries heal themselves on the next lookup
+            location_index.set("MockDataset:2", "0")
+            assert object_store.exists(MockDataset(2))
+            assert location_index.get("MockDataset:2") == "1"
+
+            # missing extra files do not evict the dataset's entry
+            assert not object_store.exists(MockDataset(2), extra_dir="dataset_2_files", alt_name="missing.txt")
+            assert location_index.get("MockDataset:2") == "1"
+
+            object_store.delete(MockDataset(2))
+            assert location_index.get("MockDataset:2") is None
+
+            directory.write("", "files2/000/dataset_3.dat")
+            location_index.clear()
+            assert object_store.index_object_locations([MockDataset(1), MockDataset(3), MockDataset(4)]) == 2
+            assert location_index.get("MockDataset:3") == "1"
+            assert location_index.get("MockDataset:4") is None
+
+            # the index is server side only, not passed on to jobs
+            assert "location_index" not in object_store.to_dict()
+
+
+def test_location_index_persistent(tmp_path):
+    path = str(tmp_path / "index.sqlite")
+    index = ObjectLocationIndex(path, cache_size=1)
+    index.set_many([("Dataset:1", "files1"), ("Dataset:2", "files2")])
+    index.set("Dataset:3", "files1")
+    assert len(index) == 3
+    # a fresh index (e.g. another Galaxy process) sees the entries
+    other = ObjectLocationIndex(path)
+    assert other.get("Dataset:1") == "files1"
+    assert other.get("Dataset:2") == "files2"
+    other.remove("Dataset:2")
+    assert ObjectLocationIndex(path).get("Dataset:2") is None
+
+
 def test_concrete_name_without_objectstore_id():
     for config_str in [HIERARCHICAL_TEST_CONFIG, HIERARCHICAL_TEST_CONFIG_YAML]:
         with TestConfig(config_str) as (directory, object_store):
@@ -716,6 +780,8 @@ def test_config_parse_boto3_merged_transfer_options():
             assert transfer_dict["io_chunksize"] == 13
             assert transfer_dict["use_threads"] is False
             assert transfer_dict["max_bandwidth"] == 13
+            assert transfer_dict["max_file_concurrency"] == 3
+            assert object_store.max_file_concurrency == 3
 
             for transfer_type in ["upload", "download"]:
                 transfer_config = object_store._transfer_config(transfer_type)
@@ -926,6 +992,8 @@ def test_config_parse_azure_transfer():
             assert as_dict["max_single_put_size"] == 10
             assert as_dict["max_single_get_size"] == 20
             assert as_dict["max_block_size"] == 3
+            assert as_dict["max_file_concurrency"] == 4
+            assert object_store.max_file_concurrency == 4
 
 
 def test_cache_monitor_thread(tmp_path):
@@ -966,6 +1034,69 @@ def test_check_cache_sanity(tmp_path):
     assert not path.exists()
 
 
+def test_check_indexed_cache(tmp_path):
+    cache_dir = tmp_path
+    cache_target = CacheTarget(str(cache_dir), 1, 0.000000001, indexed=True)
+    cache_index = get_cache_index(cache_target)
+    paths = []
+    for i in range(3):
+        path = cache_dir / "000" / f"dataset_{i}.dat"
+        path.parent.mkdir(exist_ok=True)
+        path.write_text("this is an example file")
+        paths.append(path)
+    # a file the object store never recorded is picked up by reconciliation
+    unrecorded = cache_dir / "unrecorded.dat"
+    unrecorded.write_text("unknown")
+    cache_index.record_access(str(paths[0]))
+    cache_index.record_access(str(paths[1]))
+    cache_index.record_access(str(paths[2]))
+    assert cache_index.total_size() == 3 * len("this is an example file")
+
+    check_cache(cache_target)
+    assert not any(p.exists() for p in paths)
+    assert not unrecorded.exists()
+    assert len(cache_index) == 0
+    assert cache_index.total_size() == 0
+    # the index database itself is never evicted
+    assert (cache_dir / CACHE_INDEX_FILENAME).exists()
+
+
+def test_cache_index_eviction_order(tmp_path):
+    cache_index = CacheIndex(str(tmp_path))
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"dataset_{i}.dat"
+        path.write_text("0123456789")
+        cache_index.record_access(str(path))
+        paths.append(path)
+    # touch the oldest file so it becomes the most recently used
+    cache_index.record_access(str(paths[0]))
+    assert cache_index.total_size() == 40
+    assert cache_index.evict(15) == 20
+    assert paths[0].exists()
+    assert not paths[1].exists()
+    assert not paths[2].exists()
+    assert paths[3].exists()
+    assert cache_index.total_size() == 20
+
+    lfu_index = CacheIndex(str(tmp_path), eviction_policy="lfu")
+    assert lfu_index.evict(1) == 10
+    # dataset_0 was accessed twice so dataset_3 goes first under LFU
+    assert paths[0].exists()
+    assert not paths[3].exists()
+
+    cache_index.record_removal(str(paths[0]))
+    assert cache_index.total_size() == 0
+
+
+def test_indexed_cache_watermarks(tmp_path):
+    cache_target = CacheTarget(str(tmp_path), 1, 0.9, low_limit=0.8, indexed=True)
+    assert cache_target.high_watermark == 0.9 * 1024 * 1024 * 1024
+    assert cache_target.low_watermark == 0.8 * 1024 * 1024 * 1024
+    legacy_target = CacheTarget(str(tmp_path), 1, 0.9)
+    assert legacy_target.low_watermark == legacy_target.high_watermark
+
+
 def test_fits_in_cache_check(tmp_path):
     cache_dir = tmp_path
     big_cache_target = CacheTarget(cache_dir, 1, 0.2)
@@ -976,6 +1107,184 @@ def test_fits_in_cache_check(tmp_path):
     assert noop_cache_target.fits_in_cache(1024 * 1024 * 1024 * 100)
 
 
+class FakeS3Client:
+    """Minimal thread-safe in-memory stand-in for the boto3 client calls used by the object store."""
+
+    def __init__(self):
+        self.objects = {}
+        self.ranges_requested = []
+        self.downloads = []
+        self._lock = threading.Lock()
+        self._active = 0
+        self.max_active = 0
+
+    def _track(self):
+        with self._lock:
+            self._active += 1
+            self.max_active = max(self.max_active, self._active)
+        # simulate request latency so concurrent transfers overlap
+        time.sleep(0.01)
+        with self._lock:
+            self._active -= 1
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            from botocore.exceptions import ClientError
+
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {"ContentLength": len(self.objects[Key])}
+
+    def get_object(self, Bucket, Key, Range):
+        start, end = (int(v) for v in Range[len("bytes=") :].split("-"))
+        self.ranges_requested.append((start, end))
+        return {"Body": BytesIO(self.objects[Key][start : end + 1])}
+
+    def put_object(self, Body, Bucket, Key):
+        self.objects[Key] = Body
+
+    def upload_file(self, Filename, Bucket, Key, Config=None):
+        self._track()
+        with open(Filename, "rb") as f:
+            self.objects[Key] = f.read()
+
+    def download_file(self, Bucket, Key, Filename, Config=None):
+        self._track()
+        with self._lock:
+            self.downloads.append(Key)
+        with open(Filename, "wb") as f:
+            f.write(self.objects[Key])
+
+    def get_paginator(self, operation):
+        client = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix, StartAfter):
+                keys = sorted(k for k in client.objects if k.startswith(Prefix) and k > StartAfter)
+                yield {"Contents": [{"Key": k} for k in keys]}
+
+        return Paginator()
+
+
+@patch_object_stores_to_skip_initialize
+def test_ranged_reads_boto3(tmp_path):
+    with TestConfig(get_example("boto3_simple.yml")) as (_, object_store):
+        object_store.staging_path = str(tmp_path / "cache")
+        object_store.range_block_size = 16
+        client = FakeS3Client()
+        object_store._client = client
+        dataset = MockDataset(5)
+        rel_path = object_store._construct_path(dataset)
+        contents = b"".join(f"line {i}\n".encode() for i in range(20))
+        client.objects[rel_path] = contents
+
+        with object_store.open_data(dataset) as f:
+            f.seek(40)
+            assert f.read(10) == contents[40:50]
+            f.seek(-5, os.SEEK_END)
+            assert f.read() == contents[-5:]
+        # only the blocks read were fetched and nothing was downloaded in full
+        assert client.ranges_requested == [(32, 47), (48, 63), (144, len(contents) - 1)]
+        assert not client.downloads
+        assert not object_store._in_cache(rel_path)
+        partial_path = object_store._get_partial_cache_path(rel_path)
+        assert sorted(os.listdir(partial_path)) == ["2", "3", "9"]
+
+        # cached blocks are reused
+        assert object_store.get_data(dataset, start=34, count=4) == contents[34:38].decode()
+        assert len(client.ranges_requested) == 3
+
+        # pulling the whole object into the cache drops the partial blocks
+        object_store.get_filename(dataset)
+        assert client.downloads == [rel_path]
+        assert not os.path.exists(partial_path)
+        with object_store.open_data(dataset) as f:
+            assert f.read() == contents
+        assert len(client.ranges_requested) == 3
+
+
+@patch_object_stores_to_skip_initialize
+def test_ranged_get_data_multibyte_boto3(tmp_path):
+    with TestConfig(get_example("boto3_simple.yml")) as (_, object_store):
+        object_store.staging_path = str(tmp_path / "cache")
+        object_store.range_block_size = 16
+        client = FakeS3Client()
+        object_store._client = client
+        dataset = MockDataset(7)
+        rel_path = object_store._construct_path(dataset)
+        text = "".join(f"gène {i}: α→β\n" for i in range(10))
+        client.objects[rel_path] = text.encode()
+
+        # count is in characters whether or not the object is cached
+        ranged = object_store.get_data(dataset, start=0, count=20)
+        assert ranged == text[:20]
+        assert not client.downloads
+        object_store.get_filename(dataset)
+        assert object_store.get_data(dataset, start=0, count=20) == ranged
+
+
+@patch_object_stores_to_skip_initialize
+def test_concurrent_extra_files_transfer_boto3(tmp_path):
+    with TestConfig(get_example("boto3_simple.yml")) as (_, object_store):
+        object_store.staging_path = str(tmp_path / "cache")
+        object_store.max_file_concurrency = 4
+        client = FakeS3Client()
+        object_store._client = client
+        dataset = MockDataset(6)
+        object_store.create(dataset)
+
+        extra = tmp_path / "extra"
+        (extra / "sub").mkdir(parents=True)
+        for i in range(12):
+            (extra / "sub" / f"part_{i}.txt").write_text(f"part {i}")
+        persist_extra_files_for_dataset(
+            object_store,
+            str(extra),
+            dataset,  # type: ignore[arg-type,unused-ignore]
+            dataset._extra_files_rel_path,
+        )
+        assert 1 < client.max_active <= 4
+        extra_keys = [k for k in client.objects if dataset._extra_files_rel_path in k]
+        assert len(extra_keys) == 12
+
+        # pull the whole directory back into an empty cache
+        shutil.rmtree(object_store.staging_path)
+        client.max_active = 0
+        extra_path = object_store.get_filename(dataset, dir_only=True, extra_dir=dataset._extra_files_rel_path)
+        assert sorted(client.downloads) == sorted(extra_keys)
+        assert 1 < client.max_active <= 4
+        assert open(os.path.join(extra_path, "sub", "part_7.txt")).read() == "part 7"
+        object_store.shutdown()
+
+
+def test_transfer_pool():
+    pool = TransferPool(3)
+    active = []
+    max_active = []
+    lock = threading.Lock()
+
+    def transfer(i):
+        with lock:
+            active.append(i)
+            max_active.append(len(active))
+        time.sleep(0.01)
+        with lock:
+            active.remove(i)
+        # nested use runs inline instead of waiting on the busy pool
+        return sum(pool.map(lambda j: j, [i, i]))
+
+    assert pool.map(transfer, range(10)) == [2 * i for i in range(10)]
+    assert max(max_active) == 3
+
+    def fail(i):
+        if i == 2:
+            raise ValueError("failed transfer")
+        return i
+
+    with pytest.raises(ValueError):
+        pool.map(fail, range(5))
+    pool.shutdown()
+
+
 AZURE_BLOB_NO_CACHE_TEST_CONFIG = get_example("azure_default_cache.xml")
 AZURE_BLOB_NO_CACHE_TEST_CONFIG_YAML = get_example("azure_default_cache.yml")
 
@@ -60,3 +60,46 @@ def test_to_json(merged_tdt_manager, tmp_path):
     assert not json_path.exists()
     merged_tdt_manager.to_json(json_path)
     assert json_path.exists()
+
+
+def test_get_entries(tdt_manager, tmp_path):
+    table = tdt_manager["testalpha"]
+    assert table.get_entry("value", "data2", "name") == "data2name"
+    assert table.get_entry("value", "data3", "name") is None
+    assert table.get_entry("value", "data2", "missing_column") is None
+    assert table.get_entries("name", "data1name", None) == [
+        {"value": "data1", "name": "data1name", "path": f"{tmp_path}/data1/entry.txt"}
+    ]
+    assert table.get_field("data1")["path"] == f"{tmp_path}/data1/entry.txt"
+    assert table.get_field("data3") is None
+
+    table.add_entry(["data3", "data3name", "path3"])
+    table.add_entry(["data1", "data1name_v2", "path1_v2"])
+    assert table.get_entry("value", "data3", "path") == "path3"
+    assert table.get_entries("value", "data1", "name") == ["data1name", "data1name_v2"]
+    assert table.get_entries("value", "data1", "name", limit=1) == ["data1name"]
+    assert table.get_field("data1")["name"] == "data1name_v2"
+
+    loc1 = tmp_path / "testalpha.loc"
+    loc1.write_text(LOC_ALPHA_CONTENTS_V2)
+    tdt_manager.reload_tables("testalpha")
+    table = tdt_manager["testalpha"]
+    assert table.get_entries("value", "data1", "name") == ["data1name"]
+    assert table.get_entry("value", "data3", "path") == f"{tmp_path}/data3/entry.txt"
+
+
+def test_deduplicate_entries(tdt_manager):
+    table = tdt_manager["testalpha"]
+    rows = table.get_fields()
+    table.data.extend([list(rows[1]), list(rows[0]), list(rows[1])])
+    assert len(table.get_entries("value", "data2", "name")) == 3
+    data = table.data
+    table._deduplicate_data()
+    assert table.data is data
+    assert table.data == rows
+    assert table.get_entries("value", "data2", "name") == ["data2name"]
+
+    table.allow_duplicate_entries = False
+    table.add_entries([rows[0], ["data3", "data3name", "path3"]], allow_duplicates=False)
+    assert len(table.data) == 3
+    assert table.get_entry("value", "data3", "name") == "data3name"
@@ -0,0 +1,86 @@
+import os
+import time
+
+from galaxy.tool_util.toolbox.snapshot import (
+    expand_tool_document,
+    ToolDocumentPreloader,
+)
+
+MACROS = """<macros>
+    <token name="@VERSION@">1.0</token>
+</macros>
+"""
+
+TOOL = """<tool id="{tool_id}" name="Test Tool" version="@VERSION@">
+    <macros>
+        <import>macros.xml</import>
+    </macros>
+    <command>echo hello</command>
+</tool>
+"""
+
+
+def _write_tools(tmp_path, *tool_ids):
+    (tmp_path / "macros.xml").write_text(MACROS)
+    paths = []
+    for tool_id in tool_ids:
+        path = tmp_path / f"{tool_id}.xml"
+        path.write_text(TOOL.format(tool_id=tool_id))
+        paths.append(str(path))
+    return paths
+
+
+def test_expand_tool_document(tmp_path):
+    (path,) = _write_tools(tmp_path, "tool1")
+    _, tool_document = expand_tool_document(path)
+    assert tool_document
+    assert 'version="1.0"' in tool_document["document"]
+    assert tool_document["macro_paths"] == [str(tmp_path / "macros.xml")]
+    assert set(tool_document["paths_and_modtimes"]) == {path, str(tmp_path / "macros.xml")}
+
+
+def test_expand_broken_tool_document(tmp_path):
+    path = tmp_path / "broken.xml"
+    path.write_text("<tool")
+    assert expand_tool_document(str(path)) == (str(path), None)
+
+
+def test_preload_without_snapshot(tmp_path):
+    paths = _write_tools(tmp_path, "tool1", "tool2")
+    preloader = ToolDocumentPreloader()
+    preloader.preload(paths + [str(tmp_path / "missing.xml"), str(tmp_path / "tool.yml")])
+    assert len(preloader) == 2
+    assert preloader.expanded_count == 2
+    assert preloader.pop(paths[0])
+    assert preloader.pop(paths[0]) is None
+
+
+def test_snapshot_reused_until_tool_changes(tmp_path):
+    paths = _write_tools(tmp_path, "tool1", "tool2")
+    snapshot_path = str(tmp_path / "cache" / "snapshot.json.gz")
+    preloader = ToolDocumentPreloader(snapshot_path=snapshot_path)
+    preloader.preload(paths)
+    assert preloader.expanded_count == 2
+    assert os.path.exists(snapshot_path)
+
+    preloader = ToolDocumentPreloader(snapshot_path=snapshot_path)
+    preloader.preload(paths)
+    assert preloader.snapshot_count == 2
+    assert preloader.expanded_count == 0
+
+    modtime = time.time() + 10
+    os.utime(tmp_path / "macros.xml", (modtime, modtime))
+    preloader = ToolDocumentPreloader(snapshot_path=snapshot_path)
+    preloader.preload(paths[:1])
+    assert preloader.snapshot_count == 0
+    assert preloader.expanded_count == 1
+
+
+def test_unreadable_snapshot_ignored(tmp_path):
+    paths = _write_tools(tmp_path, "tool1")
+    snapshot_path = tmp_path / "snapshot.json.gz"
+    snapshot_path.write_text("not a snapshot")
+    preloader = ToolDocumentPreloader(snapshot_path=str(snapshot_path))
+    preloader.preload(paths)
+    assert preloader.expanded_count == 1
+    assert ToolDocumentPreloader(snapshot_path=str(snapshot_path))._read_snapshot()
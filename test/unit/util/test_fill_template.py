@@ -3,7 +3,11 @@ import sys
 import pytest
 from Cheetah.NameMapper import NotFound
 
-from galaxy.util.template import fill_template
+from galaxy.util.template import (
+    compiled_template_cache,
+    CompiledTemplateCache,
+    fill_template,
+)
 
 # In Python 3.12 calling `locals()`` inside a comprehension now includes
 # variables from outside the comprehension, see
@@ -99,3 +103,38 @@ def test_fix_template_two_to_three():
 def test_fix_template_invalid_cheetah():
     template_str = fill_template(INVALID_CHEETAH_SYNTAX, python_template_version="2", retry=1)
     assert template_str == "1 is 1\n"
+
+
+def test_compiled_templates_cached():
+    compiled_template_cache.clear()
+    for a_list in ([1, 2], [3]):
+        fill_template(SIMPLE_TEMPLATE, {"a_list": a_list})
+    assert compiled_template_cache.stats()["misses"] == 1
+    assert compiled_template_cache.stats()["hits"] == 1
+    fill_template(SIMPLE_TEMPLATE, {"a_list": [1]}, python_template_version="2")
+    assert compiled_template_cache.stats()["misses"] == 2
+
+
+def test_compiled_python2_templates_cached():
+    compiled_template_cache.clear()
+    assert fill_template(TWO_TO_THREE_TEMPLATE, python_template_version="2", retry=1) == "a a 1"
+    misses = compiled_template_cache.stats()["misses"]
+    # the template and its futurized version are compiled once
+    assert fill_template(TWO_TO_THREE_TEMPLATE, python_template_version="2", retry=1) == "a a 1"
+    assert compiled_template_cache.stats()["misses"] == misses
+
+
+def test_compiled_template_cache_bounded():
+    cache = CompiledTemplateCache(max_size=2)
+    first = cache.compile("$a")
+    cache.compile("$b")
+    assert cache.compile("$a") is first
+    cache.compile("$c")
+    assert len(cache) == 2
+    # $b was least recently used
+    cache.compile("$b")
+    assert cache.stats() == {"hits": 1, "misses": 4, "size": 2, "max_size": 2}
+    cache.resize(0)
+    assert len(cache) == 0
+    cache.compile("$a")
+    assert len(cache) == 0
@@ -0,0 +1,128 @@
+import threading
+import time
+
+from galaxy import model
+from galaxy.model.base import transaction
+from galaxy.model.unittest_utils import GalaxyDataTestApp
+from galaxy.workflow.scheduling_executor import (
+    invocation_owners,
+    InvocationOwner,
+    WorkflowSchedulingExecutor,
+)
+
+OWNERS = [
+    # user 1 has three invocations, two of them in the same history
+    InvocationOwner(1, history_id=10, user_id=1),
+    InvocationOwner(2, history_id=10, user_id=1),
+    InvocationOwner(3, history_id=11, user_id=1),
+    InvocationOwner(4, history_id=12, user_id=1),
+    InvocationOwner(5, history_id=20, user_id=2),
+    InvocationOwner(6, history_id=30, user_id=3),
+]
+
+
+def test_tasks_take_turns_between_users():
+    executor = WorkflowSchedulingExecutor()
+    try:
+        tasks = executor.tasks(OWNERS)
+        assert [task.invocation_ids for task in tasks] == [[1, 2], [5], [6], [3], [4]]
+    finally:
+        executor.shutdown()
+
+
+def test_tasks_parallelize_histories():
+    executor = WorkflowSchedulingExecutor(serialize_histories=False)
+    try:
+        tasks = executor.tasks(OWNERS)
+        assert [task.invocation_ids for task in tasks] == [[1], [5], [6], [2], [3], [4]]
+    finally:
+        executor.shutdown()
+
+
+def test_schedule_in_order_with_single_worker():
+    executor = WorkflowSchedulingExecutor()
+    scheduled = []
+    try:
+        assert executor.schedule(OWNERS, scheduled.append) == 5
+        assert scheduled == [1, 2, 5, 6, 3, 4]
+        # Users that had their turn last go last
+        scheduled.clear()
+        executor.schedule(OWNERS[:3] + OWNERS[4:], scheduled.append)
+        assert scheduled == [5, 6, 1, 2, 3]
+    finally:
+        executor.shutdown()
+
+
+def test_schedule_concurrently():
+    executor = WorkflowSchedulingExecutor(workers=4)
+    barrier = threading.Barrier(4, timeout=10)
+    try:
+        # Would time out if invocations were not scheduled concurrently
+        assert executor.schedule(OWNERS[2:], lambda invocation_id: barrier.wait()) == 4
+    finally:
+        executor.shutdown()
+
+
+def test_schedule_budget():
+    executor = WorkflowSchedulingExecutor(workers=1)
+    release = threading.Event()
+    scheduled = []
+
+    def schedule_invocation(invocation_id):
+        scheduled.append(invocation_id)
+        if invocation_id == 5:
+            release.wait(10)
+
+    try:
+        # user 2 goes first, as user 1 had a turn before
+        executor.schedule([OWNERS[3]], schedule_invocation)
+        assert executor.schedule(OWNERS[3:5], schedule_invocation, budget=0.1) == 0
+        assert scheduled == [4, 5]
+        # invocation 4 did not start within the budget, 5 is still being scheduled
+        assert executor.in_flight == 1
+        assert [task.invocation_ids for task in executor.tasks(OWNERS[3:5])] == [[4]]
+        release.set()
+        for _ in range(100):
+            if not executor.in_flight:
+                break
+            time.sleep(0.05)
+        assert executor.in_flight == 0
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_schedule_continues_after_exception():
+    executor = WorkflowSchedulingExecutor()
+    scheduled = []
+
+    def schedule_invocation(invocation_id):
+        scheduled.append(invocation_id)
+        raise Exception("problem scheduling invocation")
+
+    try:
+        assert executor.schedule(OWNERS, schedule_invocation) == 5
+        assert scheduled == [1, 2, 5, 6, 3, 4]
+        assert executor.in_flight == 0
+    finally:
+        executor.shutdown()
+
+
+def test_invocation_owners():
+    app = GalaxyDataTestApp()
+    session = app.model.session
+    user = model.User(email="scheduler@example.org", password="password")
+    invocations = []
+    for history in [model.History(user=user), model.History()]:
+        invocation = model.WorkflowInvocation()
+        invocation.workflow = model.Workflow()
+        invocation.history = history
+        invocations.append(invocation)
+    session.add_all(invocations)
+    with transaction(session):
+        session.commit()
+    invocation_ids = [invocations[1].id, invocations[0].id, -1]
+    assert invocation_owners(app.model.engine, invocation_ids) == [
+        InvocationOwner(invocations[1].id, invocations[1].history.id, None),
+        InvocationOwner(invocations[0].id, invocations[0].history.id, user.id),
+    ]
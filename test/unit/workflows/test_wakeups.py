@@ -0,0 +1,75 @@
+from galaxy import model
+from galaxy.model.base import transaction
+from galaxy.model.unittest_utils import GalaxyDataTestApp
+from galaxy.workflow.wakeups import (
+    dataset_wakeup_key,
+    invocation_wakeup_key,
+    InvocationBlockers,
+    InvocationWakeupIndex,
+    job_wakeup_key,
+    WakeupKey,
+)
+
+
+def test_invocation_blockers():
+    blockers = InvocationBlockers()
+    # Nothing to wait for, schedule again right away
+    assert blockers.wakeup_keys is None
+    blockers.record([])
+    assert blockers.wakeup_keys is None
+    blockers.record([WakeupKey("job", 1), WakeupKey("dataset", 2)])
+    blockers.record([WakeupKey("job", 1)])
+    assert blockers.wakeup_keys == {WakeupKey("job", 1), WakeupKey("dataset", 2)}
+    blockers.record(None)
+    assert blockers.wakeup_keys is None
+
+
+def test_wakeup_index():
+    app = GalaxyDataTestApp()
+    session = app.model.session
+    job = model.Job()
+    hda = model.HistoryDatasetAssociation(create_dataset=True, sa_session=session)
+    invocation = model.WorkflowInvocation()
+    invocation.workflow = model.Workflow()
+    invocation.history = model.History()
+    invocation.state = invocation.states.READY
+    session.add_all([job, hda, invocation])
+    with transaction(session):
+        session.commit()
+    engine = app.model.engine
+
+    index = InvocationWakeupIndex(sweep_interval=3600)
+    active_ids = [invocation.id, invocation.id + 1]
+    # Everything is scheduled on the first sweep
+    assert index.invocations_to_schedule(engine, active_ids) == active_ids
+    index.record(invocation.id, frozenset([job_wakeup_key(job), dataset_wakeup_key(hda)]))
+    index.record(invocation.id + 1, None)
+    assert len(index) == 1
+    assert index.invocations_to_schedule(engine, active_ids) == [invocation.id + 1]
+
+    job.state = job.states.RUNNING
+    hda.dataset.state = model.Dataset.states.OK
+    with transaction(session):
+        session.commit()
+    assert index.invocations_to_schedule(engine, active_ids) == active_ids
+    assert len(index) == 0
+
+    index.record(invocation.id, frozenset([job_wakeup_key(job)]))
+    assert index.invocations_to_schedule(engine, active_ids) == [invocation.id + 1]
+    invocation.state = invocation.states.CANCELLING
+    with transaction(session):
+        session.commit()
+    assert invocation_wakeup_key(invocation.id) == WakeupKey("invocation", invocation.id)
+    assert index.invocations_to_schedule(engine, active_ids) == active_ids
+
+    # Invocations that are no longer active are dropped
+    index.record(invocation.id, frozenset([job_wakeup_key(job)]))
+    assert index.invocations_to_schedule(engine, [invocation.id + 1]) == [invocation.id + 1]
+    assert len(index) == 0
+
+
+def test_wakeup_index_sweep():
+    index = InvocationWakeupIndex(sweep_interval=0)
+    index.record(1, frozenset([WakeupKey("job", 1)]))
+    assert len(index) == 0
+    assert index.invocations_to_schedule(None, [1, 2]) == [1, 2]
@@ -1,12 +1,16 @@
 from typing import cast
 
+import pytest
+
 from galaxy import model
 from galaxy.model.base import transaction
 from galaxy.util.unittest import TestCase
+from galaxy.workflow.modules import DelayedWorkflowEvaluation
 from galaxy.workflow.run import (
     ModuleInjector,
     WorkflowProgress,
 )
+from galaxy.workflow.wakeups import WakeupKey
 from .workflow_support import (
     MockApp,
     MockTrans,
@@ -179,10 +183,28 @@ class TestWorkflowProgress(TestCase):
         replacement = progress.replacement_for_input(None, self._step(4), step_dict)
         assert replacement is hda3
 
+    def test_delay_on_collection_waiting_for_population(self):
+        self._setup_workflow(TEST_WORKFLOW_YAML)
+        collection = model.DatasetCollection(collection_type="list", populated=False)
+        hdca = model.HistoryDatasetCollectionAssociation(collection=collection)
+        session = self.app.model.session
+        session.add(hdca)
+        with transaction(session):
+            session.commit()
+
+        progress = self._new_workflow_progress()
+        progress.set_step_outputs(self._invocation_step(2), {"out1": hdca})
+
+        conn = model.WorkflowStepConnection()
+        conn.output_name = "out1"
+        conn.output_step = self._step(2)
+        with pytest.raises(DelayedWorkflowEvaluation) as exc_info:
+            progress.replacement_for_connection(conn)
+        assert exc_info.value.depends_on == [WakeupKey("collection", collection.id)]
+
     # TODO: Replace multiple true HDA with HDCA
     # TODO: Test explicit delay
     # TODO: Test cancel on collection invalid
-    # TODO: Test delay on collection waiting for population
 
     def test_subworkflow_progress(self):
         self._setup_workflow(TEST_SUBWORKFLOW_YAML)